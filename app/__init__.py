@@ -248,6 +248,12 @@ def create_app(config_name='dev'):
     from app.routes.api.sam_conversation_routes import sam_conversation_bp
     flask_instance.register_blueprint(sam_conversation_bp, url_prefix='/api')
     
+    # Coach sync classifier / async planner and pipeline metrics
+    from app.routes.api.coach_routes import coach_bp, coach_debug_bp
+    flask_instance.register_blueprint(coach_bp)
+    if flask_instance.debug:
+        flask_instance.register_blueprint(coach_debug_bp)
+    
     # Bias Monitoring API
     from app.routes.api.bias_monitoring import bias_monitoring_bp
     flask_instance.register_blueprint(bias_monitoring_bp, url_prefix='/')
@@ -350,6 +356,10 @@ def create_app(config_name='dev'):
         return response
     # --- End security headers ---
     
+    # Report shared rate limiter results/overhead on limited routes
+    from app.utils.rate_limiter import add_rate_limit_headers
+    flask_instance.after_request(add_rate_limit_headers)
+    
     @flask_instance.context_processor
     def inject_now():
         return {'now': datetime.utcnow()}
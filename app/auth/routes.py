@@ -21,7 +21,7 @@ from app.extensions import csrf
 
 # Import db from extensions
 from app.extensions import db, oauth
-from app.models import User, Conversation, Message, Feedback, UserProfile, PerformanceMetrics, FeedbackAnalysis
+from app.models import User, Conversation, Message, Feedback, UserProfile, PerformanceMetrics, FeedbackAnalysis, UserMetricsRollup
 from app.auth.security import validate_password, check_rate_limit, record_failed_login, record_successful_login, rate_limit, check_login_attempts
 from app.services.email_service import send_password_reset_email, send_verification_email
 from app.auth.forms import LoginForm, RegistrationForm, ResetPasswordRequestForm, ResetPasswordForm
@@ -534,6 +534,7 @@ def delete_account():
         if user_profile:
             PerformanceMetrics.query.filter_by(user_profile_id=user_profile.id).delete(synchronize_session=False)
             FeedbackAnalysis.query.filter_by(user_profile_id=user_profile.id).delete(synchronize_session=False)
+            UserMetricsRollup.query.filter_by(user_id=user_profile.id).delete(synchronize_session=False)
             db.session.delete(user_profile) # Mark profile for deletion
 
         # Finally, delete the user itself
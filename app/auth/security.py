@@ -13,6 +13,7 @@ from typing import Dict, Tuple, Optional, Any
 from functools import wraps
 from flask import request, session, g, redirect, url_for, flash, abort, current_app
 from datetime import datetime, timedelta
+from app.utils.rate_limiter import get_rate_limiter, rate_limit as shared_rate_limit
 
 # Configure logging
 logging.basicConfig(
@@ -22,11 +23,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger("AuthSecurity")
 
-# Rate limiting storage (in-memory, replace with Redis in production)
-_rate_limit_data = {}
-
-# Login attempt tracking storage
-_login_attempts = {}
+# Rate limits and login lockouts live in the shared limiter
+# (app.utils.rate_limiter), so they hold across workers.
+LOGIN_KEY_PREFIX = "login:"
+LOCKOUT_KEY_PREFIX = "login-lockout:"
 
 def validate_password(password: str) -> Tuple[bool, str]:
     """
@@ -69,34 +69,19 @@ def check_rate_limit(key: str, limit: int = None, window: int = None) -> Tuple[b
     Returns:
         Tuple containing (is_allowed, remaining_attempts, retry_after)
     """
-    global _rate_limit_data
-    
     if limit is None:
         limit = current_app.config.get('RATE_LIMIT', 10)
         
     if window is None:
         window = current_app.config.get('RATE_LIMIT_WINDOW', 60)
     
-    current_time = time.time()
-    
-    # Initialize or clean up old timestamps for this key
-    if key not in _rate_limit_data:
-        _rate_limit_data[key] = []
-    
-    # Remove timestamps older than the window
-    _rate_limit_data[key] = [t for t in _rate_limit_data[key] 
-                            if current_time - t < window]
-    
-    # Check if rate limit is exceeded
-    if len(_rate_limit_data[key]) >= limit:
-        oldest_timestamp = _rate_limit_data[key][0]
-        retry_after = int(window - (current_time - oldest_timestamp))
-        return False, 0, retry_after
-    
-    # Add timestamp and return allowed
-    _rate_limit_data[key].append(current_time)
-    remaining = limit - len(_rate_limit_data[key])
-    return True, remaining, 0
+    result = get_rate_limiter().hit(key, limit, window)
+    return result.allowed, result.remaining, int(result.retry_after + 0.999)
+
+def _login_limits() -> Tuple[int, int]:
+    max_attempts = current_app.config.get('MAX_LOGIN_ATTEMPTS', 5)
+    lockout_time = current_app.config.get('LOCKOUT_TIME', 300)  # 5 minutes
+    return max_attempts, lockout_time
 
 def check_login_attempts(ip_address: str):
     """
@@ -108,56 +93,34 @@ def check_login_attempts(ip_address: str):
     Returns:
         Tuple containing (is_allowed, lockout_time_remaining)
     """
-    global _login_attempts
-    
-    now = time.time()
-    if ip_address in _login_attempts:
-        user_data = _login_attempts[ip_address]
-        
-        # Check if user is in lockout period
-        if user_data['lockout_until'] > now:
-            time_remaining = int(user_data['lockout_until'] - now)
-            return False, time_remaining
-        elif user_data['lockout_until'] > 0:
-            # Reset after lockout period expires
-            user_data['attempts'] = 0
-            user_data['lockout_until'] = 0
-        
-        return True, 0
-    else:
+    max_attempts, lockout_time = _login_limits()
+    # A lockout is a one-slot bucket filled for the whole LOCKOUT_TIME
+    result = get_rate_limiter().peek(LOCKOUT_KEY_PREFIX + ip_address, 1, lockout_time)
+    if result.allowed:
         return True, 0
+    return False, int(result.retry_after + 0.999)
 
 def record_failed_login(ip_address: str):
     """
     Record a failed login attempt and determine if account should be locked.
     
+    MAX_LOGIN_ATTEMPTS failures within LOCKOUT_TIME lock the address out for
+    the full LOCKOUT_TIME; the attempt count starts over afterwards.
+    
     Args:
         ip_address: IP address that failed to log in
         
     Returns:
         Tuple containing (is_locked_out, lockout_time)
     """
-    global _login_attempts
-    
-    now = time.time()
-    if ip_address not in _login_attempts:
-        _login_attempts[ip_address] = {
-            'attempts': 0,
-            'last_attempt': 0,
-            'lockout_until': 0
-        }
-    
-    user_data = _login_attempts[ip_address]
-    
-    # Increment attempt count
-    user_data['attempts'] += 1
-    user_data['last_attempt'] = now
-    
-    # Check if should be locked out
-    max_attempts = current_app.config.get('MAX_LOGIN_ATTEMPTS', 5)
-    lockout_time = current_app.config.get('LOCKOUT_TIME', 300)  # 5 minutes
-    if user_data['attempts'] >= max_attempts:
-        user_data['lockout_until'] = now + lockout_time
+    max_attempts, lockout_time = _login_limits()
+    limiter = get_rate_limiter()
+    key = LOGIN_KEY_PREFIX + ip_address
+    
+    limiter.hit(key, max_attempts, lockout_time)
+    if not limiter.peek(key, max_attempts, lockout_time).allowed:
+        limiter.reset(key)
+        limiter.hit(LOCKOUT_KEY_PREFIX + ip_address, 1, lockout_time)
         logger.warning(f"Account locked due to too many failed attempts: {ip_address}")
         return True, lockout_time
     
@@ -170,10 +133,9 @@ def record_successful_login(ip_address: str):
     Args:
         ip_address: IP address that successfully logged in
     """
-    global _login_attempts
-    
-    if ip_address in _login_attempts:
-        del _login_attempts[ip_address]
+    limiter = get_rate_limiter()
+    limiter.reset(LOGIN_KEY_PREFIX + ip_address)
+    limiter.reset(LOCKOUT_KEY_PREFIX + ip_address)
 
 # The custom CSRF implementation has been removed in favor of the
 # standard Flask-WTF extension, which is more robust and integrated.
@@ -189,21 +151,4 @@ def rate_limit(limit=None, window=None):
         limit: Maximum number of requests allowed in the window
         window: Time window in seconds
     """
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            # Get a unique key for this rate limit
-            key = f"{request.remote_addr}:{request.path}"
-            
-            # Check rate limit
-            allowed, remaining, retry_after = check_rate_limit(key, limit, window)
-            
-            if not allowed:
-                logger.warning(f"Rate limit exceeded for {key}")
-                
-                # Abort with 429 status code, let the global handler deal with it
-                abort(429)
-            
-            return f(*args, **kwargs)
-        return decorated_function
-    return decorator
+    return shared_rate_limit(limit=limit, window=window)
@@ -19,6 +19,7 @@ from app.extensions import db
 # from app.services.openai_service import get_openai_service # Old import
 from app.services.openai_service import openai_service # Corrected import
 from app.services.gpt4o_service import get_gpt4o_service
+from app.services.llm_admission import Priority, llm_priority
 
 # Import models (adjust path if needed based on final structure)
 from app.models import UserProfile, Conversation, Message, Feedback, BuyerPersona, User, TrainingSession
@@ -575,12 +576,13 @@ def generate_ai_response(conversation: Conversation, user_message: Optional[Mess
         logger.info(
             f"Calling Claude API for roleplay response (Conv: {conversation.id}, User: {user_name})"
         )
-        ai_response = gpt4o_svc.generate_roleplay_response(
-            formatted_messages,
-            conversation.persona,
-            sales_info,
-            user_name,
-        )
+        with llm_priority(Priority.LIVE_TURN):
+            ai_response = gpt4o_svc.generate_roleplay_response(
+                formatted_messages,
+                conversation.persona,
+                sales_info,
+                user_name,
+            )
 
         if not ai_response or not ai_response.strip():
             logger.warning(f"Empty response from Claude for conv {conversation.id}. Using fallback.")
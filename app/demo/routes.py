@@ -1,8 +1,8 @@
 from flask import render_template, request, jsonify
 from flask_login import login_required
 from . import demo
+from app.services.persona_pool import get_persona_pool
 import json
-import time
 
 @demo.route('/streaming-demo')
 def streaming_demo():
@@ -34,8 +34,8 @@ def generate_persona():
                 'error': 'Product/service description is required'
             }), 400
         
-        # Simulate persona generation processing time
-        time.sleep(2)
+        # Ready-made bias-free persona from the pool (replaces a simulated 2s wait)
+        framework = get_persona_pool().draw(target_market)
         
         # Generate a realistic persona based on the product/service
         persona = {
@@ -65,6 +65,10 @@ def generate_persona():
             }
         }
         
+        persona['name'] = framework['name']
+        persona['title'] = framework['role']
+        persona['personality'] = ', '.join(framework['personality_traits'])
+        
         # Customize persona based on user's product
         if 'sales training' in product_service.lower():
             persona['pain_points'] = [
@@ -267,30 +267,63 @@ const PostCallReviewPage = () => {
       const wordCount = transcript.trim().split(/\s+/).length;
       const totalMoments = wordCount < 200 ? 1 : wordCount < 500 ? 2 : wordCount < 1000 ? 2 : 2;
       
-      // Load remaining moments in background
-      const loadedMoments = [firstMoment];
+      // Load remaining moments in background - the server analyzes them in
+      // parallel and streams each one as it completes (cached ones first)
+      const loadedMoments: any[] = [firstMoment];
       
-      for (let i = 1; i < totalMoments; i++) {
+      if (totalMoments > 1) {
         try {
-          const momentData = await loadMoment(i, loadedMoments.map((_, idx) => idx));
-          loadedMoments.push(momentData.moment);
+          const response = await fetch(`${API_BASE_URL}/api/feedback/analyze-moments/stream`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ transcript: transcript.trim(), count: totalMoments })
+          });
+          if (!response.ok || !response.body) {
+            throw new Error(`Moment stream failed: ${response.status}`);
+          }
           
-          // Update callMetrics with newly loaded moments
-          setCallMetrics(prev => ({
-            ...prev,
-            detailedMoments: [...loadedMoments],
-            totalExpectedMoments: totalMoments
-          }));
+          const reader = response.body.getReader();
+          const decoder = new TextDecoder();
+          let buffer = '';
           
-          // Update localStorage
-          localStorage.setItem('lastCallMetrics', JSON.stringify({
-            ...summary,
-            detailedMoments: loadedMoments,
-            source: 'ai_analyzed'
-          }));
+          while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            const events = buffer.split('\n\n');
+            buffer = events.pop() || '';
+            
+            for (const rawEvent of events) {
+              const eventName = rawEvent.match(/^event: (.*)$/m)?.[1];
+              const payload = rawEvent.match(/^data: (.*)$/m)?.[1];
+              if (eventName === 'error' && payload) {
+                console.error('Failed to load moment:', JSON.parse(payload));
+              }
+              if (eventName !== 'moment' || !payload) continue;
+              
+              const momentData = JSON.parse(payload);
+              if (momentData.momentIndex === 0) continue; // Already shown
+              loadedMoments[momentData.momentIndex] = momentData.moment;
+              const orderedMoments = loadedMoments.filter(Boolean);
+              
+              // Update callMetrics with newly loaded moments
+              setCallMetrics(prev => ({
+                ...prev,
+                detailedMoments: orderedMoments,
+                totalExpectedMoments: totalMoments
+              }));
+              
+              // Update localStorage
+              localStorage.setItem('lastCallMetrics', JSON.stringify({
+                ...summary,
+                detailedMoments: orderedMoments,
+                source: 'ai_analyzed'
+              }));
+            }
+          }
         } catch (e) {
-          console.error(`Failed to load moment ${i}:`, e);
-          break;
+          console.error('Failed to load remaining moments:', e);
         }
       }
       
@@ -12,11 +12,12 @@ from app.extensions import db
 from .user import User, UserProfile
 from .conversation import Conversation, Message
 from .persona import BuyerPersona
-from .training import TrainingSession, PerformanceMetrics, SessionMetrics
+from .training import TrainingSession, PerformanceMetrics, SessionMetrics, UserMetricsRollup
 from .feedback import Feedback, FeedbackAnalysis, SessionFeedback
 from .utility import FeatureVote, SalesStage, NameUsageTracker, EmailSignup
 from .business import BusinessProfile, BusinessDocument
 from .call_recording import CallRecording, CallTurn
+from .telemetry import ClientTelemetryEvent
 
 # --- Define Relationships that cross modules ---
 
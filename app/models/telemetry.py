@@ -0,0 +1,32 @@
+"""
+Client telemetry model for the Sales Training AI application.
+"""
+from datetime import datetime
+from app.extensions import db
+
+class ClientTelemetryEvent(db.Model):
+    """
+    Append-only record of client call metrics, websocket and transcript
+    events. Written in batches by app.services.telemetry_ingest, which
+    also deletes rows older than TELEMETRY_RETENTION_DAYS (by received_at).
+    """
+    __tablename__ = 'client_telemetry_events'
+    __table_args__ = (
+        # Per-session aggregates (latency percentiles, reconnect counts)
+        db.Index('ix_client_telemetry_session_kind', 'session_id', 'kind'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    received_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'call_metrics', 'call_event', 'websocket', 'transcript'
+    session_id = db.Column(db.String(100), nullable=True)
+    event = db.Column(db.String(50), nullable=True)  # e.g. CALL_STARTING, SENT, RECEIVED, user
+    user_id = db.Column(db.Integer, nullable=True)
+    persona = db.Column(db.String(100), nullable=True)
+    client_timestamp = db.Column(db.String(40), nullable=True)  # As reported by the browser
+    latency_ms = db.Column(db.Float, nullable=True)
+    reconnect_attempts = db.Column(db.Integer, nullable=True)
+    payload = db.Column(db.Text, nullable=True)  # Compact JSON of the remaining fields
+    
+    def __repr__(self):
+        return f'<ClientTelemetryEvent {self.kind} {self.session_id}>'
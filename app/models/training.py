@@ -9,6 +9,10 @@ class TrainingSession(db.Model):
     """Model for training sessions data."""
     
     __tablename__ = 'training_sessions'
+    __table_args__ = (
+        # Dashboard aggregates: per-user, completed-only, newest first
+        db.Index('ix_training_sessions_profile_status_start', 'user_profile_id', 'status', 'start_time'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user_profiles.id'))
@@ -201,4 +205,37 @@ class SessionMetrics(db.Model):
 
     def to_dict(self):
         """Convert model instance to a dictionary."""
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns} 
\ No newline at end of file
+        return {c.name: getattr(self, c.name) for c in self.__table__.columns} 
+
+class UserMetricsRollup(db.Model):
+    """
+    Per-user dashboard aggregates, maintained incrementally.
+
+    Updated in the same transaction that ends a session or stores its
+    performance metrics (see app.services.user_metrics_rollup), and
+    rebuildable from scratch with scripts/database/backfill_user_metrics.py.
+    """
+    __tablename__ = 'user_metrics_rollups'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user_profiles.id'), primary_key=True, autoincrement=False)
+    
+    # Session totals (completed sessions)
+    sessions_count = db.Column(db.Integer, nullable=False, default=0)
+    total_duration_seconds = db.Column(db.Float, nullable=False, default=0.0)
+    user_message_count = db.Column(db.Integer, nullable=False, default=0)
+    ai_message_count = db.Column(db.Integer, nullable=False, default=0)
+    last_session_at = db.Column(db.DateTime, nullable=True)
+    
+    # Rolling skill averages (0-100, exponential moving average over scored sessions)
+    scored_sessions = db.Column(db.Integer, nullable=False, default=0)
+    rapport_avg = db.Column(db.Float, nullable=True)
+    discovery_avg = db.Column(db.Float, nullable=True)
+    presentation_avg = db.Column(db.Float, nullable=True)
+    objection_handling_avg = db.Column(db.Float, nullable=True)
+    closing_avg = db.Column(db.Float, nullable=True)
+    overall_avg = db.Column(db.Float, nullable=True)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<UserMetricsRollup user={self.user_id} sessions={self.sessions_count}>'
@@ -10,6 +10,7 @@ import logging
 import json
 from datetime import datetime, timedelta
 from app.models import db, User, TrainingSession, Message
+from app.services.user_metrics_rollup import SKILL_FIELDS, get_user_rollup
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -29,8 +30,8 @@ def dashboard_data():
         # Get recent training sessions
         recent_sessions = get_recent_sessions(current_user.id, limit=5)
         
-        # Get metrics
-        metrics = get_user_metrics(current_user.id)
+        # Get metrics (rollups are keyed by the training profile)
+        metrics = get_user_metrics(_current_profile_id())
         
         return jsonify({
             'user': user_data,
@@ -62,7 +63,7 @@ def user_profile():
 def user_metrics():
     """Return user performance metrics"""
     try:
-        metrics = get_user_metrics(current_user.id)
+        metrics = get_user_metrics(_current_profile_id())
         return jsonify(metrics)
     except Exception as e:
         logger.error(f"Error in user metrics API: {str(e)}")
@@ -244,37 +245,34 @@ def get_session_details(session_id):
         }
     }
 
-def get_user_metrics(user_id):
-    """Calculate user performance metrics"""
-    # This is a placeholder implementation
-    # In a real implementation, you would calculate these metrics from actual user data
-    
-    # Count sessions in the last 30 days
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_sessions = TrainingSession.query.filter_by(user_id=user_id).filter(
-        TrainingSession.start_time >= thirty_days_ago
-    ).count()
-    
-    # Calculate total training time
-    sessions = TrainingSession.query.filter_by(user_id=user_id).all()
-    total_duration = sum(
-        (session.end_time - session.start_time).total_seconds() 
-        for session in sessions 
-        if hasattr(session, 'end_time') and session.end_time
-    )
+def _current_profile_id():
+    """UserProfile id of the logged-in user, or None if they have no profile yet"""
+    profile = getattr(current_user, 'profile', None)
+    return profile.id if profile else None
+
+def get_user_metrics(profile_id):
+    """User performance metrics from the per-user rollup row (keyed by UserProfile.id)"""
+    if profile_id is None:
+        return {
+            'sessions_count': 0,
+            'training_time_hours': 0.0,
+            'message_count': 0,
+            'overall_score': 0,
+            'skills': {skill: 0 for skill in SKILL_FIELDS},
+            'last_session_at': None
+        }
+    rollup = get_user_rollup(profile_id)
     
-    # For now, return placeholder metrics
     return {
-        'sessions_count': recent_sessions,
-        'training_time_hours': round(total_duration / 3600, 1),
-        'overall_score': 72,  # Placeholder
+        'sessions_count': rollup.sessions_count,
+        'training_time_hours': round(rollup.total_duration_seconds / 3600, 1),
+        'message_count': rollup.user_message_count + rollup.ai_message_count,
+        'overall_score': round(rollup.overall_avg) if rollup.overall_avg is not None else 0,
         'skills': {
-            'rapport': 78,
-            'discovery': 65,
-            'presentation': 80,
-            'objection_handling': 60,
-            'closing': 55
-        }
+            skill: round(getattr(rollup, column)) if getattr(rollup, column) is not None else 0
+            for skill, (column, _) in SKILL_FIELDS.items()
+        },
+        'last_session_at': rollup.last_session_at.isoformat() if rollup.last_session_at else None
     }
 
 def generate_skills_insights(user_id):
@@ -150,8 +150,7 @@ def reset_bias_tracking():
     """
     try:
         # Clear tracking data
-        ComprehensiveBiasPrevention._generation_history.clear()
-        ComprehensiveBiasPrevention._usage_tracker.clear()
+        ComprehensiveBiasPrevention.reset_history()
         
         logger.info("Bias tracking data reset")
         
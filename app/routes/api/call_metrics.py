@@ -1,9 +1,16 @@
 from flask import Blueprint, request, jsonify
-from flask_login import current_user
-import json
-from datetime import datetime
+from flask_login import current_user, login_required
 from app.utils.logger import get_smart_logger
 from app.extensions import csrf  # Import the csrf object
+from app.utils.rate_limiter import rate_limit, user_or_ip
+from app.services.telemetry_ingest import (
+    RATE_LIMIT as TELEMETRY_RATE_LIMIT,
+    RATE_LIMIT_WINDOW as TELEMETRY_RATE_WINDOW,
+    TelemetryValidationError,
+    call_metrics_rows,
+    get_telemetry_ingestor,
+    session_summary
+)
 
 logger = get_smart_logger(__name__)
 
@@ -13,38 +20,34 @@ call_metrics_bp = Blueprint('call_metrics', __name__)
 csrf.exempt(call_metrics_bp)
 
 @call_metrics_bp.route('/call-metrics', methods=['POST'])
+@rate_limit(limit=TELEMETRY_RATE_LIMIT, window=TELEMETRY_RATE_WINDOW, key_func=user_or_ip, scope='telemetry')
 def log_call_metrics():
-    """Log call metrics from the frontend"""
+    """Record call metrics from the frontend (queued, written in batches)"""
     try:
-        # Get data from the request
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
+        user_id = current_user.id if current_user.is_authenticated else None
+        rows = call_metrics_rows(request.get_json(silent=True), user_id)
+        get_telemetry_ingestor().enqueue(rows)
         
-        # Extract metrics and events
-        metrics = data.get('metrics', {})
-        events = data.get('events', [])
+        logger.debug(f"📊 CALL METRICS [{rows[0]['session_id']}] {rows[0]['event'] or 'metrics'}, "
+                     f"{len(rows) - 1} events, user={user_id}")
         
-        # Log who is sending the metrics if authenticated
-        user_info = f"User ID: {current_user.id}" if current_user.is_authenticated else "Unauthenticated user"
-        
-        # Log the key metrics
-        session_id = metrics.get('sessionId', 'unknown')
-        persona = metrics.get('personaName', 'unknown')
-        duration = metrics.get('duration', 0)
-        
-        logger.info(f"📊 CALL METRICS [{session_id}] Received from {user_info}")
-        logger.info(f"📊 CALL METRICS [{session_id}] Persona: {persona}, Duration: {duration/1000:.1f}s")
-        logger.info(f"📊 CALL METRICS [{session_id}] Details: {json.dumps(metrics, indent=2)}")
-        
-        # Log some key events if needed
-        if len(events) > 0:
-            logger.info(f"📊 CALL METRICS [{session_id}] Received {len(events)} events")
-        
-        # In the future, you could store these metrics in a database
-        
-        return jsonify({'status': 'logged'}), 200
+        return jsonify({'status': 'queued', 'rows': len(rows)}), 202
         
+    except TelemetryValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error logging call metrics: {str(e)}")
         return jsonify({'error': 'Failed to log metrics'}), 500
+
+@call_metrics_bp.route('/call-metrics/<session_id>/summary', methods=['GET'])
+@login_required
+def get_call_metrics_summary(session_id):
+    """Latency percentiles, reconnects and event counts for one call session"""
+    try:
+        summary = session_summary(session_id, current_user.id)
+        if summary is None:
+            return jsonify({'error': 'Session not found'}), 404
+        return jsonify(summary)
+    except Exception as e:
+        logger.error(f"Error summarizing call metrics for {session_id}: {str(e)}")
+        return jsonify({'error': 'Failed to summarize metrics'}), 500
@@ -3,11 +3,13 @@
 import os
 import json
 import logging
+import subprocess
 from datetime import datetime
 from flask import Blueprint, request, jsonify, current_app, send_from_directory
 from werkzeug.utils import secure_filename
 from app.extensions import db
-from app.models import CallRecording
+from app.models import CallRecording, CallTurn
+from app.services.voice_activity_detector import VADConfig, trim_silence, decode_to_pcm16k
 from app import api_manager
 from flask import g
 
@@ -33,6 +35,47 @@ def save_turn_audio(session_id: str, turn_id: str, audio_file):
     return file_path
 
 
+def trim_turn_audio(file_path: str):
+    """
+    Run VAD over a saved turn and cut leading/trailing silence in place.
+    Returns the VAD summary for the turn metrics, or None if the audio
+    could not be decoded.
+    """
+    with open(file_path, 'rb') as f:
+        pcm = decode_to_pcm16k(f.read())
+    if pcm is None:
+        return None
+    
+    vad = trim_silence(pcm)
+    stats = vad.to_dict()
+    if not vad.has_speech:
+        return stats
+    
+    pad_ms = VADConfig.pad_ms
+    start_ms = max(0, vad.segments[0]['start_ms'] - pad_ms)
+    end_ms = min(vad.original_ms, vad.segments[-1]['end_ms'] + pad_ms)
+    if start_ms == 0 and end_ms >= vad.original_ms:
+        return stats
+    
+    # Stream copy: no re-encode, just drop the silent head and tail
+    trimmed_path = f"{file_path}.trim.webm"
+    cmd = [
+        'ffmpeg', '-i', file_path,
+        '-ss', f"{start_ms / 1000:.3f}", '-to', f"{end_ms / 1000:.3f}",
+        '-c', 'copy', '-y', trimmed_path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode == 0:
+        os.replace(trimmed_path, file_path)
+        stats['stored_start_ms'] = start_ms
+        stats['stored_end_ms'] = end_ms
+    else:
+        logger.warning(f"Turn audio trim failed for {file_path}: {result.stderr[-200:]}")
+        if os.path.exists(trimmed_path):
+            os.unlink(trimmed_path)
+    return stats
+
+
 @call_bp.route('/api/calls/timeline', methods=['POST'])
 def upload_timeline():
     """
@@ -85,11 +128,15 @@ def upload_timeline():
                 continue
             
             audio_path = None
+            turn_metrics = turn.get('metrics')
             file_key = f"audio_{turn_id}"
             if file_key in request.files:
                 audio_file = request.files[file_key]
                 if audio_file.filename != '':
                     audio_path = save_turn_audio(session_id, turn_id, audio_file)
+                    vad_stats = trim_turn_audio(audio_path)
+                    if vad_stats:
+                        turn_metrics = dict(turn_metrics or {}, vad=vad_stats)
             
             # Check if turn already exists
             existing_turn = CallTurn.query.filter_by(
@@ -102,7 +149,7 @@ def upload_timeline():
                 existing_turn.text = turn.get('text', '')
                 existing_turn.start_ms = turn.get('start_ms')
                 existing_turn.end_ms = turn.get('end_ms')
-                existing_turn.metrics = json.dumps(turn.get('metrics') or {}) if turn.get('metrics') else None
+                existing_turn.metrics = json.dumps(turn_metrics) if turn_metrics else None
                 existing_turn.word_timestamps = json.dumps(turn.get('word_timestamps') or []) if turn.get('word_timestamps') else None
                 if audio_path:
                     existing_turn.audio_path = audio_path
@@ -116,7 +163,7 @@ def upload_timeline():
                     audio_path=audio_path,
                     start_ms=turn.get('start_ms'),
                     end_ms=turn.get('end_ms'),
-                    metrics=json.dumps(turn.get('metrics') or {}) if turn.get('metrics') else None,
+                    metrics=json.dumps(turn_metrics) if turn_metrics else None,
                     word_timestamps=json.dumps(turn.get('word_timestamps') or []) if turn.get('word_timestamps') else None
                 )
                 db.session.add(new_turn)
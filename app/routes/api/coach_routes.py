@@ -4,21 +4,46 @@ Coach API Routes - Sync Classifier + Async Planner
 Two endpoints:
 1. /sync-classify - Fast reflex flags (called every turn)
 2. /async-plan - Strategic planning (called during user speech)
+
+Both need a logged-in user. The pipeline stats and /metrics are for the
+admin (ADMIN_EMAIL) only; /state is on coach_debug_bp, which the app
+registers in debug mode only.
 """
-from flask import Blueprint, request, jsonify
+from functools import wraps
+from flask import Blueprint, request, jsonify, Response, current_app
+from flask_login import current_user, login_required
 from app.services.coach_sync_classifier import get_sync_classifier
-from app.services.coach_async_planner import get_async_planner
-from app.services.session_state import get_session_state, CallPhase
+from app.services.coach_metrics import get_metrics, CoachMetrics
+from app.services.coach_plan_scheduler import get_plan_scheduler
+from app.services.llm_admission import get_admission_controller
+from app.services.llm_retry import get_retry_stats
+from app.services.llm_router import get_llm_router
+from app.services.session_state import get_session_state
 from app.extensions import csrf
+from app.utils.redis_client import RedisError, get_shared_client
 import logging
 
 logger = logging.getLogger(__name__)
 
 coach_bp = Blueprint('coach', __name__, url_prefix='/api/coach')
+coach_debug_bp = Blueprint('coach_debug', __name__, url_prefix='/api/coach')
+
+
+def admin_required(view):
+    """login_required, and the user must be the configured ADMIN_EMAIL"""
+    @wraps(view)
+    @login_required
+    def wrapped(*args, **kwargs):
+        admin_email = current_app.config.get('ADMIN_EMAIL')
+        if not admin_email or getattr(current_user, 'email', None) != admin_email:
+            return jsonify({'error': 'Admin access required'}), 403
+        return view(*args, **kwargs)
+    return wrapped
 
 
 @coach_bp.route('/sync-classify', methods=['POST'])
 @csrf.exempt
+@login_required
 def sync_classify():
     """
     Fast sync classification for reflex flags.
@@ -36,7 +61,8 @@ def sync_classify():
         
         # Run sync classifier (no LLM, pattern matching only)
         classifier = get_sync_classifier()
-        reflexes = classifier.classify(user_message, current_phase)
+        with get_metrics().time_stage('sync_classify'):
+            reflexes = classifier.classify(user_message, current_phase)
         
         # Apply reflexes to session state
         session_state.apply_sync_reflexes({
@@ -64,6 +90,7 @@ def sync_classify():
 
 @coach_bp.route('/async-plan', methods=['POST'])
 @csrf.exempt
+@login_required
 def async_plan():
     """
     Async strategic planning.
@@ -88,57 +115,21 @@ def async_plan():
         if session_state.pressure_level:
             pressure_level = session_state.pressure_level.value
         
-        # Run async planner (uses LLM, can take time)
-        planner = get_async_planner()
-        plan = planner.plan(
-            transcript_history=transcript_history,
-            persona=persona,
-            current_phase=current_phase,
-            current_turn=current_turn,
-            current_facts=current_facts,
-            pressure_level=pressure_level
-        )
-        
-        # Apply plan to session state (for FUTURE turns)
-        
-        # Try phase transition if suggested
-        if plan.suggested_phase:
-            try:
-                target_phase = CallPhase(plan.suggested_phase)
-                transitioned = session_state.try_transition_phase(
-                    target_phase,
-                    confidence=plan.phase_confidence,
-                    min_confidence=0.7
-                )
-                logger.info(f"[Coach] Phase transition attempt: {plan.suggested_phase} -> {transitioned}")
-            except ValueError:
-                logger.warning(f"[Coach] Invalid phase: {plan.suggested_phase}")
-        
-        # Set pending trap
-        if plan.pending_trap:
-            session_state.pending_trap = plan.pending_trap
-        
-        # Adjust pressure
-        if plan.pressure_adjustment != 0:
-            current = pressure_level
-            new_pressure = max(0.0, min(1.0, current + plan.pressure_adjustment))
-            session_state.pressure_level = type(session_state.pressure_level)(
-                value=new_pressure,
-                ttl_turns=4,
-                set_at_turn=current_turn
-            ) if session_state.pressure_level else None
-        
-        # Add detected facts
-        for key, value in plan.facts_detected.items():
-            session_state.add_fact(key, value)
-        
-        # Set objection if suggested
-        if plan.objection_to_introduce:
-            session_state.active_objection = type(session_state.active_objection)(
-                value=plan.objection_to_introduce,
-                ttl_turns=3,
-                set_at_turn=current_turn
-            ) if session_state.active_objection else None
+        # Run async planner (uses LLM, can take time). The scheduler keeps one
+        # plan in flight per session; if a newer turn arrives while this one is
+        # queued we get the newer plan, and plans finishing after the session
+        # moved on are not applied to state.
+        with get_metrics().time_stage('async_plan'):
+            outcome = get_plan_scheduler().plan(
+                session_id,
+                current_turn,
+                transcript_history=transcript_history,
+                persona=persona,
+                current_phase=current_phase,
+                current_facts=current_facts,
+                pressure_level=pressure_level
+            )
+        plan = outcome.plan
         
         return jsonify({
             'success': True,
@@ -151,6 +142,8 @@ def async_plan():
                 'reasoning': plan.reasoning,
                 'facts_detected': plan.facts_detected
             },
+            'plan_turn': outcome.base_turn,
+            'plan_applied': outcome.applied,
             'current_state': {
                 'phase': session_state.get_current_phase(),
                 'phase_duration': session_state.get_phase_duration(),
@@ -163,7 +156,60 @@ def async_plan():
         return jsonify({'error': str(e)}), 500
 
 
-@coach_bp.route('/state', methods=['GET'])
+@coach_bp.route('/plan-stats', methods=['GET'])
+@admin_required
+def get_plan_stats():
+    """Async planner scheduling counters (coalesced, superseded, applied, stale)"""
+    return jsonify(get_plan_scheduler().get_stats())
+
+
+@coach_bp.route('/llm-admission', methods=['GET'])
+@admin_required
+def get_llm_admission_stats():
+    """LLM admission counters and queue-time percentiles per priority class"""
+    return jsonify(get_admission_controller().get_stats())
+
+
+@coach_bp.route('/llm-retries', methods=['GET'])
+@admin_required
+def get_llm_retry_stats():
+    """Attempts per call and give-up reasons for each provider retry policy"""
+    return jsonify(get_retry_stats())
+
+
+@coach_bp.route('/llm-providers', methods=['GET'])
+@admin_required
+def get_llm_provider_stats():
+    """Circuit breaker state, rolling p95 and failover/hedge counters per provider"""
+    return jsonify(get_llm_router().get_stats())
+
+
+@coach_bp.route('/metrics', methods=['GET'])
+@admin_required
+def export_metrics():
+    """
+    Stage latency percentiles and event counters.
+    Prometheus text by default, ?format=json for JSON. With a shared store
+    configured, covers every worker that has published a snapshot.
+    """
+    metrics = get_metrics()
+    snapshot = metrics.snapshot()
+    
+    client = get_shared_client()
+    if client is not None:
+        try:
+            metrics.publish(client)
+            snapshot = CoachMetrics.collect(client) or snapshot
+        except RedisError as e:
+            logger.warning(f"[Coach] Shared metrics unavailable, exporting this worker only: {e}")
+    
+    if request.args.get('format') == 'json':
+        return jsonify(snapshot.to_json())
+    return Response(snapshot.to_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+@coach_debug_bp.route('/state', methods=['GET'])
+@login_required
 def get_state():
     """Get current session state (for debugging)"""
     try:
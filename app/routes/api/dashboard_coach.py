@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 import os
 import openai
 from app.utils.auth import require_auth
+from app.services.llm_admission import llm_admission
 from app.utils.logger import get_logger
 
 dashboard_coach_bp = Blueprint('dashboard_coach', __name__)
@@ -85,15 +86,16 @@ Your response:
 """
                 
                 # Use the OpenAI API to generate a response
-                response = openai.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a helpful sales coach assistant."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=250
-                )
+                with llm_admission():
+                    response = openai.chat.completions.create(
+                        model="gpt-3.5-turbo",
+                        messages=[
+                            {"role": "system", "content": "You are a helpful sales coach assistant."},
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=0.7,
+                        max_tokens=250
+                    )
                 
                 # Extract the content from response
                 ai_response = response.choices[0].message.content.strip()
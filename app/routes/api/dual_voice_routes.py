@@ -10,7 +10,7 @@ from flask_login import login_required, current_user
 import logging
 import json
 from app.services.dual_voice_agent_service import get_dual_voice_service
-from app.models import UserProfile, db
+from app.models import UserProfile, BuyerPersona, db
 from app.services.demographic_names import DemographicNameService
 from app.services.comprehensive_bias_prevention import ComprehensiveBiasPrevention
 
@@ -143,6 +143,28 @@ def end_dual_voice_session(session_id):
             'error': 'Failed to end dual voice session'
         }), 500
 
+@dual_voice_bp.route('/session/<session_id>/feedback', methods=['GET'])
+@login_required
+def get_session_feedback(session_id):
+    """Poll for the feedback generated after a session ends (202 while pending)"""
+    try:
+        result = get_dual_voice_service().get_session_feedback(session_id)
+        
+        if not result.get('success'):
+            return jsonify(result), 404
+        
+        if result['feedback_status'] == 'pending':
+            return jsonify(result), 202
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        logger.error(f"Error getting feedback for session {session_id}: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Failed to get session feedback'
+        }), 500
+
 @dual_voice_bp.route('/generate-persona', methods=['POST'])
 @login_required
 def generate_voice_persona():
@@ -175,18 +197,21 @@ def generate_voice_persona():
         
         logger.info(f"✅ Generating enhanced persona for product: '{product_service}', target: '{target_market}'")
         
+        # Context for persona generation (echoed in the response, and used by the GPT-4o fallback)
+        context = {
+            "product_service": product_service,
+            "target_market": target_market,
+            "industry": "Various industries",  # Could be enhanced with industry detection
+            "experience_level": "Intermediate"
+        }
+        
         # Use our comprehensive bias prevention system first
-        from app.services.comprehensive_bias_prevention import ComprehensiveBiasPrevention
+        from app.services.persona_pool import get_persona_pool
         
         try:
-            # Generate bias-free persona with contextual fears
+            # Draw a pregenerated bias-free persona; contextual fears are added for this product
             logger.info("🔧 Using comprehensive bias prevention system...")
-            framework = ComprehensiveBiasPrevention.generate_bias_free_persona_framework(
-                industry_context=None,
-                target_market=target_market,
-                complexity_level="intermediate",
-                product_service=product_service  # This triggers contextual fear generation
-            )
+            framework = get_persona_pool().draw(target_market, product_service, data.get('difficulty'))
             
             # Transform framework to enhanced persona format
             enhanced_persona = {
@@ -268,13 +293,6 @@ def generate_voice_persona():
             logger.info("🔄 Falling back to GPT-4o generation...")
             
         # Fallback to GPT-4o if comprehensive system fails
-        # Create context for persona generation
-        context = {
-            "product_service": product_service,
-            "target_market": target_market,
-            "industry": "Various industries",  # Could be enhanced with industry detection
-            "experience_level": "Intermediate"
-        }
         
         # Use the enhanced GPT-4o service for persona generation
         logger.info("🔧 Importing GPT-4o service...")
@@ -464,13 +482,14 @@ def get_session_status(session_id):
     try:
         dual_voice_service = get_dual_voice_service()
         
-        if session_id not in dual_voice_service.active_sessions:
+        session_data = dual_voice_service.sessions.get(session_id)
+        if session_data is None:
             return jsonify({
                 'success': False,
                 'error': 'Session not found or has ended'
             }), 404
         
-        session_data = dual_voice_service.active_sessions[session_id]
+        buyer_persona = db.session.get(BuyerPersona, session_data['buyer_persona_id']) if session_data.get('buyer_persona_id') else None
         
         # Return session status without sensitive data
         return jsonify({
@@ -478,12 +497,12 @@ def get_session_status(session_id):
             'session_id': session_id,
             'status': session_data.get('status'),
             'scenario_type': session_data.get('scenario_type'),
-            'start_time': session_data.get('start_time').isoformat() if session_data.get('start_time') else None,
-            'conversation_turns': len(session_data.get('conversation_log', [])),
+            'start_time': session_data.get('start_time'),
+            'conversation_turns': dual_voice_service.sessions.length(session_id, 'conversation_log'),
             'buyer_persona': {
-                'name': session_data['buyer_persona'].name if session_data.get('buyer_persona') else None,
-                'role': session_data['buyer_persona'].role if session_data.get('buyer_persona') else None,
-                'primary_concern': session_data['buyer_persona'].primary_concern if session_data.get('buyer_persona') else None
+                'name': buyer_persona.name if buyer_persona else None,
+                'role': buyer_persona.role if buyer_persona else None,
+                'primary_concern': buyer_persona.primary_concern if buyer_persona else None
             }
         })
         
@@ -501,7 +520,7 @@ def health_check():
         'success': True,
         'service': 'dual_voice_agent',
         'status': 'healthy',
-        'active_sessions': len(get_dual_voice_service().active_sessions)
+        'active_sessions': get_dual_voice_service().sessions.count()
     })
 
 @dual_voice_bp.route('/test-persona', methods=['POST'])
@@ -749,25 +768,9 @@ def detect_gender_from_name():
                 'error': 'Name is required'
             }), 400
         
-        # Parse first and last name (simple split)
-        name_parts = full_name.split(' ')
-        first_name = name_parts[0] if len(name_parts) > 0 else full_name
-        
-        # Use unbiased demographic name service to detect gender
-        # First check if the first name exists in our database
-        gender = None
-        
-        # Check across different cultural backgrounds
-        for culture in DemographicNameService.NAME_POOLS:
-            # Check female names
-            if first_name in DemographicNameService.NAME_POOLS[culture]['female']['first']:
-                gender = 'female'
-                break
-                
-            # Check male names
-            if first_name in DemographicNameService.NAME_POOLS[culture]['male']['first']:
-                gender = 'male'
-                break
+        # Use unbiased demographic name service to detect gender from the
+        # first name (precomputed index across all cultural backgrounds)
+        gender = DemographicNameService.detect_gender(full_name)
                 
         # If gender not found in database, use comprehensive bias prevention system
         if not gender:
@@ -4,8 +4,14 @@ API routes for warm-lead feedback generation
 Provides LLM-powered feedback and quiz generation for sales call analysis.
 """
 
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, Response, request, jsonify, g, stream_with_context
 from app.services.api_manager import api_manager
+from app.services.feedback_analysis_engine import (
+    complete_json,
+    default_moment_count,
+    get_feedback_engine
+)
+from app.services.llm_admission import AdmissionRejected, Priority, llm_admission
 import json
 import logging
 
@@ -13,6 +19,14 @@ logger = logging.getLogger(__name__)
 
 feedback_bp = Blueprint('feedback', __name__)
 
+
+def _shed_response(error: AdmissionRejected):
+    """503 for analysis shed by LLM admission control"""
+    response = jsonify({'error': 'Feedback service is busy, please retry shortly', 'details': str(error)})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+
 @feedback_bp.route('/api/generate-feedback', methods=['POST'])
 def generate_feedback():
     """
@@ -55,22 +69,23 @@ def generate_feedback():
             return jsonify({'error': 'AI service configuration error'}), 500
         
         # Generate feedback using GPT-4
-        response = service_manager.openai_service.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a sales coaching expert who provides practical, evidence-based feedback. Always respond with valid JSON matching the requested structure."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.7,
-            max_tokens=1000,
-            response_format={"type": "json_object"}
-        )
+        with llm_admission(Priority.FEEDBACK):
+            response = service_manager.openai_service.client.chat.completions.create(
+                model="gpt-4o",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are a sales coaching expert who provides practical, evidence-based feedback. Always respond with valid JSON matching the requested structure."
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                temperature=0.7,
+                max_tokens=1000,
+                response_format={"type": "json_object"}
+            )
         
         # Parse the response
         feedback_text = response.choices[0].message.content
@@ -90,6 +105,8 @@ def generate_feedback():
             'error': 'Failed to parse LLM response as JSON',
             'details': str(e)
         }), 500
+    except AdmissionRejected as e:
+        return _shed_response(e)
     except Exception as e:
         return jsonify({
             'error': 'Failed to generate feedback',
@@ -139,22 +156,23 @@ def generate_quiz():
             return jsonify({'error': 'AI service configuration error'}), 500
         
         # Generate quiz using GPT-4
-        response = service_manager.openai_service.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a sales psychology expert who creates diagnostic quiz questions. Always respond with valid JSON matching the requested structure. Ensure all answer options are equal length (±3 words) and psychologically plausible."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.8,
-            max_tokens=800,
-            response_format={"type": "json_object"}
-        )
+        with llm_admission(Priority.FEEDBACK):
+            response = service_manager.openai_service.client.chat.completions.create(
+                model="gpt-4o",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are a sales psychology expert who creates diagnostic quiz questions. Always respond with valid JSON matching the requested structure. Ensure all answer options are equal length (±3 words) and psychologically plausible."
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                temperature=0.8,
+                max_tokens=800,
+                response_format={"type": "json_object"}
+            )
         
         # Parse the response
         quiz_text = response.choices[0].message.content
@@ -188,6 +206,8 @@ def generate_quiz():
             'error': 'Failed to parse LLM response as JSON',
             'details': str(e)
         }), 500
+    except AdmissionRejected as e:
+        return _shed_response(e)
     except Exception as e:
         return jsonify({
             'error': 'Failed to generate quiz',
@@ -374,46 +394,39 @@ NUMBER OF MOMENTS TO ANALYZE: {target_moments}
 
 Return only the JSON object with the analysis."""
 
-        # Generate analysis using GPT-4o-mini for speed/cost
-        logger.info(f"Starting transcript analysis - word count: {word_count}, target moments: {target_moments}")
-        response = service_manager.openai_service.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000,
-            response_format={"type": "json_object"},
-            timeout=25  # 25 second timeout to stay under gunicorn's 30s limit
-        )
+        client = service_manager.openai_service.client
+        
+        def run_analysis():
+            # Generate analysis using GPT-4o-mini for speed/cost
+            logger.info(f"Starting transcript analysis - word count: {word_count}, target moments: {target_moments}")
+            analysis = complete_json(
+                client, "gpt-4o-mini", system_prompt, user_prompt,
+                temperature=0.7,
+                max_tokens=2000,
+                timeout=25  # 25 second timeout to stay under gunicorn's 30s limit
+            )
+            
+            # Ensure all required fields exist with defaults
+            return {
+                'readinessScore': analysis.get('readinessScore', 65),
+                'painPointsFound': analysis.get('painPointsFound', 0),
+                'objectionsHandled': analysis.get('objectionsHandled', 0),
+                'objectionsTotal': analysis.get('objectionsTotal', 1),
+                'demoScheduled': analysis.get('demoScheduled', False),
+                'callDuration': analysis.get('callDuration', max(60, len(transcript.split()) // 2)),
+                'highlights': analysis.get('highlights', [
+                    {"text": "Analyzed transcript", "type": "win"}
+                ]),
+                'sentimentAnalysis': analysis.get('sentimentAnalysis', 'Analysis completed.'),
+                'detailedMoments': analysis.get('detailedMoments', [])
+            }
         
-        # Parse the response
-        analysis_text = response.choices[0].message.content
-        logger.info(f"AI response received, length: {len(analysis_text)} chars")
-        
-        try:
-            analysis = json.loads(analysis_text)
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parse error. AI response snippet: {analysis_text[:500]}...")
-            raise
-        
-        # Ensure all required fields exist with defaults
-        result = {
-            'readinessScore': analysis.get('readinessScore', 65),
-            'painPointsFound': analysis.get('painPointsFound', 0),
-            'objectionsHandled': analysis.get('objectionsHandled', 0),
-            'objectionsTotal': analysis.get('objectionsTotal', 1),
-            'demoScheduled': analysis.get('demoScheduled', False),
-            'callDuration': analysis.get('callDuration', max(60, len(transcript.split()) // 2)),
-            'highlights': analysis.get('highlights', [
-                {"text": "Analyzed transcript", "type": "win"}
-            ]),
-            'sentimentAnalysis': analysis.get('sentimentAnalysis', 'Analysis completed.'),
-            'detailedMoments': analysis.get('detailedMoments', [])
-        }
+        # Same transcript + prompt version -> stored result, no LLM call
+        result, cached = get_feedback_engine().cached('transcript', transcript, system_prompt, run_analysis)
         
-        return jsonify(result)
+        response = jsonify(result)
+        response.headers['X-Feedback-Cache'] = 'hit' if cached else 'miss'
+        return response
         
     except json.JSONDecodeError as e:
         logger.error(f"JSON decode error in analyze_transcript: {str(e)}")
@@ -421,6 +434,8 @@ Return only the JSON object with the analysis."""
             'error': 'Failed to parse AI response as JSON',
             'details': str(e)
         }), 500
+    except AdmissionRejected as e:
+        return _shed_response(e)
     except Exception as e:
         error_str = str(e).lower()
         if 'timeout' in error_str or 'timed out' in error_str:
@@ -469,82 +484,24 @@ def analyze_single_moment():  # v1.0 progressive loading
         if not hasattr(service_manager, 'openai_service'):
             return jsonify({'error': 'OpenAI service not available in API manager'}), 500
         
-        # Build exclusion context
-        exclusion_text = ""
-        if exclude_indices:
-            exclusion_text = f"\nPreviously analyzed moments: {exclude_indices}\nFocus on a DIFFERENT critical decision point than those already covered."
-        
-        # Simplified system prompt for single moment
-        single_moment_prompt = f"""You are an expert sales coach analyzing ONE specific moment from a sales call.
-
-Analyze this transcript and identify the single most important coaching moment at index {moment_index}.
-
-Return ONLY this JSON structure:
-{{
-    "turnLabel": "Turn X",
-    "turnNumber": "X / Y",
-    "type": "mistake|strength|turning",
-    "youSaid": "exact rep quote",
-    "prospectSaid": "exact prospect quote", 
-    "talkRatio": "XX% you, XX% prospect",
-    "prospectTone": "brief tone description",
-    "beforeContext": "2-3 sentence scenario describing the actual call context. Be SPECIFIC: Was this cold outreach or warm follow-up? What triggered the call? Example: 'You followed up with Sarah after she downloaded your pricing guide. She mentioned struggling with rep onboarding time.'"
-    "beforeScore": 4.5,
-    "sharpenThis": "2-3 sentence coaching insight with **bold key point** embedded naturally",
-    "quoteTag": "Try this instead",
-    "quoteText": "1-2 sentence improved script",
-    "afterScore": 7.5,
-    "psychologyPrinciple": "brief principle name",
-    "psychologyExplanation": "1-2 sentence business impact explanation",
-    "quiz": {{
-        "question": "What should you have done differently?",
-        "options": [
-            {{"text": "Correct answer", "correct": true}},
-            {{"text": "Plausible distractor 1", "correct": false}},
-            {{"text": "Plausible distractor 2", "correct": false}}
-        ],
-        "explanation": "Why the correct answer works - focus on business impact",
-        "howResponse": "Exact script for next time"
-    }}
-}}
-
-Be concise. No filler. Focus on actionable coaching.{exclusion_text}"""
-
-        user_prompt = f"""Analyze this sales call transcript and generate moment {moment_index}:
-
-{transcript}
-
-Return only the JSON object for this single moment."""
-
         logger.info(f"Generating single moment {moment_index} for transcript of {len(transcript.split())} words")
         
-        response = service_manager.openai_service.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": single_moment_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.7,
-            max_tokens=1200,
-            response_format={"type": "json_object"},
-            timeout=20
+        # Cached per moment, so a reload only analyzes moments still missing
+        result = get_feedback_engine().analyze_moment(
+            service_manager.openai_service.client, transcript, moment_index, exclude_indices
         )
-        
-        moment_text = response.choices[0].message.content
-        logger.info(f"Moment {moment_index} received, length: {len(moment_text)} chars")
-        
-        try:
-            moment = json.loads(moment_text)
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parse error for moment {moment_index}: {moment_text[:500]}...")
-            raise
+        moment = result['moment']
         
         return jsonify({
             'moment': moment,
             'momentIndex': moment_index,
-            'totalWordCount': len(transcript.split())
+            'totalWordCount': len(transcript.split()),
+            'cached': result['cached'],
+            'salience': result['salience']
         })
         
+    except AdmissionRejected as e:
+        return _shed_response(e)
     except Exception as e:
         logger.exception(f"Error generating moment {moment_index}: {str(e)}")
         return jsonify({
@@ -608,28 +565,18 @@ Be concise. No filler."""
 
         user_prompt = f"Extract summary metrics from this call transcript ({word_count} words):\n\n{transcript}\n\nReturn only the JSON."
         
-        logger.info(f"Analyzing summary for transcript of {word_count} words")
+        client = service_manager.openai_service.client
         
-        response = service_manager.openai_service.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": summary_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.5,
-            max_tokens=600,
-            response_format={"type": "json_object"},
-            timeout=15
-        )
+        def run_summary():
+            logger.info(f"Analyzing summary for transcript of {word_count} words")
+            return complete_json(
+                client, "gpt-4o-mini", summary_prompt, user_prompt,
+                temperature=0.5,
+                max_tokens=600,
+                timeout=15
+            )
         
-        summary_text = response.choices[0].message.content
-        logger.info(f"Summary received, length: {len(summary_text)} chars")
-        
-        try:
-            summary = json.loads(summary_text)
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parse error for summary: {summary_text[:500]}...")
-            raise
+        summary, _ = get_feedback_engine().cached('summary', transcript, summary_prompt, run_summary)
         
         # Add calculated duration
         summary['callDuration'] = max(60, word_count / 2)
@@ -637,6 +584,8 @@ Be concise. No filler."""
         
         return jsonify(summary)
         
+    except AdmissionRejected as e:
+        return _shed_response(e)
     except Exception as e:
         logger.exception(f"Error analyzing summary: {str(e)}")
         return jsonify({
@@ -645,10 +594,58 @@ Be concise. No filler."""
         }), 500
 
 
+@feedback_bp.route('/api/feedback/analyze-moments/stream', methods=['POST'])
+def stream_moments():
+    """
+    Analyze all coaching moments for a transcript in parallel (server-side fan-out)
+    
+    Expected input:
+    {
+        "transcript": "full call transcript",
+        "count": 2  // optional, defaults to the word-count rule
+    }
+    
+    Streams server-sent events as moments complete; already analyzed moments
+    come first, straight from the cache:
+        event: moment   data: {"momentIndex": 1, "moment": {...}, "cached": false, ...}
+        event: error    data: {"momentIndex": 1, "error": "..."}
+        event: end      data: {"status": "completed", "count": 2}
+    """
+    data = request.json or {}
+    transcript = data.get('transcript', '').strip()
+    
+    if not transcript:
+        return jsonify({'error': 'Transcript is required'}), 400
+    
+    try:
+        count = max(1, min(int(data.get('count') or default_moment_count(len(transcript.split()))), 5))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'count must be an integer'}), 400
+    
+    service_manager = getattr(g, 'api_manager', api_manager)
+    if not service_manager or not hasattr(service_manager, 'openai_service'):
+        return jsonify({'error': 'OpenAI service not available'}), 500
+    
+    client = service_manager.openai_service.client
+    engine = get_feedback_engine()
+    
+    def generate():
+        for event in engine.stream_moments(client, transcript, count):
+            name = 'error' if 'error' in event else 'moment'
+            yield f'event: {name}\ndata: {json.dumps(event)}\n\n'
+        yield f'event: end\ndata: {json.dumps({"status": "completed", "count": count})}\n\n'
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
 @feedback_bp.route('/api/feedback/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'service': 'warm-lead-feedback'
+        'service': 'warm-lead-feedback',
+        'analysisCache': get_feedback_engine().stats()
     })
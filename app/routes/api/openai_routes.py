@@ -8,6 +8,9 @@ from flask import Blueprint, request, jsonify, current_app, Response, stream_wit
 from flask_login import login_required
 import json
 
+from app.services.llm_admission import Priority, llm_priority
+from app.services.llm_router import NoProviderAvailable, get_llm_router, google_payload as build_google_payload
+
 logger = logging.getLogger(__name__)
 
 openai_bp = Blueprint('openai', __name__)
@@ -209,39 +212,8 @@ def _call_google_ai(model, messages, temperature, max_tokens, stream, api_key, r
     
     logger.info(f"Calling Google AI with model: {google_model} (temp={temperature}, max_tokens={max_tokens})")
     
-    # Convert OpenAI-style messages to Google AI format
-    # Google AI doesn't support system messages in the same way - merge system into first user message
-    contents = []
-    system_instruction = None
-    
-    for i, msg in enumerate(messages):
-        if msg['role'] == 'system':
-            # Store system message for systemInstruction field
-            system_instruction = msg['content']
-        elif msg['role'] == 'user':
-            contents.append({
-                'parts': [{'text': msg['content']}]
-            })
-        elif msg['role'] == 'assistant':
-            contents.append({
-                'role': 'model',
-                'parts': [{'text': msg['content']}]
-            })
-    
-    # Build Google AI request
-    google_payload = {
-        'contents': contents,
-        'generationConfig': {
-            'temperature': temperature,
-            'maxOutputTokens': max_tokens,
-        }
-    }
-    
-    # Add system instruction if present
-    if system_instruction:
-        google_payload['systemInstruction'] = {
-            'parts': [{'text': system_instruction}]
-        }
+    # Convert OpenAI-style messages to Google AI format (system -> systemInstruction)
+    google_payload = build_google_payload(messages, temperature, max_tokens)
     
     api_start = time.time()
     
@@ -362,45 +334,23 @@ def classify():
         if not prompt:
             return jsonify({'error': 'No prompt provided'}), 400
         
-        import os
-        import requests
-        
-        openrouter_key = os.environ.get('OPENROUTER_API_KEY')
-        if not openrouter_key:
-            logger.error("OPENROUTER_API_KEY not set")
-            return jsonify({'error': 'OpenRouter not configured'}), 503
-        
-        # Call OpenRouter API
+        # Route via the provider router (OpenRouter first, failover to equivalents)
         logger.info(f"Classifying product with LLM (temp={temperature}, max_tokens={max_tokens})")
-        response = requests.post(
-            'https://openrouter.ai/api/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {openrouter_key}',
-                'HTTP-Referer': 'https://pitchiq.com',
-                'X-Title': 'PitchIQ Product Classification',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'openai/gpt-4o-mini',
-                'messages': [
-                    {'role': 'user', 'content': prompt}
-                ],
-                'temperature': temperature,
-                'max_tokens': max_tokens
-            },
+        routed = get_llm_router().complete(
+            'openai/gpt-4o-mini',
+            [{'role': 'user', 'content': prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
             timeout=15
         )
+        content = routed.text
         
-        if not response.ok:
-            logger.error(f"OpenRouter error: {response.status_code} - {response.text}")
-            return jsonify({'error': f'OpenRouter API error: {response.status_code}'}), 500
-        
-        result = response.json()
-        content = result['choices'][0]['message']['content']
-        
-        logger.info(f"Product classification complete")
+        logger.info(f"Product classification complete via {routed.provider}")
         return jsonify({'content': content}), 200
         
+    except NoProviderAvailable as e:
+        logger.error(f"Product classification unavailable: {e}")
+        return jsonify({'error': 'No LLM provider available'}), 503
     except Exception as e:
         logger.error(f"Error in product classification: {e}", exc_info=True)
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
@@ -462,41 +412,19 @@ Provide feedback in this exact JSON format:
   "skillTagged": "Primary skill being tested (e.g., 'Discovery Questioning', 'Objection Handling', 'Rapport Building')"
 }}"""
 
-        import os
-        import requests
-        
-        openrouter_key = os.environ.get('OPENROUTER_API_KEY')
-        if not openrouter_key:
-            logger.error("OPENROUTER_API_KEY not set")
-            return jsonify({'error': 'OpenRouter not configured'}), 503
-        
-        # Call OpenRouter API
+        # Route via the provider router (OpenRouter first, failover to equivalents)
         logger.info(f"Generating feedback for {message_role} message: {message_content[:50]}...")
-        response = requests.post(
-            'https://openrouter.ai/api/v1/chat/completions',
-            headers={
-                'Authorization': f'Bearer {openrouter_key}',
-                'HTTP-Referer': 'https://pitchiq.com',
-                'X-Title': 'PitchIQ Message Feedback',
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': 'openai/gpt-4o-mini',
-                'messages': [
+        with llm_priority(Priority.FEEDBACK):
+            routed = get_llm_router().complete(
+                'openai/gpt-4o-mini',
+                [
                     {'role': 'system', 'content': system_prompt},
                     {'role': 'user', 'content': user_prompt}
                 ],
-                'temperature': 0.7,
-                'max_tokens': 300
-            }
-        )
-        
-        if not response.ok:
-            logger.error(f"OpenRouter error: {response.status_code} - {response.text}")
-            return jsonify({'error': f'OpenRouter API error: {response.status_code}'}), 500
-        
-        result = response.json()
-        feedback_text = result['choices'][0]['message']['content']
+                temperature=0.7,
+                max_tokens=300
+            )
+        feedback_text = routed.text
         logger.info(f"Raw AI response: {feedback_text[:200]}...")
         
         # Parse JSON response - strip markdown if present
@@ -524,6 +452,9 @@ Provide feedback in this exact JSON format:
                 }
             }), 200
         
+    except NoProviderAvailable as e:
+        logger.error(f"Message feedback unavailable: {e}")
+        return jsonify({'error': 'No LLM provider available'}), 503
     except Exception as e:
         logger.error(f"Error generating message feedback: {e}", exc_info=True)
         return jsonify({'error': f'Internal server error: {str(e)}'}), 500
@@ -7,6 +7,7 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required
 import logging
 from app.services.gpt4o_service import get_gpt4o_service
+from app.services.streaming_json import extract_json
 import json
 
 logger = logging.getLogger(__name__)
@@ -45,27 +46,16 @@ Always return valid JSON in the exact format requested. Be specific about produc
         
         logger.info(f"Product classification response: {response[:100]}...")
         
-        # Try to extract JSON from response
+        # Extract the JSON object, skipping code fences and any prose around it
         try:
-            # Handle case where response might have markdown code blocks
-            if "```json" in response:
-                json_start = response.find("```json") + 7
-                json_end = response.find("```", json_start)
-                response = response[json_start:json_end].strip()
-            elif "```" in response:
-                json_start = response.find("```") + 3
-                json_end = response.find("```", json_start)
-                response = response[json_start:json_end].strip()
-            
-            # Validate it's proper JSON
-            json.loads(response)
+            classification = extract_json(response)
             
             return jsonify({
                 'success': True,
-                'content': response
+                'content': json.dumps(classification)
             })
             
-        except json.JSONDecodeError:
+        except ValueError:
             logger.warning(f"LLM returned non-JSON response: {response}")
             # Return a default classification
             return jsonify({
@@ -6,12 +6,14 @@ Generates AI prospect responses with behavioral mirroring and Coach LLM interven
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 import logging
-from app.services.gpt4o_service import GPT4oService
+from app.services.gpt4o_service import GPT4oService, GPT4oServiceError
 from app.services.coach_llm_service import CoachLLMService
 from app.services.session_state import get_session_state
 from app.services.coach_translation import translate_coach_state, get_max_sentences
-from app.services.coach_constants import CONFIDENCE_THRESHOLD
+from app.services.coach_constants import CONFIDENCE_THRESHOLD, LIVE_TURN_DEADLINE
 from app.services.coach_metrics import get_metrics
+from app.services.llm_admission import AdmissionRejected, Priority, llm_priority
+from app.services.llm_retry import request_deadline
 from app.extensions import csrf
 
 logger = logging.getLogger(__name__)
@@ -129,11 +131,12 @@ def generate_prospect_response():
         
         # PHASE 3: Generate response
         gpt_service = GPT4oService()
-        response_text = gpt_service.generate_response(
-            messages=[{"role": "user", "content": prompt}],
-            temperature=_calculate_temperature(behavior_state),
-            max_tokens=300  # Increased from 150 to allow complete sentences
-        )
+        with metrics.time_stage('prospect_generation'), llm_priority(Priority.LIVE_TURN), request_deadline(LIVE_TURN_DEADLINE):
+            response_text = gpt_service.generate_response(
+                messages=[{"role": "user", "content": prompt}],
+                temperature=_calculate_temperature(behavior_state),
+                max_tokens=300  # Increased from 150 to allow complete sentences
+            )
         
         # Calculate response metadata
         metadata = _analyze_response(response_text, behavior_state)
@@ -155,6 +158,12 @@ def generate_prospect_response():
             'metadata': metadata
         })
         
+    except GPT4oServiceError as e:
+        if isinstance(e.__cause__, AdmissionRejected):
+            logger.warning(f"[ProspectResponse] Shed: {e.__cause__}")
+            return jsonify({'error': 'Service busy, please retry'}), 503
+        logger.error(f"[ProspectResponse] Error: {str(e)}")
+        return jsonify({'error': 'Failed to generate response'}), 500
     except Exception as e:
         logger.error(f"[ProspectResponse] Error: {str(e)}")
         return jsonify({'error': 'Failed to generate response'}), 500
@@ -7,15 +7,46 @@ API endpoints for handling sales roleplay conversations with phase management.
 import json
 import logging
 import uuid
+from contextlib import nullcontext
 from flask import Blueprint, request, jsonify, current_app, session
-from app.services.gpt4o_service import GPT4oService
-from flask_login import login_required
+from app.services.conversation_state_manager import ConversationStateManager
+from app.services.gpt4o_service import get_gpt4o_service
+from app.services.llm_admission import Priority, llm_priority
+from app.services.session_warmup import get_session_warmup
+from flask_login import current_user, login_required
 
 roleplay_bp = Blueprint('roleplay', __name__)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+def _user_info():
+    """User info for the roleplay prompts; the warm-up and the turns must build them alike"""
+    return {
+        'name': session.get('user', {}).get('first_name', 'User'),
+        'experience_level': session.get('user', {}).get('sales_experience', 'intermediate')
+    }
+
+def _warmup_key(conversation_id):
+    return f"{current_user.get_id()}:{conversation_id}"
+
+@roleplay_bp.route('/warmup', methods=['POST'])
+@login_required
+def warmup_roleplay():
+    """
+    Warm up a roleplay as soon as its persona is assigned, before the user
+    starts: the opening line and the prompt prefix are prepared in the
+    background. Pass the returned conversation_id to /start.
+    """
+    data = request.json or {}
+    persona = data.get('persona')
+    if not persona:
+        return jsonify({"error": "No persona provided"}), 400
+    
+    conversation_id = str(uuid.uuid4())
+    get_session_warmup().start(_warmup_key(conversation_id), persona, _user_info())
+    return jsonify({'conversation_id': conversation_id}), 202
+
 @roleplay_bp.route('/start', methods=['POST'])
 @login_required
 def start_roleplay_route():
@@ -30,8 +61,8 @@ def start_roleplay_route():
         if not persona:
             return jsonify({"error": "No persona provided"}), 400
             
-        # Create a conversation ID
-        conversation_id = str(uuid.uuid4())
+        # Use the conversation ID from /warmup if there was one
+        conversation_id = data.get('conversation_id') or str(uuid.uuid4())
         
         # Store the conversation in the session
         if 'conversations' not in session:
@@ -45,12 +76,21 @@ def start_roleplay_route():
         }
         session.modified = True
         
-        # Generate initial greeting from the customer
-        gpt4o_service = GPT4oService.get_instance()
-        initial_greeting = gpt4o_service.generate_initial_greeting(
-            persona=persona,
-            conversation_id=conversation_id
-        )
+        # Initial greeting from the customer: the one /warmup prepared if it is ready
+        # within GREETING_WAIT, else generated now (a cold start)
+        gpt4o_service = get_gpt4o_service()
+        warmup = get_session_warmup()
+        initial_greeting = warmup.take_greeting(_warmup_key(conversation_id))
+        warmup.record_start(_warmup_key(conversation_id), warm=initial_greeting is not None)
+        if initial_greeting:
+            gpt4o_service.phase_managers.setdefault(
+                conversation_id, ConversationStateManager(business_context=persona.get("business_context", "B2C")))
+        else:
+            with llm_priority(Priority.LIVE_TURN):
+                initial_greeting = gpt4o_service.generate_initial_greeting(
+                    persona=persona,
+                    conversation_id=conversation_id
+                )
         
         # Add the greeting to the conversation history
         session['conversations'][conversation_id]['messages'].append({
@@ -104,23 +144,19 @@ def send_message():
         session.modified = True
         
         # Get user info for personalization
-        user_info = {
-            'name': session.get('user', {}).get('first_name', 'User'),
-            'experience_level': session.get('user', {}).get('sales_experience', 'intermediate')
-        }
-        
-        # Extract conversation metadata if available
-        conversation_metadata = data.get('conversation_metadata')
-        
-        # Generate a response
-        gpt4o_service = GPT4oService.get_instance()
-        response = gpt4o_service.generate_roleplay_response(
-            persona=conversation['persona'],
-            messages=conversation['messages'],
-            user_info=user_info,
-            conversation_id=conversation_id,
-            conversation_metadata=conversation_metadata
-        )
+        user_info = _user_info()
+        
+        # Generate a response; the first turn is timed warm or cold
+        gpt4o_service = get_gpt4o_service()
+        first_turn = sum(1 for m in conversation['messages'] if m['role'] == 'user') == 1
+        with get_session_warmup().first_turn(_warmup_key(conversation_id)) if first_turn else nullcontext(), \
+                llm_priority(Priority.LIVE_TURN):
+            response = gpt4o_service.generate_roleplay_response(
+                persona=conversation['persona'],
+                messages=conversation['messages'],
+                user_info=user_info,
+                conversation_id=conversation_id
+            )
         
         # Add the response to the conversation
         conversation['messages'].append({
@@ -131,7 +167,7 @@ def send_message():
         
         # Get the current phase for the UI
         phase_manager = gpt4o_service.phase_managers.get(conversation_id)
-        current_phase = phase_manager.current_phase.value if phase_manager else "unknown"
+        current_phase = phase_manager.current_state["likely_phase"].value if phase_manager else "unknown"
         
         # Return the response
         return jsonify({
@@ -164,6 +200,7 @@ def end_roleplay():
         # Mark the conversation as inactive
         session['conversations'][conversation_id]['active'] = False
         session.modified = True
+        get_session_warmup().discard(_warmup_key(conversation_id))
         
         # Return success
         return jsonify({
@@ -185,7 +222,7 @@ def get_phase_status():
             return jsonify({"error": "Missing conversation_id"}), 400
             
         # Get the phase manager
-        gpt4o_service = GPT4oService.get_instance()
+        gpt4o_service = get_gpt4o_service()
         phase_manager = gpt4o_service.phase_managers.get(conversation_id)
         
         if not phase_manager:
@@ -55,8 +55,17 @@ def analyze_sam_conversation():
     
     Expected JSON payload:
     {
-        "conversation": ["message1", "message2", ...]
+        "conversation": ["message1", "message2", ...],
+        "conversation_id": str (optional; resumes analysis from the last call)
     }
+    or, with a conversation_id, only the messages since the last call:
+    {
+        "conversation_id": str,
+        "new_messages": ["message3", ...],
+        "cursor": int (messages already sent; required)
+    }
+    A cursor that does not match the server's gets 409 with the server's
+    cursor; the client then resends the full conversation.
     
     Returns:
     {
@@ -65,7 +74,8 @@ def analyze_sam_conversation():
         "target_market": str or null,
         "ready_for_completion": bool,
         "confidence": float,
-        "reasoning": str
+        "reasoning": str,
+        "cursor": int (only with conversation_id)
     }
     """
     try:
@@ -73,29 +83,46 @@ def analyze_sam_conversation():
         if not data:
             return jsonify({'error': 'No JSON data provided'}), 400
             
-        conversation = data.get('conversation', [])
+        conversation = data.get('conversation')
+        conversation_id = data.get('conversation_id')
+        new_messages = data.get('new_messages')
         
-        if not conversation:
+        if not conversation and not (conversation_id and new_messages is not None):
             return jsonify({'error': 'No conversation provided'}), 400
-        
-        logger.debug(f"Analyzing conversation with {len(conversation)} messages")
+        if not conversation and not isinstance(data.get('cursor'), int):
+            return jsonify({'error': 'cursor is required with new_messages'}), 400
         
         # Import the service here to avoid circular imports
-        from app.services.sam_conversation_service import get_sam_conversation_service
+        from app.services.sam_conversation_service import AnalysisCursorMismatch, get_sam_conversation_service
         
         # Use the Sam conversation service to analyze the conversation
         service = get_sam_conversation_service()
-        analysis_result = service.analyze_conversation(conversation)
+        if conversation_id:
+            # Resume from the previous call: only new messages are analyzed
+            try:
+                analysis_result = service.analyze_incremental(
+                    str(conversation_id), conversation=conversation,
+                    new_messages=new_messages, cursor=data.get('cursor')
+                )
+            except AnalysisCursorMismatch as e:
+                # Client must resend the full conversation (or the messages from our cursor)
+                return jsonify({'error': 'Cursor mismatch', 'cursor': e.cursor}), 409
+        else:
+            logger.debug(f"Analyzing conversation with {len(conversation)} messages")
+            analysis_result = service.analyze_conversation(conversation)
         
         # Return only the necessary fields to the frontend
-        return jsonify({
+        response = {
             "is_complete": analysis_result["is_complete"],
             "product_service": analysis_result["product_service"],
             "target_market": analysis_result["target_market"],
             "ready_for_completion": analysis_result["ready_for_completion"],
             "confidence": analysis_result["confidence"],
             "reasoning": analysis_result["reasoning"]
-        })
+        }
+        if "cursor" in analysis_result:
+            response["cursor"] = analysis_result["cursor"]
+        return jsonify(response)
         
     except Exception as e:
         logger.error(f"Error analyzing conversation: {e}")
@@ -134,7 +161,7 @@ def demo_phase_update():
             gpt_service.phase_managers[conversation_id] = ConversationStateManager()
         phase_manager = gpt_service.phase_managers[conversation_id]
 
-        phase_changed = phase_manager.update_phase(utterance)
+        phase_changed = phase_manager.update_phase(utterance, assistant_message=data.get('prospect_reply'))
         current_phase = phase_manager.current_state.get('likely_phase', ConversationPhase.RAPPORT)
 
         # Persona cache on service
@@ -1,80 +1,84 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app
 from flask_login import login_required, current_user
-import os
 import logging
-import requests
-import io
-import tempfile
-from app.services.gpt4o_service import GPT4oService
+import os
+import threading
+from app.services.gpt4o_service import get_gpt4o_service
+from app.services.llm_admission import Priority, llm_priority
+from app.services.coach_metrics import get_metrics
+from app.services.deepgram_http import DeepgramHTTPError, extract_transcript, get_deepgram_http_client
 
 logger = logging.getLogger(__name__)
 
 simple_voice_bp = Blueprint('simple_voice', __name__)
 
+_prewarm_checked = False
+_prewarm_lock = threading.Lock()
+
+@simple_voice_bp.before_app_request
+def _prewarm_fillers():
+    """
+    Opt-in (TTS_PREWARM): synthesize filler audio when a server first handles a
+    request, so the first filler of a call is already a cache hit. Test apps and
+    CLI commands never get here; the TTS cache lets one worker do it for all.
+    """
+    global _prewarm_checked
+    if _prewarm_checked:
+        return
+    with _prewarm_lock:
+        if _prewarm_checked:
+            return
+        _prewarm_checked = True
+    if current_app.testing or not current_app.config.get('TTS_PREWARM'):
+        return
+    deepgram = get_deepgram_http_client()
+    if deepgram.api_key:
+        deepgram.prewarm_fillers()
+
 @simple_voice_bp.route('/transcribe', methods=['POST'])
 def transcribe_audio():
-    """Transcribe audio using Deepgram STT API"""
+    """Transcribe audio using Deepgram STT API
+    
+    Accepts a multipart upload in the 'audio' field, or a raw audio/* request
+    body which is piped to Deepgram without being read into memory.
+    """
     try:
-        if 'audio' not in request.files:
-            return jsonify({'error': 'No audio file provided'}), 400
+        deepgram = get_deepgram_http_client()
         
-        audio_file = request.files['audio']
-        if audio_file.filename == '':
-            return jsonify({'error': 'No audio file selected'}), 400
+        if request.mimetype.startswith('audio/'):
+            if request.content_length == 0:
+                return jsonify({'error': 'No audio file provided'}), 400
+            audio_stream, content_type = request.stream, request.mimetype
+        else:
+            if 'audio' not in request.files:
+                return jsonify({'error': 'No audio file provided'}), 400
+            
+            audio_file = request.files['audio']
+            if audio_file.filename == '':
+                return jsonify({'error': 'No audio file selected'}), 400
+            audio_stream = audio_file.stream
+            content_type = audio_file.mimetype if audio_file.mimetype.startswith('audio/') else 'audio/wav'
         
-        # Get Deepgram API key
-        api_key = os.getenv('DEEPGRAM_API_KEY')
-        if not api_key:
+        if not deepgram.api_key:
             return jsonify({'error': 'Deepgram API key not configured'}), 500
         
-        # Prepare audio data
-        audio_data = audio_file.read()
-        
-        # Call Deepgram STT API
-        url = "https://api.deepgram.com/v1/listen"
-        headers = {
-            "Authorization": f"Token {api_key}",
-            "Content-Type": "audio/wav"
-        }
-        
-        params = {
-            "model": "nova-2",
-            "language": "en-US",
-            "smart_format": "true",
-            "punctuate": "true"
-        }
-        
-        response = requests.post(
-            url,
-            headers=headers,
-            params=params,
-            data=audio_data,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            transcript = ""
-            
-            # Extract transcript from Deepgram response
-            if 'results' in result and 'channels' in result['results']:
-                channels = result['results']['channels']
-                if channels and 'alternatives' in channels[0]:
-                    alternatives = channels[0]['alternatives']
-                    if alternatives and 'transcript' in alternatives[0]:
-                        transcript = alternatives[0]['transcript']
-            
-            logger.info(f"Transcription successful: {transcript[:50]}...")
-            return jsonify({
-                'success': True,
-                'transcript': transcript
-            })
-        else:
-            logger.error(f"Deepgram STT error: {response.status_code} - {response.text}")
+        # Stream the upload to Deepgram over the shared keep-alive session
+        try:
+            with get_metrics().time_stage('stt'):
+                result = deepgram.transcribe(audio_stream, content_type)
+        except DeepgramHTTPError as e:
+            logger.error(f"Deepgram STT error: {e.status_code} - {e.body}")
             return jsonify({
                 'error': 'Failed to transcribe audio',
-                'details': response.text
+                'details': e.body
             }), 500
+        
+        transcript = extract_transcript(result)
+        logger.info(f"Transcription successful: {transcript[:50]}...")
+        return jsonify({
+            'success': True,
+            'transcript': transcript
+        })
             
     except Exception as e:
         logger.error(f"Error in transcribe_audio: {str(e)}")
@@ -108,8 +112,9 @@ Respond as if you're a potential customer or provide coaching feedback. Keep you
 Your response:"""
         
         # Use GPT-4o service to generate response
-        gpt_service = GPT4oService()
-        ai_response = gpt_service.generate_response(prompt)
+        gpt_service = get_gpt4o_service()
+        with llm_priority(Priority.LIVE_TURN):
+            ai_response = gpt_service.generate_response(prompt)
         
         logger.info(f"Generated response for user {current_user.id}: {ai_response[:50]}...")
         return jsonify({
@@ -134,47 +139,29 @@ def text_to_speech():
         if not text.strip():
             return jsonify({'error': 'Empty text provided'}), 400
         
-        # Get Deepgram API key
-        api_key = os.getenv('DEEPGRAM_API_KEY')
-        if not api_key:
+        deepgram = get_deepgram_http_client()
+        if not deepgram.api_key:
             return jsonify({'error': 'Deepgram API key not configured'}), 500
         
-        # Call Deepgram TTS API
-        url = "https://api.deepgram.com/v1/speak"
-        headers = {
-            "Authorization": f"Token {api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "text": text,
-            "model": "aura-asteria-en",
-            "encoding": "mp3",
-            "sample_rate": 24000
-        }
-        
-        response = requests.post(
-            url,
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            logger.info(f"TTS successful for user {current_user.id}: {text[:30]}...")
-            
-            # Return audio data directly
-            return response.content, 200, {
-                'Content-Type': 'audio/mpeg',
-                'Content-Disposition': 'inline; filename="speech.mp3"'
-            }
-        else:
-            logger.error(f"Deepgram TTS error: {response.status_code} - {response.text}")
+        # Call Deepgram TTS API, or replay a phrase it spoke before; the stage time is time to first byte
+        try:
+            with get_metrics().time_stage('tts'):
+                content_type, audio = deepgram.speak_cached(text)
+        except DeepgramHTTPError as e:
+            logger.error(f"Deepgram TTS error: {e.status_code} - {e.body}")
             return jsonify({
                 'error': 'Failed to generate speech',
-                'details': response.text
+                'details': e.body
             }), 500
+        
+        logger.info(f"TTS streaming for user {current_user.id}: {text[:30]}...")
+        
+        # Relay audio chunks as Deepgram produces them
+        return Response(audio, 200, {
+            'Content-Type': 'audio/mpeg',
+            'Content-Disposition': 'inline; filename="speech.mp3"'
+        })
             
     except Exception as e:
         logger.error(f"Error in text_to_speech: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500 
\ No newline at end of file
+        return jsonify({'error': 'Internal server error'}), 500
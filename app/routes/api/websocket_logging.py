@@ -1,62 +1,54 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-import json
-from datetime import datetime
 from app.utils.logger import get_smart_logger
+from app.utils.rate_limiter import rate_limit, user_or_ip
+from app.services.telemetry_ingest import (
+    RATE_LIMIT as TELEMETRY_RATE_LIMIT,
+    RATE_LIMIT_WINDOW as TELEMETRY_RATE_WINDOW,
+    TelemetryValidationError,
+    conversation_text_row,
+    get_telemetry_ingestor,
+    websocket_message_row
+)
 
 logger = get_smart_logger(__name__)
 
 websocket_logging_bp = Blueprint('websocket_logging', __name__)
 
 @websocket_logging_bp.route('/log-websocket-message', methods=['POST'])
+@rate_limit(limit=TELEMETRY_RATE_LIMIT, window=TELEMETRY_RATE_WINDOW, key_func=user_or_ip, scope='telemetry')
 def log_websocket_message():
-    """Log WebSocket messages from the frontend for debugging - available without authentication"""
+    """Record WebSocket messages from the frontend for debugging - available without authentication, rate limited"""
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
+        user_id = current_user.id if current_user.is_authenticated else None
+        row = websocket_message_row(request.get_json(silent=True), user_id)
+        get_telemetry_ingestor().enqueue([row])
         
-        direction = data.get('direction', 'UNKNOWN')
-        persona = data.get('persona', 'Unknown')
-        message = data.get('message', {})
-        timestamp = data.get('timestamp', datetime.now().isoformat())
+        logger.debug(f"🔥 WEBSOCKET [{row['persona']}] {row['event']} ({len(row['payload'] or '')} bytes)")
         
-        # Format the log message for easy reading
-        if direction == 'SENT':
-            logger.info(f"🔥 WEBSOCKET [{persona}] SENT → {json.dumps(message, indent=2)}")
-        else:
-            logger.info(f"🔥 WEBSOCKET [{persona}] RECEIVED ← {json.dumps(message, indent=2)}")
-        
-        return jsonify({'status': 'logged'}), 200
+        return jsonify({'status': 'queued'}), 202
         
+    except TelemetryValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error logging WebSocket message: {str(e)}")
         return jsonify({'error': 'Failed to log message'}), 500
 
 @websocket_logging_bp.route('/log-conversation-text', methods=['POST'])
 @login_required
+@rate_limit(limit=TELEMETRY_RATE_LIMIT, window=TELEMETRY_RATE_WINDOW, key_func=user_or_ip, scope='telemetry')
 def log_conversation_text():
-    """Log conversation text specifically for easy transcript viewing"""
+    """Record conversation text for transcript viewing"""
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-        
-        persona = data.get('persona', 'Unknown')
-        role = data.get('role', 'unknown')
-        text = data.get('text', '')
-        timestamp = data.get('timestamp', datetime.now().isoformat())
+        row = conversation_text_row(request.get_json(silent=True), current_user.id)
+        get_telemetry_ingestor().enqueue([row])
         
-        # Format conversation text for easy reading
-        if role == 'user':
-            logger.info(f"🔥 CONVERSATION [{persona}] 🎤 USER: \"{text}\"")
-        elif role == 'assistant':
-            logger.info(f"🔥 CONVERSATION [{persona}] 🤖 {persona}: \"{text}\"")
-        else:
-            logger.info(f"🔥 CONVERSATION [{persona}] {role}: \"{text}\"")
+        logger.debug(f"🔥 CONVERSATION [{row['persona']}] {row['event']}")
         
-        return jsonify({'status': 'logged'}), 200
+        return jsonify({'status': 'queued'}), 202
         
+    except TelemetryValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error logging conversation text: {str(e)}")
-        return jsonify({'error': 'Failed to log conversation'}), 500 
\ No newline at end of file
+        return jsonify({'error': 'Failed to log conversation'}), 500
@@ -15,6 +15,9 @@ import anthropic
 from flask import current_app
 import urllib3
 
+from app.services.llm_admission import AdmissionRejected, llm_admission
+from app.services.llm_retry import RetryFailed, get_retry_policy
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -27,6 +30,8 @@ class ClaudeServiceError(Exception):
 MODEL_NAME = "claude-sonnet-4-20250514"  # Using Claude 4 Sonnet (May 2025)
 MAX_TOKENS = 4000
 DEFAULT_TEMPERATURE = 0.7
+DEFAULT_TIMEOUT = 60  # Seconds per call, including retries
+MAX_ATTEMPTS = 3  # Per call, within the deadline and shared retry budget (see llm_retry)
 
 class ClaudeService:
     """Service for interacting with Claude 4 Sonnet Extended API."""
@@ -64,7 +69,7 @@ class ClaudeService:
         
         try:
             # Test the API key by making a minimal request
-            test_client = anthropic.Anthropic(api_key=self.api_key)
+            test_client = anthropic.Anthropic(api_key=self.api_key, max_retries=0)  # Retries go through llm_retry
             
             # Initialize the full Anthropic client
             self.client = test_client
@@ -114,60 +119,52 @@ class ClaudeService:
                         "content": msg['content']
                     })
             
-            # Call the API with retry logic
-            max_retries = 3
-            backoff_factor = 1.5
-            
-            for attempt in range(max_retries):
-                try:
+            # Call the API; the retry policy owns backoff, deadline and budget
+            def attempt(timeout: float) -> str:
+                attempt_deadline = time.monotonic() + timeout
+                
+                # --- Add Detailed Logging Here ---
+                api_params = {
+                    "model": MODEL_NAME,
+                    "system": system_prompt,
+                    "messages": formatted_messages,
+                    "max_tokens": max_tokens,
+                    "temperature": temperature
+                }
+                logger.info("Calling Anthropic API")
+                logger.info(f"Model: {api_params['model']}")
+                logger.info(f"System Prompt Length: {len(api_params['system'])}")
+                logger.info(f"Num Messages: {len(api_params['messages'])}")
+                # --- End Detailed Logging ---
+                
+                with llm_admission(deadline=attempt_deadline):
                     start_time = time.time()
-                    
-                    # --- Add Detailed Logging Here ---
-                    api_params = {
-                        "model": MODEL_NAME,
-                        "system": system_prompt,
-                        "messages": formatted_messages,
-                        "max_tokens": max_tokens,
-                        "temperature": temperature
-                    }
-                    logger.info(f"Calling Anthropic API (Attempt {attempt + 1})")
-                    logger.info(f"Model: {api_params['model']}")
-                    logger.info(f"System Prompt Length: {len(api_params['system'])}")
-                    logger.info(f"Num Messages: {len(api_params['messages'])}")
-                    # --- End Detailed Logging ---
-                    
-                    response = self.client.messages.create(**api_params)
-                    
-                    duration = time.time() - start_time
-                    logger.info(f"Claude API request completed in {duration:.2f}s")
-                    
-                    # Extract the assistant's response
-                    if response and response.content and response.content[0].text.strip(): # Check if text exists and isn't just whitespace
-                        return response.content[0].text
-                    else:
-                        logger.error("Empty or invalid content received from Claude API") # Log as error
-                        raise ClaudeServiceError("Claude API returned an empty or invalid response content.")
-                        
-                except anthropic.RateLimitError as e:
-                    if attempt < max_retries - 1:
-                        wait_time = backoff_factor ** attempt
-                        logger.warning(f"Rate limit exceeded, retrying in {wait_time}s. Error: {e}")
-                        time.sleep(wait_time)
-                    else:
-                        logger.error(f"Final rate limit error after {max_retries} attempts: {str(e)}")
-                        raise ClaudeServiceError(f"Claude API rate limit exceeded after {max_retries} attempts: {e}") from e
-                except (anthropic.APIError, anthropic.APIConnectionError) as e:
-                    if attempt < max_retries - 1:
-                        wait_time = backoff_factor ** attempt
-                        logger.warning(f"API error, retrying in {wait_time}s. Error: {e}")
-                        time.sleep(wait_time)
-                    else:
-                        logger.error(f"Final API connection error after {max_retries} attempts: {str(e)}")
-                        raise ClaudeServiceError(f"Claude API connection failed after {max_retries} attempts: {e}") from e
+                    response = self.client.messages.create(
+                        **api_params, timeout=max(0.1, attempt_deadline - time.monotonic())
+                    )
+                
+                duration = time.time() - start_time
+                logger.info(f"Claude API request completed in {duration:.2f}s")
+                
+                # Extract the assistant's response
+                if response and response.content and response.content[0].text.strip(): # Check if text exists and isn't just whitespace
+                    return response.content[0].text
+                logger.error("Empty or invalid content received from Claude API") # Log as error
+                raise ClaudeServiceError("Claude API returned an empty or invalid response content.")
+            
+            try:
+                result = get_retry_policy('claude', max_attempts=MAX_ATTEMPTS, default_timeout=DEFAULT_TIMEOUT).call(attempt)
+            except AdmissionRejected as e:
+                # Shed before reaching the provider; retrying would only add load
+                raise ClaudeServiceError(f"Claude request shed: {e}") from e
+            except RetryFailed as e:
+                if isinstance(e.last_error, anthropic.RateLimitError):
+                    raise ClaudeServiceError(f"Claude API rate limit exceeded after {e.attempts} attempts ({e.reason}): {e.last_error}") from e
+                raise ClaudeServiceError(f"Claude API connection failed after {e.attempts} attempts ({e.reason}): {e.last_error}") from e
             
-            # If we get here, all retries failed (though the exceptions above should have been raised)
-            # This might catch cases where the loop finishes unexpectedly.
-            raise ClaudeServiceError(f"Claude API failed to respond after {max_retries} attempts.")
+            if result.attempts > 1:
+                logger.info(f"Claude API succeeded after {result.attempts} attempts in {result.elapsed:.2f}s")
+            return result.value
                 
         except ClaudeServiceError: # Re-raise our custom error to avoid the generic catch below
              raise
@@ -19,6 +19,9 @@ from dataclasses import dataclass
 from flask import current_app
 from app.services.gpt4o_service import GPT4oService
 from app.services.session_state import CallPhase
+from app.services.llm_admission import Priority, llm_priority
+from app.services.coach_schemas import validate_plan_response
+from app.services.streaming_json import extract_json
 import json
 import logging
 import time
@@ -68,11 +71,12 @@ class CoachAsyncPlanner:
                 current_turn, current_facts, pressure_level
             )
             
-            response = self.gpt.generate_response(
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,  # Slightly creative for strategy
-                max_tokens=500
-            )
+            with llm_priority(Priority.ASYNC_PLAN):
+                response = self.gpt.generate_response(
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.7,  # Slightly creative for strategy
+                    max_tokens=500
+                )
             
             plan = self._parse_plan(response)
             
@@ -156,37 +160,8 @@ Facts must be explicitly stated by user, not inferred."""
     def _parse_plan(self, response: str) -> StrategicPlan:
         """Parse strategic plan from LLM response"""
         try:
-            # Extract JSON from response
-            json_match = None
-            
-            # Try to find JSON block
-            if '```json' in response:
-                start = response.find('```json') + 7
-                end = response.find('```', start)
-                json_match = response[start:end].strip()
-            elif '```' in response:
-                start = response.find('```') + 3
-                end = response.find('```', start)
-                json_match = response[start:end].strip()
-            elif '{' in response:
-                start = response.find('{')
-                end = response.rfind('}') + 1
-                json_match = response[start:end]
-            
-            if not json_match:
-                raise ValueError("No JSON found in response")
-            
-            data = json.loads(json_match)
-            
-            return StrategicPlan(
-                suggested_phase=data.get('suggested_phase'),
-                phase_confidence=float(data.get('phase_confidence', 0.0)),
-                pending_trap=data.get('pending_trap'),
-                pressure_adjustment=float(data.get('pressure_adjustment', 0.0)),
-                objection_to_introduce=data.get('objection_to_introduce'),
-                reasoning=data.get('reasoning', 'No reasoning provided'),
-                facts_detected=data.get('facts_detected', {})
-            )
+            data = validate_plan_response(extract_json(response))
+            return StrategicPlan(**data)
             
         except (json.JSONDecodeError, ValueError, KeyError) as e:
             logger.warning(f"[AsyncPlanner] Parse error: {e}")
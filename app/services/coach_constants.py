@@ -3,6 +3,10 @@ Coach System Constants
 Centralized configuration for thresholds and parameters
 """
 
+# LLM call deadlines (seconds, including retries)
+LIVE_TURN_DEADLINE = 8.0  # Prospect reply; the caller is waiting on the line
+CLASSIFY_DEADLINE = 4.0  # Coach classification in the live turn path
+
 # Classification thresholds
 CONFIDENCE_THRESHOLD = 0.6  # Minimum confidence to apply intervention
 LOW_CONFIDENCE_THRESHOLD = 0.4  # Log warning below this
@@ -6,15 +6,35 @@ from typing import Dict, List, Optional
 from dataclasses import dataclass
 from flask import current_app
 from app.services.gpt4o_service import GPT4oService
-from app.services.coach_schemas import validate_coach_response
+from app.services.coach_schemas import validate_coach_response, validate_confidence, validate_decision
 from app.services.coach_constants import (
-    COACH_TEMPERATURE, COACH_MAX_TOKENS, CONFIDENCE_THRESHOLD, LOW_CONFIDENCE_THRESHOLD
+    CLASSIFY_DEADLINE, COACH_TEMPERATURE, COACH_MAX_TOKENS, CONFIDENCE_THRESHOLD, LOW_CONFIDENCE_THRESHOLD
 )
 from app.services.coach_metrics import get_metrics
+from app.services.llm_admission import AdmissionRejected, Priority, llm_priority
+from app.services.llm_retry import request_deadline
+from app.services.llm_router import NoProviderAvailable
+from app.services.streaming_json import extract_json, parse_stream
 import json
-import re
 import time
 
+# Reasoning of a persist decision whose generation was stopped before the reasoning field
+EARLY_PERSIST_REASONING = 'Persist settled early; reasoning not generated'
+
+
+def persist_settled(fields: Dict) -> bool:
+    """
+    True once streamed fields hold a valid persist decision and its
+    confidence: a persist applies no state patch, so the rest is unused
+    """
+    if 'decision' not in fields or 'confidence' not in fields:
+        return False
+    try:
+        validate_confidence(fields['confidence'])
+        return validate_decision(fields['decision']) == 'persist'
+    except ValueError:
+        return False
+
 
 @dataclass
 class CoachDecision:
@@ -53,13 +73,8 @@ class CoachLLMService:
                 user_message, transcript_history, persona, session_context
             )
             
-            response = self.gpt.generate_response(
-                messages=[{"role": "user", "content": prompt}],
-                temperature=COACH_TEMPERATURE,
-                max_tokens=COACH_MAX_TOKENS
-            )
-            
-            decision = self._parse_decision(response)
+            with llm_priority(Priority.COACH_CLASSIFY), request_deadline(CLASSIFY_DEADLINE):
+                decision = self._request_decision(prompt)
             latency_ms = (time.time() - start_time) * 1000
             
             # Log decision with metrics
@@ -180,38 +195,85 @@ Output JSON ONLY:
 
 ONLY include state_patch keys if changing them. one_shot_line is optional."""
     
+    def _request_decision(self, prompt: str) -> CoachDecision:
+        """
+        Stream the classification and parse it as it arrives. A persist
+        decision is final once its confidence is in - nothing after it is
+        applied - so generation stops there instead of running to the end.
+        The prompt asks for reasoning after confidence, so an early persist
+        has no reasoning; it carries EARLY_PERSIST_REASONING instead. Any
+        other incomplete object (max_tokens ran out) falls back to persist.
+        
+        Shed (AdmissionRejected) and unavailable (NoProviderAvailable) calls
+        propagate to the caller's safe fallback; only provider and stream
+        errors retry the request unstreamed.
+        """
+        messages = [{"role": "user", "content": prompt}]
+        try:
+            chunks = self.gpt.stream_response(
+                messages=messages,
+                temperature=COACH_TEMPERATURE,
+                max_tokens=COACH_MAX_TOKENS
+            )
+            data, complete = parse_stream(chunks, until=persist_settled)
+        except ValueError as e:
+            return self._parse_failure(e, '')
+        except (AdmissionRejected, NoProviderAvailable):
+            raise  # Another request would only add load or fail the same way
+        except Exception as e:
+            # Streaming is not retried; fall back to the retried request
+            current_app.logger.warning(f"[Coach] Streamed classification failed, retrying unstreamed: {e}")
+            response = self.gpt.generate_response(
+                messages=messages,
+                temperature=COACH_TEMPERATURE,
+                max_tokens=COACH_MAX_TOKENS
+            )
+            return self._parse_decision(response)
+        if not complete:
+            if not persist_settled(data):
+                return self._parse_failure(ValueError("Incomplete classification"), json.dumps(data))
+            get_metrics().increment('coach_early_decision')
+            data.setdefault('reasoning', EARLY_PERSIST_REASONING)
+        return self._decision_from(data, preview=json.dumps(data)[:200])
+    
     def _parse_decision(self, response: str) -> CoachDecision:
         """Parse and validate JSON response into structured decision"""
         try:
-            # Try multiple extraction strategies
-            data = self._extract_json(response)
-            
+            data = extract_json(response)
+        except ValueError as e:
+            return self._parse_failure(e, response)
+        return self._decision_from(data, preview=response[:200])
+    
+    def _decision_from(self, data: Dict, preview: str) -> CoachDecision:
+        try:
             # Validate and sanitize with schema
             validated = validate_coach_response(data)
-            
-            current_app.logger.debug(f"[Coach] Validated decision: {validated['decision']}")
-            
-            return CoachDecision(
-                should_intervene=(validated['decision'] == 'intervene'),
-                state_patch=validated['state_patch'],
-                one_shot_line=validated.get('one_shot_line'),
-                reasoning=validated['reasoning'],
-                confidence=validated['confidence']
-            )
-            
-        except (json.JSONDecodeError, ValueError, KeyError) as e:
-            current_app.logger.warning(
-                f"[Coach] Parse error: {e.__class__.__name__}: {str(e)}\n"
-                f"Response preview: {response[:200]}"
-            )
-            # Safe fallback
-            return CoachDecision(
-                should_intervene=False,
-                state_patch={},
-                one_shot_line=None,
-                reasoning=f"Parse error: {str(e)[:50]}",
-                confidence=0.0
-            )
+        except (ValueError, KeyError) as e:
+            return self._parse_failure(e, preview)
+        
+        current_app.logger.debug(f"[Coach] Validated decision: {validated['decision']}")
+        
+        return CoachDecision(
+            should_intervene=(validated['decision'] == 'intervene'),
+            state_patch=validated['state_patch'],
+            one_shot_line=validated.get('one_shot_line'),
+            reasoning=validated['reasoning'],
+            confidence=validated['confidence']
+        )
+    
+    def _parse_failure(self, error: Exception, preview: str) -> CoachDecision:
+        current_app.logger.warning(
+            f"[Coach] Parse error: {error.__class__.__name__}: {str(error)}\n"
+            f"Response preview: {preview[:200]}"
+        )
+        # Safe fallback
+        return CoachDecision(
+            should_intervene=False,
+            state_patch={},
+            one_shot_line=None,
+            reasoning=f"Parse error: {str(error)[:50]}",
+            confidence=0.0
+        )
     
     def _detect_question_direction(self, message: str) -> bool:
         """Detect if user is asking a question (vs answering or neutral)"""
@@ -291,36 +353,3 @@ ONLY include state_patch keys if changing them. one_shot_line is optional."""
         
         return 'none'
     
-    def _extract_json(self, response: str) -> Dict:
-        """Extract JSON with multiple fallback strategies"""
-        # Strategy 1: Find JSON in markdown code block
-        code_block_match = re.search(r'```(?:json)?\s*(\{.*\})\s*```', response, re.DOTALL)
-        if code_block_match:
-            try:
-                return json.loads(code_block_match.group(1))
-            except json.JSONDecodeError:
-                pass
-        
-        # Strategy 2: Bracket matching for nested JSON
-        start_idx = response.find('{')
-        if start_idx != -1:
-            depth = 0
-            end_idx = start_idx
-            for i, char in enumerate(response[start_idx:], start_idx):
-                if char == '{':
-                    depth += 1
-                elif char == '}':
-                    depth -= 1
-                    if depth == 0:
-                        end_idx = i + 1
-                        break
-            
-            if depth == 0:
-                try:
-                    return json.loads(response[start_idx:end_idx])
-                except json.JSONDecodeError:
-                    pass
-        
-        # Strategy 3: Try parsing entire response
-        return json.loads(response.strip())
-
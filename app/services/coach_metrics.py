@@ -1,14 +1,271 @@
 """
 Coach Metrics - Observability and Decision Tracking
 Structured logging for debugging and analytics
+
+Stage latencies (sync-classify, async-plan, prospect generation, TTS) are
+recorded into fixed-size log-linear histograms, HDR-style: each power of
+two is split into 32 linear sub-buckets, so any percentile is within ~3%
+of the true value and a histogram is ~900 counters no matter how many
+samples it holds. Each thread records into its own shard without locks;
+when the thread ends its shard is folded into a retired total, so shards
+track live threads only. Snapshots merge shards (and other workers'
+published snapshots) by adding counts.
 """
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Set
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
 import logging
 import json
+import math
+import os
+import socket
+import threading
+import time
+import weakref
 
 logger = logging.getLogger(__name__)
 
+# Histogram layout: values in microseconds up to an hour
+SUB_BUCKET_BITS = 6
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_SUB_BUCKETS = SUB_BUCKETS // 2
+MAX_TRACKABLE_US = 3600 * 1_000_000
+
+# Stages timed on the voice path
+STAGES = ('sync_classify', 'async_plan', 'prospect_generation', 'stt', 'tts',
+          'persona_refill', 'first_turn_warm', 'first_turn_cold')
+
+REPORTED_PERCENTILES = (50, 95, 99)
+PUBLISH_TTL = 24 * 3600  # Seconds a worker's published snapshot is kept
+
+
+def bucket_index(value_us: int) -> int:
+    """Histogram bucket for a non-negative integer value"""
+    if value_us < SUB_BUCKETS:
+        return value_us
+    shift = value_us.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKETS + (shift - 1) * HALF_SUB_BUCKETS + (value_us >> shift) - HALF_SUB_BUCKETS
+
+
+def bucket_bounds(index: int):
+    """[lower, upper) value range covered by a bucket"""
+    if index < SUB_BUCKETS:
+        return index, index + 1
+    shift = (index - SUB_BUCKETS) // HALF_SUB_BUCKETS + 1
+    mantissa = (index - SUB_BUCKETS) % HALF_SUB_BUCKETS + HALF_SUB_BUCKETS
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+BUCKET_COUNT = bucket_index(MAX_TRACKABLE_US) + 1
+
+
+@dataclass
+class HistogramSnapshot:
+    """Point-in-time histogram counts; mergeable and JSON-serializable"""
+    counts: List[int] = field(default_factory=lambda: [0] * BUCKET_COUNT)
+    count: int = 0
+    sum_us: int = 0
+    min_us: Optional[int] = None
+    max_us: Optional[int] = None
+    
+    def merge(self, other: 'HistogramSnapshot') -> 'HistogramSnapshot':
+        """Add another snapshot's samples into this one"""
+        for index, n in enumerate(other.counts):
+            if n:
+                self.counts[index] += n
+        self.count += other.count
+        self.sum_us += other.sum_us
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+        if other.max_us is not None:
+            self.max_us = other.max_us if self.max_us is None else max(self.max_us, other.max_us)
+        return self
+    
+    def percentile(self, q: float) -> Optional[float]:
+        """Value in milliseconds at percentile q (0-100), or None when empty"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                lower, upper = bucket_bounds(index)
+                value = min(max((lower + upper - 1) / 2, self.min_us), self.max_us)
+                return value / 1000
+        return self.max_us / 1000
+    
+    def mean(self) -> Optional[float]:
+        return self.sum_us / self.count / 1000 if self.count else None
+    
+    def summary(self) -> Dict:
+        summary = {'count': self.count, 'mean_ms': self.mean(),
+                   'min_ms': self.min_us / 1000 if self.min_us is not None else None,
+                   'max_ms': self.max_us / 1000 if self.max_us is not None else None}
+        for q in REPORTED_PERCENTILES:
+            summary[f'p{q}_ms'] = self.percentile(q)
+        return summary
+    
+    def to_dict(self) -> Dict:
+        return {
+            'buckets': {str(index): n for index, n in enumerate(self.counts) if n},
+            'count': self.count, 'sum_us': self.sum_us,
+            'min_us': self.min_us, 'max_us': self.max_us
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'HistogramSnapshot':
+        snapshot = cls(count=data['count'], sum_us=data['sum_us'],
+                       min_us=data.get('min_us'), max_us=data.get('max_us'))
+        for index, n in data['buckets'].items():
+            snapshot.counts[int(index)] = n
+        return snapshot
+
+
+class _HistogramShard:
+    """One thread's counts; only the owning thread writes to it"""
+    __slots__ = ('counts', 'count', 'sum_us', 'min_us', 'max_us')
+    
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.sum_us = 0
+        self.min_us = None
+        self.max_us = None
+    
+    def absorb(self, other: '_HistogramShard'):
+        for index, n in enumerate(other.counts):
+            if n:
+                self.counts[index] += n
+        self.count += other.count
+        self.sum_us += other.sum_us
+        if other.min_us is not None and (self.min_us is None or other.min_us < self.min_us):
+            self.min_us = other.min_us
+        if other.max_us is not None and (self.max_us is None or other.max_us > self.max_us):
+            self.max_us = other.max_us
+
+
+class _ThreadExit:
+    """Kept in a thread's local storage, which is cleared when the thread ends"""
+    __slots__ = ('__weakref__',)
+
+
+def _on_thread_exit(local: threading.local, callback, *args):
+    """Run callback(*args) once the calling thread has finished"""
+    marker = local.exit_marker = _ThreadExit()
+    weakref.finalize(marker, callback, *args)
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram with lock-free per-thread recording"""
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: Set[_HistogramShard] = set()  # Live threads only
+        self._retired = _HistogramShard()  # Samples from threads that have ended
+        self._shards_lock = threading.Lock()  # Taken on a thread's first sample and when it ends
+    
+    def _shard(self) -> _HistogramShard:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _HistogramShard()
+            with self._shards_lock:
+                self._shards.add(shard)
+            _on_thread_exit(self._local, self._retire, shard)
+        return shard
+    
+    def _retire(self, shard: _HistogramShard):
+        with self._shards_lock:
+            self._shards.discard(shard)
+            self._retired.absorb(shard)
+    
+    @property
+    def shard_count(self) -> int:
+        with self._shards_lock:
+            return len(self._shards)
+    
+    def record(self, latency_ms: float):
+        value_us = min(max(int(latency_ms * 1000), 0), MAX_TRACKABLE_US)
+        shard = self._shard()
+        shard.counts[bucket_index(value_us)] += 1
+        shard.count += 1
+        shard.sum_us += value_us
+        if shard.min_us is None or value_us < shard.min_us:
+            shard.min_us = value_us
+        if shard.max_us is None or value_us > shard.max_us:
+            shard.max_us = value_us
+    
+    def snapshot(self) -> HistogramSnapshot:
+        with self._shards_lock:
+            total = _HistogramShard()
+            total.absorb(self._retired)
+            for shard in self._shards:
+                total.absorb(shard)
+        return HistogramSnapshot(counts=total.counts, count=total.count, sum_us=total.sum_us,
+                                 min_us=total.min_us, max_us=total.max_us)
+
+
+@dataclass
+class MetricsSnapshot:
+    """Stage histograms plus event counters, from one or more workers"""
+    stages: Dict[str, HistogramSnapshot] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    workers: int = 1
+    
+    def merge(self, other: 'MetricsSnapshot') -> 'MetricsSnapshot':
+        for stage, histogram in other.stages.items():
+            self.stages.setdefault(stage, HistogramSnapshot()).merge(histogram)
+        for name, value in other.counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        self.workers += other.workers
+        return self
+    
+    def to_dict(self) -> Dict:
+        return {
+            'stages': {stage: histogram.to_dict() for stage, histogram in self.stages.items()},
+            'counters': dict(self.counters),
+            'workers': self.workers
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MetricsSnapshot':
+        return cls(
+            stages={stage: HistogramSnapshot.from_dict(h) for stage, h in data['stages'].items()},
+            counters=dict(data['counters']),
+            workers=data.get('workers', 1)
+        )
+    
+    def to_json(self) -> Dict:
+        """Readable summary: percentiles per stage, counters"""
+        return {
+            'workers': self.workers,
+            'stages': {stage: histogram.summary() for stage, histogram in sorted(self.stages.items())},
+            'counters': dict(sorted(self.counters.items()))
+        }
+    
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition: a summary per stage plus counters"""
+        lines = [
+            '# HELP coach_stage_latency_seconds Voice pipeline stage latency',
+            '# TYPE coach_stage_latency_seconds summary'
+        ]
+        for stage, histogram in sorted(self.stages.items()):
+            for q in REPORTED_PERCENTILES:
+                value = histogram.percentile(q)
+                if value is not None:
+                    lines.append(f'coach_stage_latency_seconds{{stage="{stage}",quantile="{q / 100}"}} {value / 1000:.6f}')
+            lines.append(f'coach_stage_latency_seconds_sum{{stage="{stage}"}} {histogram.sum_us / 1e6:.6f}')
+            lines.append(f'coach_stage_latency_seconds_count{{stage="{stage}"}} {histogram.count}')
+        lines += [
+            '# HELP coach_events_total Voice pipeline events (cache hits, LLM escalations, ...)',
+            '# TYPE coach_events_total counter'
+        ]
+        for name, value in sorted(self.counters.items()):
+            lines.append(f'coach_events_total{{event="{name}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
 
 class CoachMetrics:
     """Track Coach decisions and state changes for observability"""
@@ -16,15 +273,89 @@ class CoachMetrics:
     MAX_LOG_SIZE = 1000  # Prevent unbounded memory growth
     
     def __init__(self):
-        self.decisions_log = []
-        self.state_changes_log = []
+        self.decisions_log = deque(maxlen=self.MAX_LOG_SIZE)
+        self.state_changes_log = deque(maxlen=self.MAX_LOG_SIZE)
+        self._histograms: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in STAGES}
+        self._histograms_lock = threading.Lock()
+        self._local = threading.local()
+        self._counter_shards: Dict[int, Dict[str, int]] = {}  # Live threads only, by id()
+        self._retired_counters: Dict[str, int] = {}  # Counts from threads that have ended
+        self._counter_shards_lock = threading.Lock()
+    
+    # === LATENCY AND EVENT COUNTS ===
     
-    def _trim_logs(self):
-        """Trim logs to prevent memory leak"""
-        if len(self.decisions_log) > self.MAX_LOG_SIZE:
-            self.decisions_log = self.decisions_log[-self.MAX_LOG_SIZE:]
-        if len(self.state_changes_log) > self.MAX_LOG_SIZE:
-            self.state_changes_log = self.state_changes_log[-self.MAX_LOG_SIZE:]
+    def record_latency(self, stage: str, latency_ms: float):
+        """Record one stage timing in milliseconds"""
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._histograms_lock:
+                histogram = self._histograms.setdefault(stage, LatencyHistogram())
+        histogram.record(latency_ms)
+    
+    @contextmanager
+    def time_stage(self, stage: str):
+        """Time the enclosed block into the stage's histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_latency(stage, (time.perf_counter() - start) * 1000)
+    
+    def increment(self, event: str, amount: int = 1):
+        """Count an event (e.g. 'tts_cache_hit', 'llm_escalation')"""
+        counters = getattr(self._local, 'counters', None)
+        if counters is None:
+            counters = self._local.counters = {}
+            with self._counter_shards_lock:
+                self._counter_shards[id(counters)] = counters
+            _on_thread_exit(self._local, self._retire_counters, counters)
+        counters[event] = counters.get(event, 0) + amount
+    
+    def _retire_counters(self, counters: Dict[str, int]):
+        with self._counter_shards_lock:
+            self._counter_shards.pop(id(counters), None)
+            for name, value in counters.items():
+                self._retired_counters[name] = self._retired_counters.get(name, 0) + value
+    
+    def snapshot(self) -> MetricsSnapshot:
+        """This worker's metrics so far"""
+        with self._histograms_lock:
+            histograms = dict(self._histograms)
+        with self._counter_shards_lock:
+            counters = dict(self._retired_counters)
+            for shard in self._counter_shards.values():
+                for name, value in list(shard.items()):
+                    counters[name] = counters.get(name, 0) + value
+        return MetricsSnapshot(
+            stages={stage: histogram.snapshot() for stage, histogram in histograms.items()},
+            counters=counters
+        )
+    
+    def publish(self, client, prefix: str = 'coach_metrics', worker_id: Optional[str] = None):
+        """Store this worker's snapshot in the shared store for collect()"""
+        worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        client.execute('SET', f"{prefix}:worker:{worker_id}", json.dumps(self.snapshot().to_dict()),
+                       'PX', PUBLISH_TTL * 1000)
+        client.execute('SADD', f"{prefix}:workers", worker_id)
+    
+    @staticmethod
+    def collect(client, prefix: str = 'coach_metrics') -> Optional[MetricsSnapshot]:
+        """Merge every worker's published snapshot (None if nothing published)"""
+        merged = None
+        for worker_id in client.execute('SMEMBERS', f"{prefix}:workers") or []:
+            raw = client.execute('GET', f"{prefix}:worker:{worker_id}")
+            if raw is None:
+                # Expired worker; drop it from the index
+                client.execute('SREM', f"{prefix}:workers", worker_id)
+                continue
+            snapshot = MetricsSnapshot.from_dict(json.loads(raw))
+            if merged is None:
+                merged = snapshot
+            else:
+                merged.merge(snapshot)
+        return merged
+    
+    # === DECISION LOGS ===
     
     def log_decision(
         self,
@@ -48,7 +379,6 @@ class CoachMetrics:
         }
         
         self.decisions_log.append(entry)
-        self._trim_logs()
         
         # Structured log for easy parsing
         logger.info(
@@ -81,7 +411,6 @@ class CoachMetrics:
         }
         
         self.state_changes_log.append(entry)
-        self._trim_logs()
         
         logger.info(
             f"[StateChange] session={session_id} turn={turn} "
@@ -200,8 +529,31 @@ class CoachMetrics:
 
 # Global metrics instance
 _metrics = CoachMetrics()
+_publisher_started = False
+_publisher_lock = threading.Lock()
+
+PUBLISH_INTERVAL = 30.0  # Seconds between snapshot publishes to the shared store
+
+
+def _publish_loop(client):
+    while True:
+        time.sleep(PUBLISH_INTERVAL)
+        try:
+            _metrics.publish(client)
+        except Exception as e:
+            logger.warning(f"[CoachMetrics] Publish failed: {e}")
 
 
 def get_metrics() -> CoachMetrics:
-    """Get global metrics instance"""
+    """Get global metrics instance (publishing to the shared store if configured)"""
+    global _publisher_started
+    if not _publisher_started:
+        from app.utils.redis_client import get_shared_client
+        with _publisher_lock:
+            if not _publisher_started:
+                _publisher_started = True
+                client = get_shared_client()
+                if client is not None:
+                    threading.Thread(target=_publish_loop, args=(client,), daemon=True,
+                                     name='coach-metrics-publish').start()
     return _metrics
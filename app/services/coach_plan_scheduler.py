@@ -0,0 +1,210 @@
+"""
+Coach Plan Scheduler - Per-session coalescing for the async planner
+
+The client requests a strategic plan after every turn, so quick exchanges
+used to stack several overlapping LLM plans for one session, each racing
+to patch SessionState. The scheduler runs plans through a small pool with:
+- At most one in-flight plan per session
+- A single queued slot per session; a newer request supersedes the queued
+  one, and its callers receive the newer plan instead
+- Stale plans (state moved past the turn they were planned for) discarded
+  instead of applied
+- Counters for submitted, coalesced, superseded, applied and stale plans
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+import logging
+import threading
+
+from app.services.coach_async_planner import StrategicPlan, get_async_planner
+from app.services.session_state import CallPhase, SessionState, get_session_state
+
+logger = logging.getLogger(__name__)
+
+PLAN_WORKERS = 4  # Sessions planned concurrently
+PLAN_TIMEOUT = 30.0  # Seconds a caller waits for its plan
+
+
+@dataclass
+class PlanOutcome:
+    """What happened to the plan a request was answered with"""
+    plan: StrategicPlan
+    base_turn: int  # Session turn the plan was made for
+    applied: bool  # False when the session moved on before the plan finished
+
+
+@dataclass
+class _PlanRequest:
+    base_turn: int
+    kwargs: Dict[str, Any]
+    future: Future = field(default_factory=Future)
+
+
+@dataclass
+class _SessionSlot:
+    running: bool = False
+    queued: Optional[_PlanRequest] = None
+
+
+def apply_plan_to_state(session_state: SessionState, plan: StrategicPlan, base_turn: int) -> None:
+    """Apply a strategic plan to session state (affects FUTURE turns only)"""
+    pressure_level = session_state.pressure_level.value if session_state.pressure_level else 0.5
+
+    # Try phase transition if suggested
+    if plan.suggested_phase:
+        try:
+            target_phase = CallPhase(plan.suggested_phase)
+            transitioned = session_state.try_transition_phase(
+                target_phase,
+                confidence=plan.phase_confidence,
+                min_confidence=0.7
+            )
+            logger.info(f"[Coach] Phase transition attempt: {plan.suggested_phase} -> {transitioned}")
+        except ValueError:
+            logger.warning(f"[Coach] Invalid phase: {plan.suggested_phase}")
+
+    # Set pending trap
+    if plan.pending_trap:
+        session_state.pending_trap = plan.pending_trap
+
+    # Adjust pressure
+    if plan.pressure_adjustment != 0:
+        new_pressure = max(0.0, min(1.0, pressure_level + plan.pressure_adjustment))
+        session_state.pressure_level = type(session_state.pressure_level)(
+            value=new_pressure,
+            ttl_turns=4,
+            set_at_turn=base_turn
+        ) if session_state.pressure_level else None
+
+    # Add detected facts
+    for key, value in plan.facts_detected.items():
+        session_state.add_fact(key, value)
+
+    # Set objection if suggested
+    if plan.objection_to_introduce:
+        session_state.active_objection = type(session_state.active_objection)(
+            value=plan.objection_to_introduce,
+            ttl_turns=3,
+            set_at_turn=base_turn
+        ) if session_state.active_objection else None
+
+
+class CoachPlanScheduler:
+    """
+    Runs planner calls with per-session coalescing.
+    planner needs a plan(**kwargs) -> StrategicPlan method; get_state and
+    apply_plan are injectable so tests can run without Flask or an LLM.
+    """
+
+    def __init__(
+        self,
+        planner=None,
+        get_state: Callable[[str], SessionState] = get_session_state,
+        apply_plan: Callable[[SessionState, StrategicPlan, int], None] = apply_plan_to_state,
+        max_workers: int = PLAN_WORKERS
+    ):
+        self._planner = planner
+        self.get_state = get_state
+        self.apply_plan = apply_plan
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='coach-plan')
+        self._slots: Dict[str, _SessionSlot] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'submitted': 0,
+            'started': 0,
+            'coalesced': 0,  # Queued behind an in-flight plan instead of starting one
+            'superseded': 0,  # Queued request replaced by a newer turn before running
+            'applied': 0,
+            'stale': 0,  # Finished after the session moved past its base turn
+            'failed': 0
+        }
+
+    @property
+    def planner(self):
+        if self._planner is None:
+            self._planner = get_async_planner()
+        return self._planner
+
+    def submit(self, session_id: str, base_turn: int, **plan_kwargs) -> Future:
+        """
+        Request a plan for session_id at base_turn.
+        The future resolves to a PlanOutcome; if this request is superseded
+        before it runs, it resolves with the newer request's outcome.
+        """
+        with self._lock:
+            self.stats['submitted'] += 1
+            slot = self._slots.setdefault(session_id, _SessionSlot())
+
+            if not slot.running:
+                slot.running = True
+                self.stats['started'] += 1
+                request = _PlanRequest(base_turn, plan_kwargs)
+                self._executor.submit(self._run, session_id, request)
+                return request.future
+
+            self.stats['coalesced'] += 1
+            if slot.queued is None:
+                slot.queued = _PlanRequest(base_turn, plan_kwargs)
+            else:
+                # Latest turn wins; earlier callers share its future
+                self.stats['superseded'] += 1
+                slot.queued.base_turn = base_turn
+                slot.queued.kwargs = plan_kwargs
+            return slot.queued.future
+
+    def plan(self, session_id: str, base_turn: int, timeout: float = PLAN_TIMEOUT, **plan_kwargs) -> PlanOutcome:
+        """Blocking submit()"""
+        return self.submit(session_id, base_turn, **plan_kwargs).result(timeout=timeout)
+
+    def _run(self, session_id: str, request: _PlanRequest):
+        # Drain this session's slot: run the request, then whatever queued behind it
+        while request is not None:
+            try:
+                request.future.set_result(self._plan_and_apply(session_id, request))
+            except Exception as e:
+                logger.error(f"[PlanScheduler] Plan failed for {session_id}: {e}")
+                with self._lock:
+                    self.stats['failed'] += 1
+                request.future.set_exception(e)
+
+            with self._lock:
+                slot = self._slots[session_id]
+                request, slot.queued = slot.queued, None
+                if request is None:
+                    del self._slots[session_id]
+                else:
+                    self.stats['started'] += 1
+
+    def _plan_and_apply(self, session_id: str, request: _PlanRequest) -> PlanOutcome:
+        plan = self.planner.plan(current_turn=request.base_turn, **request.kwargs)
+        session_state = self.get_state(session_id)
+
+        with session_state.lock:
+            if session_state.current_turn > request.base_turn:
+                with self._lock:
+                    self.stats['stale'] += 1
+                logger.info(f"[PlanScheduler] Discarded stale plan for {session_id}: "
+                            f"turn {request.base_turn} < {session_state.current_turn}")
+                return PlanOutcome(plan=plan, base_turn=request.base_turn, applied=False)
+
+            self.apply_plan(session_state, plan, request.base_turn)
+
+        with self._lock:
+            self.stats['applied'] += 1
+        return PlanOutcome(plan=plan, base_turn=request.base_turn, applied=True)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, 'sessions_in_flight': len(self._slots)}
+
+
+# Singleton instance
+_scheduler = None
+
+def get_plan_scheduler() -> CoachPlanScheduler:
+    """Get singleton scheduler instance"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = CoachPlanScheduler()
+    return _scheduler
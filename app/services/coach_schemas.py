@@ -45,6 +45,21 @@ def validate_constraint(constraint: Any) -> bool:
     return True
 
 
+def validate_decision(value: Any) -> str:
+    """Validate the decision field; usable as soon as it streams in"""
+    decision = str(value).lower()
+    if decision not in ['persist', 'intervene']:
+        raise ValueError(f"Invalid decision: {decision}")
+    return decision
+
+
+def validate_confidence(value: Any) -> float:
+    """Validate the confidence field; usable as soon as it streams in"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not (0.0 <= value <= 1.0):
+        raise ValueError(f"Invalid confidence: {value}")
+    return float(value)
+
+
 def validate_coach_response(data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Validate and sanitize Coach LLM response
@@ -54,14 +69,10 @@ def validate_coach_response(data: Dict[str, Any]) -> Dict[str, Any]:
     if 'decision' not in data:
         raise ValueError("Missing 'decision' field")
     
-    decision = str(data['decision']).lower()
-    if decision not in ['persist', 'intervene']:
-        raise ValueError(f"Invalid decision: {decision}")
+    decision = validate_decision(data['decision'])
     
     # Validate confidence
-    confidence = data.get('confidence', 0.5)
-    if not isinstance(confidence, (int, float)) or not (0.0 <= confidence <= 1.0):
-        raise ValueError(f"Invalid confidence: {confidence}")
+    confidence = validate_confidence(data.get('confidence', 0.5))
     
     # Validate state_patch if present
     state_patch = data.get('state_patch', {})
@@ -118,8 +129,40 @@ def validate_coach_response(data: Dict[str, Any]) -> Dict[str, Any]:
     
     return {
         'decision': decision,
-        'confidence': float(confidence),
+        'confidence': confidence,
         'reasoning': reasoning,
         'state_patch': sanitized_patch,
         'one_shot_line': one_shot
     }
+
+
+def validate_plan_response(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate and sanitize async planner response
+    Returns sanitized data or raises ValueError
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Plan must be a JSON object")
+    
+    def optional_str(key: str) -> Optional[str]:
+        value = data.get(key)
+        return value if isinstance(value, str) and value else None
+    
+    try:
+        phase_confidence = float(data.get('phase_confidence', 0.0))
+        pressure_adjustment = float(data.get('pressure_adjustment', 0.0))
+    except (TypeError, ValueError):
+        raise ValueError("phase_confidence and pressure_adjustment must be numbers")
+    
+    facts = data.get('facts_detected', {})
+    reasoning = data.get('reasoning', 'No reasoning provided')
+    
+    return {
+        'suggested_phase': optional_str('suggested_phase'),
+        'phase_confidence': min(1.0, max(0.0, phase_confidence)),
+        'pending_trap': optional_str('pending_trap'),
+        'pressure_adjustment': min(1.0, max(-1.0, pressure_adjustment)),
+        'objection_to_introduce': optional_str('objection_to_introduce'),
+        'reasoning': reasoning if isinstance(reasoning, str) else str(reasoning),
+        'facts_detected': facts if isinstance(facts, dict) else {}
+    }
@@ -0,0 +1,164 @@
+"""
+Company Profile Store - Indexed, cached access to business_profiles/*.json
+
+The company route used to list the whole profile directory and re-parse
+the requested file on every request. This store:
+- Indexes the directory once (one os.scandir, names and stat only)
+- Parses a profile on first use and keeps the parsed object, its
+  serialized JSON body and a content ETag
+- Re-stats a cached entry at most every MTIME_CHECK_INTERVAL seconds and
+  reloads it when its mtime or size changed; deleted files drop out
+- Resolves ids missing from the index with a single stat of the expected
+  path, so profiles added later are found without rescanning
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MTIME_CHECK_INTERVAL = 1.0  # Seconds between stat() calls for a cached profile
+PROFILE_SUFFIX = '.json'
+
+_VALID_ID = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')  # No separators or leading dots
+
+
+@dataclass
+class CompanyProfile:
+    company_id: str
+    data: Any
+    body: bytes  # Serialized JSON, ready to send
+    etag: str
+    mtime_ns: int
+    size: int
+
+
+@dataclass
+class _IndexEntry:
+    path: str
+    mtime_ns: int
+    size: int
+    profile: Optional[CompanyProfile] = None
+    checked_at: float = 0.0
+
+
+class CompanyProfileStore:
+    """In-memory index and parse cache for one profile directory"""
+
+    def __init__(self, directory: str, check_interval: float = MTIME_CHECK_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.directory = os.fspath(directory)
+        self.check_interval = check_interval
+        self._clock = clock
+        self._index: Dict[str, _IndexEntry] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'loads': 0, 'reloads': 0, 'misses': 0}
+        self.rebuild_index()
+
+    def rebuild_index(self):
+        """Scan the directory once and replace the index (parsed entries are dropped)"""
+        index = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(PROFILE_SUFFIX) and entry.is_file():
+                        stat = entry.stat()
+                        company_id = entry.name[:-len(PROFILE_SUFFIX)]
+                        index[company_id] = _IndexEntry(entry.path, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            logger.warning(f"[CompanyProfiles] Profile directory missing: {self.directory}")
+        with self._lock:
+            self._index = index
+        logger.info(f"[CompanyProfiles] Indexed {len(index)} profiles in {self.directory}")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def ids(self) -> Iterable[str]:
+        return list(self._index)
+
+    @staticmethod
+    def normalize_id(company_id: str) -> Optional[str]:
+        """Strip a trailing .json; None for ids that could escape the directory"""
+        if company_id.endswith(PROFILE_SUFFIX):
+            company_id = company_id[:-len(PROFILE_SUFFIX)]
+        return company_id if _VALID_ID.match(company_id) else None
+
+    def get(self, company_id: str) -> Optional[CompanyProfile]:
+        """
+        Parsed profile for company_id, or None if there is no such file.
+        Raises json.JSONDecodeError for a file that is not valid JSON; it
+        is parsed again on the next request.
+        """
+        company_id = self.normalize_id(company_id)
+        if company_id is None:
+            return None
+
+        entry = self._index.get(company_id)
+        now = self._clock()
+        if entry is not None and entry.profile is not None and now - entry.checked_at < self.check_interval:
+            self.stats['hits'] += 1
+            return entry.profile
+
+        path = entry.path if entry is not None else os.path.join(self.directory, company_id + PROFILE_SUFFIX)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            if entry is not None:
+                with self._lock:
+                    self._index.pop(company_id, None)
+            self.stats['misses'] += 1
+            return None
+
+        if entry is None:
+            entry = _IndexEntry(path, stat.st_mtime_ns, stat.st_size)
+            with self._lock:
+                entry = self._index.setdefault(company_id, entry)
+
+        profile = entry.profile
+        if profile is not None and profile.mtime_ns == stat.st_mtime_ns and profile.size == stat.st_size:
+            entry.checked_at = now
+            self.stats['hits'] += 1
+            return profile
+
+        self.stats['reloads' if profile is not None else 'loads'] += 1
+        profile = self._load(company_id, path)
+        entry.mtime_ns, entry.size = profile.mtime_ns, profile.size
+        entry.profile, entry.checked_at = profile, now
+        return profile
+
+    def _load(self, company_id: str, path: str) -> CompanyProfile:
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            raw = f.read()
+        data = json.loads(raw)
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        etag = hashlib.sha1(raw).hexdigest()[:20]
+        return CompanyProfile(company_id, data, body, etag, stat.st_mtime_ns, stat.st_size)
+
+    def get_stats(self) -> Dict[str, int]:
+        cached = sum(1 for entry in list(self._index.values()) if entry.profile is not None)
+        return {**self.stats, 'indexed': len(self._index), 'cached': cached}
+
+
+# Shared instance
+_store = None
+_store_lock = threading.Lock()
+
+def get_company_profile_store(directory: Optional[str] = None) -> CompanyProfileStore:
+    """Process-wide store; the directory applies on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if directory is None:
+                    directory = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                             'business_profiles')
+                _store = CompanyProfileStore(directory)
+    return _store
@@ -8,7 +8,10 @@ This service prevents AI bias across ALL aspects of persona generation:
 import random
 from typing import Dict, List, Set, Optional, Tuple
 from collections import defaultdict
-import time
+import threading
+
+from app.services.generation_history import GenerationHistory, SharedGenerationHistory
+from app.utils.redis_client import get_shared_client
 
 class ComprehensiveBiasPrevention:
     """
@@ -17,8 +20,9 @@ class ComprehensiveBiasPrevention:
     
     # Track usage to prevent bias patterns
     _usage_tracker = defaultdict(int)
-    _generation_history = []
-    _max_history = 1000
+    _history = None  # GenerationHistory, built on first use
+    _history_lock = threading.Lock()
+    HISTORY_WINDOWS = (3, 10, 50)  # Avoidance windows and the bias-report window
     
     # BANNED OVERUSED PATTERNS
     BANNED_ROLES = {
@@ -184,11 +188,8 @@ class ComprehensiveBiasPrevention:
         if not choices:
             raise ValueError(f"choices list for category '{category}' cannot be empty")
         
-        # Get recent selections for this category
-        recent_selections = [
-            entry[category] for entry in cls._generation_history[-recent_count:]
-            if category in entry
-        ]
+        # Get recent selections for this category (maintained counters, no history scan)
+        recent_selections = cls.get_history().counts(category, cls._history_window(recent_count))
         
         # Prefer choices that haven't been used recently
         available_choices = [choice for choice in choices if choice not in recent_selections]
@@ -199,17 +200,50 @@ class ComprehensiveBiasPrevention:
         
         return random.choice(available_choices)
     
+    @classmethod
+    def get_history(cls) -> GenerationHistory:
+        """Generation history, shared across workers when SHARED_STATE_URL is set."""
+        if cls._history is None:
+            with cls._history_lock:
+                if cls._history is None:
+                    client = get_shared_client()
+                    if client is not None:
+                        cls._history = SharedGenerationHistory(client, windows=cls.HISTORY_WINDOWS)
+                    else:
+                        cls._history = GenerationHistory(cls.HISTORY_WINDOWS)
+        return cls._history
+    
+    @classmethod
+    def _history_window(cls, recent_count: int) -> int:
+        """Smallest tracked window covering recent_count generations."""
+        for window in cls.HISTORY_WINDOWS:
+            if window >= recent_count:
+                return window
+        return cls.HISTORY_WINDOWS[-1]
+    
+    @classmethod
+    def reset_history(cls) -> None:
+        """Clear generation history and usage counters (testing/development)."""
+        cls.get_history().clear()
+        cls._usage_tracker.clear()
+    
     @classmethod
     def generate_bias_free_persona_framework(cls, 
                                            industry_context: str = None,
                                            target_market: str = None,
                                            complexity_level: str = "intermediate",
-                                           product_service: str = None) -> Dict[str, any]:
+                                           product_service: str = None,
+                                           industry_category: str = None,
+                                           record: bool = True) -> Dict[str, any]:
         """
         Generate a comprehensive persona framework that avoids all bias patterns.
+        
+        industry_category pins the industry to one INDUSTRY_DIVERSIFICATION
+        category. With record=False the framework is not added to the
+        generation history; the caller records it once it is actually used
+        (see PersonaPool).
         """
         from app.services.demographic_names import DemographicNameService
-        from app.services.contextual_fear_generator import ContextualFearGenerator
         
         framework = {}
         
@@ -283,7 +317,10 @@ class ComprehensiveBiasPrevention:
         
         # 7. DIVERSE INDUSTRY GENERATION (with target market validation)
         try:
-            if industry_context:
+            if industry_category in cls.INDUSTRY_DIVERSIFICATION:
+                industry_cat = industry_category
+                specific_industry = cls._anti_bias_selection("industry", cls.INDUSTRY_DIVERSIFICATION[industry_cat])
+            elif industry_context:
                 industry_cat = cls._map_industry_to_category(industry_context)
                 specific_industry = cls._anti_bias_selection("industry", cls.INDUSTRY_DIVERSIFICATION.get(industry_cat, [industry_context]))
             else:
@@ -338,38 +375,58 @@ class ComprehensiveBiasPrevention:
         
         # 11. CONTEXTUAL FEARS AND OBJECTIONS (if product context provided)
         if product_service:
-            fear_analysis = ContextualFearGenerator.generate_contextual_fears(
-                product_service=product_service,
-                persona_context={
-                    "name": framework["name"],
-                    "role": framework["role"],
-                    "industry": framework["industry"],
-                    "age_range": framework["age_range"]
-                },
-                personal_situation=None  # Could be enhanced based on framework data
-            )
-            framework["contextual_fears"] = fear_analysis
-            
-            # Add conversation flow guidance to prevent robot behavior
-            framework["conversation_flow_guidance"] = ContextualFearGenerator.create_conversation_guidance_prompt(
-                fear_analysis.get("contextual_fears", []),
-                {
-                    "name": framework["name"],
-                    "role": framework["role"],
-                    "industry": framework["industry"]
-                }
-            )
+            cls.attach_product_context(framework, product_service)
         
         # 12. RECORD GENERATION FOR BIAS TRACKING
-        cls._record_generation(framework)
+        if record:
+            cls.record_generation(framework)
         
         return framework
     
     @classmethod
-    def _record_generation(cls, framework: Dict[str, any]) -> None:
+    def attach_product_context(cls, framework: Dict[str, any], product_service: str) -> Dict[str, any]:
+        """Add product-specific contextual fears and conversation guidance to a framework."""
+        from app.services.contextual_fear_generator import ContextualFearGenerator
+        
+        fear_analysis = ContextualFearGenerator.generate_contextual_fears(
+            product_service=product_service,
+            persona_context={
+                "name": framework["name"],
+                "role": framework["role"],
+                "industry": framework["industry"],
+                "age_range": framework["age_range"]
+            },
+            personal_situation=None  # Could be enhanced based on framework data
+        )
+        framework["contextual_fears"] = fear_analysis
+        
+        # Add conversation flow guidance to prevent robot behavior
+        framework["conversation_flow_guidance"] = ContextualFearGenerator.create_conversation_guidance_prompt(
+            fear_analysis.get("contextual_fears", []),
+            {
+                "name": framework["name"],
+                "role": framework["role"],
+                "industry": framework["industry"]
+            }
+        )
+        return framework
+    
+    @classmethod
+    def record_generation(cls, framework: Dict[str, any]) -> None:
         """Record this generation for bias tracking."""
-        record = {
-            "timestamp": time.time(),
+        record = cls.generation_record(framework)
+        
+        cls.get_history().record(record)
+        
+        # Update usage tracker
+        for key, value in record.items():
+            if value:
+                cls._usage_tracker[f"{key}:{value}"] += 1
+    
+    @classmethod
+    def generation_record(cls, framework: Dict[str, any]) -> Dict[str, str]:
+        """The history fields tracked for a framework."""
+        return {
             "cultural_key": framework.get("cultural_key"),
             "gender": framework.get("gender"),
             "role_category": framework.get("role_level"),
@@ -383,36 +440,28 @@ class ComprehensiveBiasPrevention:
             "decision_authority": framework.get("decision_authority"),
             "buyer_type": framework.get("buyer_type")
         }
-        
-        cls._generation_history.append(record)
-        
-        # Keep history manageable
-        if len(cls._generation_history) > cls._max_history:
-            cls._generation_history = cls._generation_history[-cls._max_history:]
-        
-        # Update usage tracker
-        for key, value in record.items():
-            if key != "timestamp" and value:
-                cls._usage_tracker[f"{key}:{value}"] += 1
+    
+    @classmethod
+    def select_industry_category(cls, target_market: str = None, product_service: str = None) -> str:
+        """Anti-bias pick of an industry category suited to the context (rule-based, no AI call)."""
+        suitable = cls._get_rule_based_suitable_industries(target_market, product_service) or cls.INDUSTRY_DIVERSIFICATION
+        return cls._anti_bias_selection("industry_category", list(suitable))
     
     @classmethod
     def get_bias_report(cls) -> Dict[str, any]:
         """Generate a bias analysis report."""
-        if not cls._generation_history:
+        history = cls.get_history()
+        if not history.total:
             return {"status": "No generations recorded yet"}
         
-        recent_count = min(50, len(cls._generation_history))
-        recent_generations = cls._generation_history[-recent_count:]
-        
-        # Analyze distribution patterns
+        # Analyze distribution patterns over the last 50 generations
+        report_window = cls.HISTORY_WINDOWS[-1]
         analysis = {}
         
         for field in ["cultural_key", "gender", "role_category", "age_category"]:
-            values = [gen.get(field) for gen in recent_generations if gen.get(field)]
-            if values:
-                from collections import Counter
-                distribution = Counter(values)
-                total = len(values)
+            distribution = history.counts(field, report_window)
+            if distribution:
+                total = sum(distribution.values())
                 percentages = {k: (v/total)*100 for k, v in distribution.items()}
                 
                 # Flag if any single value is >40% (potential bias)
@@ -427,7 +476,7 @@ class ComprehensiveBiasPrevention:
                 }
         
         return {
-            "total_generations": len(cls._generation_history),
+            "total_generations": history.total,
             "recent_analysis": analysis,
             "bias_detected": any(field_data.get("is_biased", False) for field_data in analysis.values())
         }
@@ -885,7 +934,7 @@ BANNED: Never be an thoughtful robot. Show human emotions and vulnerability."""
         framework["business_context"] = "B2C" if target_constraints.get("is_b2c") else "B2B"
         
         # 13. RECORD GENERATION FOR BIAS TRACKING
-        cls._record_generation(framework)
+        cls.record_generation(framework)
         
         return framework
     
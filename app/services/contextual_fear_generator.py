@@ -6,10 +6,40 @@ It analyzes the product/service context and generates authentic human concerns.
 """
 
 import random
+import threading
 import time
 from typing import Dict, List, Optional, Tuple
 import re
-from collections import defaultdict
+from collections import defaultdict, deque
+from functools import lru_cache
+
+_AI_RELATED_TERMS = re.compile(r"artificial intelligence|machine learning|automated", re.IGNORECASE)
+
+
+class _ManifestationRecency:
+    """
+    Selection number at which each manifestation of one fear type was last
+    picked, so recency checks need no scan of the shared history.
+    """
+    
+    __slots__ = ("source", "last_used")
+    
+    def __init__(self, manifestations: List[str]):
+        self.source = manifestations
+        self.last_used: Dict[str, Optional[int]] = dict.fromkeys(manifestations)
+    
+    def serves(self, manifestations: List[str]) -> bool:
+        return manifestations is self.source or manifestations == self.source
+    
+    def choose(self, rng: random.Random, selection: int, recent_count: int) -> str:
+        # Skip anything picked within the last recent_count selections of any fear type;
+        # if every option is that recent, all of them are eligible again
+        horizon = selection - recent_count
+        candidates = [m for m, used in self.last_used.items() if used is None or used < horizon]
+        selected = rng.choice(candidates or list(self.last_used))
+        self.last_used[selected] = selection
+        return selected
+
 
 class ContextualFearGenerator:
     """
@@ -21,8 +51,23 @@ class ContextualFearGenerator:
     
     # Track fear usage to prevent repetitive patterns
     _fear_usage_history = defaultdict(int)
-    _manifestation_history = []
     _max_history = 100
+    _manifestation_history = deque(maxlen=_max_history)
+    
+    # Manifestations picked within this many selections (all fear types) are skipped
+    RECENT_SELECTIONS = 20
+    _manifestation_recency: Dict[str, "_ManifestationRecency"] = {}
+    _selection_count = 0
+    _lock = threading.Lock()
+    
+    # Dedicated generator so selection never reseeds or shares the global random module
+    _rng = random.Random()
+    
+    # Compiled from FEAR_ARCHETYPES triggers by _build_trigger_matcher()
+    _trigger_pattern: Optional[re.Pattern] = None
+    _trigger_fears: Dict[str, Tuple[str, ...]] = {}
+    _ai_fears: Tuple[str, ...] = ()
+    _cached_trigger_scores = None
     
     # Core fear categories that combine with context
     FEAR_ARCHETYPES = {
@@ -197,38 +242,29 @@ class ContextualFearGenerator:
     }
     
     @classmethod
-    def _anti_bias_fear_selection(cls, fear_type: str, manifestations: List[str], recent_count: int = 20) -> str:
+    def seed(cls, seed=None):
+        """Seed the generator's own random source (for reproducible tests)."""
+        cls._rng.seed(seed)
+    
+    @classmethod
+    def _anti_bias_fear_selection(cls, fear_type: str, manifestations: List[str],
+                                  recent_count: int = RECENT_SELECTIONS) -> str:
         """
         Select fear manifestation while avoiding recently used options to prevent repetitive patterns.
         """
-        # Get recent manifestations for this fear type
-        recent_manifestations = [
-            entry for entry in cls._manifestation_history[-recent_count:]
-            if entry.get("fear_type") == fear_type
-        ]
-        recent_texts = [entry["manifestation"] for entry in recent_manifestations]
-        
-        # Prefer manifestations that haven't been used recently
-        available_manifestations = [m for m in manifestations if m not in recent_texts]
-        
-        # If all manifestations have been used recently, use the least recently used
-        if not available_manifestations:
-            available_manifestations = manifestations
-        
-        # Add randomness with time-based seed to ensure variety
-        random.seed(int(time.time() * 1000) % 10000)
-        selected = random.choice(available_manifestations)
-        
-        # Record this selection
-        cls._manifestation_history.append({
-            "fear_type": fear_type,
-            "manifestation": selected,
-            "timestamp": time.time()
-        })
-        
-        # Keep history manageable
-        if len(cls._manifestation_history) > cls._max_history:
-            cls._manifestation_history = cls._manifestation_history[-cls._max_history:]
+        with cls._lock:
+            recency = cls._manifestation_recency.get(fear_type)
+            if recency is None or not recency.serves(manifestations):
+                recency = cls._manifestation_recency[fear_type] = _ManifestationRecency(manifestations)
+            selected = recency.choose(cls._rng, cls._selection_count, recent_count)
+            cls._selection_count += 1
+            
+            # Record this selection
+            cls._manifestation_history.append({
+                "fear_type": fear_type,
+                "manifestation": selected,
+                "timestamp": time.time()
+            })
         
         return selected
     
@@ -259,12 +295,9 @@ class ContextualFearGenerator:
         fear_types = list(adjusted_fears.keys())
         weights = list(adjusted_fears.values())
         
-        # Use time-based randomization
-        random.seed(int(time.time() * 1000) % 10000)
-        
         # Select primary fear
         if fear_types:
-            primary_fear = random.choices(fear_types, weights=weights, k=1)[0]
+            primary_fear = cls._rng.choices(fear_types, weights=weights, k=1)[0]
             selected_fears.append(primary_fear)
             cls._fear_usage_history[primary_fear] += 1
             
@@ -272,9 +305,9 @@ class ContextualFearGenerator:
             remaining_fears = [(f, w) for f, w in zip(fear_types, weights) if f != primary_fear]
             
             # Select secondary fear if available
-            if remaining_fears and random.random() > 0.3:  # 70% chance of secondary fear
+            if remaining_fears and cls._rng.random() > 0.3:  # 70% chance of secondary fear
                 secondary_types, secondary_weights = zip(*remaining_fears)
-                secondary_fear = random.choices(secondary_types, weights=secondary_weights, k=1)[0]
+                secondary_fear = cls._rng.choices(secondary_types, weights=secondary_weights, k=1)[0]
                 selected_fears.append(secondary_fear)
                 cls._fear_usage_history[secondary_fear] += 1
         
@@ -325,27 +358,67 @@ class ContextualFearGenerator:
             "authentic_objections": authentic_objections
         }
     
+    @classmethod
+    def _build_trigger_matcher(cls):
+        """
+        Compile every archetype trigger into one word-boundary pattern.
+        Lowercase triggers match any case (and a plural "s" from four
+        letters up); all-caps
+        triggers ("AI", "ROI") only match as written.
+        """
+        trigger_fears = defaultdict(list)
+        ai_fears = []
+        for fear_type, fear_data in cls.FEAR_ARCHETYPES.items():
+            for trigger in dict.fromkeys(fear_data["triggers"]):
+                key = trigger if trigger.isupper() else trigger.lower()
+                trigger_fears[key].append(fear_type)
+                if trigger == "AI":
+                    ai_fears.append(fear_type)
+        
+        words = sorted((t for t in trigger_fears if not t.isupper()), key=lambda t: (-len(t), t))
+        plural = [t for t in words if len(t) >= 4]  # "new" must not match "news"
+        short = [t for t in words if len(t) < 4]
+        acronyms = sorted(t for t in trigger_fears if t.isupper())
+        alternatives = []
+        if plural:
+            alternatives.append("(?:" + "|".join(map(re.escape, plural)) + ")s?")
+        if short:
+            alternatives.append("|".join(map(re.escape, short)))
+        if acronyms:
+            alternatives.append("(?-i:" + "|".join(map(re.escape, acronyms)) + ")")
+        cls._trigger_pattern = re.compile(r"\b(?:" + "|".join(alternatives or ["(?!)"]) + r")\b", re.IGNORECASE)
+        cls._trigger_fears = {trigger: tuple(fears) for trigger, fears in trigger_fears.items()}
+        cls._ai_fears = tuple(ai_fears)
+        # Product descriptions repeat for every persona in a session
+        cls._cached_trigger_scores = lru_cache(maxsize=256)(cls._score_triggers)
+    
     @classmethod
     def _identify_fear_triggers(cls, product_service: str) -> Dict[str, float]:
         """Analyze product description to identify fear triggers."""
-        product_lower = product_service.lower()
-        fear_scores = {}
-        
-        for fear_type, fear_data in cls.FEAR_ARCHETYPES.items():
-            trigger_score = 0.0
-            triggers = fear_data["triggers"]
-            
-            for trigger in triggers:
-                if trigger in product_lower:
-                    trigger_score += 0.4
-                    
-                # Check for related terms
-                if trigger == "AI" and any(term in product_lower for term in ["artificial intelligence", "machine learning", "automated"]):
-                    trigger_score += 0.3
-            
-            fear_scores[fear_type] = min(1.0, trigger_score)
-        
-        return fear_scores
+        return dict(cls._cached_trigger_scores(product_service))
+    
+    @classmethod
+    def _score_triggers(cls, product_service: str) -> Dict[str, float]:
+        matched = set()
+        for hit in cls._trigger_pattern.finditer(product_service):
+            text = hit.group(0)
+            if text not in cls._trigger_fears:
+                text = text.lower()
+                if text not in cls._trigger_fears:
+                    text = text[:-1]  # Plural
+            matched.add(text)
+        
+        fear_scores = dict.fromkeys(cls.FEAR_ARCHETYPES, 0.0)
+        for trigger in matched:
+            for fear_type in cls._trigger_fears[trigger]:
+                fear_scores[fear_type] += 0.4
+        
+        # Check for related terms
+        if _AI_RELATED_TERMS.search(product_service):
+            for fear_type in cls._ai_fears:
+                fear_scores[fear_type] += 0.3
+        
+        return {fear_type: min(1.0, score) for fear_type, score in fear_scores.items()}
     
     @classmethod
     def _generate_specific_fear(cls, 
@@ -436,9 +509,7 @@ class ContextualFearGenerator:
                     f"I don't have time for complications. {base_objection}"
                 ])
             
-            # Use time-based randomization for objection selection
-            random.seed(int(time.time() * 1000) % 10000)
-            objections.append(random.choice(human_objections))
+            objections.append(cls._rng.choice(human_objections))
         
         return objections
     
@@ -458,7 +529,7 @@ class ContextualFearGenerator:
                 }
         
         # Analyze recent manifestation diversity
-        recent_manifestations = cls._manifestation_history[-50:]  # Last 50
+        recent_manifestations = list(cls._manifestation_history)[-50:]  # Last 50
         manifestation_diversity = len(set(m["manifestation"] for m in recent_manifestations))
         
         return {
@@ -472,8 +543,11 @@ class ContextualFearGenerator:
     @classmethod
     def reset_fear_history(cls):
         """Reset fear generation history (useful for testing)."""
-        cls._fear_usage_history.clear()
-        cls._manifestation_history.clear()
+        with cls._lock:
+            cls._fear_usage_history.clear()
+            cls._manifestation_history.clear()
+            cls._manifestation_recency.clear()
+            cls._selection_count = 0
     
     @classmethod
     def generate_conversation_flow_guidance(cls, 
@@ -602,4 +676,7 @@ You: "Okay... *sigh* that does make me feel better about the safety part. But ho
 This shows: Processing information → Natural concern transition → Practical follow-up
 """
         
-        return guidance 
\ No newline at end of file
+        return guidance 
+
+
+ContextualFearGenerator._build_trigger_matcher()
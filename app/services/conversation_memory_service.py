@@ -26,6 +26,7 @@ from enum import Enum
 import sqlite3
 from app.database_manager import DatabaseManager
 from app.services.openai_service import openai_service
+from app.services.llm_admission import Priority, llm_priority
 
 logger = logging.getLogger(__name__)
 
@@ -396,11 +397,12 @@ class SuperhumanMemoryService:
         
         try:
             # Get AI compression (our only AI call - but SUPER intelligent)
-            summary_response = openai_service.get_completion(
-                prompt=compression_prompt,
-                max_tokens=200,  # Generous for quality
-                model="gpt-4.1-mini"
-            )
+            with llm_priority(Priority.BACKGROUND):
+                summary_response = openai_service.get_completion(
+                    prompt=compression_prompt,
+                    max_tokens=200,  # Generous for quality
+                    model="gpt-4.1-mini"
+                )
             
             summary = summary_response.get('content', 'Compression failed')
             
@@ -240,6 +240,11 @@ def get_brief_acknowledgment() -> str:
     """Get a random brief acknowledgment response."""
     return random.choice(BRIEF_ACKNOWLEDGMENTS)
 
+def get_filler_phrases() -> List[str]:
+    """Every distinct filler and brief acknowledgment, e.g. for prewarming TTS audio."""
+    phrases = [filler for fillers in SPEECH_FILLERS.values() for filler in fillers] + BRIEF_ACKNOWLEDGMENTS
+    return list(dict.fromkeys(phrases))
+
 def get_response_pattern(engagement_level: str) -> Dict[str, Any]:
     """Get response pattern based on engagement level."""
     if engagement_level not in RESPONSE_PATTERNS:
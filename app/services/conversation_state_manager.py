@@ -8,11 +8,19 @@ contextual analysis based on conversation history.
 import logging
 import re
 import json
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from app.utils.conversation_utils import should_transition_to_business
 from enum import Enum
-from typing import Dict, Any, List, Optional, Set, Tuple
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
 from app.services.openai_service import get_openai_service
+from app.services.coach_metrics import get_metrics
+from app.services.llm_admission import Priority, llm_priority
+from app.services.llm_retry import request_deadline
+from app.services.streaming_json import extract_json
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -69,12 +77,76 @@ CLOSING_PATTERNS = [
     r'when can (we|I) start', r'next steps', r'decision maker', r'approval', r'management', r'team'
 ]
 
+# Running phase evidence: each message adds its category scores to the
+# matching phase; older evidence decays so recent turns dominate.
+PHASE_SIGNALS = {
+    ConversationPhase.RAPPORT: "rapport",
+    ConversationPhase.DISCOVERY: "needs",
+    ConversationPhase.PRESENTATION: "interest",
+    ConversationPhase.OBJECTION_HANDLING: "objection",
+    ConversationPhase.CLOSING: "closing",
+}
+EVIDENCE_DECAY = 0.6
+MIN_PHASE_EVIDENCE = 0.2  # Below this the message carries no phase signal
+PHASE_CONFIDENCE_MARGIN = 0.15  # Top two phases closer than this escalate to the LLM
+CLASSIFIER_HISTORY = 10  # Recent messages (both speakers) sent to the LLM classifier
+PHASE_CLASSIFIER_TIMEOUT = 5.0  # Seconds; a later answer is discarded
+PHASE_CLASSIFIER_WORKERS = 4
+
+# Escalation counters across all managers in this process
+_phase_stats = Counter()
+_phase_stats_lock = threading.Lock()
+
+
+def get_phase_tracking_stats() -> Dict[str, Any]:
+    """Heuristic vs LLM phase decisions since process start."""
+    with _phase_stats_lock:
+        stats = dict(_phase_stats)
+    turns = stats.get("turns", 0)
+    stats["escalation_rate"] = stats.get("escalations", 0) / turns if turns else 0.0
+    return stats
+
+
+def _count(**increments):
+    with _phase_stats_lock:
+        _phase_stats.update(increments)
+
+
+# Shared instance
+_classifier_executor = None
+_classifier_executor_lock = threading.Lock()
+
+
+def _get_classifier_executor() -> ThreadPoolExecutor:
+    """Pool that runs escalated phase classifications off the request path"""
+    global _classifier_executor
+    if _classifier_executor is None:
+        with _classifier_executor_lock:
+            if _classifier_executor is None:
+                _classifier_executor = ThreadPoolExecutor(
+                    max_workers=PHASE_CLASSIFIER_WORKERS, thread_name_prefix='phase-classifier'
+                )
+    return _classifier_executor
+
+
 class ConversationStateManager:
     """Enhanced conversation state manager with improved phase detection."""
     
-    def __init__(self, conversation_history: List[Dict[str, str]] = None, business_context: str = "B2B"):
+    def __init__(self, conversation_history: List[Dict[str, str]] = None, business_context: str = "B2B",
+                 phase_classifier: Optional[Callable[[List[Dict[str, str]]], Optional[ConversationPhase]]] = None,
+                 classifier_executor: Optional[ThreadPoolExecutor] = None):
         self.conversation_history = conversation_history if conversation_history is not None else []
         self.business_context = business_context
+        # Called in the background with recent messages when heuristics are ambiguous
+        self.phase_classifier = phase_classifier or self._classify_phase_with_gpt
+        self._classifier_executor = classifier_executor
+        self.phase_evidence = {phase: 0.0 for phase in PHASE_SIGNALS}
+        self.recent_messages = deque(maxlen=CLASSIFIER_HISTORY)
+        self.phase_stats = Counter()
+        self._lock = threading.Lock()
+        self._phase_version = 0  # Bumped on every transition; stale classifications are dropped
+        self._pending: Optional[Tuple[Future, float, int]] = None  # (future, started, phase version)
+        self._analyzed_messages = 0  # update_state cursor into conversation_history
         self.current_state = self._initialize_state()
         
     def _initialize_state(self) -> Dict[str, Any]:
@@ -92,12 +164,17 @@ class ConversationStateManager:
     def update_state(self, new_history: List[Dict[str, str]] = None) -> Dict[str, Any]:
         """Update the conversation state based on new messages."""
         if new_history is not None:
+            if len(new_history) < self._analyzed_messages:
+                # History was replaced rather than extended; recount from the start
+                self._analyzed_messages = 0
+                self.current_state["question_count"] = 0
             self.conversation_history = new_history
             
         self.current_state["message_count"] = len(self.conversation_history)
         self._update_phase()
         self._update_question_count()
         self._update_topics()
+        self._analyzed_messages = len(self.conversation_history)
         
         return self.current_state
         
@@ -123,35 +200,28 @@ class ConversationStateManager:
                 "to_phase": new_phase.value,
                 "timestamp": now_iso
             })
+            self._phase_version += 1
             logger.info(f"Phase transition: {old_phase.value} -> {new_phase.value}")
             
     def _update_question_count(self) -> None:
-        """Update the count of questions in the conversation."""
-        if not self.conversation_history:
-            return
-            
+        """Update the count of questions in the conversation (messages since the last update only)."""
         # Count questions from the assistant
         assistant_questions = sum(
-            1 for msg in self.conversation_history 
+            1 for msg in self.conversation_history[self._analyzed_messages:]
             if msg.get('role') == 'assistant' and '?' in str(msg.get('content', ''))
         )
-        self.current_state["question_count"] = assistant_questions
+        self.current_state["question_count"] += assistant_questions
                 
     def _update_topics(self) -> None:
-        """Update the set of topics discussed in the conversation."""
-        if not self.conversation_history:
-            return
-        # Consolidate all message content and convert to lowercase for keyword checks
-        content = ' '.join(str(m.get('content', '')) for m in self.conversation_history).lower()
-        topics = set()
-        if any(term in content for term in ['business', 'company', 'solution']):
-            topics.add('business')
-        if any(term in content for term in ['product', 'service', 'feature']):
-            topics.add('product')
-        if any(term in content for term in ['price', 'cost', 'budget']):
-            topics.add('pricing')
-        self.current_state['topics'].update(topics)
-        return
+        """Update the set of topics discussed in the conversation (messages since the last update only)."""
+        for message in self.conversation_history[self._analyzed_messages:]:
+            content = str(message.get('content', '')).lower()
+            if any(term in content for term in ['business', 'company', 'solution']):
+                self.current_state['topics'].add('business')
+            if any(term in content for term in ['product', 'service', 'feature']):
+                self.current_state['topics'].add('product')
+            if any(term in content for term in ['price', 'cost', 'budget']):
+                self.current_state['topics'].add('pricing')
 
     def get_state(self) -> Dict[str, Any]:
         """Return the current conversation state in a JSON-serializable form."""
@@ -160,6 +230,8 @@ class ConversationStateManager:
         if isinstance(state_copy.get("likely_phase"), ConversationPhase):
             state_copy["likely_phase"] = state_copy["likely_phase"].value
         state_copy["topics"] = list(state_copy.get("topics", []))
+        state_copy["phase_evidence"] = {phase.value: round(score, 3) for phase, score in self.phase_evidence.items()}
+        state_copy["phase_tracking"] = dict(self.phase_stats)
         return state_copy
         # (legacy logic removed)
         # Closing has highest priority
@@ -310,12 +382,44 @@ class ConversationStateManager:
         if total_score < -1: return "negative"
         return "neutral" # Default
 
-    def update_phase(self, user_message: str) -> bool:
+    def _calculate_message_category_scores(self, message: str) -> Dict[str, float]:
+        """Category scores for a single message."""
+        return analyze_message_content(message)
+
+    def observe_message(self, content: str, role: str = "user") -> Dict[str, float]:
+        """
+        Fold one message into the running phase evidence.
+        
+        Only the new message is scanned; earlier messages survive as decayed
+        evidence, so the cost does not grow with the conversation.
+        
+        Returns:
+            Dict[str, float]: The message's category scores
+        """
+        scores = self._calculate_message_category_scores(content)
+        for phase, signal in PHASE_SIGNALS.items():
+            self.phase_evidence[phase] = self.phase_evidence[phase] * EVIDENCE_DECAY + scores[signal]
+        self.recent_messages.append({"role": role, "content": content})
+        return scores
+
+    def observe_reply(self, content: str) -> None:
+        """Record the prospect's reply as classifier context; phase evidence comes from the user only"""
+        if content:
+            self.recent_messages.append({"role": "assistant", "content": content})
+
+    def update_phase(self, user_message: str, assistant_message: Optional[str] = None) -> bool:
         """
         Update the conversation phase based on the latest user message.
         
+        The phase with the most evidence wins when it leads the runner-up by
+        PHASE_CONFIDENCE_MARGIN. Closer calls are sent to the phase classifier
+        (an LLM call) in the background and the phase is kept for this turn;
+        its answer is applied on a later turn unless the phase moved on in
+        the meantime. Messages with no phase signal keep the current phase.
+        
         Args:
             user_message: The latest message from the user.
+            assistant_message: The prospect's reply the user is answering, if known.
             
         Returns:
             bool: True if the phase changed, False otherwise.
@@ -323,35 +427,111 @@ class ConversationStateManager:
         if not user_message:
             return False
             
-        # Calculate scores for the message
-        scores = self._calculate_message_category_scores(user_message)
-        
-        # Get the current likely phase from state
-        current_phase = self.current_state.get("likely_phase", ConversationPhase.UNKNOWN)
-        
-        # Determine next phase using simplified heuristics from _determine_likely_phase
-        next_phase = current_phase  # Default to no change
-        
-        # Use message scores to determine phase transition
-        if scores["closing"] > 0.5:
-            next_phase = ConversationPhase.CLOSING
-        elif scores["objection"] > 0.4:
-            next_phase = ConversationPhase.OBJECTION_HANDLING
-        elif scores["interest"] > 0.4 and current_phase in [ConversationPhase.DISCOVERY, ConversationPhase.PRESENTATION]:
-            next_phase = ConversationPhase.PRESENTATION
-        elif scores["needs"] > 0.3 and current_phase != ConversationPhase.RAPPORT:
-            next_phase = ConversationPhase.DISCOVERY
-        elif scores["rapport"] > 0.3 and current_phase == ConversationPhase.UNKNOWN:
-            next_phase = ConversationPhase.RAPPORT
+        with self._lock:
+            starting_phase = self.current_state.get("likely_phase", ConversationPhase.UNKNOWN)
+            self._apply_classified_phase()
+            
+            self.observe_reply(assistant_message)
+            self.observe_message(user_message, "user")
+            current_phase = self.current_state.get("likely_phase", ConversationPhase.UNKNOWN)
+            self.phase_stats["turns"] += 1
+            _count(turns=1)
+            
+            ranked = sorted(self.phase_evidence.items(), key=lambda item: item[1], reverse=True)
+            (top_phase, top_score), (_, runner_up_score) = ranked[0], ranked[1]
+            
+            if top_score >= MIN_PHASE_EVIDENCE:
+                if top_score - runner_up_score >= PHASE_CONFIDENCE_MARGIN:
+                    self._set_phase(top_phase)
+                else:
+                    self._escalate_phase()
+            
+            return self.current_state["likely_phase"] != starting_phase
+
+    def settle(self, timeout: float = PHASE_CLASSIFIER_TIMEOUT) -> bool:
+        """
+        Wait for an in-flight classification and apply it (for callers off the
+        live path, and tests). Returns True if the phase changed.
+        """
+        pending = self._pending
+        if pending is not None:
+            try:
+                pending[0].exception(timeout=timeout)
+            except Exception:
+                pass  # Timed out; _apply_classified_phase counts it
+        with self._lock:
+            phase = self.current_state["likely_phase"]
+            self._apply_classified_phase()
+            return self.current_state["likely_phase"] != phase
+
+    def _escalate_phase(self) -> None:
+        """Classify in the background when the heuristic evidence is too close to call."""
+        if self._pending is not None:
+            return  # One classification in flight per conversation
+        self.phase_stats["escalations"] += 1
+        _count(escalations=1)
+        get_metrics().increment('llm_escalation')
+        executor = self._classifier_executor or _get_classifier_executor()
+        future = executor.submit(self._run_classifier, list(self.recent_messages))
+        self._pending = (future, time.monotonic(), self._phase_version)
+
+    def _run_classifier(self, recent_messages: List[Dict[str, str]]) -> Optional[ConversationPhase]:
+        with llm_priority(Priority.ASYNC_PLAN), request_deadline(PHASE_CLASSIFIER_TIMEOUT):
+            return self.phase_classifier(recent_messages)
+
+    def _apply_classified_phase(self) -> None:
+        """Apply a finished classification; failures, timeouts and stale answers leave the state alone. Caller holds the lock."""
+        if self._pending is None:
+            return
+        future, started, version = self._pending
+        if not future.done():
+            if time.monotonic() - started < PHASE_CLASSIFIER_TIMEOUT:
+                return
+            logger.warning("Phase classifier timed out; keeping the current phase")
+            phase = None
+        else:
+            try:
+                phase = future.result()
+            except Exception as e:
+                logger.error(f"Phase classifier failed: {e}")
+                phase = None
+        self._pending = None
         
-        # Check if phase changed
-        phase_changed = (next_phase != current_phase)
+        if phase is None:
+            self.phase_stats["classifier_failures"] += 1
+            _count(classifier_failures=1)
+        elif version == self._phase_version:
+            self._set_phase(phase)
+        else:
+            self.phase_stats["stale_classifications"] += 1
+
+    def _classify_phase_with_gpt(self, recent_messages: List[Dict[str, str]]) -> Optional[ConversationPhase]:
+        """Default phase classifier: asks a small model for the phase only; never touches the state."""
+        if not recent_messages:
+            return None
+        openai_service = get_openai_service()
+        if not openai_service or not openai_service.initialized:
+            logger.warning("OpenAI service not available for phase classification.")
+            return None
         
-        # Update the current phase in the state
-        if phase_changed:
-            self.current_state["likely_phase"] = next_phase
-            
-        return phase_changed
+        transcript = "\n".join(
+            f"{'Salesperson' if message['role'] == 'user' else 'Prospect'}: {message['content']}"
+            for message in recent_messages
+        )
+        phases = ", ".join(phase.value for phase in PHASE_SIGNALS)
+        prompt = (
+            f"Classify the current phase of this {self.business_context or 'general'} sales conversation.\n\n"
+            f"{transcript}\n\n"
+            f'Return only a JSON object: {{"likely_phase": one of {phases}}}'
+        )
+        response = openai_service.get_completion(prompt, temperature=0.0, max_tokens=30, model="gpt-3.5-turbo")
+        if not response:
+            return None
+        try:
+            return ConversationPhase(str(extract_json(response).get("likely_phase", "")).lower())
+        except ValueError as e:
+            logger.error(f"Phase classifier returned an unusable answer: {e}")
+            return None
 
     def get_system_prompt(self, persona: str, sales_info: Dict[str, Any] = None, 
                          user_name: str = "User") -> str:
@@ -515,7 +695,7 @@ If needs or objections are not apparent, return empty lists.
             # For now, using the default completion model from openai_service
             analysis_json_str = openai_service.get_completion(
                 prompt,
-                model_override="gpt-3.5-turbo" # Example: Force a cheaper/faster model
+                model="gpt-3.5-turbo" # Example: Force a cheaper/faster model
             )
 
             if not analysis_json_str:
@@ -563,68 +743,51 @@ def analyze_message_content(message: str) -> Dict[str, float]:
     # This is a simplified version - in production you might use NLP
     message_lower = message.lower()
     
-    # Quick pattern matching for message analysis
-    scores = {
-        "rapport": 0.0,
-        "business": 0.0,
-        "needs": 0.0,
-        "objection": 0.0,
-        "interest": 0.0,
-        "closing": 0.0
-    }
+    # Simple pattern counting over precompiled patterns
+    scores = {}
+    for category, (weight, patterns) in _CATEGORY_PATTERNS.items():
+        score = sum(weight for pattern in patterns if pattern.search(message_lower))
+        # Cap scores at 1.0
+        scores[category] = min(score, 1.0)
     
+    return scores
+
+
+# Category -> (score per matching pattern, patterns) for analyze_message_content
+MESSAGE_CATEGORY_PATTERNS = {
     # Personal/rapport patterns
-    rapport_patterns = [
+    "rapport": (0.2, [
         r"how are you", r"nice (day|weather)", r"weekend", r"family", r"hobby",
         r"nice to (meet|talk)", r"personally", r"yourself", r"background"
-    ]
-    
+    ]),
     # Business patterns
-    business_patterns = [
+    "business": (0.15, [
         r"business", r"company", r"organization", r"industry", r"market",
         r"product", r"service", r"solution", r"offer", r"price", r"cost"
-    ]
-    
+    ]),
     # Needs/problems patterns
-    needs_patterns = [
+    "needs": (0.2, [
         r"need", r"want", r"looking for", r"interested in", r"requirement",
         r"problem", r"issue", r"challenge", r"improve", r"better", r"help with"
-    ]
-    
+    ]),
     # Objection patterns
-    objection_patterns = [
+    "objection": (0.25, [
         r"expensive", r"costly", r"concern", r"worried", r"risk", r"competitor",
         r"alternative", r"not sure", r"think about", r"high price", r"too much"
-    ]
-    
+    ]),
     # Interest patterns
-    interest_patterns = [
+    "interest": (0.2, [
         r"interested", r"tell me more", r"sounds good", r"like that", r"benefit",
         r"value", r"advantage", r"how would", r"feature", r"curious"
-    ]
-    
+    ]),
     # Closing patterns
-    closing_patterns = [
+    "closing": (0.25, [
         r"next steps", r"move forward", r"decision", r"purchase", r"buy",
         r"timeline", r"when can we", r"start", r"implement", r"sign", r"agreement"
-    ]
-    
-    # Simple pattern counting
-    for pattern in rapport_patterns:
-        if re.search(pattern, message_lower): scores["rapport"] += 0.2
-    for pattern in business_patterns:
-        if re.search(pattern, message_lower): scores["business"] += 0.15
-    for pattern in needs_patterns:
-        if re.search(pattern, message_lower): scores["needs"] += 0.2
-    for pattern in objection_patterns:
-        if re.search(pattern, message_lower): scores["objection"] += 0.25
-    for pattern in interest_patterns:
-        if re.search(pattern, message_lower): scores["interest"] += 0.2
-    for pattern in closing_patterns:
-        if re.search(pattern, message_lower): scores["closing"] += 0.25
-    
-    # Cap scores at 1.0
-    for key in scores:
-        scores[key] = min(scores[key], 1.0)
-    
-    return scores 
\ No newline at end of file
+    ]),
+}
+
+_CATEGORY_PATTERNS = {
+    category: (weight, [re.compile(pattern) for pattern in patterns])
+    for category, (weight, patterns) in MESSAGE_CATEGORY_PATTERNS.items()
+}
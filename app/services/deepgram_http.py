@@ -0,0 +1,204 @@
+"""
+Deepgram HTTP Client - Pooled REST transport for the simple voice path
+
+deepgram_service wraps the SDK for streaming sessions; the /api/voice
+transcribe and speak routes call the REST endpoints directly. This client
+keeps one keep-alive requests.Session per process so those calls reuse
+warm connections instead of paying a TCP/TLS handshake per request:
+- Upload bodies are streamed in chunks from any file-like object (the
+  request stream or a spooled upload), never read into one buffer
+- TTS audio is returned as an iterator of chunks as they arrive, so the
+  route can relay it to the browser before synthesis finishes
+- Timeouts and pool size come from the environment and can be overridden
+  per client
+- speak_cached() serves repeated short phrases from the TTS cache, and
+  prewarm_fillers() fills it with the filler phrases for PREWARM_VOICES,
+  once per phrase set for all workers sharing the cache directory
+"""
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple, Union
+import hashlib
+import logging
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.services.conversation_patterns import get_filler_phrases
+from app.services.tts_cache import TTSCache, cache_key, get_tts_cache
+
+logger = logging.getLogger(__name__)
+
+DEEPGRAM_API_URL = os.getenv('DEEPGRAM_API_URL', 'https://api.deepgram.com/v1')
+CONNECT_TIMEOUT = float(os.getenv('VOICE_HTTP_CONNECT_TIMEOUT', '3.05'))
+STT_TIMEOUT = float(os.getenv('VOICE_STT_TIMEOUT', '30'))  # Seconds between bytes of the response
+TTS_TIMEOUT = float(os.getenv('VOICE_TTS_TIMEOUT', '30'))
+POOL_SIZE = int(os.getenv('VOICE_HTTP_POOL_SIZE', '16'))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+STT_PARAMS = {
+    "model": "nova-2",
+    "language": "en-US",
+    "smart_format": "true",
+    "punctuate": "true"
+}
+TTS_OPTIONS = {
+    "model": "aura-asteria-en",
+    "encoding": "mp3",
+    "sample_rate": 24000
+}
+# Aura models are voices; fillers are prewarmed for each
+PREWARM_VOICES = [voice.strip() for voice in os.getenv('TTS_PREWARM_VOICES', TTS_OPTIONS['model']).split(',')
+                  if voice.strip()]
+
+
+class DeepgramHTTPError(Exception):
+    """Deepgram answered with a non-200 status"""
+
+    def __init__(self, status_code: int, body: str):
+        self.status_code = status_code
+        self.body = body
+        super().__init__(f"Deepgram HTTP {status_code}: {body[:200]}")
+
+
+def iter_chunks(stream: IO[bytes], chunk_size: int = UPLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+    """Read a file-like object in chunks (sent with chunked transfer encoding)"""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def tts_cache_key(text: str, **options) -> str:
+    """TTS cache address of the audio speak(text, **options) returns"""
+    options = {**TTS_OPTIONS, **options}
+    return cache_key(options['model'], 'deepgram-aura', f"{options['encoding']}_{options['sample_rate']}", text)
+
+
+def extract_transcript(result: Dict[str, Any]) -> str:
+    """First alternative's transcript from a /listen response, or ''"""
+    channels = result.get('results', {}).get('channels') or []
+    if channels:
+        alternatives = channels[0].get('alternatives') or []
+        if alternatives:
+            return alternatives[0].get('transcript', '')
+    return ''
+
+
+class DeepgramHTTPClient:
+    """Speech-to-text and text-to-speech over one pooled keep-alive session"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = DEEPGRAM_API_URL,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        stt_timeout: float = STT_TIMEOUT,
+        tts_timeout: float = TTS_TIMEOUT,
+        pool_size: int = POOL_SIZE,
+        session: Optional[requests.Session] = None
+    ):
+        self._api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.connect_timeout = connect_timeout
+        self.stt_timeout = stt_timeout
+        self.tts_timeout = tts_timeout
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return self._api_key or os.getenv('DEEPGRAM_API_KEY')
+
+    def _headers(self, content_type: str) -> Dict[str, str]:
+        return {"Authorization": f"Token {self.api_key}", "Content-Type": content_type}
+
+    def transcribe(self, audio: Union[bytes, IO[bytes]], content_type: str = 'audio/wav',
+                   params: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """POST audio to /listen and return the parsed JSON result"""
+        body = iter_chunks(audio) if hasattr(audio, 'read') else audio
+        response = self.session.post(
+            f"{self.base_url}/listen",
+            headers=self._headers(content_type),
+            params=params or STT_PARAMS,
+            data=body,
+            timeout=(self.connect_timeout, self.stt_timeout)
+        )
+        if response.status_code != 200:
+            raise DeepgramHTTPError(response.status_code, response.text)
+        return response.json()
+
+    def speak(self, text: str, **options) -> Tuple[str, Iterator[bytes]]:
+        """
+        POST text to /speak. Returns once the response headers arrive, with
+        the content type and an iterator over audio chunks as Deepgram sends
+        them; the connection returns to the pool when the iterator finishes
+        or is closed.
+        """
+        payload = {"text": text, **TTS_OPTIONS, **options}
+        response = self.session.post(
+            f"{self.base_url}/speak",
+            headers=self._headers("application/json"),
+            json=payload,
+            stream=True,
+            timeout=(self.connect_timeout, self.tts_timeout)
+        )
+        if response.status_code != 200:
+            try:
+                raise DeepgramHTTPError(response.status_code, response.text)
+            finally:
+                response.close()
+        return response.headers.get('Content-Type', 'audio/mpeg'), self._relay(response)
+
+    def speak_cached(self, text: str, cache: Optional[TTSCache] = None, **options) -> Tuple[str, Iterator[bytes]]:
+        """speak(), served from the TTS cache when this phrase was synthesized before"""
+        cache = cache or get_tts_cache()
+        return cache.stream(tts_cache_key(text, **options), text, lambda: self.speak(text, **options))
+
+    def prewarm_fillers(self, cache: Optional[TTSCache] = None, voices: Optional[List[str]] = None):
+        """
+        Synthesize every filler phrase for each voice into the TTS cache in the
+        background. Only the first worker to claim this phrase and voice set in
+        the cache directory does it; the others return no futures. A claim
+        that ends up storing nothing is released for the next attempt.
+        """
+        cache = cache or get_tts_cache()
+        items = [(tts_cache_key(phrase, model=voice), phrase,
+                  lambda phrase=phrase, voice=voice: self.speak(phrase, model=voice))
+                 for voice in (voices or PREWARM_VOICES) for phrase in get_filler_phrases()]
+        fingerprint = hashlib.sha256(''.join(key for key, _, _ in items).encode()).hexdigest()[:16]
+        marker = f'prewarm-{fingerprint}'
+        if not cache.claim(marker):
+            logger.info("[DeepgramHTTP] Filler phrases already prewarmed for this deployment")
+            return []
+        futures = cache.prewarm(items, marker=marker)
+        logger.info(f"[DeepgramHTTP] Prewarming {len(futures)} of {len(items)} filler phrases")
+        return futures
+
+    @staticmethod
+    def _relay(response: requests.Response) -> Iterator[bytes]:
+        try:
+            for chunk in response.iter_content(chunk_size=None):
+                if chunk:
+                    yield chunk
+        finally:
+            response.close()
+
+
+# Shared instance
+_client = None
+_client_lock = threading.Lock()
+
+def get_deepgram_http_client() -> DeepgramHTTPClient:
+    """Process-wide client, so every request reuses the same connection pool"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = DeepgramHTTPClient()
+    return _client
@@ -911,6 +911,17 @@ class DeepgramService:
                 "utterances": True
             }
             
+        # Raw 16 kHz PCM can be trimmed before upload; leading/trailing
+        # silence would otherwise be billed and transcribed
+        if options.get("encoding") == "linear16" and options.get("sample_rate", 16000) == 16000:
+            from app.services.voice_activity_detector import trim_silence
+            vad = trim_silence(audio_buffer)
+            logger.info(f"VAD trimmed buffer {vad.original_ms}ms -> {vad.trimmed_ms}ms")
+            if not vad.has_speech:
+                logger.info("No speech detected in buffer, skipping transcription")
+                return None
+            audio_buffer = vad.audio
+            
         try:
             # Initialize client
             client = DeepgramClient(self.api_key)
@@ -3,7 +3,49 @@
 # culturally-appropriate name pools for persona generation
 
 import random
-from typing import Dict, List, Tuple
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+
+class _NamePool:
+    """
+    Names for one (culture, gender, first/last) pool. The first `available`
+    entries are the names not recently used, so picking one is a single
+    random() and marking a name used or free is a swap.
+    """
+
+    __slots__ = ("names", "available", "_position")
+
+    def __init__(self, names: Sequence[str]):
+        self.names = list(dict.fromkeys(names))
+        self.available = len(self.names)
+        self._position = {name: i for i, name in enumerate(self.names)}
+
+    def _swap(self, i: int, j: int):
+        a, b = self.names[i], self.names[j]
+        self.names[i], self.names[j] = b, a
+        self._position[a], self._position[b] = j, i
+
+    def choose_any(self) -> str:
+        return self.names[int(random.random() * len(self.names))]
+
+    def choose_available(self) -> str:
+        return self.names[int(random.random() * self.available)]
+
+    def reserve(self, name: str):
+        i = self._position[name]
+        if i < self.available:
+            self.available -= 1
+            self._swap(i, self.available)
+
+    def release(self, name: str):
+        i = self._position[name]
+        if i >= self.available:
+            self._swap(i, self.available)
+            self.available += 1
+
 
 class DemographicNameService:
     """
@@ -161,9 +203,77 @@ class DemographicNameService:
         }
     }
     
-    # Recently used names to avoid repetition
-    _recently_used = set()
+    # Recently used names to avoid repetition, oldest first (true LRU)
+    _recently_used: "OrderedDict[str, None]" = OrderedDict()
     _max_recent_size = 100
+    _lock = threading.Lock()
+
+    # Lookup indexes built once from NAME_POOLS (see _build_indexes)
+    _pools: Dict[Tuple[str, str, str], "_NamePool"] = {}
+    _pools_by_name: Dict[str, Tuple["_NamePool", ...]] = {}
+    _gender_index: Mapping[str, Tuple[str, str]] = MappingProxyType({})
+
+    @classmethod
+    def _build_indexes(cls):
+        """Index NAME_POOLS: per-pool arrays, name -> pools, first name -> (culture, gender)"""
+        pools = {}
+        pools_by_name = {}
+        gender_index = {}
+        for culture, genders in cls.NAME_POOLS.items():
+            for gender, parts in genders.items():
+                for part in ("first", "last"):
+                    pool = pools[(culture, gender, part)] = _NamePool(parts[part])
+                    for name in pool.names:
+                        pools_by_name.setdefault(name, []).append(pool)
+            # Female is checked first within a culture, and earlier cultures win
+            for gender in ("female", "male"):
+                for name in genders.get(gender, {}).get("first", ()):
+                    gender_index.setdefault(name.casefold(), (culture, gender))
+        with cls._lock:
+            cls._pools = pools
+            cls._pools_by_name = {name: tuple(p) for name, p in pools_by_name.items()}
+            cls._gender_index = MappingProxyType(gender_index)
+            cls._recently_used = OrderedDict()
+
+    @classmethod
+    def lookup_first_name(cls, first_name: str) -> Optional[Tuple[str, str]]:
+        """Return (cultural_background, gender) for a known first name, case-insensitive"""
+        return cls._gender_index.get(first_name.strip().casefold())
+
+    @classmethod
+    def detect_gender(cls, name: str) -> Optional[str]:
+        """Gender of the first word of `name` if it is in the name pools, else None"""
+        parts = name.split()
+        if not parts:
+            return None
+        match = cls.lookup_first_name(parts[0])
+        return match[1] if match else None
+
+    @classmethod
+    def reset_recent(cls):
+        """Forget recently used names"""
+        with cls._lock:
+            cls._clear_recent()
+
+    @classmethod
+    def _clear_recent(cls):
+        for name in cls._recently_used:
+            for pool in cls._pools_by_name.get(name, ()):
+                pool.release(name)
+        cls._recently_used.clear()
+
+    @classmethod
+    def _mark_recent(cls, name: str):
+        if name in cls._recently_used:
+            cls._recently_used.move_to_end(name)
+            return
+        cls._recently_used[name] = None
+        for pool in cls._pools_by_name.get(name, ()):
+            pool.reserve(name)
+        while len(cls._recently_used) > cls._max_recent_size:
+            oldest, _ = cls._recently_used.popitem(last=False)
+            for pool in cls._pools_by_name.get(oldest, ()):
+                pool.release(oldest)
     
     @classmethod
     def get_name_by_demographics(cls, 
@@ -189,40 +299,23 @@ class DemographicNameService:
         if gender not in cls.NAME_POOLS[cultural_background]:
             gender = "female"
         
-        pool = cls.NAME_POOLS[cultural_background][gender]
+        first_pool = cls._pools[(cultural_background, gender, "first")]
+        last_pool = cls._pools[(cultural_background, gender, "last")]
         
-        # Get available names (not recently used)
-        first_names = pool["first"]
-        last_names = pool["last"]
+        if not avoid_recent:
+            return first_pool.choose_any(), last_pool.choose_any()
         
-        if avoid_recent:
-            # Filter out recently used names
-            available_first = [name for name in first_names if name not in cls._recently_used]
-            available_last = [name for name in last_names if name not in cls._recently_used]
+        with cls._lock:
+            # If we've used every name in the pool, reset the recent list
+            if not first_pool.available or not last_pool.available:
+                cls._clear_recent()
             
-            # If we've used too many names, reset the recent list
-            if not available_first or not available_last:
-                cls._recently_used.clear()
-                available_first = first_names
-                available_last = last_names
-        else:
-            available_first = first_names
-            available_last = last_names
-        
-        # Select random names
-        first_name = random.choice(available_first)
-        last_name = random.choice(available_last)
-        
-        # Track usage
-        if avoid_recent:
-            cls._recently_used.add(first_name)
-            cls._recently_used.add(last_name)
+            first_name = first_pool.choose_available()
+            last_name = last_pool.choose_available()
             
-            # Limit recent list size
-            if len(cls._recently_used) > cls._max_recent_size:
-                # Remove oldest entries (simplified approach)
-                excess = len(cls._recently_used) - cls._max_recent_size
-                cls._recently_used = set(list(cls._recently_used)[excess:])
+            # Track usage; the least recently used names are evicted first
+            cls._mark_recent(first_name)
+            cls._mark_recent(last_name)
         
         return first_name, last_name
     
@@ -289,4 +382,7 @@ class DemographicNameService:
                 "gender": gender
             })
         
-        return suggestions 
\ No newline at end of file
+        return suggestions 
+
+
+DemographicNameService._build_indexes()
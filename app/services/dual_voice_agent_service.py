@@ -12,21 +12,51 @@ import logging
 import json
 import time
 import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, Any, Optional, List, Callable
 from datetime import datetime
 from flask import current_app
-from app.models import BuyerPersona, TrainingSession, Message, db
+from app.models import BuyerPersona, TrainingSession, db
 from app.services.gpt4o_service import get_gpt4o_service
+from app.services.llm_admission import Priority, llm_priority
 from app.training.services import generate_buyer_persona
+from app.services.user_metrics_rollup import record_session_end
+from app.services.training_dashboard_service import invalidate_dashboard
+from app.services.voice_session_registry import create_session_registry
 
 logger = logging.getLogger(__name__)
 
+# Write-behind for conversation turns: persisted to the TrainingSession in
+# batches, whichever threshold is hit first, and always when the session ends
+TURN_FLUSH_BATCH = 10
+TURN_FLUSH_INTERVAL = 15.0  # Seconds
+FEEDBACK_WORKERS = 2  # Concurrent end-of-session feedback LLM calls
+
+SPEAKER_ROLES = {'user': 'user', 'persona': 'assistant', 'coach': 'coach'}
+
 class DualVoiceAgentService:
     """Service for managing dual voice agents in sales training scenarios"""
     
-    def __init__(self):
-        self.active_sessions = {}  # session_id -> session_data
+    def __init__(self, sessions=None, feedback_jobs=None, feedback_executor=None):
+        # Registries are created on first use so SHARED_STATE_URL is read inside the app
+        self._sessions = sessions  # session_id -> live session fields and logs
+        self._feedback_jobs = feedback_jobs  # session_id -> end-of-session feedback job status
+        self._feedback_executor = feedback_executor or ThreadPoolExecutor(
+            max_workers=FEEDBACK_WORKERS, thread_name_prefix='voice-feedback'
+        )
         self.gpt4o_service = get_gpt4o_service()
+    
+    @property
+    def sessions(self):
+        if self._sessions is None:
+            self._sessions = create_session_registry('dual_voice')
+        return self._sessions
+    
+    @property
+    def feedback_jobs(self):
+        if self._feedback_jobs is None:
+            self._feedback_jobs = create_session_registry('dual_voice_feedback')
+        return self._feedback_jobs
         
     def create_training_session(
         self, 
@@ -101,26 +131,27 @@ class DualVoiceAgentService:
             # Configure sales coach agent  
             coach_config = self._create_coach_agent_config(user_profile, scenario_type)
             
-            # Store session data
+            # Store session data (conversation_log, coaching_interventions and
+            # recording_snippets are registry lists appended per item)
             session_data = {
                 'session_id': session_id,
                 'training_session_id': training_session.id,
                 'user_id': user_id,
                 'scenario_type': scenario_type,
-                'buyer_persona': buyer_persona,
+                'buyer_persona_id': buyer_persona.id,
+                'buyer_persona_name': buyer_persona.name,
                 'persona_config': persona_config,
                 'coach_config': coach_config,
-                'conversation_log': [],
-                'coaching_interventions': [],
-                'recording_snippets': [],  # New: Store coach-saved snippets
                 'session_state': 'active',  # active, paused, coaching_only, timeout
                 'pause_reason': None,
                 'timeout_context': None,
-                'start_time': datetime.utcnow(),
-                'status': 'initialized'
+                'start_time': datetime.utcnow().isoformat(),
+                'status': 'initialized',
+                'persisted_turns': 0,
+                'last_flush': time.time()
             }
             
-            self.active_sessions[session_id] = session_data
+            self.sessions.create(session_id, session_data)
             
             db.session.commit()
             
@@ -153,14 +184,10 @@ class DualVoiceAgentService:
     def pause_session(self, session_id: str, reason: str = "learning_moment") -> Dict[str, Any]:
         """Pause the session for a learning moment"""
         try:
-            if session_id not in self.active_sessions:
+            if not self.sessions.update(session_id, session_state='paused', pause_reason=reason,
+                                        pause_time=datetime.utcnow().isoformat()):
                 return {'success': False, 'error': 'Session not found'}
             
-            session_data = self.active_sessions[session_id]
-            session_data['session_state'] = 'paused'
-            session_data['pause_reason'] = reason
-            session_data['pause_time'] = datetime.utcnow()
-            
             logger.info(f"Paused session {session_id} for {reason}")
             
             return {
@@ -177,13 +204,9 @@ class DualVoiceAgentService:
     def resume_session(self, session_id: str) -> Dict[str, Any]:
         """Resume a paused session"""
         try:
-            if session_id not in self.active_sessions:
+            if not self.sessions.update(session_id, session_state='active', pause_reason=None):
                 return {'success': False, 'error': 'Session not found'}
             
-            session_data = self.active_sessions[session_id]
-            session_data['session_state'] = 'active'
-            session_data['pause_reason'] = None
-            
             logger.info(f"Resumed session {session_id}")
             
             return {
@@ -199,13 +222,10 @@ class DualVoiceAgentService:
     def activate_coaching_only_mode(self, session_id: str) -> Dict[str, Any]:
         """Activate coaching-only mode (disable buyer persona)"""
         try:
-            if session_id not in self.active_sessions:
+            if not self.sessions.update(session_id, session_state='coaching_only',
+                                        coaching_only_start=datetime.utcnow().isoformat()):
                 return {'success': False, 'error': 'Session not found'}
             
-            session_data = self.active_sessions[session_id]
-            session_data['session_state'] = 'coaching_only'
-            session_data['coaching_only_start'] = datetime.utcnow()
-            
             logger.info(f"Activated coaching-only mode for session {session_id}")
             
             return {
@@ -221,22 +241,18 @@ class DualVoiceAgentService:
     def request_timeout(self, session_id: str, context: str) -> Dict[str, Any]:
         """Coach requests a timeout for deeper discussion"""
         try:
-            if session_id not in self.active_sessions:
+            if not self.sessions.update(session_id, session_state='timeout', timeout_context=context,
+                                        timeout_start=datetime.utcnow().isoformat()):
                 return {'success': False, 'error': 'Session not found'}
             
-            session_data = self.active_sessions[session_id]
-            session_data['session_state'] = 'timeout'
-            session_data['timeout_context'] = context
-            session_data['timeout_start'] = datetime.utcnow()
-            
             # Log the timeout intervention
             intervention = {
                 'timestamp': datetime.utcnow().isoformat(),
                 'type': 'timeout_request',
                 'context': context,
-                'conversation_snapshot': session_data['conversation_log'][-5:]  # Last 5 turns
+                'conversation_snapshot': self.sessions.items(session_id, 'conversation_log', -5)  # Last 5 turns
             }
-            session_data['coaching_interventions'].append(intervention)
+            self.sessions.append(session_id, 'coaching_interventions', intervention)
             
             logger.info(f"Timeout requested for session {session_id}: {context}")
             
@@ -254,11 +270,9 @@ class DualVoiceAgentService:
     def save_recording_snippet(self, session_id: str, snippet_data: Dict[str, Any]) -> Dict[str, Any]:
         """Save a recording snippet for later coaching review"""
         try:
-            if session_id not in self.active_sessions:
+            if self.sessions.get(session_id) is None:
                 return {'success': False, 'error': 'Session not found'}
             
-            session_data = self.active_sessions[session_id]
-            
             # Create snippet record
             snippet = {
                 'timestamp': datetime.utcnow().isoformat(),
@@ -268,10 +282,10 @@ class DualVoiceAgentService:
                 'context': snippet_data.get('context', 'Key moment for review'),
                 'coaching_notes': snippet_data.get('coaching_notes', ''),
                 'conversation_excerpt': snippet_data.get('conversation_excerpt', []),
-                'snippet_id': f"snippet-{len(session_data['recording_snippets']) + 1}"
+                'snippet_id': f"snippet-{self.sessions.length(session_id, 'recording_snippets') + 1}"
             }
             
-            session_data['recording_snippets'].append(snippet)
+            self.sessions.append(session_id, 'recording_snippets', snippet)
             
             logger.info(f"Saved recording snippet for session {session_id}: {snippet['context']}")
             
@@ -288,21 +302,20 @@ class DualVoiceAgentService:
     def get_session_status(self, session_id: str) -> Dict[str, Any]:
         """Get current session status and state"""
         try:
-            if session_id not in self.active_sessions:
+            session_data = self.sessions.get(session_id)
+            if session_data is None:
                 return {'success': False, 'error': 'Session not found'}
             
-            session_data = self.active_sessions[session_id]
-            
             return {
                 'success': True,
                 'session_id': session_id,
                 'session_state': session_data.get('session_state', 'active'),
                 'pause_reason': session_data.get('pause_reason'),
                 'timeout_context': session_data.get('timeout_context'),
-                'conversation_turns': len(session_data.get('conversation_log', [])),
-                'coaching_interventions': len(session_data.get('coaching_interventions', [])),
-                'recording_snippets': len(session_data.get('recording_snippets', [])),
-                'buyer_persona_name': session_data['buyer_persona'].name if session_data.get('buyer_persona') else None
+                'conversation_turns': self.sessions.length(session_id, 'conversation_log'),
+                'coaching_interventions': self.sessions.length(session_id, 'coaching_interventions'),
+                'recording_snippets': self.sessions.length(session_id, 'recording_snippets'),
+                'buyer_persona_name': session_data.get('buyer_persona_name')
             }
             
         except Exception as e:
@@ -699,33 +712,57 @@ Remember: You're coaching in real-time, so be brief, specific, and immediately a
         content: str, 
         agent_type: str = None
     ):
-        """Log a conversation turn for analysis"""
-        if session_id in self.active_sessions:
-            turn_data = {
-                'timestamp': datetime.utcnow().isoformat(),
-                'speaker': speaker,  # 'user', 'persona', 'coach'
-                'content': content,
-                'agent_type': agent_type  # 'buyer_persona' or 'sales_coach'
-            }
-            
-            self.active_sessions[session_id]['conversation_log'].append(turn_data)
-            
-            # Check for coach tool calls in the content
-            self._process_coach_tools(session_id, content, speaker)
-            
-            # Also save to database
-            try:
-                training_session_id = self.active_sessions[session_id]['training_session_id']
-                message = Message(
-                    training_session_id=training_session_id,
-                    role=speaker,
-                    content=content,
-                    timestamp=datetime.utcnow()
-                )
-                db.session.add(message)
-                db.session.commit()
-            except Exception as e:
-                logger.error(f"Error saving message to database: {str(e)}")
+        """Log a conversation turn for analysis (persisted in batches, see _flush_turns)"""
+        session_data = self.sessions.get(session_id)
+        if session_data is None:
+            return
+        
+        turn_data = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'speaker': speaker,  # 'user', 'persona', 'coach'
+            'content': content,
+            'agent_type': agent_type  # 'buyer_persona' or 'sales_coach'
+        }
+        turn_count = self.sessions.append(session_id, 'conversation_log', turn_data)
+        
+        # Check for coach tool calls in the content
+        self._process_coach_tools(session_id, content, speaker)
+        
+        # Write-behind: save to database once enough turns or time have accumulated
+        unsaved = turn_count - session_data.get('persisted_turns', 0)
+        if unsaved >= TURN_FLUSH_BATCH or time.time() - session_data.get('last_flush', 0) >= TURN_FLUSH_INTERVAL:
+            self._flush_turns(session_id, session_data)
+    
+    def _flush_turns(self, session_id: str, session_data: Dict[str, Any]) -> int:
+        """
+        Save the session's logged turns to its TrainingSession conversation.
+        Rewrites the whole log, so a flush from any worker is idempotent.
+        Returns the number of turns saved.
+        """
+        turns = self.sessions.items(session_id, 'conversation_log')
+        if len(turns) <= session_data.get('persisted_turns', 0):
+            return len(turns)
+        try:
+            training_session = db.session.get(TrainingSession, session_data['training_session_id'])
+            if training_session is None:
+                return 0
+            training_session.conversation = [
+                {
+                    'role': SPEAKER_ROLES.get(turn['speaker'], turn['speaker']),
+                    'content': turn['content'],
+                    'timestamp': turn['timestamp'],
+                    'agent_type': turn.get('agent_type')
+                }
+                for turn in turns
+            ]
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Error saving conversation turns for {session_id}: {str(e)}")
+            db.session.rollback()
+            return 0
+        self.sessions.update(session_id, persisted_turns=len(turns), last_flush=time.time())
+        session_data.update(persisted_turns=len(turns), last_flush=time.time())
+        return len(turns)
     
     def _process_coach_tools(self, session_id: str, content: str, speaker: str):
         """Process coach tool calls embedded in conversation"""
@@ -741,8 +778,7 @@ Remember: You're coaching in real-time, so be brief, specific, and immediately a
         if "SAVE SNIPPET:" in content.upper():
             context = content.split("SAVE SNIPPET:")[-1].strip()
             # Get recent conversation for snippet
-            session_data = self.active_sessions[session_id]
-            recent_conversation = session_data['conversation_log'][-3:]  # Last 3 turns
+            recent_conversation = self.sessions.items(session_id, 'conversation_log', -3)  # Last 3 turns
             
             snippet_data = {
                 'context': context,
@@ -754,46 +790,98 @@ Remember: You're coaching in real-time, so be brief, specific, and immediately a
             self.save_recording_snippet(session_id, snippet_data)
     
     def end_session(self, session_id: str) -> Dict[str, Any]:
-        """End a dual voice agent session and generate feedback"""
+        """
+        End a dual voice agent session. Feedback is generated in the
+        background; poll get_session_feedback() for the result.
+        """
         try:
-            if session_id not in self.active_sessions:
+            session_data = self.sessions.get(session_id)
+            if session_data is None:
                 return {'success': False, 'error': 'Session not found'}
             
-            session_data = self.active_sessions[session_id]
+            # Save any turns still waiting in the write-behind buffer
+            self._flush_turns(session_id, session_data)
             
             # Update training session status
             training_session = TrainingSession.query.get(session_data['training_session_id'])
-            if training_session:
+            if training_session and training_session.status != 'completed':
                 training_session.status = 'completed'
                 training_session.end_time = datetime.utcnow()
+                record_session_end(training_session)
                 db.session.commit()
+                invalidate_dashboard(training_session.user_profile_id)
+            
+            session_data['conversation_log'] = self.sessions.items(session_id, 'conversation_log')
+            session_data['recording_snippets'] = self.sessions.items(session_id, 'recording_snippets')
+            session_data['coaching_interventions'] = self.sessions.items(session_id, 'coaching_interventions')
             
-            # Generate comprehensive feedback (this could be async)
-            feedback_summary = self._generate_session_feedback(session_data)
+            # Generate comprehensive feedback in the background
+            self._start_feedback_job(session_id, session_data)
             
             # Clean up active session
-            del self.active_sessions[session_id]
+            self.sessions.delete(session_id)
             
             logger.info(f"Ended dual voice session {session_id}")
             
             return {
                 'success': True,
                 'session_id': session_id,
-                'feedback_summary': feedback_summary,
+                'feedback_status': 'pending',
+                'feedback_summary': None,
                 'conversation_log': session_data['conversation_log'],
-                'recording_snippets': session_data.get('recording_snippets', []),
-                'coaching_interventions': session_data.get('coaching_interventions', [])
+                'recording_snippets': session_data['recording_snippets'],
+                'coaching_interventions': session_data['coaching_interventions']
             }
             
         except Exception as e:
             logger.error(f"Error ending session {session_id}: {str(e)}")
             return {'success': False, 'error': str(e)}
     
+    def _start_feedback_job(self, session_id: str, session_data: Dict[str, Any]) -> Future:
+        """Queue end-of-session feedback; the result is stored on the TrainingSession"""
+        self.feedback_jobs.create(session_id, {
+            'status': 'pending',
+            'training_session_id': session_data['training_session_id'],
+            'queued_at': time.time()
+        })
+        app = current_app._get_current_object()
+        return self._feedback_executor.submit(self._run_feedback_job, app, session_id, session_data)
+    
+    def _run_feedback_job(self, app, session_id: str, session_data: Dict[str, Any]):
+        with app.app_context(), llm_priority(Priority.FEEDBACK):
+            try:
+                feedback_summary = self._generate_session_feedback(session_data)
+                training_session = db.session.get(TrainingSession, session_data['training_session_id'])
+                if training_session is not None:
+                    training_session.feedback_json = json.dumps(feedback_summary)
+                    db.session.commit()
+                self.feedback_jobs.update(session_id, status='complete', feedback_summary=feedback_summary)
+                logger.info(f"Generated feedback for dual voice session {session_id}")
+            except Exception as e:
+                logger.error(f"Feedback job failed for session {session_id}: {str(e)}")
+                db.session.rollback()
+                self.feedback_jobs.update(session_id, status='failed', error=str(e))
+            finally:
+                db.session.remove()
+    
+    def get_session_feedback(self, session_id: str) -> Dict[str, Any]:
+        """Status of an ended session's feedback job, with the feedback once complete"""
+        job = self.feedback_jobs.get(session_id)
+        if job is None:
+            return {'success': False, 'error': 'No feedback job for this session'}
+        return {
+            'success': True,
+            'session_id': session_id,
+            'feedback_status': job['status'],
+            'feedback_summary': job.get('feedback_summary'),
+            'error': job.get('error')
+        }
+    
     def _generate_session_feedback(self, session_data: Dict[str, Any]) -> Dict[str, Any]:
         """Generate comprehensive feedback for the session"""
         
         conversation_log = session_data.get('conversation_log', [])
-        buyer_persona = session_data.get('buyer_persona')
+        buyer_persona = db.session.get(BuyerPersona, session_data['buyer_persona_id']) if session_data.get('buyer_persona_id') else None
         scenario_type = session_data.get('scenario_type')
         recording_snippets = session_data.get('recording_snippets', [])
         coaching_interventions = session_data.get('coaching_interventions', [])
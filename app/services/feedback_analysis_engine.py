@@ -0,0 +1,504 @@
+"""
+Feedback Analysis Engine - Cached, parallel post-call feedback
+
+Backs the /api/feedback/* analysis routes:
+- Results cached by transcript content hash + prompt version (SQLite)
+- Coaching moments picked by a salience pre-pass over the transcript and
+  analyzed in a bounded concurrent fan-out, yielded as each completes
+- Every finished moment is persisted on its own, so a reload only
+  analyzes the moments that are still missing
+- Moments below the salience threshold go to a cheaper model
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from dataclasses import dataclass, field
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from app.services.llm_admission import Priority, llm_admission
+
+logger = logging.getLogger(__name__)
+
+# Part of every cache key. Prompt text is hashed into the key as well, so
+# bump this only when output handling changes without a prompt edit.
+PROMPT_VERSION = 1
+
+
+# ----------------------------------------------------------------------
+# Transcript pre-pass: exchanges and salience
+# ----------------------------------------------------------------------
+
+SPEAKER_RE = re.compile(r"^\s*([A-Za-z][\w .'-]{0,30}?)\s*:\s*(.*)$")
+REP_LABELS = {'rep', 'you', 'me', 'salesperson', 'sales rep', 'seller', 'user', 'agent'}
+
+# (weight, pattern) applied to the prospect's reply
+PROSPECT_SIGNALS = {
+    'objection': (3.0, re.compile(
+        r"\b(not interested|too expensive|expensive|budget|already (?:have|use|using)|"
+        r"not (?:sure|ready|right now)|no time|busy|send me|call (?:me )?back|competitor|"
+        r"contract|price|pricing|cost)\b", re.I)),
+    'pain': (2.0, re.compile(
+        r"\b(struggl\w*|problems?|challeng\w*|frustrat\w*|losing|lost|difficult|pain|"
+        r"slow|churn\w*|missed)\b", re.I)),
+    'commitment': (2.0, re.compile(
+        r"\b(demo|meeting|schedule|calendar|next (?:step|week)|follow[- ]up|trial|"
+        r"sign|decision)\b", re.I)),
+}
+MAX_SALIENCE_SCORE = 8.0  # Raw score that maps to salience 1.0
+MONOLOGUE_WORDS = 60  # Rep turns longer than this usually mean premature pitching
+
+
+@dataclass
+class MomentCandidate:
+    """One rep/prospect exchange selected for coaching"""
+    index: int  # Rank among selected moments (0 = most salient)
+    turn: int  # 1-based exchange number in the call
+    total_turns: int
+    rep_text: str
+    prospect_text: str
+    salience: float  # 0-1
+    signals: List[str] = field(default_factory=list)
+
+
+def normalize_transcript(transcript: str) -> str:
+    """Whitespace-insensitive form used for hashing"""
+    return '\n'.join(' '.join(line.split()) for line in transcript.strip().splitlines() if line.strip())
+
+
+def transcript_hash(transcript: str) -> str:
+    return hashlib.sha256(normalize_transcript(transcript).encode('utf-8')).hexdigest()
+
+
+def parse_turns(transcript: str) -> List[Tuple[str, str]]:
+    """(speaker, text) turns; consecutive lines from one speaker are merged"""
+    turns: List[Tuple[str, str]] = []
+    for line in transcript.splitlines():
+        match = SPEAKER_RE.match(line)
+        if match:
+            speaker, text = match.group(1).strip(), match.group(2).strip()
+            if turns and turns[-1][0] == speaker:
+                turns[-1] = (speaker, f"{turns[-1][1]} {text}".strip())
+            else:
+                turns.append((speaker, text))
+        elif line.strip() and turns:
+            turns[-1] = (turns[-1][0], f"{turns[-1][1]} {line.strip()}")
+    return turns
+
+
+def find_exchanges(transcript: str) -> List[Tuple[str, str]]:
+    """(rep_text, prospect_reply) pairs in call order"""
+    turns = parse_turns(transcript)
+    if not turns:
+        return []
+
+    speakers = [speaker for speaker, _ in turns]
+    rep = next((s for s in speakers if s.lower() in REP_LABELS), speakers[0])
+
+    exchanges: List[Tuple[str, str]] = []
+    for speaker, text in turns:
+        if speaker == rep:
+            exchanges.append((text, ''))
+        elif exchanges:
+            rep_text, reply = exchanges[-1]
+            exchanges[-1] = (rep_text, f"{reply} {text}".strip())
+        else:
+            exchanges.append(('', text))  # Prospect opened the call
+    return exchanges
+
+
+def score_exchange(rep_text: str, prospect_text: str) -> Tuple[float, List[str]]:
+    """Raw salience score and the signals that fired"""
+    score = 0.0
+    signals = []
+    for name, (weight, pattern) in PROSPECT_SIGNALS.items():
+        if pattern.search(prospect_text):
+            score += weight
+            signals.append(name)
+    if '?' in rep_text:
+        score += 1.0
+        signals.append('discovery')
+    if len(rep_text.split()) > MONOLOGUE_WORDS:
+        score += 1.5
+        signals.append('monologue')
+    score += min(len(prospect_text.split()) / 40.0, 1.0)  # Engaged replies matter more
+    return score, signals
+
+
+def select_moments(transcript: str, count: int) -> List[MomentCandidate]:
+    """
+    Most salient exchanges, ranked. Ranking is stable, so the first k
+    candidates are the same whatever `count` is.
+    """
+    exchanges = find_exchanges(transcript)
+    scored = []
+    for turn, (rep_text, prospect_text) in enumerate(exchanges, 1):
+        if not rep_text or not prospect_text:
+            continue
+        score, signals = score_exchange(rep_text, prospect_text)
+        scored.append((score, turn, rep_text, prospect_text, signals))
+
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [
+        MomentCandidate(
+            index=index,
+            turn=turn,
+            total_turns=len(exchanges),
+            rep_text=rep_text,
+            prospect_text=prospect_text,
+            salience=round(min(score / MAX_SALIENCE_SCORE, 1.0), 3),
+            signals=signals
+        )
+        for index, (score, turn, rep_text, prospect_text, signals) in enumerate(scored[:count])
+    ]
+
+
+def default_moment_count(word_count: int) -> int:
+    """Moments per call (matches the post-call review page)"""
+    return 1 if word_count < 200 else 2
+
+
+# ----------------------------------------------------------------------
+# Prompts
+# ----------------------------------------------------------------------
+
+MOMENT_SYSTEM_PROMPT = """You are an expert sales coach analyzing ONE specific moment from a sales call.
+
+Analyze this transcript and identify the single most important coaching moment at index {moment_index}.
+
+Return ONLY this JSON structure:
+{{
+    "turnLabel": "Turn X",
+    "turnNumber": "X / Y",
+    "type": "mistake|strength|turning",
+    "youSaid": "exact rep quote",
+    "prospectSaid": "exact prospect quote",
+    "talkRatio": "XX% you, XX% prospect",
+    "prospectTone": "brief tone description",
+    "beforeContext": "2-3 sentence scenario describing the actual call context. Be SPECIFIC: Was this cold outreach or warm follow-up? What triggered the call? Example: 'You followed up with Sarah after she downloaded your pricing guide. She mentioned struggling with rep onboarding time.'"
+    "beforeScore": 4.5,
+    "sharpenThis": "2-3 sentence coaching insight with **bold key point** embedded naturally",
+    "quoteTag": "Try this instead",
+    "quoteText": "1-2 sentence improved script",
+    "afterScore": 7.5,
+    "psychologyPrinciple": "brief principle name",
+    "psychologyExplanation": "1-2 sentence business impact explanation",
+    "quiz": {{
+        "question": "What should you have done differently?",
+        "options": [
+            {{"text": "Correct answer", "correct": true}},
+            {{"text": "Plausible distractor 1", "correct": false}},
+            {{"text": "Plausible distractor 2", "correct": false}}
+        ],
+        "explanation": "Why the correct answer works - focus on business impact",
+        "howResponse": "Exact script for next time"
+    }}
+}}
+
+Be concise. No filler. Focus on actionable coaching.{focus_text}"""
+
+MOMENT_USER_PROMPT = """Analyze this sales call transcript and generate moment {moment_index}:
+
+{transcript}
+
+Return only the JSON object for this single moment."""
+
+
+def build_moment_prompt(moment_index: int, candidate: Optional[MomentCandidate] = None,
+                        exclude_indices: Optional[List[int]] = None) -> str:
+    """System prompt for one moment, focused on a candidate exchange when known"""
+    if candidate is not None:
+        focus_text = (
+            f"\n\nThe moment to coach is exchange {candidate.turn} of {candidate.total_turns}:"
+            f"\nRep: {candidate.rep_text}\nProspect: {candidate.prospect_text}"
+            f"\nUse these exact quotes for youSaid and prospectSaid and "
+            f"\"Turn {candidate.turn}\" / \"{candidate.turn} / {candidate.total_turns}\" for the turn fields."
+        )
+    elif exclude_indices:
+        focus_text = (
+            f"\nPreviously analyzed moments: {exclude_indices}"
+            f"\nFocus on a DIFFERENT critical decision point than those already covered."
+        )
+    else:
+        focus_text = ""
+    return MOMENT_SYSTEM_PROMPT.format(moment_index=moment_index, focus_text=focus_text)
+
+
+def complete_json(client, model: str, system_prompt: str, user_prompt: str,
+                  temperature: float = 0.7, max_tokens: int = 1200,
+                  timeout: float = 20) -> Dict[str, Any]:
+    """One JSON-mode chat completion, parsed"""
+    with llm_admission(Priority.FEEDBACK):
+        response = client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"},
+            timeout=timeout
+        )
+    text = response.choices[0].message.content
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        logger.error(f"[FeedbackEngine] JSON parse error ({model}): {text[:500]}...")
+        raise
+
+
+# ----------------------------------------------------------------------
+# Persistent result store
+# ----------------------------------------------------------------------
+
+class FeedbackResultStore:
+    """Analysis results keyed by cache key, in a SQLite file shared by workers"""
+
+    def __init__(self, path: str, ttl_days: int = 30):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS feedback_results ("
+            "key TEXT PRIMARY KEY, kind TEXT NOT NULL, transcript_hash TEXT NOT NULL, "
+            "payload TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn().execute(
+            "CREATE INDEX IF NOT EXISTS ix_feedback_results_transcript ON feedback_results (transcript_hash)"
+        )
+        self.purge()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT payload, created FROM feedback_results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return json.loads(row[0])
+
+    def put(self, key: str, kind: str, content_hash: str, payload: Dict[str, Any]):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO feedback_results (key, kind, transcript_hash, payload, created) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, kind, content_hash, json.dumps(payload), time.time())
+        )
+
+    def purge(self):
+        self._conn().execute("DELETE FROM feedback_results WHERE created < ?", (time.time() - self.ttl,))
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM feedback_results").fetchone()[0]
+
+
+# ----------------------------------------------------------------------
+# Engine
+# ----------------------------------------------------------------------
+
+class FeedbackAnalysisEngine:
+    """
+    Cache-first feedback analysis with a bounded pool for LLM calls.
+
+    Concurrent requests for the same key share one in-flight call, and the
+    pool size caps parallel LLM calls for the whole process.
+    """
+
+    def __init__(self, store: FeedbackResultStore, max_workers: int = 3,
+                 moment_model: str = 'gpt-4o-mini', light_model: str = 'gpt-4.1-nano',
+                 salience_threshold: float = 0.35):
+        self.store = store
+        self.moment_model = moment_model
+        self.light_model = light_model
+        self.salience_threshold = salience_threshold
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='feedback')
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.light_calls = 0
+
+    @staticmethod
+    def cache_key(kind: str, transcript: str, prompt: str, **params) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]
+        material = json.dumps(
+            [kind, PROMPT_VERSION, prompt_hash, transcript_hash(transcript), params],
+            sort_keys=True
+        )
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def cached(self, kind: str, transcript: str, prompt: str,
+               compute: Callable[[], Dict[str, Any]], **params) -> Tuple[Dict[str, Any], bool]:
+        """(result, was_cached); compute() runs on the pool on a miss"""
+        key = self.cache_key(kind, transcript, prompt, **params)
+        result = self._lookup(key)
+        if result is not None:
+            return result, True
+        return self._submit(key, kind, transcript, compute).result(), False
+
+    def analyze_moment(self, client, transcript: str, moment_index: int,
+                       exclude_indices: Optional[List[int]] = None) -> Dict[str, Any]:
+        """One moment: {'moment', 'cached', 'model', 'salience'}"""
+        job = self._moment_job(client, transcript, moment_index, exclude_indices)
+        moment = self._lookup(job['key'])
+        cached = moment is not None
+        if not cached:
+            moment = self._submit(job['key'], 'moment', transcript, job['compute']).result()
+        return {'moment': moment, 'cached': cached, 'model': job['model'], 'salience': job['salience']}
+
+    def stream_moments(self, client, transcript: str, count: int) -> Iterator[Dict[str, Any]]:
+        """
+        Yield one event per moment as it becomes available: persisted moments
+        first, then the rest in completion order. Failures yield an 'error'.
+        """
+        pending: Dict[Future, Dict[str, Any]] = {}
+        for index in range(count):
+            job = self._moment_job(client, transcript, index, list(range(index)))
+            moment = self._lookup(job['key'])
+            if moment is not None:
+                yield self._moment_event(index, job, moment, cached=True)
+            else:
+                pending[self._submit(job['key'], 'moment', transcript, job['compute'])] = dict(job, index=index)
+
+        for future in as_completed(pending):
+            job = pending[future]
+            try:
+                yield self._moment_event(job['index'], job, future.result(), cached=False)
+            except Exception as e:
+                logger.error(f"[FeedbackEngine] Moment {job['index']} failed: {e}")
+                yield {'momentIndex': job['index'], 'error': str(e)}
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'light_model_calls': self.light_calls,
+            'inflight': len(self._inflight),
+            'stored_results': self.store.count()
+        }
+
+    # ------------------------------------------------------------------
+
+    def _moment_job(self, client, transcript: str, moment_index: int,
+                    exclude_indices: Optional[List[int]]) -> Dict[str, Any]:
+        candidates = select_moments(transcript, moment_index + 1)
+        candidate = candidates[moment_index] if moment_index < len(candidates) else None
+
+        if candidate is not None:
+            light = candidate.salience < self.salience_threshold
+            model = self.light_model if light else self.moment_model
+            system_prompt = build_moment_prompt(moment_index, candidate)
+            params = {'index': moment_index, 'turn': candidate.turn, 'model': model}
+            salience = candidate.salience
+        else:
+            # No speaker labels to pre-select from: the model picks the moment
+            light = False
+            model = self.moment_model
+            system_prompt = build_moment_prompt(moment_index, exclude_indices=exclude_indices)
+            params = {'index': moment_index, 'exclude': sorted(exclude_indices or []), 'model': model}
+            salience = None
+
+        user_prompt = MOMENT_USER_PROMPT.format(moment_index=moment_index, transcript=transcript)
+
+        def compute():
+            if light:
+                with self._lock:
+                    self.light_calls += 1
+            logger.info(f"[FeedbackEngine] Analyzing moment {moment_index} with {model}")
+            return complete_json(client, model, system_prompt, user_prompt,
+                                 max_tokens=800 if light else 1200, timeout=20)
+
+        return {
+            'key': self.cache_key('moment', transcript, system_prompt, **params),
+            'compute': compute,
+            'model': model,
+            'salience': salience
+        }
+
+    @staticmethod
+    def _moment_event(index: int, job: Dict[str, Any], moment: Dict[str, Any], cached: bool):
+        return {
+            'momentIndex': index,
+            'moment': moment,
+            'cached': cached,
+            'model': job['model'],
+            'salience': job['salience']
+        }
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            result = self.store.get(key)
+        except sqlite3.Error as e:
+            logger.warning(f"[FeedbackEngine] Cache read failed: {e}")
+            result = None
+        with self._lock:
+            if result is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return result
+
+    def _submit(self, key: str, kind: str, transcript: str,
+                compute: Callable[[], Dict[str, Any]]) -> Future:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._run, key, kind, transcript_hash(transcript), compute)
+                self._inflight[key] = future
+            return future
+
+    def _run(self, key: str, kind: str, content_hash: str, compute: Callable[[], Dict[str, Any]]):
+        try:
+            result = compute()
+            try:
+                self.store.put(key, kind, content_hash, result)
+            except sqlite3.Error as e:
+                logger.warning(f"[FeedbackEngine] Cache write failed: {e}")
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+# Global engine, built lazily from app config
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_feedback_engine() -> FeedbackAnalysisEngine:
+    """Get the process-wide feedback analysis engine"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                config = {}
+                try:
+                    from flask import current_app
+                    config = current_app.config
+                except RuntimeError:
+                    pass  # Outside app context: defaults
+                path = config.get('FEEDBACK_CACHE_PATH') or os.path.join('instance', 'feedback_cache.db')
+                _engine = FeedbackAnalysisEngine(
+                    FeedbackResultStore(path, ttl_days=config.get('FEEDBACK_CACHE_TTL_DAYS', 30)),
+                    max_workers=config.get('FEEDBACK_MAX_CONCURRENCY', 3),
+                    moment_model=config.get('FEEDBACK_MOMENT_MODEL', 'gpt-4o-mini'),
+                    light_model=config.get('FEEDBACK_LIGHT_MODEL', 'gpt-4.1-nano'),
+                    salience_threshold=config.get('FEEDBACK_SALIENCE_THRESHOLD', 0.35)
+                )
+    return _engine
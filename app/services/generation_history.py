@@ -0,0 +1,227 @@
+"""
+Generation History - Bounded persona-generation history with O(1) counters
+
+Backs the anti-bias selection in ComprehensiveBiasPrevention.
+- Ring buffer of the last N generation records
+- Frequency counters maintained per window size (e.g. last 10, last 50)
+- Recording a generation costs O(fields x windows), independent of history
+- Optional Redis-backed variant shares the window across workers
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from collections import Counter, defaultdict, deque
+import logging
+import threading
+import time
+
+from app.utils.redis_client import RedisClient, RedisError
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SEP = '\x1f'  # Separates field=value tokens inside an encoded record
+
+
+def _tokens(record: Dict[str, str]) -> List[str]:
+    """Flatten a record into field=value tokens, skipping empty values"""
+    return [f"{field}={value}" for field, value in record.items() if value not in (None, '')]
+
+
+class GenerationHistory:
+    """In-process history; thread-safe"""
+
+    def __init__(self, windows: Sequence[int] = (10, 50)):
+        self.windows = tuple(sorted(windows))
+        self._records = deque(maxlen=self.windows[-1])
+        self._counts: Dict[int, Dict[str, Counter]] = {
+            w: defaultdict(Counter) for w in self.windows
+        }
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def record(self, record: Dict[str, str]):
+        """Append a generation; counters leaving each window are decremented"""
+        tokens = _tokens(record)
+        with self._lock:
+            self._apply(tokens)
+
+    def _apply(self, tokens: List[str]):
+        for window in self.windows:
+            if len(self._records) >= window:
+                leaving = self._records[-window]
+                counts = self._counts[window]
+                for token in leaving:
+                    field, value = token.split('=', 1)
+                    counts[field][value] -= 1
+                    if counts[field][value] <= 0:
+                        del counts[field][value]
+
+        self._records.append(tokens)
+        for window in self.windows:
+            counts = self._counts[window]
+            for token in tokens:
+                field, value = token.split('=', 1)
+                counts[field][value] += 1
+        self._total += 1
+
+    def counts(self, field: str, window: Optional[int] = None) -> Dict[str, int]:
+        """Value -> occurrences of `field` within the last `window` generations"""
+        window = window or self.windows[0]
+        with self._lock:
+            return dict(self._counts[window].get(field, {}))
+
+    def size(self, window: Optional[int] = None) -> int:
+        """Number of generations currently inside `window`"""
+        with self._lock:
+            return min(len(self._records), window or self.windows[-1])
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            for window in self.windows:
+                self._counts[window] = defaultdict(Counter)
+            self._total = 0
+
+
+# Append one record and maintain per-window counters atomically.
+# KEYS: list, total, counts hash per window (same order as ARGV[2..])
+# ARGV: encoded record, window sizes ascending
+# Returns: {total, HGETALL of each window hash}
+RECORD_SCRIPT = """
+local record = ARGV[1]
+local max_window = tonumber(ARGV[#ARGV])
+local len = redis.call('LLEN', KEYS[1])
+for i = 2, #ARGV do
+  local window = tonumber(ARGV[i])
+  if len >= window then
+    local leaving = redis.call('LINDEX', KEYS[1], -window)
+    for token in string.gmatch(leaving, '[^\\31]+') do
+      if redis.call('HINCRBY', KEYS[i + 1], token, -1) <= 0 then
+        redis.call('HDEL', KEYS[i + 1], token)
+      end
+    end
+  end
+end
+redis.call('RPUSH', KEYS[1], record)
+redis.call('LTRIM', KEYS[1], -max_window, -1)
+for token in string.gmatch(record, '[^\\31]+') do
+  for i = 2, #ARGV do
+    redis.call('HINCRBY', KEYS[i + 1], token, 1)
+  end
+end
+local result = {redis.call('INCR', KEYS[2])}
+for i = 2, #ARGV do
+  table.insert(result, redis.call('HGETALL', KEYS[i + 1]))
+end
+return result
+"""
+
+
+class SharedGenerationHistory(GenerationHistory):
+    """
+    History shared across workers through a Redis-protocol store.
+
+    Every record() is one atomic script call that also returns fresh
+    counters, so selection reads a local snapshot without extra round
+    trips. Snapshots older than refresh_interval are re-read. If the store
+    is unreachable, the in-process counters are used instead.
+    """
+
+    RETRY_AFTER = 30.0  # Seconds to stay on local counters after a store error
+
+    def __init__(self, client: RedisClient, prefix: str = 'bias_history',
+                 windows: Sequence[int] = (10, 50), refresh_interval: float = 2.0):
+        super().__init__(windows)
+        self.client = client
+        self.prefix = prefix
+        self.refresh_interval = refresh_interval
+        self._failed_at = 0.0
+        self._snapshot: Optional[Dict[int, Dict[str, Dict[str, int]]]] = None
+        self._snapshot_total = 0
+        self._snapshot_at = 0.0
+
+    @property
+    def _keys(self) -> List[str]:
+        return [f"{self.prefix}:records", f"{self.prefix}:total"] + [
+            f"{self.prefix}:counts:{w}" for w in self.windows
+        ]
+
+    def record(self, record: Dict[str, str]):
+        super().record(record)
+        if self._store_down():
+            return
+        tokens = _tokens(record)
+        keys = self._keys
+        try:
+            reply = self.client.execute(
+                'EVAL', RECORD_SCRIPT, len(keys), *keys,
+                TOKEN_SEP.join(tokens), *self.windows
+            )
+            self._store_snapshot(int(reply[0]), reply[1:])
+        except RedisError as e:
+            logger.warning(f"[BiasHistory] Shared store unavailable, using local counters: {e}")
+            self._mark_down()
+
+    def counts(self, field: str, window: Optional[int] = None) -> Dict[str, int]:
+        window = window or self.windows[0]
+        snapshot = self._current_snapshot()
+        if snapshot is None:
+            return super().counts(field, window)
+        return dict(snapshot[window].get(field, {}))
+
+    def size(self, window: Optional[int] = None) -> int:
+        snapshot = self._current_snapshot()
+        if snapshot is None:
+            return super().size(window)
+        return min(self._snapshot_total, window or self.windows[-1])
+
+    @property
+    def total(self) -> int:
+        return self._snapshot_total if self._current_snapshot() is not None else self._total
+
+    def clear(self):
+        super().clear()
+        try:
+            self.client.execute('DEL', *self._keys)
+        except RedisError as e:
+            logger.warning(f"[BiasHistory] Could not clear shared history: {e}")
+        self._snapshot = None
+
+    def _store_down(self) -> bool:
+        return time.time() - self._failed_at < self.RETRY_AFTER
+
+    def _mark_down(self):
+        self._failed_at = time.time()
+        self._snapshot = None
+
+    def _current_snapshot(self):
+        if self._store_down():
+            return None
+        if self._snapshot is None or time.time() - self._snapshot_at > self.refresh_interval:
+            try:
+                total = self.client.execute('GET', self._keys[1])
+                hashes = [self.client.execute('HGETALL', key) for key in self._keys[2:]]
+                self._store_snapshot(int(total or 0), hashes)
+            except RedisError as e:
+                logger.warning(f"[BiasHistory] Refresh failed, using local counters: {e}")
+                self._mark_down()
+                return None
+        return self._snapshot
+
+    def _store_snapshot(self, total: int, hashes: Iterable[List[str]]):
+        snapshot = {}
+        for window, flat in zip(self.windows, hashes):
+            counts: Dict[str, Dict[str, int]] = defaultdict(dict)
+            for token, count in _pairs(flat or []):
+                field, value = token.split('=', 1)
+                counts[field][value] = int(count)
+            snapshot[window] = counts
+        self._snapshot = snapshot
+        self._snapshot_total = total
+        self._snapshot_at = time.time()
+
+
+def _pairs(flat: List[str]) -> Iterable[Tuple[str, str]]:
+    return zip(flat[0::2], flat[1::2])
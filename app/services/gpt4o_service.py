@@ -12,12 +12,15 @@ import random
 import re
 import traceback
 import hashlib
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Iterator, Optional, Union
 import openai # Import the base library
 from flask import current_app
 from app.models import Conversation, Message, User, db
 from app.services.openai_service import OpenAIService, get_openai_service
 from app.services.conversation_state_manager import ConversationStateManager, ConversationPhase
+from app.services.llm_admission import AdmissionRejected, Priority, llm_admission, llm_priority
+from app.services.llm_retry import RetryFailed, TransientResponseError, current_deadline, get_retry_policy
+from app.services.llm_router import NoProviderAvailable, OpenAIChatProvider, get_llm_router
 from app.services.industry_persona_templates import get_industry_context_prompt_addition, apply_industry_modifications
 from app.utils.logging_utils import setup_logger
 from app.utils.conversation_utils import allow_reciprocation
@@ -35,8 +38,14 @@ DEFAULT_MODEL = "gpt-4o-mini"
 DEFAULT_TEMPERATURE = 0.7
 MAX_TOKENS = 1500  # Reduced from 4000 for faster responses
 DEFAULT_TIMEOUT = 30  # Reduced from 90 seconds
-DEFAULT_RETRIES = 2  # Reduced from 3
-DEFAULT_BACKOFF = 2
+MAX_ATTEMPTS = 3  # Per call, within the deadline and shared retry budget (see llm_retry)
+# Sent as the user turn when the greeting is generated with the roleplay system prompt
+ROLEPLAY_GREETING_REQUEST = (
+    "[CALL CONNECTED] The salesperson has just joined the call. Answer with a brief, natural opening "
+    "greeting as the customer: 1 brief sentence, simple and professional. NEVER use the salesperson's "
+    "name unless they've already introduced themselves, DO NOT ask personal questions, and DO NOT ask "
+    "multiple questions. Example appropriate responses: 'Hello there.' or 'Good morning, how are you?'"
+)
 TEMPERATURE_RANGES = {
     "low": (0.1, 0.3),
     "medium": (0.4, 0.6),
@@ -110,7 +119,7 @@ class GPT4oService:
             self.client = openai.OpenAI(
                 api_key=current_api_key,
                 timeout=DEFAULT_TIMEOUT,  # Use 30 second timeout
-                max_retries=DEFAULT_RETRIES
+                max_retries=0  # Retries are handled by the shared retry policy
             )
             
             # Test the API key with a minimal API call
@@ -132,6 +141,72 @@ class GPT4oService:
             self.client = None
             self._initialized = True  # Fix: Prevent repeated failed reinitializations
     
+    def _format_messages(self, messages: List[Dict[str, str]], system_prompt: str = "") -> List[Dict[str, str]]:
+        """Messages for the OpenAI API: system prompt first, empty messages dropped"""
+        formatted_messages = []
+        has_non_empty_message = False
+        
+        # Add system prompt if provided
+        if system_prompt:
+            formatted_messages.append({
+                "role": "system",
+                "content": system_prompt
+            })
+        
+        for msg in messages:
+            if msg.get('role') and msg.get('content') is not None:
+                # Only add non-empty messages or replace empty content with a placeholder
+                role = msg['role']
+                content = msg['content'].strip() if isinstance(msg['content'], str) else msg['content']
+                
+                if content:  # If content is not empty
+                    formatted_messages.append({
+                        "role": role,
+                        "content": content
+                    })
+                    has_non_empty_message = True
+        
+        # If no valid messages found, add a placeholder message
+        if not has_non_empty_message:
+            logger.warning("No non-empty messages found, adding placeholder message")
+            formatted_messages.append({
+                "role": "user",
+                "content": "Hello, I'm interested in learning more."
+            })
+        return formatted_messages
+    
+    def _router(self):
+        router = get_llm_router()
+        if 'openai' not in router.providers:
+            router.add_provider(OpenAIChatProvider('openai', self.client), replace=False)
+        return router
+    
+    def stream_response(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: str = "",
+        temperature: float = DEFAULT_TEMPERATURE,
+        max_tokens: int = MAX_TOKENS
+    ) -> Iterator[str]:
+        """
+        Stream a response from GPT-4o-mini as text deltas, for callers that
+        act on output before it is complete. Not retried: an error before the
+        first delta fails over to an equivalent provider, a later one reaches
+        the caller. Close the iterator to stop generation early.
+        """
+        if not getattr(self, 'api_available', False):
+            raise GPT4oServiceError("GPT-4o-mini API is not properly configured. Please check your API key.")
+        deadline = current_deadline()
+        timeout = max(0.1, deadline - time.monotonic()) if deadline is not None else DEFAULT_TIMEOUT
+        return self._router().stream(
+            DEFAULT_MODEL,
+            self._format_messages(messages, system_prompt),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            provider='openai'
+        )
+    
     def generate_response(
         self, 
         messages: List[Dict[str, str]],
@@ -160,115 +235,71 @@ class GPT4oService:
             raise GPT4oServiceError("GPT-4o-mini API is not properly configured. Please check your API key.")
         
         try:
-            # Format messages for OpenAI API
-            formatted_messages = []
-            has_non_empty_message = False
+            formatted_messages = self._format_messages(messages, system_prompt)
             
-            # Add system prompt if provided
-            if system_prompt:
-                formatted_messages.append({
-                    "role": "system",
-                    "content": system_prompt
-                })
+            # Call the API; the retry policy owns backoff, deadline and budget
+            router = self._router()
             
-            for msg in messages:
-                if msg.get('role') and msg.get('content') is not None:
-                    # Only add non-empty messages or replace empty content with a placeholder
-                    role = msg['role']
-                    content = msg['content'].strip() if isinstance(msg['content'], str) else msg['content']
-                    
-                    if content:  # If content is not empty
-                        formatted_messages.append({
-                            "role": role,
-                            "content": content
-                        })
-                        has_non_empty_message = True
-            
-            # If no valid messages found, add a placeholder message
-            if not has_non_empty_message:
-                logger.warning("No non-empty messages found, adding placeholder message")
-                formatted_messages.append({
-                    "role": "user",
-                    "content": "Hello, I'm interested in learning more."
-                })
-            
-            # Call the API with retry logic
-            max_retries = DEFAULT_RETRIES
-            backoff_factor = DEFAULT_BACKOFF
+            def attempt(timeout: float) -> str:
+                attempt_deadline = time.monotonic() + timeout
+                logger.info("Sending request to GPT-4o-mini API")
+                
+                # Log request details at debug level
+                logger.debug(f"System prompt (if in messages): {formatted_messages[0]['content'][:30] if formatted_messages and formatted_messages[0]['role'] == 'system' else 'No system prompt'}")
+                logger.debug(f"Number of messages: {len(formatted_messages)}")
+                
+                # Router handles admission, circuit breakers, failover and hedging
+                routed = router.complete(
+                    DEFAULT_MODEL,
+                    formatted_messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=max(0.1, attempt_deadline - time.monotonic()),
+                    provider='openai'
+                )
+                response = routed.raw
+                
+                # Phase 1 instrumentation: log prompt size and cached tokens
+                system_prompt_size = len(formatted_messages[0]['content']) if formatted_messages and formatted_messages[0]['role'] == 'system' else 0
+                total_prompt_size = sum(len(msg['content']) for msg in formatted_messages)
+                logger.info(f'[Prompt Analysis] system_prompt: {system_prompt_size} chars, total_prompt: {total_prompt_size} chars')
+                
+                # Log cached tokens if available (OpenAI prompt caching)
+                if routed.provider != 'openai':
+                    logger.info(f'[Prompt Caching] served by {routed.provider}/{routed.model}, cached_tokens: not available')
+                elif hasattr(response, 'usage') and hasattr(response.usage, 'prompt_tokens_details'):
+                    cached_tokens = getattr(response.usage.prompt_tokens_details, 'cached_tokens', 0)
+                    logger.info(f'[Prompt Caching] cached_tokens: {cached_tokens}, total_tokens: {response.usage.prompt_tokens}')
+                elif hasattr(response, 'usage'):
+                    logger.info(f'[Prompt Caching] total_tokens: {response.usage.prompt_tokens}, cached_tokens: not available')
+                logger.info(f"GPT-4o-mini API request completed in {routed.latency_ms / 1000:.2f}s"
+                            f"{' (hedged)' if routed.hedged else ''}")
+                
+                # Extract the assistant's response
+                if routed.text:
+                    return routed.text
+                logger.error("Empty or invalid content received from GPT-4o-mini API")
+                raise TransientResponseError("Empty response from GPT-4o-mini API")
             
-            for attempt in range(max_retries):
-                try:
-                    start_time = time.time()
-                    logger.info(f"Sending request to GPT-4o-mini API (attempt {attempt+1}/{max_retries})")
-                    
-                    # Log request details at debug level
-                    logger.debug(f"System prompt (if in messages): {formatted_messages[0]['content'][:30] if formatted_messages and formatted_messages[0]['role'] == 'system' else 'No system prompt'}")
-                    logger.debug(f"Number of messages: {len(formatted_messages)}")
-                    
-                    response = self.client.chat.completions.create(
-                        model=DEFAULT_MODEL,
-                        messages=formatted_messages,
-                        max_tokens=max_tokens,
-                        temperature=temperature
-                    )
-                    
-                    duration = time.time() - start_time
-                    # Phase 1 instrumentation: log prompt size and cached tokens
-                    system_prompt_size = len(formatted_messages[0]['content']) if formatted_messages and formatted_messages[0]['role'] == 'system' else 0
-                    total_prompt_size = sum(len(msg['content']) for msg in formatted_messages)
-                    logger.info(f'[Prompt Analysis] system_prompt: {system_prompt_size} chars, total_prompt: {total_prompt_size} chars')
-                    
-                    # Log cached tokens if available (OpenAI prompt caching)
-                    if hasattr(response, 'usage') and hasattr(response.usage, 'prompt_tokens_details'):
-                        cached_tokens = getattr(response.usage.prompt_tokens_details, 'cached_tokens', 0)
-                        logger.info(f'[Prompt Caching] cached_tokens: {cached_tokens}, total_tokens: {response.usage.prompt_tokens}')
-                    elif hasattr(response, 'usage'):
-                        logger.info(f'[Prompt Caching] total_tokens: {response.usage.prompt_tokens}, cached_tokens: not available')
-                    logger.info(f"GPT-4o-mini API request completed in {duration:.2f}s")
-                    
-                    # Extract the assistant's response
-                    if response and response.choices and len(response.choices) > 0:
-                        return response.choices[0].message.content
-                    else:
-                        logger.error("Empty or invalid content received from GPT-4o-mini API")
-                        if attempt < max_retries - 1:
-                            wait_time = backoff_factor ** attempt
-                            logger.warning(f"Empty response, retrying in {wait_time}s")
-                            time.sleep(wait_time)
-                        else:
-                            # Return fallback response instead of raising exception on final attempt
-                            logger.warning("Returning fallback response after empty GPT-4o-mini API responses")
-                            return "I apologize, but I'm having trouble generating a response at the moment. Could you please try again or rephrase your message?"
-                        
-                except Exception as e:
-                    if "rate_limit" in str(e).lower():
-                        if attempt < max_retries - 1:
-                            wait_time = backoff_factor ** attempt
-                            logger.warning(f"Rate limit exceeded, retrying in {wait_time}s. Error: {e}")
-                            time.sleep(wait_time)
-                        else:
-                            logger.error(f"Final rate limit error after {max_retries} attempts: {str(e)}")
-                            raise GPT4oServiceError(f"GPT-4o-mini API rate limit exceeded after {max_retries} attempts: {e}") from e
-                    elif "api" in str(e).lower():
-                        if attempt < max_retries - 1:
-                            wait_time = backoff_factor ** attempt
-                            logger.warning(f"API error, retrying in {wait_time}s. Error: {e}")
-                            time.sleep(wait_time)
-                        else:
-                            logger.error(f"Final API error after {max_retries} attempts: {str(e)}")
-                            raise GPT4oServiceError(f"GPT-4o-mini API connection failed after {max_retries} attempts: {e}") from e
-                    else:
-                        if attempt < max_retries - 1:
-                            wait_time = backoff_factor ** attempt
-                            logger.warning(f"Unknown error, retrying in {wait_time}s. Error: {e}")
-                            time.sleep(wait_time)
-                        else:
-                            logger.error(f"Final unknown error after {max_retries} attempts: {str(e)}")
-                            raise GPT4oServiceError(f"GPT-4o-mini API error after {max_retries} attempts: {e}") from e
+            try:
+                result = get_retry_policy('gpt4o', max_attempts=MAX_ATTEMPTS, default_timeout=DEFAULT_TIMEOUT).call(attempt)
+            except AdmissionRejected as e:
+                # Shed before reaching the provider; retrying would only add load
+                raise GPT4oServiceError(f"GPT-4o-mini request shed: {e}") from e
+            except RetryFailed as e:
+                if isinstance(e.last_error, TransientResponseError):
+                    # Return fallback response instead of raising exception after empty responses
+                    logger.warning("Returning fallback response after empty GPT-4o-mini API responses")
+                    return "I apologize, but I'm having trouble generating a response at the moment. Could you please try again or rephrase your message?"
+                raise GPT4oServiceError(f"GPT-4o-mini API failed after {e.attempts} attempts ({e.reason}): {e.last_error}") from e
+            except NoProviderAvailable as e:
+                raise GPT4oServiceError(f"GPT-4o-mini unavailable: {e}") from e
+            except openai.OpenAIError as e:
+                raise GPT4oServiceError(f"GPT-4o-mini API error: {e}") from e
             
-            # If we get here, all retries failed
-            logger.error(f"GPT-4o-mini API failed to respond properly after {max_retries} attempts, using fallback response")
-            return "I apologize, but I'm having trouble processing your request right now."
+            if result.attempts > 1:
+                logger.info(f"GPT-4o-mini API succeeded after {result.attempts} attempts in {result.elapsed:.2f}s")
+            return result.value
                 
         except GPT4oServiceError:
              raise
@@ -427,17 +458,25 @@ IMPORTANT: Make this persona feel like a REAL PERSON with genuine concerns, real
         
         logger.info(f"Generating customer persona with shell: {bool(behavioral_shell_data)}. Prompt (first 200 chars): {prompt_text[:200]}")
 
+        def attempt(timeout: float):
+            attempt_deadline = time.monotonic() + timeout
+            with llm_admission(deadline=attempt_deadline):
+                return self.client.chat.completions.create(
+                    model=DEFAULT_MODEL, # Use DEFAULT_MODEL explicitly
+                    messages=[
+                        {"role": "system", "content": "You are an AI assistant that generates detailed customer personas in JSON format."},
+                        {"role": "user", "content": prompt_text}
+                    ],
+                    response_format={"type": "json_object"}, # Ensure JSON output
+                    temperature=0.8, # Allow for some creativity
+                    max_tokens=2500, # Increased to allow for detailed JSON, especially with shells
+                    timeout=max(0.1, attempt_deadline - time.monotonic())
+                )
+
         try:
-            chat_completion = self.client.chat.completions.create(
-                model=DEFAULT_MODEL, # Use DEFAULT_MODEL explicitly
-                messages=[
-                    {"role": "system", "content": "You are an AI assistant that generates detailed customer personas in JSON format."},
-                    {"role": "user", "content": prompt_text}
-                ],
-                response_format={"type": "json_object"}, # Ensure JSON output
-                temperature=0.8, # Allow for some creativity
-                max_tokens=2500 # Increased to allow for detailed JSON, especially with shells
-            )
+            # The shared client does not retry; the retry policy does
+            with llm_priority(Priority.BACKGROUND):
+                chat_completion = get_retry_policy('gpt4o', max_attempts=MAX_ATTEMPTS, default_timeout=DEFAULT_TIMEOUT).call(attempt).value
             
             response_content = chat_completion.choices[0].message.content
             logger.info(f"Successfully received persona JSON from API (first 200 chars): {response_content[:200]}")
@@ -956,22 +995,17 @@ IMPORTANT: Make this persona feel like a REAL PERSON with genuine concerns, real
 
         # Direct return of optimized sections (old 32KB prompt removed)
         # Build final prompt with caching-optimized order
-        static_core_section = self._build_static_core_rules()
-        static_voice_section = self._build_static_voice_rules()
-        static_output_section = self._build_static_output_rules()
+        static_prefix = self.static_prompt_prefix()
         persona_section = self._build_persona_context(persona, user_info)
         dynamic_state_section = self._build_dynamic_conversation_state(conversation_state, user_info)
         
         # Log section sizes for optimization analysis
-        logger.info(f"[Prompt Sections] static_core: {len(static_core_section)} chars")
-        logger.info(f"[Prompt Sections] static_voice: {len(static_voice_section)} chars") 
-        logger.info(f"[Prompt Sections] static_output: {len(static_output_section)} chars")
+        logger.info(f"[Prompt Sections] static_prefix: {len(static_prefix)} chars")
         logger.info(f"[Prompt Sections] persona_context: {len(persona_section)} chars")
         logger.info(f"[Prompt Sections] dynamic_state: {len(dynamic_state_section)} chars")
         
         # FIXED: Only static content in system prompt for caching
-        final_prompt = (static_core_section + static_voice_section + 
-                       static_output_section + persona_section)
+        final_prompt = static_prefix + persona_section
         
         # Dynamic state moved to separate user message to preserve caching
         dynamic_context_message = {
@@ -992,6 +1026,19 @@ IMPORTANT: Make this persona feel like a REAL PERSON with genuine concerns, real
         
         return final_prompt
     
+    def static_prompt_prefix(self) -> str:
+        """
+        Static core, voice and output rules in their fixed order, rendered once.
+        Every roleplay system prompt starts with these exact bytes, which is
+        what provider-side prompt caching matches on.
+        """
+        prefix = getattr(self, '_static_prompt_prefix', None)
+        if prefix is None:
+            prefix = self._static_prompt_prefix = (self._build_static_core_rules() +
+                                                   self._build_static_voice_rules() +
+                                                   self._build_static_output_rules())
+        return prefix
+    
     def _build_static_core_rules(self) -> str:
         """Static universal Marcus rules - same across all calls (cacheable)"""
         return """
@@ -1112,7 +1159,7 @@ Pain Points: {pain_points}"""
             # Initialize phase manager if it doesn't exist for this conversation
             if conversation_id not in self.phase_managers:
                 business_context = persona.get("business_context", "B2C")
-                self.phase_managers[conversation_id] = ConversationStateManager(business_context)
+                self.phase_managers[conversation_id] = ConversationStateManager(business_context=business_context)
             
             # Format persona for the prompt
             persona_description = self._format_persona_for_prompt(persona)
@@ -1163,6 +1210,40 @@ Pain Points: {pain_points}"""
             logger.error(f"Error generating initial greeting: {str(e)}")
             return "Hello. How can I help you today?"
     
+    def generate_roleplay_greeting(
+        self,
+        persona: Dict[str, Any],
+        user_info: Dict[str, Any] = None
+    ) -> str:
+        """
+        Generate the opening line with the same system prompt the roleplay turns use.
+        
+        Unlike generate_initial_greeting, the greeting instructions go in a user
+        message, so this request warms the provider's prompt cache for the
+        first turn and renders the persona prompt into persona_prompt_cache.
+        
+        Args:
+            persona: Dictionary containing the customer persona information
+            user_info: The user info the conversation's turns will pass
+            
+        Returns:
+            str: The generated greeting
+            
+        Raises:
+            GPT4oServiceError: The model returned no greeting. Provider errors
+            propagate too, so the caller can fall back to a cold greeting.
+        """
+        system_prompt = self._create_roleplay_system_prompt(persona, user_info, None)
+        response = self.generate_response(
+            messages=[{"role": "user", "content": ROLEPLAY_GREETING_REQUEST}],
+            system_prompt=system_prompt,
+            temperature=0.7,
+            max_tokens=100
+        )
+        if not response or not response.strip():
+            raise GPT4oServiceError("Empty roleplay greeting response")
+        return response.strip()
+    
     def _format_persona_for_prompt(self, persona: Dict[str, Any]) -> str:
         """Format the persona dictionary into a string description for the prompt."""
         # Extract core persona fields
@@ -1213,16 +1294,22 @@ Personality: {personality}"""
                 logger.error("GPT-4o mini API is not available")
                 return "Error: GPT-4o mini service not available"
             
-            # Create chat completion
-            response = self.client.chat.completions.create(
-                model=DEFAULT_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that provides well-formatted responses."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            # Create chat completion; the shared client does not retry, the retry policy does
+            def attempt(timeout: float):
+                attempt_deadline = time.monotonic() + timeout
+                with llm_admission(deadline=attempt_deadline):
+                    return self.client.chat.completions.create(
+                        model=DEFAULT_MODEL,
+                        messages=[
+                            {"role": "system", "content": "You are a helpful assistant that provides well-formatted responses."},
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        timeout=max(0.1, attempt_deadline - time.monotonic())
+                    )
+            
+            response = get_retry_policy('gpt4o', max_attempts=MAX_ATTEMPTS, default_timeout=DEFAULT_TIMEOUT).call(attempt).value
             
             # Extract text
             if response.choices and len(response.choices) > 0:
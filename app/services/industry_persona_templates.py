@@ -5,8 +5,10 @@ This module provides industry-specific persona variations to make personas
 more contextually authentic based on PERSONA_IMPROVEMENTS.md recommendations.
 """
 
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from typing import Dict, Any, NamedTuple, Optional, Tuple
 import random
+import re
 
 # Industry-specific trait modifiers and characteristics
 INDUSTRY_TEMPLATES = {
@@ -239,6 +241,109 @@ INDUSTRY_TEMPLATES = {
     }
 }
 
+# Keywords that select each template, with their weight in the match score.
+# Matching is case-insensitive on whole words (simple plurals included);
+# entries in INDUSTRY_ACRONYMS only match in capitals, so "IT" is an
+# industry but "it" is not.
+INDUSTRY_KEYWORDS = {
+    "healthcare": {"healthcare": 1.0, "health care": 1.0, "medical": 1.0, "hospital": 1.0, "clinic": 1.0,
+                   "pharmaceutical": 1.0, "pharma": 1.0},
+    "technology": {"technology": 1.0, "tech": 1.0, "software": 1.0, "saas": 1.0, "IT": 1.0,
+                   "engineering": 0.5, "startup": 0.5},
+    "manufacturing": {"manufacturing": 1.0, "industrial": 1.0, "factory": 1.0, "production": 0.5,
+                      "automotive": 1.0},
+    "education": {"education": 1.0, "school": 1.0, "university": 1.0, "academic": 1.0, "learning": 0.5,
+                  "training": 0.5},
+    "retail": {"retail": 1.0, "ecommerce": 1.0, "e-commerce": 1.0, "store": 1.0, "shopping": 1.0,
+               "consumer": 0.5},
+    "financial_services": {"financial": 1.0, "finance": 1.0, "banking": 1.0, "insurance": 1.0, "fintech": 1.0}
+}
+INDUSTRY_ACRONYMS = {"IT"}
+
+
+class IndustryMatch(NamedTuple):
+    industry: str
+    confidence: float  # Share of the total keyword score won by this industry
+    keywords: Tuple[str, ...]  # Keywords found for it, in text order
+
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def _plural(word: str) -> Optional[str]:
+    if len(word) < 4 or word.endswith("s"):
+        return None
+    return word[:-1] + "ies" if word.endswith("y") else word + "s"
+
+
+class IndustryMatcher:
+    """
+    Scores every industry in one pass over the words of the context string.
+    Keywords are compiled into a phrase table indexed by first word, so
+    matches always fall on word boundaries and most words cost a single
+    dict miss. The industry with the highest keyword score
+    wins, and ties go to the earlier template, so results are deterministic.
+    """
+
+    def __init__(self, keywords: Dict[str, Dict[str, float]], acronyms=frozenset(), cache_size: int = 1024):
+        self._order = {industry: i for i, industry in enumerate(keywords)}
+        phrases = {}  # Lowercased word tuple -> (industry, keyword, weight)
+        self._acronyms = {}  # Exact-case word -> (industry, keyword, weight)
+        for industry, weights in keywords.items():
+            for keyword, weight in weights.items():
+                entry = (industry, keyword, weight)
+                if keyword in acronyms:
+                    self._acronyms.setdefault(keyword, entry)
+                    continue
+                words = tuple(_WORD.findall(keyword.lower()))
+                phrases.setdefault(words, entry)
+                plural = _plural(words[-1])
+                if plural:
+                    phrases.setdefault(words[:-1] + (plural,), entry)
+        # First word -> [(remaining words, entry)], longest phrase first
+        self._starts = {}
+        for words, entry in sorted(phrases.items(), key=lambda item: -len(item[0])):
+            self._starts.setdefault(words[0], []).append((words[1:], entry))
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def _match(self, normalized: str) -> Optional[IndustryMatch]:
+        words = _WORD.findall(normalized)
+        lowered = [word.lower() for word in words]
+        scores = {}
+        found = {}
+        i = 0
+        while i < len(words):
+            entry = None
+            length = 1
+            # Longest phrase first, so "health care" is one match
+            for rest, candidate in self._starts.get(lowered[i], ()):
+                if not rest or tuple(lowered[i + 1:i + 1 + len(rest)]) == rest:
+                    entry, length = candidate, 1 + len(rest)
+                    break
+            else:
+                entry = self._acronyms.get(words[i])
+            i += length
+            if entry is None:
+                continue
+            industry, keyword, weight = entry
+            keywords = found.setdefault(industry, [])
+            if keyword not in keywords:  # Repeating a keyword does not add to the score
+                keywords.append(keyword)
+                scores[industry] = scores.get(industry, 0.0) + weight
+        if not scores:
+            return None
+        best = min(scores, key=lambda industry: (-scores[industry], self._order[industry]))
+        return IndustryMatch(best, round(scores[best] / sum(scores.values()), 3), tuple(found[best]))
+
+    def __call__(self, industry_context: Optional[str]) -> Optional[IndustryMatch]:
+        if not industry_context:
+            return None
+        return self.match(" ".join(industry_context.split()))
+
+
+match_industry = IndustryMatcher(INDUSTRY_KEYWORDS, INDUSTRY_ACRONYMS)
+
+
 def get_industry_template(industry_context: str) -> Optional[Dict[str, Any]]:
     """
     Get industry-specific template based on industry context.
@@ -249,23 +354,8 @@ def get_industry_template(industry_context: str) -> Optional[Dict[str, Any]]:
     Returns:
         Dictionary with industry-specific modifications or None if no match
     """
-    industry_lower = industry_context.lower()
-    
-    # Map common industry terms to our templates
-    industry_mapping = {
-        "healthcare": ["healthcare", "medical", "hospital", "clinic", "pharmaceutical", "pharma"],
-        "technology": ["technology", "tech", "software", "saas", "it", "engineering", "startup"],
-        "manufacturing": ["manufacturing", "industrial", "factory", "production", "automotive"],
-        "education": ["education", "school", "university", "academic", "learning", "training"],
-        "retail": ["retail", "ecommerce", "e-commerce", "store", "shopping", "consumer"],
-        "financial_services": ["financial", "finance", "banking", "insurance", "fintech"]
-    }
-    
-    for template_key, keywords in industry_mapping.items():
-        if any(keyword in industry_lower for keyword in keywords):
-            return INDUSTRY_TEMPLATES[template_key]
-    
-    return None
+    match = match_industry(industry_context)
+    return INDUSTRY_TEMPLATES[match.industry] if match else None
 
 def apply_industry_modifications(
     base_persona_data: Dict[str, Any], 
@@ -285,7 +375,8 @@ def apply_industry_modifications(
     if not template:
         return base_persona_data
     
-    # Create a copy to avoid modifying the original
+    # Shallow copy; nested containers are copied only when they are changed
+    # below, so the original persona is never modified
     modified_persona = base_persona_data.copy()
     
     # Apply trait modifiers
@@ -300,7 +391,7 @@ def apply_industry_modifications(
     
     # Enhance pain points with industry-specific ones
     if "pain_points" in modified_persona and "common_pain_points" in template:
-        existing_pain_points = modified_persona["pain_points"]
+        existing_pain_points = list(modified_persona["pain_points"] or [])
         industry_pain_points = template["common_pain_points"]
         
         # Replace one random existing pain point with an industry-specific one
@@ -308,10 +399,11 @@ def apply_industry_modifications(
             replace_index = random.randint(0, len(existing_pain_points) - 1)
             industry_pain = random.choice(industry_pain_points)
             existing_pain_points[replace_index] = industry_pain
+            modified_persona["pain_points"] = existing_pain_points
     
     # Enhance objections with industry-specific ones
     if "objections" in modified_persona and "typical_objections" in template:
-        existing_objections = modified_persona["objections"]
+        existing_objections = list(modified_persona["objections"] or [])
         industry_objections = template["typical_objections"]
         
         # Replace one random objection with an industry-specific one
@@ -319,26 +411,29 @@ def apply_industry_modifications(
             replace_index = random.randint(0, len(existing_objections) - 1)
             industry_objection = random.choice(industry_objections)
             existing_objections[replace_index] = industry_objection
+            modified_persona["objections"] = existing_objections
     
     # Apply speech pattern defaults if not specified
     if "speech_patterns" in modified_persona and "speech_patterns" in template:
-        speech_patterns = modified_persona["speech_patterns"]
+        speech_patterns = dict(modified_persona["speech_patterns"] or {})
         template_speech = template["speech_patterns"]
         
         # Apply defaults for any missing fields
         for key, default_value in template_speech.items():
             if key not in speech_patterns or not speech_patterns[key]:
                 speech_patterns[key] = default_value
+        modified_persona["speech_patterns"] = speech_patterns
     
     # Apply conversation dynamics defaults
     if "conversation_dynamics" in modified_persona and "conversation_dynamics" in template:
-        conv_dynamics = modified_persona["conversation_dynamics"]
+        conv_dynamics = dict(modified_persona["conversation_dynamics"] or {})
         template_dynamics = template["conversation_dynamics"]
         
         # Apply defaults for any missing fields
         for key, default_value in template_dynamics.items():
             if key not in conv_dynamics or not conv_dynamics[key]:
                 conv_dynamics[key] = default_value
+        modified_persona["conversation_dynamics"] = conv_dynamics
     
     # Add industry context to business description
     if "business_description" in modified_persona:
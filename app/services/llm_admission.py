@@ -0,0 +1,259 @@
+"""
+LLM Admission Control - Shared, priority-ordered gate for provider calls
+
+Every outbound model call passes through admit() before it reaches the
+provider. The controller bounds global concurrency and, when all slots
+are busy, queues callers by priority class:
+
+    LIVE_TURN > COACH_CLASSIFY > ASYNC_PLAN > FEEDBACK > BACKGROUND
+
+Each class has a bounded queue and a maximum queue wait; a caller that
+would exceed either is rejected with AdmissionRejected instead of piling
+onto the provider. FEEDBACK and BACKGROUND may only hold part of the
+slots, so a burst of persona generations or feedback analyses cannot
+take every slot from voice turns. Queue time per class is recorded in
+log-linear histograms (see coach_metrics).
+
+Callers declare their class with `with llm_priority(Priority.FEEDBACK):`
+around service calls (context-local, so it follows the request), or pass
+priority= explicitly where work hops to another thread.
+"""
+from typing import Dict, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+
+from app.services.coach_metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Admission classes; lower value is served first"""
+    LIVE_TURN = 0
+    COACH_CLASSIFY = 1
+    ASYNC_PLAN = 2
+    FEEDBACK = 3
+    BACKGROUND = 4
+
+
+DEFAULT_PRIORITY = Priority.ASYNC_PLAN  # Calls made without declaring a class
+
+MAX_CONCURRENT = int(os.environ.get('LLM_MAX_CONCURRENCY', 16))
+
+# Waiting callers allowed per class before new ones are shed
+QUEUE_LIMITS = {
+    Priority.LIVE_TURN: 64,
+    Priority.COACH_CLASSIFY: 64,
+    Priority.ASYNC_PLAN: 32,
+    Priority.FEEDBACK: 16,
+    Priority.BACKGROUND: 8,
+}
+
+# Longest a caller waits in the queue (seconds) before it is rejected
+QUEUE_DEADLINES = {
+    Priority.LIVE_TURN: 2.0,
+    Priority.COACH_CLASSIFY: 2.0,
+    Priority.ASYNC_PLAN: 5.0,
+    Priority.FEEDBACK: 30.0,
+    Priority.BACKGROUND: 60.0,
+}
+
+# Fraction of slots each class may hold at once
+SLOT_SHARES = {
+    Priority.LIVE_TURN: 1.0,
+    Priority.COACH_CLASSIFY: 1.0,
+    Priority.ASYNC_PLAN: 0.75,
+    Priority.FEEDBACK: 0.5,
+    Priority.BACKGROUND: 0.25,
+}
+
+_priority: ContextVar[Optional[Priority]] = ContextVar('llm_priority', default=None)
+
+
+class AdmissionRejected(Exception):
+    """An LLM call was shed instead of admitted"""
+
+    def __init__(self, priority: Priority, reason: str, waited: float = 0.0):
+        self.priority = priority
+        self.reason = reason  # 'queue_full' or 'deadline'
+        self.waited = waited
+        super().__init__(f"LLM call rejected ({priority.name.lower()}: {reason} after {waited:.2f}s)")
+
+
+@contextmanager
+def llm_priority(priority: Priority):
+    """Declare the admission class for LLM calls made inside the block"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    priority = _priority.get()
+    return DEFAULT_PRIORITY if priority is None else priority
+
+
+class _Waiter:
+    __slots__ = ('priority', 'granted', 'cancelled')
+
+    def __init__(self, priority: Priority):
+        self.priority = priority
+        self.granted = False
+        self.cancelled = False
+
+
+class LLMAdmissionController:
+    """Bounded concurrency with per-class priority queues"""
+
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT,
+        queue_limits: Optional[Dict[Priority, int]] = None,
+        queue_deadlines: Optional[Dict[Priority, float]] = None,
+        slot_shares: Optional[Dict[Priority, float]] = None
+    ):
+        self.max_concurrent = max_concurrent
+        self.queue_limits = {**QUEUE_LIMITS, **(queue_limits or {})}
+        self.queue_deadlines = {**QUEUE_DEADLINES, **(queue_deadlines or {})}
+        shares = {**SLOT_SHARES, **(slot_shares or {})}
+        self.class_limits = {p: max(1, int(max_concurrent * shares[p])) for p in Priority}
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._active_by_class = {p: 0 for p in Priority}
+        self._waiting = []  # Heap of (priority, seq, waiter)
+        self._waiting_by_class = {p: 0 for p in Priority}
+        self._seq = itertools.count()
+
+        self.queue_time = {p: LatencyHistogram() for p in Priority}
+        self.stats = {p: {'admitted': 0, 'queued': 0, 'rejected_queue_full': 0, 'rejected_deadline': 0}
+                      for p in Priority}
+
+    @contextmanager
+    def admit(self, priority: Optional[Priority] = None, deadline: Optional[float] = None):
+        """
+        Hold an LLM slot for the enclosed provider call.
+        deadline is an absolute time.monotonic() value; the queue wait is
+        also capped by the class's QUEUE_DEADLINES entry.
+        """
+        priority = current_priority() if priority is None else priority
+        self.acquire(priority, deadline)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def acquire(self, priority: Priority, deadline: Optional[float] = None):
+        start = time.monotonic()
+        limit = start + self.queue_deadlines[priority]
+        deadline = limit if deadline is None else min(deadline, limit)
+
+        with self._cond:
+            if self._can_run(priority) and not self._waiter_ahead(priority):
+                self._grant(priority)
+                self.stats[priority]['admitted'] += 1
+                self.queue_time[priority].record(0.0)
+                return
+
+            if self._waiting_by_class[priority] >= self.queue_limits[priority]:
+                self.stats[priority]['rejected_queue_full'] += 1
+                raise AdmissionRejected(priority, 'queue_full')
+
+            waiter = _Waiter(priority)
+            heapq.heappush(self._waiting, (priority, next(self._seq), waiter))
+            self._waiting_by_class[priority] += 1
+            self.stats[priority]['queued'] += 1
+
+            while not waiter.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    waiter.cancelled = True
+                    self._waiting_by_class[priority] -= 1
+                    self.stats[priority]['rejected_deadline'] += 1
+                    raise AdmissionRejected(priority, 'deadline', time.monotonic() - start)
+                self._cond.wait(remaining)
+
+            self.stats[priority]['admitted'] += 1
+        self.queue_time[priority].record((time.monotonic() - start) * 1000)
+
+    def release(self, priority: Priority):
+        with self._cond:
+            self._active -= 1
+            self._active_by_class[priority] -= 1
+            if self._dispatch():
+                self._cond.notify_all()
+
+    def _can_run(self, priority: Priority) -> bool:
+        return (self._active < self.max_concurrent
+                and self._active_by_class[priority] < self.class_limits[priority])
+
+    def _waiter_ahead(self, priority: Priority) -> bool:
+        """Whether a queued caller of the same or higher priority should go first"""
+        return any(self._waiting_by_class[p] for p in Priority if p <= priority)
+
+    def _grant(self, priority: Priority):
+        self._active += 1
+        self._active_by_class[priority] += 1
+
+    def _dispatch(self) -> bool:
+        """Hand free slots to queued callers in priority order; True if any were granted"""
+        granted = False
+        blocked = []
+        while self._waiting and self._active < self.max_concurrent:
+            entry = heapq.heappop(self._waiting)
+            waiter = entry[2]
+            if waiter.cancelled:
+                continue
+            if not self._can_run(waiter.priority):
+                blocked.append(entry)  # Class at its share; let lower classes use the slot
+                continue
+            waiter.granted = True
+            self._waiting_by_class[waiter.priority] -= 1
+            self._grant(waiter.priority)
+            granted = True
+        for entry in blocked:
+            heapq.heappush(self._waiting, entry)
+        return granted
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            classes = {
+                p.name.lower(): {
+                    **self.stats[p],
+                    'active': self._active_by_class[p],
+                    'waiting': self._waiting_by_class[p],
+                }
+                for p in Priority
+            }
+        for p in Priority:
+            summary = self.queue_time[p].snapshot().summary()
+            classes[p.name.lower()]['queue_ms'] = {k: summary[k] for k in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms')}
+        return {'max_concurrent': self.max_concurrent, 'active': self._active, 'classes': classes}
+
+
+# Singleton instance
+_controller = None
+_controller_lock = threading.Lock()
+
+def get_admission_controller() -> LLMAdmissionController:
+    """Get the process-wide admission controller"""
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = LLMAdmissionController()
+    return _controller
+
+
+def llm_admission(priority: Optional[Priority] = None, deadline: Optional[float] = None):
+    """Shorthand for get_admission_controller().admit(...)"""
+    return get_admission_controller().admit(priority, deadline)
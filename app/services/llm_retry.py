@@ -0,0 +1,314 @@
+"""
+LLM Retry Policy - Deadline-aware retries for provider calls
+
+Replaces fixed time.sleep backoff loops in the provider services:
+- Every call has a deadline (request_deadline() scope or the policy
+  default) and each attempt gets the remaining time as its timeout. The
+  first attempt always runs; a retry is only started if the typical
+  attempt duration still fits. That estimate is kept per priority class
+  (llm_admission), since a live turn and a feedback call on the same
+  service take very different times
+- Waits use decorrelated jitter, so threads that failed together do not
+  retry together; a provider Retry-After hint is honored as a floor
+- Retries draw from a process-wide RetryBudget (a fraction of recent
+  calls), so a provider brownout is not multiplied by every caller
+- Attempts per call are counted and reported with get_stats()
+"""
+from typing import Any, Callable, Dict, Optional
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+import logging
+import random
+import threading
+import time
+
+from app.services.llm_admission import Priority, current_priority
+
+logger = logging.getLogger(__name__)
+
+RETRY_BUDGET_RATIO = 0.1  # Retries allowed per call in the window
+RETRY_BUDGET_MIN_PER_SECOND = 1.0  # Floor so low traffic can still retry
+RETRY_BUDGET_WINDOW = 10.0  # Seconds
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+RETRYABLE_ERROR_NAMES = ('APIConnectionError', 'APITimeoutError', 'ConnectError', 'ReadTimeout', 'TimeoutException')
+
+_deadline: ContextVar[Optional[float]] = ContextVar('llm_deadline', default=None)
+
+
+@contextmanager
+def request_deadline(seconds: float):
+    """Bound all LLM calls inside the block to finish within `seconds`"""
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    """Absolute time.monotonic() deadline of the enclosing request, if any"""
+    return _deadline.get()
+
+
+class TransientResponseError(Exception):
+    """A provider response that is worth retrying (e.g. empty content)"""
+
+
+class RetryFailed(Exception):
+    """Retrying stopped before a successful attempt"""
+
+    def __init__(self, reason: str, attempts: int, elapsed: float, last_error: Optional[BaseException]):
+        self.reason = reason  # 'attempts', 'deadline' or 'budget'
+        self.attempts = attempts
+        self.elapsed = elapsed
+        self.last_error = last_error
+        super().__init__(f"gave up after {attempts} attempt(s) in {elapsed:.2f}s ({reason}): {last_error}")
+
+
+@dataclass
+class RetryResult:
+    value: Any
+    attempts: int
+    elapsed: float
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, overload, server errors, timeouts and dropped connections"""
+    if isinstance(error, TransientResponseError):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait, from Retry-After(-Ms) headers"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        value = headers.get('retry-after-ms')
+        if value is not None:
+            return max(0.0, float(value) / 1000)
+        value = headers.get('retry-after')
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """
+    Allows retries up to `ratio` of the calls made in the last `window`
+    seconds (plus `min_per_second`), shared by every policy in the process
+    """
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, min_per_second: float = RETRY_BUDGET_MIN_PER_SECOND,
+                 window: float = RETRY_BUDGET_WINDOW, clock: Callable[[], float] = time.monotonic):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        self._clock = clock
+        self._calls = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float):
+        horizon = now - self.window
+        for events in (self._calls, self._retries):
+            while events and events[0] < horizon:
+                events.popleft()
+
+    def record_call(self):
+        with self._lock:
+            now = self._clock()
+            self._trim(now)
+            self._calls.append(now)
+
+    def try_acquire(self) -> bool:
+        """Take one retry from the budget; False when it is spent"""
+        with self._lock:
+            now = self._clock()
+            self._trim(now)
+            allowed = self.min_per_second * self.window + self.ratio * len(self._calls)
+            if len(self._retries) >= allowed:
+                return False
+            self._retries.append(now)
+            return True
+
+
+class RetryPolicy:
+    """Retries a provider call within its deadline and the shared budget"""
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: int = 3,
+        base_delay: float = 0.25,
+        max_delay: float = 8.0,
+        default_timeout: float = 30.0,
+        min_attempt_time: float = 1.0,
+        budget: Optional[RetryBudget] = None,
+        classify: Callable[[BaseException], bool] = is_retryable,
+        rng: Optional[random.Random] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.default_timeout = default_timeout
+        self.min_attempt_time = min_attempt_time
+        self.budget = budget if budget is not None else get_retry_budget()
+        self.classify = classify
+        self._rng = rng or random.Random()
+        self._sleep = sleep
+        self._clock = clock
+        self._attempt_estimates: Dict[Priority, float] = {}  # EWMA of attempt durations per priority class
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'succeeded': 0, 'failed': 0, 'retries': 0,
+                      'gave_up_deadline': 0, 'gave_up_budget': 0, 'gave_up_attempts': 0}
+        self.attempts_per_call: Dict[int, int] = {}
+
+    def call(self, fn: Callable[[float], Any], deadline: Optional[float] = None) -> RetryResult:
+        """
+        Run fn(timeout) until it succeeds. deadline is an absolute
+        time.monotonic() value (defaults to the request_deadline() scope,
+        then to default_timeout from now). The first attempt runs whenever
+        any time is left; retries must fit the attempt estimate for the
+        caller's priority class. Errors that classify() rejects
+        propagate unchanged; giving up on retryable ones raises RetryFailed
+        chained to the last error.
+        """
+        start = self._clock()
+        if deadline is None:
+            deadline = current_deadline()
+        if deadline is None:
+            deadline = start + self.default_timeout
+        self.budget.record_call()
+        priority = current_priority()
+
+        attempts = 0
+        delay = self.base_delay
+        last_error = None
+        while True:
+            remaining = deadline - self._clock()
+            if remaining <= 0 or (attempts and remaining < self._estimate(priority)):
+                raise self._give_up('deadline', attempts, start, last_error)
+
+            attempts += 1
+            attempt_start = self._clock()
+            try:
+                value = fn(remaining)
+            except Exception as e:
+                if not self.classify(e):
+                    self._finish(attempts, succeeded=False)
+                    raise
+                self._observe(priority, self._clock() - attempt_start)  # Slow failures count: a brownout stretches attempts
+                last_error = e
+            else:
+                self._observe(priority, self._clock() - attempt_start)
+                self._finish(attempts, succeeded=True)
+                return RetryResult(value, attempts, self._clock() - start)
+
+            if attempts >= self.max_attempts:
+                raise self._give_up('attempts', attempts, start, last_error)
+
+            # Decorrelated jitter; a Retry-After hint sets the minimum wait
+            delay = min(self.max_delay, self._rng.uniform(self.base_delay, delay * 3))
+            wait = max(delay, retry_after(last_error) or 0.0)
+            if self._clock() + wait + self._estimate(priority) > deadline:
+                raise self._give_up('deadline', attempts, start, last_error)
+            if not self.budget.try_acquire():
+                raise self._give_up('budget', attempts, start, last_error)
+
+            with self._lock:
+                self.stats['retries'] += 1
+            logger.warning(f"[Retry] {self.name} attempt {attempts} failed ({type(last_error).__name__}), "
+                           f"retrying in {wait:.2f}s")
+            self._sleep(wait)
+
+    def _estimate(self, priority: Priority) -> float:
+        return self._attempt_estimates.get(priority, self.min_attempt_time)
+
+    def _observe(self, priority: Priority, duration: float):
+        with self._lock:
+            estimate = self._attempt_estimates.get(priority, self.min_attempt_time)
+            self._attempt_estimates[priority] = max(self.min_attempt_time, 0.8 * estimate + 0.2 * duration)
+
+    def _finish(self, attempts: int, succeeded: bool):
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['succeeded' if succeeded else 'failed'] += 1
+            self.attempts_per_call[attempts] = self.attempts_per_call.get(attempts, 0) + 1
+
+    def _give_up(self, reason: str, attempts: int, start: float, last_error: Optional[BaseException]) -> RetryFailed:
+        self._finish(attempts, succeeded=False)
+        with self._lock:
+            self.stats[f'gave_up_{reason}'] += 1
+        error = RetryFailed(reason, attempts, self._clock() - start, last_error)
+        error.__cause__ = last_error
+        logger.error(f"[Retry] {self.name} {error}")
+        return error
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            calls = self.stats['calls']
+            total_attempts = sum(n * count for n, count in self.attempts_per_call.items())
+            return {
+                **self.stats,
+                'attempts_per_call': dict(sorted(self.attempts_per_call.items())),
+                'mean_attempts': round(total_attempts / calls, 3) if calls else 0.0,
+                'attempt_estimate_s': {priority.name.lower(): round(estimate, 3)
+                                       for priority, estimate in sorted(self._attempt_estimates.items())}
+            }
+
+
+# Shared instances
+_budget = None
+_policies: Dict[str, RetryPolicy] = {}
+_registry_lock = threading.Lock()
+
+def get_retry_budget() -> RetryBudget:
+    """Process-wide retry budget shared by all provider policies"""
+    global _budget
+    if _budget is None:
+        with _registry_lock:
+            if _budget is None:
+                _budget = RetryBudget()
+    return _budget
+
+
+def get_retry_policy(name: str, **kwargs) -> RetryPolicy:
+    """Named policy (one per provider service); kwargs apply on first use"""
+    policy = _policies.get(name)
+    if policy is None:
+        budget = get_retry_budget()
+        with _registry_lock:
+            policy = _policies.get(name)
+            if policy is None:
+                policy = _policies[name] = RetryPolicy(name, budget=budget, **kwargs)
+    return policy
+
+
+def get_retry_stats() -> Dict[str, Dict]:
+    return {name: policy.get_stats() for name, policy in list(_policies.items())}
@@ -0,0 +1,627 @@
+"""
+LLM Provider Router - Failover and hedging across model providers
+
+A model name resolves to an equivalence group (MODEL_EQUIVALENTS), e.g.
+gpt-4o-mini on OpenAI and openai/gpt-4o-mini on OpenRouter. The defaults
+only name the same model behind another endpoint, so prompts never reach
+a different model vendor unless LLM_MODEL_EQUIVALENTS adds one (say
+gemini-2.5-flash on Google). The router walks the group in order and
+skips providers whose circuit breaker is open:
+
+- CircuitBreaker: rolling window of outcomes per provider; opens on a high
+  error rate or slow-call rate, then lets a probe through after a cool-off
+  (half-open) before closing again
+- Failover: a provider error moves straight on to the next equivalent
+- Hedging: if the first provider has not answered within its rolling p95,
+  a second request goes to the next equivalent and whichever answers
+  first wins. Enabled by default for live-turn and coach-classify calls.
+- Streaming (stream()): text deltas from the first healthy provider that
+  supports it; failover only until the first delta arrives, no hedging
+
+Every provider call still passes through LLM admission control.
+"""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from app.services.llm_admission import AdmissionRejected, Priority, current_priority, llm_admission
+from app.services.llm_retry import is_retryable
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_ORDER = ('openai', 'openrouter', 'anthropic', 'google')
+
+# Equivalence groups: provider -> model id. The same model on its own
+# vendor and on OpenRouter only; cross-vendor equivalents are opt-in via the
+# LLM_MODEL_EQUIVALENTS environment variable (same JSON shape), e.g.
+# {"gpt-4o-mini": {"google": "gemini-2.5-flash"}}.
+MODEL_EQUIVALENTS = {
+    'gpt-4o-mini': {
+        'openai': 'gpt-4o-mini',
+        'openrouter': 'openai/gpt-4o-mini',
+    },
+    'gpt-4o': {
+        'openai': 'gpt-4o',
+        'openrouter': 'openai/gpt-4o',
+    },
+    'claude-sonnet': {
+        'anthropic': 'claude-sonnet-4-20250514',
+        'openrouter': 'anthropic/claude-sonnet-4',
+    },
+}
+
+# Google model ids for OpenRouter-style names (Gemini 2.0 models are shut down)
+GOOGLE_MODEL_ALIASES = {
+    'gemini-2.0-flash-exp:free': 'gemini-2.5-flash',
+    'gemini-2.0-flash-001': 'gemini-2.5-flash',
+    'gemini-2.0-flash-exp': 'gemini-2.5-flash',
+    'gemini-flash-1.5': 'gemini-1.5-flash',
+}
+
+HEDGE_MIN_DELAY = 0.15  # Seconds
+HEDGE_MAX_DELAY = 3.0
+HEDGE_DEFAULT_DELAY = 1.0  # Until a provider has HEDGE_MIN_SAMPLES latencies
+HEDGE_MIN_SAMPLES = 20
+
+
+class NoProviderAvailable(Exception):
+    """Every provider for the model is unconfigured or has an open circuit"""
+
+
+class RouterTimeout(TimeoutError):
+    """No provider answered before the call's timeout"""
+
+
+class ProviderHTTPError(Exception):
+    """Non-2xx response from a provider called over plain HTTP"""
+
+    def __init__(self, provider: str, response):
+        self.response = response
+        self.status_code = response.status_code
+        super().__init__(f"{provider} API error: {response.status_code} - {response.text[:200]}")
+
+
+@dataclass
+class ProviderResponse:
+    text: str
+    raw: Any = None
+
+
+@dataclass
+class RoutedResponse:
+    text: str
+    provider: str
+    model: str
+    latency_ms: float
+    hedged: bool = False
+    raw: Any = None
+
+
+# ----------------------------------------------------------------------
+# Providers
+# ----------------------------------------------------------------------
+
+class OpenAIChatProvider:
+    """OpenAI SDK client; also OpenRouter through its OpenAI-compatible base_url"""
+
+    def __init__(self, name: str, client):
+        self.name = name
+        self.client = client
+
+    def complete(self, model, messages, temperature, max_tokens, timeout) -> ProviderResponse:
+        response = self.client.chat.completions.create(
+            model=model, messages=messages, temperature=temperature,
+            max_tokens=max_tokens, timeout=timeout
+        )
+        text = response.choices[0].message.content if response.choices else ''
+        return ProviderResponse(text or '', response)
+
+    def stream(self, model, messages, temperature, max_tokens, timeout) -> Iterator[str]:
+        response = self.client.chat.completions.create(
+            model=model, messages=messages, temperature=temperature,
+            max_tokens=max_tokens, timeout=timeout, stream=True
+        )
+        try:
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            response.close()  # Also when the caller stops reading early
+
+
+class AnthropicChatProvider:
+    def __init__(self, client, name: str = 'anthropic'):
+        self.name = name
+        self.client = client
+
+    def complete(self, model, messages, temperature, max_tokens, timeout) -> ProviderResponse:
+        system = '\n\n'.join(m['content'] for m in messages if m['role'] == 'system')
+        turns = [{'role': m['role'], 'content': m['content']} for m in messages if m['role'] != 'system']
+        params = dict(model=model, messages=turns, temperature=temperature, max_tokens=max_tokens, timeout=timeout)
+        if system:
+            params['system'] = system
+        response = self.client.messages.create(**params)
+        return ProviderResponse(''.join(getattr(block, 'text', '') for block in response.content), response)
+
+
+def google_payload(messages: List[Dict], temperature: float, max_tokens: int) -> Dict:
+    """OpenAI-style messages as a Gemini generateContent request"""
+    contents = []
+    system_instruction = None
+    for msg in messages:
+        if msg['role'] == 'system':
+            system_instruction = msg['content']
+        elif msg['role'] == 'user':
+            contents.append({'parts': [{'text': msg['content']}]})
+        elif msg['role'] == 'assistant':
+            contents.append({'role': 'model', 'parts': [{'text': msg['content']}]})
+    payload = {
+        'contents': contents,
+        'generationConfig': {'temperature': temperature, 'maxOutputTokens': max_tokens}
+    }
+    if system_instruction:
+        payload['systemInstruction'] = {'parts': [{'text': system_instruction}]}
+    return payload
+
+
+class GoogleChatProvider:
+    def __init__(self, api_key: str, session=None, name: str = 'google'):
+        import requests
+        self.name = name
+        self.api_key = api_key
+        self.session = session or requests.Session()
+
+    def complete(self, model, messages, temperature, max_tokens, timeout) -> ProviderResponse:
+        model = model.replace('google/', '')
+        model = GOOGLE_MODEL_ALIASES.get(model, model)
+        response = self.session.post(
+            f'https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent',
+            headers={'Content-Type': 'application/json', 'x-goog-api-key': self.api_key},
+            json=google_payload(messages, temperature, max_tokens),
+            timeout=timeout
+        )
+        if not response.ok:
+            raise ProviderHTTPError(self.name, response)
+        result = response.json()
+        text = result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
+        return ProviderResponse(text, result)
+
+
+# ----------------------------------------------------------------------
+# Circuit breaker
+# ----------------------------------------------------------------------
+
+class CircuitBreaker:
+    """
+    Rolling-window breaker. Opens when at least `min_calls` outcomes in
+    the last `window` seconds show `failure_rate` errors or `slow_rate`
+    calls slower than `slow_call_ms`; after `open_seconds` it admits
+    `half_open_probes` trial calls and closes if they succeed quickly.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, name: str, window: float = 30.0, min_calls: int = 10, failure_rate: float = 0.5,
+                 slow_call_ms: float = 8000, slow_rate: float = 0.8, open_seconds: float = 15.0,
+                 half_open_probes: int = 1, max_samples: int = 512, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_ms = slow_call_ms
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=max_samples)  # (time, ok, latency_ms)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self.stats = {'opened': 0, 'rejected': 0, 'successes': 0, 'failures': 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(self._clock())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == self.OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go to this provider now (reserves a probe when half-open)"""
+        with self._lock:
+            state = self._current_state(self._clock())
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.stats['rejected'] += 1
+            return False
+
+    def record(self, ok: bool, latency_ms: float):
+        with self._lock:
+            now = self._clock()
+            self.stats['successes' if ok else 'failures'] += 1
+            slow = latency_ms >= self.slow_call_ms
+            state = self._current_state(now)
+            if state == self.HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if ok and not slow:
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                    logger.info(f"[Router] Circuit for {self.name} closed")
+                else:
+                    self._open(now)
+            elif state == self.CLOSED:
+                self._outcomes.append((now, ok, latency_ms))
+                self._trim(now)
+                if len(self._outcomes) >= self.min_calls:
+                    failures = sum(1 for _, good, _ in self._outcomes if not good)
+                    slow_calls = sum(1 for _, _, ms in self._outcomes if ms >= self.slow_call_ms)
+                    if (failures / len(self._outcomes) >= self.failure_rate
+                            or slow_calls / len(self._outcomes) >= self.slow_rate):
+                        self._open(now)
+            if state == self.OPEN and ok:
+                self._outcomes.append((now, ok, latency_ms))  # Late hedge results still inform latency
+
+    def cancel(self):
+        """A call reserved with allow() never reached the provider"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def _open(self, now: float):
+        self._state = self.OPEN
+        self._opened_at = now
+        self.stats['opened'] += 1
+        logger.warning(f"[Router] Circuit for {self.name} opened for {self.open_seconds:.0f}s")
+
+    def _trim(self, now: float):
+        horizon = now - self.window
+        while self._outcomes and self._outcomes[0][0] < horizon:
+            self._outcomes.popleft()
+
+    def latency_percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """q-th percentile (ms) of successful calls in the window, None if too few"""
+        with self._lock:
+            self._trim(self._clock())
+            latencies = sorted(ms for _, ok, ms in self._outcomes if ok)
+        if len(latencies) < min_samples or not latencies:
+            return None
+        return latencies[max(0, math.ceil(q / 100 * len(latencies)) - 1)]
+
+    def get_stats(self) -> Dict:
+        p95 = self.latency_percentile(95)
+        with self._lock:
+            now = self._clock()
+            self._trim(now)
+            window = list(self._outcomes)
+            return {
+                **self.stats,
+                'state': self._current_state(now),
+                'window_calls': len(window),
+                'window_failures': sum(1 for _, ok, _ in window if not ok),
+                'p95_ms': round(p95, 1) if p95 is not None else None
+            }
+
+
+# ----------------------------------------------------------------------
+# Router
+# ----------------------------------------------------------------------
+
+def load_equivalents() -> Dict[str, Dict[str, str]]:
+    groups = {name: dict(models) for name, models in MODEL_EQUIVALENTS.items()}
+    raw = os.environ.get('LLM_MODEL_EQUIVALENTS')
+    if raw:
+        try:
+            for name, models in json.loads(raw).items():
+                groups.setdefault(name, {}).update(models)
+        except (ValueError, AttributeError) as e:
+            logger.error(f"[Router] Ignoring invalid LLM_MODEL_EQUIVALENTS: {e}")
+    return groups
+
+
+class ProviderRouter:
+    """Routes a chat completion across equivalent models on healthy providers"""
+
+    def __init__(
+        self,
+        providers: Optional[Dict[str, Any]] = None,
+        equivalents: Optional[Dict[str, Dict[str, str]]] = None,
+        provider_order: Tuple[str, ...] = PROVIDER_ORDER,
+        breaker_factory: Callable[[str], CircuitBreaker] = CircuitBreaker,
+        hedge_quantile: float = 95,
+        hedge_min_delay: float = HEDGE_MIN_DELAY,
+        hedge_max_delay: float = HEDGE_MAX_DELAY,
+        hedge_default_delay: float = HEDGE_DEFAULT_DELAY,
+        hedge_min_samples: int = HEDGE_MIN_SAMPLES,
+        max_workers: int = 32
+    ):
+        self.providers: Dict[str, Any] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.equivalents = equivalents if equivalents is not None else load_equivalents()
+        self.provider_order = provider_order
+        self._breaker_factory = breaker_factory
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.hedge_min_samples = hedge_min_samples
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-router')
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'failovers': 0, 'hedges': 0, 'hedge_wins': 0, 'shed': 0, 'unavailable': 0,
+                      'timeouts': 0}
+        for provider in (providers or {}).values():
+            self.add_provider(provider)
+
+    def add_provider(self, provider, replace: bool = True):
+        with self._lock:
+            if provider.name in self.providers and not replace:
+                return
+            self.providers[provider.name] = provider
+            self.breakers.setdefault(provider.name, self._breaker_factory(provider.name))
+
+    def candidates(self, model: str, provider: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        (provider, model) pairs to try, in order. `model` is a group name or
+        any provider's id in a group; the provider it belongs to (or the
+        explicit `provider`) goes first. Unknown models only run on
+        `provider` (default: first configured provider in order).
+        """
+        group, preferred = None, provider
+        if model in self.equivalents:
+            group = self.equivalents[model]
+        else:
+            for models in self.equivalents.values():
+                owners = [name for name, model_id in models.items() if model_id == model]
+                if owners:
+                    group = models
+                    preferred = preferred or owners[0]
+                    break
+
+        if group is None:
+            name = preferred or next((p for p in self.provider_order if p in self.providers), None)
+            return [(name, model)] if name in self.providers else []
+
+        order = [preferred] if preferred in group else []
+        order += [p for p in self.provider_order if p in group and p not in order]
+        order += [p for p in group if p not in order]
+        return [(name, group[name]) for name in order if name in self.providers]
+
+    def hedge_delay(self, provider: str) -> float:
+        p = self.breakers[provider].latency_percentile(self.hedge_quantile, self.hedge_min_samples)
+        if p is None:
+            return self.hedge_default_delay
+        return min(self.hedge_max_delay, max(self.hedge_min_delay, p / 1000))
+
+    def complete(self, model: str, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 500,
+                 timeout: float = 30.0, provider: Optional[str] = None, hedge: Optional[bool] = None) -> RoutedResponse:
+        """
+        Chat completion on the first healthy equivalent provider. Provider
+        errors fail over to the next one; if none succeed, the first
+        retryable error (else the last error) is raised. A request shed by
+        admission control counts as a failed attempt: the call keeps
+        waiting on any other pending request and raises AdmissionRejected
+        only if every attempt was shed. Hedging defaults on for live-turn
+        and coach-classify calls.
+        """
+        priority = current_priority()
+        if hedge is None:
+            hedge = priority <= Priority.COACH_CLASSIFY
+        deadline = time.monotonic() + timeout
+        remaining_candidates = deque(self.candidates(model, provider))
+        if not remaining_candidates:
+            raise NoProviderAvailable(f"No provider configured for {model}")
+        with self._lock:
+            self.stats['calls'] += 1
+
+        pending = {}  # future -> (provider, model, started)
+        errors = []
+        shed = []
+        hedged = False
+
+        def launch() -> bool:
+            while remaining_candidates:
+                name, model_id = remaining_candidates.popleft()
+                if self.breakers[name].allow():
+                    future = self._executor.submit(
+                        self._invoke, name, model_id, messages, temperature, max_tokens, deadline, priority
+                    )
+                    pending[future] = (name, model_id)
+                    return True
+            return False
+
+        if not launch():
+            with self._lock:
+                self.stats['unavailable'] += 1
+            raise NoProviderAvailable(f"All providers for {model} have open circuits")
+        primary = next(iter(pending.values()))[0]
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait_for = remaining
+            if hedge and not hedged and remaining_candidates:
+                wait_for = min(remaining, self.hedge_delay(primary))
+            done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            if not done:
+                if hedge and not hedged:
+                    hedged = True
+                    if launch():
+                        with self._lock:
+                            self.stats['hedges'] += 1
+                        logger.info(f"[Router] Hedging {model}: {primary} slower than {wait_for:.2f}s")
+                continue
+
+            provider_failed = False
+            for future in done:
+                name, model_id = pending.pop(future)
+                try:
+                    response, latency_ms = future.result()
+                except AdmissionRejected as e:
+                    shed.append(e)
+                    with self._lock:
+                        self.stats['shed'] += 1
+                    logger.info(f"[Router] {name}/{model_id} shed by admission control ({e.reason})")
+                    continue
+                except Exception as e:
+                    errors.append(e)
+                    provider_failed = True
+                    logger.warning(f"[Router] {name}/{model_id} failed: {type(e).__name__}: {e}")
+                    continue
+                with self._lock:
+                    if name != primary:
+                        self.stats['hedge_wins' if hedged else 'failovers'] += 1
+                return RoutedResponse(response.text, name, model_id, latency_ms, hedged, response.raw)
+
+            if not pending and provider_failed:
+                launch()  # Fail over to the next equivalent; every provider shares the admission gate
+
+        if errors:
+            # A transient failure anywhere makes the whole call worth retrying
+            raise next((e for e in errors if is_retryable(e)), errors[-1])
+        if shed:
+            raise shed[0]
+        with self._lock:
+            self.stats['timeouts'] += 1
+        raise RouterTimeout(f"No provider answered {model} within {timeout:.1f}s")
+
+    def stream(self, model: str, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 500,
+               timeout: float = 30.0, provider: Optional[str] = None) -> Iterator[str]:
+        """
+        Streamed chat completion: text deltas from the first healthy
+        equivalent provider with a stream() method. Provider errors fail over
+        only until the first delta arrives; later errors reach the caller.
+        The admission slot is held until the stream finishes or is closed,
+        and the breaker records the time to the first delta.
+        """
+        priority = current_priority()
+        deadline = time.monotonic() + timeout
+        candidates = [(name, model_id) for name, model_id in self.candidates(model, provider)
+                      if hasattr(self.providers[name], 'stream')]
+        if not candidates:
+            raise NoProviderAvailable(f"No streaming provider configured for {model}")
+        with self._lock:
+            self.stats['calls'] += 1
+
+        errors = []
+        for name, model_id in candidates:
+            breaker = self.breakers[name]
+            if not breaker.allow():
+                continue
+            start = time.monotonic()
+            with llm_admission(priority, deadline):
+                try:
+                    timeout = max(0.1, deadline - time.monotonic())
+                    deltas = iter(self.providers[name].stream(model_id, messages, temperature, max_tokens, timeout))
+                    first = next(deltas, '')
+                except AdmissionRejected:
+                    breaker.cancel()
+                    raise
+                except Exception as e:
+                    self._record_error(breaker, e, start)
+                    errors.append(e)
+                    logger.warning(f"[Router] {name}/{model_id} stream failed: {type(e).__name__}: {e}")
+                    continue
+                breaker.record(True, (time.monotonic() - start) * 1000)
+                if errors:
+                    with self._lock:
+                        self.stats['failovers'] += 1
+                yield first
+                yield from deltas
+                return
+
+        if errors:
+            raise next((e for e in errors if is_retryable(e)), errors[-1])
+        with self._lock:
+            self.stats['unavailable'] += 1
+        raise NoProviderAvailable(f"All streaming providers for {model} have open circuits")
+
+    def _invoke(self, name, model, messages, temperature, max_tokens, deadline, priority):
+        breaker = self.breakers[name]
+        start = time.monotonic()
+        try:
+            with llm_admission(priority, deadline):
+                timeout = max(0.1, deadline - time.monotonic())
+                response = self.providers[name].complete(model, messages, temperature, max_tokens, timeout)
+        except AdmissionRejected:
+            breaker.cancel()
+            raise
+        except Exception as e:
+            self._record_error(breaker, e, start)
+            raise
+        latency_ms = (time.monotonic() - start) * 1000
+        breaker.record(True, latency_ms)
+        return response, latency_ms
+
+    @staticmethod
+    def _record_error(breaker: CircuitBreaker, error: Exception, start: float):
+        if is_retryable(error) or isinstance(error, TimeoutError):
+            breaker.record(False, (time.monotonic() - start) * 1000)
+        else:
+            breaker.cancel()  # Bad request, auth, parse errors: not a provider health signal
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats['providers'] = {name: breaker.get_stats() for name, breaker in self.breakers.items()}
+        return stats
+
+
+# Singleton instance
+_router = None
+_router_lock = threading.Lock()
+
+def _providers_from_environment() -> List[Any]:
+    providers = []
+    try:
+        import openai
+        if os.environ.get('OPENAI_API_KEY'):
+            providers.append(OpenAIChatProvider('openai', openai.OpenAI(
+                api_key=os.environ['OPENAI_API_KEY'], max_retries=0
+            )))
+        if os.environ.get('OPENROUTER_API_KEY'):
+            providers.append(OpenAIChatProvider('openrouter', openai.OpenAI(
+                api_key=os.environ['OPENROUTER_API_KEY'], base_url='https://openrouter.ai/api/v1', max_retries=0,
+                default_headers={'HTTP-Referer': 'https://pitchiq.com', 'X-Title': 'PitchIQ'}
+            )))
+    except ImportError:
+        logger.warning("[Router] openai package not installed; OpenAI/OpenRouter providers disabled")
+    if os.environ.get('ANTHROPIC_API_KEY'):
+        try:
+            import anthropic
+            providers.append(AnthropicChatProvider(anthropic.Anthropic(
+                api_key=os.environ['ANTHROPIC_API_KEY'], max_retries=0
+            )))
+        except ImportError:
+            logger.warning("[Router] anthropic package not installed; Anthropic provider disabled")
+    if os.environ.get('GOOGLE_AI_API_KEY'):
+        providers.append(GoogleChatProvider(os.environ['GOOGLE_AI_API_KEY']))
+    return providers
+
+
+def get_llm_router() -> ProviderRouter:
+    """Get singleton router with every provider that has an API key configured"""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                router = ProviderRouter()
+                for provider in _providers_from_environment():
+                    router.add_provider(provider)
+                logger.info(f"[Router] Providers: {', '.join(router.providers) or 'none'}")
+                _router = router
+    return _router
@@ -21,6 +21,7 @@ import tempfile
 import os
 from botocore.config import Config
 import boto3
+from app.services.voice_activity_detector import trim_silence
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -378,6 +379,17 @@ class NovaSonicService:
             # Convert WebM to PCM
             pcm_audio = self._convert_webm_to_pcm(audio_bytes)
             
+            # Trim silence before it reaches the model
+            vad_stats = None
+            if pcm_audio is not audio_bytes:
+                vad = trim_silence(pcm_audio)
+                vad_stats = vad.to_dict()
+                self.sessions[session_id].setdefault("turns", []).append(vad_stats)
+                logger.info(f"🎤 VAD trimmed {vad.original_ms}ms -> {vad.trimmed_ms}ms")
+                if not vad.has_speech:
+                    return {"responses": [], "vad": vad_stats}
+                pcm_audio = vad.audio
+            
             # For now, return realistic conversation responses
             # TODO: Replace with actual Nova Sonic bidirectional streaming when SDK is available
             conversation_responses = [
@@ -405,7 +417,8 @@ class NovaSonicService:
                 "responses": [{
                     "text": response_text,
                     "audio": None
-                }]
+                }],
+                "vad": vad_stats
             }
             
         except Exception as e:
@@ -23,6 +23,8 @@ from dotenv import load_dotenv
 from openai import APIError, RateLimitError, APITimeoutError, APIConnectionError, APIStatusError # Updated imports for specific errors
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from app.services.llm_admission import AdmissionRejected, Priority, llm_admission
+
 # Load environment variables
 load_dotenv()
 
@@ -297,12 +299,13 @@ class OpenAIService:
             logger.info(f"Generating response with {len(formatted_messages)} messages, temp={temperature}, model={model_to_use}")
             
             # Make the API request
-            response = self.client.chat.completions.create(
-                model=model_to_use,
-                messages=formatted_messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            with llm_admission():
+                response = self.client.chat.completions.create(
+                    model=model_to_use,
+                    messages=formatted_messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
             
             # Extract and return the generated text
             if response.choices and len(response.choices) > 0:
@@ -313,6 +316,9 @@ class OpenAIService:
                 logger.error(error_msg)
                 return f"Error: {error_msg}"
             
+        except AdmissionRejected as e:
+            logger.warning(f"OpenAI request shed: {e}")
+            return "The service is busy. Please try again shortly."
         except RateLimitError as e:
             logger.error(f"OpenAI API rate limit exceeded: {e}")
             return "Rate limit exceeded. Please try again later."
@@ -360,12 +366,13 @@ class OpenAIService:
         try:
             start_time = time.time()
             # Use older API structure for v0.28.1
-            response = self.client.chat.completions.create(
-                model=self.feedback_model,
-                messages=prompt_messages,
-                temperature=0.5,  # Lower temp for more focused feedback
-                max_tokens=3000 # Allow longer feedback
-            )
+            with llm_admission(Priority.FEEDBACK):
+                response = self.client.chat.completions.create(
+                    model=self.feedback_model,
+                    messages=prompt_messages,
+                    temperature=0.5,  # Lower temp for more focused feedback
+                    max_tokens=3000 # Allow longer feedback
+                )
             end_time = time.time()
             duration = end_time - start_time
             logger.info(f"OpenAI feedback generation successful. Duration: {duration:.2f} seconds")
@@ -408,12 +415,13 @@ class OpenAIService:
         try:
             start_time = time.time()
             # Use older API structure in v0.28.1
-            response = self.client.completions.create(
-                model=current_model,
-                prompt=prompt,
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
+            with llm_admission():
+                response = self.client.completions.create(
+                    model=current_model,
+                    prompt=prompt,
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
             end_time = time.time()
             duration = end_time - start_time
             logger.info(f"OpenAI text generation successful. Duration: {duration:.2f} seconds")
@@ -0,0 +1,119 @@
+"""
+Persona Cache - Server-side storage for the persona a training session uses
+
+Training services used to keep the whole generated persona in the Flask
+session, a signed cookie: every later request (static assets included)
+carried and re-verified it, large personas risked the browser's cookie
+size limit, and other workers or devices could not see it. The cookie now
+holds only an opaque token; personas live here, keyed by user, token and
+the caller's session key:
+- PersonaCache keeps them in process: LRU-bounded to max_entries, each
+  entry expiring ttl seconds after it was stored
+- SharedPersonaCache keeps them in a Redis-protocol store (SET ... PX) so
+  any worker can serve the next request
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+from app.utils.redis_client import RedisClient, get_shared_client
+
+logger = logging.getLogger(__name__)
+
+PERSONA_TTL = int(os.environ.get('PERSONA_CACHE_TTL', str(6 * 3600)))  # Seconds a cached persona lives
+MAX_PERSONAS = int(os.environ.get('PERSONA_CACHE_MAX_ENTRIES', '2000'))  # In-process bound
+
+
+class PersonaCache:
+    """In-process LRU cache with per-entry TTL; thread-safe"""
+
+    def __init__(self, max_entries: int = MAX_PERSONAS, ttl: int = PERSONA_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Copy of the cached persona, or None if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            expires_at, persona = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+        return json.loads(persona)
+
+    def set(self, key: str, persona: Dict[str, Any]):
+        # Stored serialized: callers get independent copies, and the size matches the shared store
+        value = json.dumps(persona, default=str)
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evicted'] += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SharedPersonaCache:
+    """Cache in a Redis-protocol store, shared by all workers; the store's TTL bounds memory"""
+
+    def __init__(self, client: RedisClient, prefix: str = 'persona_cache', ttl: int = PERSONA_TTL):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.client.execute('GET', self._key(key))
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, persona: Dict[str, Any]):
+        self.client.execute('SET', self._key(key), json.dumps(persona, default=str), 'PX', self.ttl * 1000)
+
+    def delete(self, key: str):
+        self.client.execute('DEL', self._key(key))
+
+
+def create_persona_cache(prefix: str = 'persona_cache', ttl: int = PERSONA_TTL):
+    """Shared cache when SHARED_STATE_URL is configured, else in-process"""
+    client = get_shared_client()
+    if client is None:
+        return PersonaCache(ttl=ttl)
+    logger.info(f"[PersonaCache] Using shared persona cache '{prefix}'")
+    return SharedPersonaCache(client, prefix=prefix, ttl=ttl)
+
+
+# Shared instance
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_persona_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_persona_cache()
+    return _cache
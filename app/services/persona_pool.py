@@ -0,0 +1,241 @@
+"""
+Persona Pool - Pregenerated bias-free personas, ready to hand out
+
+Starting a practice session used to wait on persona generation. The pool
+keeps up to POOL_DEPTH ready frameworks per (industry category, difficulty,
+target-market bucket) and tops buckets back up on a background worker:
+- A draw removes its entry under the pool lock, so no persona is served twice
+- Among the waiting entries, the draw takes the one whose attributes were
+  served least in the recent generation history, and only then records it
+  there - pregenerated personas do not count until they are used
+- Product-specific contextual fears are attached after the draw; they are
+  cheap and depend on the caller's exact product description
+- An empty bucket generates inline (a miss) and schedules a refill
+- Hit rate and refill lag (slot freed -> replacement ready) are reported
+  in get_stats() and the 'persona_refill' latency stage
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional
+import logging
+import os
+import threading
+import time
+
+from app.services.coach_metrics import get_metrics
+from app.services.comprehensive_bias_prevention import ComprehensiveBiasPrevention
+
+logger = logging.getLogger(__name__)
+
+POOL_DEPTH = int(os.environ.get('PERSONA_POOL_DEPTH', '3'))  # Ready personas kept per bucket
+POOL_WORKERS = int(os.environ.get('PERSONA_POOL_WORKERS', '1'))
+DRAW_CANDIDATES = 8  # Oldest waiting entries compared for diversity on each draw
+DIFFICULTIES = ('beginner', 'intermediate', 'advanced')
+DEFAULT_DIFFICULTY = 'intermediate'
+
+# Target-market buckets: (bucket, terms, representative market the bucket's personas are generated for).
+# The terms mirror the ones generate_bias_free_persona_framework weights roles and business context by.
+MARKET_BUCKETS = (
+    ('b2c', ('b2c',), 'B2C consumers'),
+    ('small_business', ('freelancer', 'entrepreneur', 'startup', 'small business', 'independent'),
+     'small business owners and independent entrepreneurs'),
+    ('enterprise', ('enterprise', 'corporation', 'large business', 'fortune 500'), 'enterprise corporations'),
+    ('technical', ('tech', 'software', 'engineering', 'development'), 'software and engineering teams'),
+    ('general', (), 'businesses'),
+)
+_MARKET_TEXT = {bucket: market for bucket, _, market in MARKET_BUCKETS}
+
+
+class PoolKey(NamedTuple):
+    industry: str  # ComprehensiveBiasPrevention.INDUSTRY_DIVERSIFICATION category
+    difficulty: str
+    market: str  # MARKET_BUCKETS bucket
+
+
+def market_bucket(target_market: Optional[str]) -> str:
+    """Bucket for a free-text target market description"""
+    text = (target_market or '').lower()
+    for bucket, terms, _ in MARKET_BUCKETS:
+        if any(term in text for term in terms):
+            return bucket
+    return 'general'
+
+
+def generate_framework(key: PoolKey) -> Dict[str, Any]:
+    """Default generator: an unrecorded framework for the bucket's representative market"""
+    return ComprehensiveBiasPrevention.generate_bias_free_persona_framework(
+        target_market=_MARKET_TEXT[key.market],
+        complexity_level=key.difficulty,
+        industry_category=key.industry,
+        record=False
+    )
+
+
+@dataclass
+class _Bucket:
+    entries: List[Dict[str, Any]] = field(default_factory=list)
+    in_flight: int = 0
+    freed_at: Deque[float] = field(default_factory=deque)  # When each in-flight slot was freed
+
+
+class PersonaPool:
+    """
+    Per-bucket pools of ready persona frameworks.
+    generator(key) -> framework and the refill executor are injectable so
+    tests can run with a fake or mock-mode generator.
+    """
+
+    def __init__(
+        self,
+        generator: Callable[[PoolKey], Dict[str, Any]] = generate_framework,
+        depth: int = POOL_DEPTH,
+        max_workers: int = POOL_WORKERS,
+        executor: Optional[ThreadPoolExecutor] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.generator = generator
+        self.depth = depth
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='persona-pool')
+        self._clock = clock
+        self._buckets: Dict[PoolKey, _Bucket] = {}
+        self._lock = threading.Lock()
+        self._refill_lag_ms: Deque[float] = deque(maxlen=100)
+        self.stats = {'hits': 0, 'misses': 0, 'generated': 0, 'failed': 0}
+
+    def key_for(self, target_market: Optional[str], product_service: Optional[str] = None,
+                difficulty: Optional[str] = None) -> PoolKey:
+        """Bucket a request falls in; the industry category is an anti-bias pick suited to the context"""
+        difficulty = (difficulty or DEFAULT_DIFFICULTY).lower()
+        if difficulty not in DIFFICULTIES:
+            difficulty = DEFAULT_DIFFICULTY
+        industry = ComprehensiveBiasPrevention.select_industry_category(target_market, product_service)
+        return PoolKey(industry, difficulty, market_bucket(target_market))
+
+    def draw(self, target_market: Optional[str], product_service: Optional[str] = None,
+             difficulty: Optional[str] = None) -> Dict[str, Any]:
+        """
+        A framework no other caller has received, recorded in the generation
+        history and carrying the product's contextual fears.
+        """
+        key = self.key_for(target_market, product_service, difficulty)
+        framework = self._take(key)
+        if framework is None:
+            self.stats['misses'] += 1
+            get_metrics().increment('persona_pool_miss')
+            framework = self.generator(key)
+        else:
+            self.stats['hits'] += 1
+            get_metrics().increment('persona_pool_hit')
+        self.refill(key)
+
+        ComprehensiveBiasPrevention.record_generation(framework)
+        if product_service:
+            ComprehensiveBiasPrevention.attach_product_context(framework, product_service)
+        return framework
+
+    def _take(self, key: PoolKey) -> Optional[Dict[str, Any]]:
+        """Remove and return the waiting entry that keeps recent history most diverse"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or not bucket.entries:
+                return None
+            candidates = bucket.entries[:DRAW_CANDIDATES]
+        # History reads may go to the shared store; keep them outside the lock
+        scores = self._recent_usage(candidates)
+        ranked = sorted(range(len(candidates)), key=scores.__getitem__)  # Stable: oldest first on ties
+        with self._lock:
+            for index in ranked:
+                for position, entry in enumerate(bucket.entries):
+                    if entry is candidates[index]:  # Identity: equal-looking personas are still distinct
+                        return bucket.entries.pop(position)
+            # Every candidate was drawn concurrently; take whatever arrived since
+            return bucket.entries.pop(0) if bucket.entries else None
+
+    @staticmethod
+    def _recent_usage(frameworks: List[Dict[str, Any]]) -> List[int]:
+        """How often each framework's attributes appear in the shortest history window"""
+        history = ComprehensiveBiasPrevention.get_history()
+        window = ComprehensiveBiasPrevention.HISTORY_WINDOWS[0]
+        records = [ComprehensiveBiasPrevention.generation_record(framework) for framework in frameworks]
+        counts = {name: history.counts(name, window) for name in records[0]}
+        return [sum(counts[name].get(value, 0) for name, value in record.items() if value) for record in records]
+
+    def refill(self, key: PoolKey):
+        """Schedule generation until the bucket (ready plus in flight) reaches depth"""
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.setdefault(key, _Bucket())
+            needed = self.depth - len(bucket.entries) - bucket.in_flight
+            bucket.in_flight += max(needed, 0)
+            bucket.freed_at.extend([now] * needed)
+        for _ in range(needed):
+            self._executor.submit(self._refill_one, key)
+
+    def warm(self, keys: Iterable[PoolKey]):
+        """Start filling the given buckets in the background"""
+        for key in keys:
+            self.refill(key)
+
+    def _refill_one(self, key: PoolKey):
+        try:
+            framework = self.generator(key)
+        except Exception as e:
+            logger.error(f"[PersonaPool] Refill failed for {key}: {e}")
+            framework = None
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets[key]
+            bucket.in_flight -= 1
+            freed_at = bucket.freed_at.popleft()
+            if framework is None:
+                self.stats['failed'] += 1
+                return
+            bucket.entries.append(framework)
+            self.stats['generated'] += 1
+            lag_ms = (now - freed_at) * 1000
+            self._refill_lag_ms.append(lag_ms)
+        get_metrics().record_latency('persona_refill', lag_ms)
+
+    def ready(self, key: PoolKey) -> int:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            return len(bucket.entries) if bucket else 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            ready = sum(len(bucket.entries) for bucket in self._buckets.values())
+            in_flight = sum(bucket.in_flight for bucket in self._buckets.values())
+            last_lag = self._refill_lag_ms[-1] if self._refill_lag_ms else None
+            lags = sorted(self._refill_lag_ms)
+            buckets = len(self._buckets)
+        draws = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_rate': self.stats['hits'] / draws if draws else None,
+            'buckets': buckets,
+            'ready': ready,
+            'in_flight': in_flight,
+            'depth': self.depth,
+            'refill_lag_ms': {
+                'last': round(last_lag, 1) if lags else None,
+                'p50': round(lags[len(lags) // 2], 1) if lags else None,
+                'max': round(lags[-1], 1) if lags else None
+            }
+        }
+
+
+# Shared instance
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_persona_pool() -> PersonaPool:
+    """Process-wide pool; the general-market buckets start warming on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PersonaPool()
+                _pool.warm(PoolKey(industry, DEFAULT_DIFFICULTY, 'general')
+                           for industry in ComprehensiveBiasPrevention.INDUSTRY_DIVERSIFICATION)
+    return _pool
@@ -8,6 +8,9 @@ import random
 import re
 from flask import current_app
 
+from app.services.llm_admission import Priority, llm_admission
+from app.services.streaming_json import extract_json
+
 logger = logging.getLogger(__name__)
 
 def normalize_input_text(text: str) -> str:
@@ -57,44 +60,13 @@ def robust_json_extraction(response_text: str) -> dict:
         logger.warning("Empty response text for JSON extraction")
         return None
     
-    # Strategy 1: Direct JSON parsing
+    # Strategy 1: The first complete JSON object - bare, in a code block or after prose
     try:
-        return json.loads(response_text.strip())
-    except json.JSONDecodeError:
+        return extract_json(response_text)
+    except ValueError:
         pass
     
-    # Strategy 2: Extract from markdown code blocks
-    code_block_patterns = [
-        r'```json\s*(.*?)\s*```',
-        r'```\s*(.*?)\s*```',
-        r'`(.*?)`'
-    ]
-    
-    for pattern in code_block_patterns:
-        matches = re.findall(pattern, response_text, re.DOTALL)
-        for match in matches:
-            try:
-                return json.loads(match.strip())
-            except json.JSONDecodeError:
-                continue
-    
-    # Strategy 3: Look for JSON-like structures with specific keys
-    json_patterns = [
-        r'\{[^{}]*"value_proposition"[^{}]*\}',
-        r'\{[^{}]*"coaching_methodology"[^{}]*\}',
-        r'\{[^{}]*"opening_hook"[^{}]*\}',
-        r'\{.*?".*?".*?\}'
-    ]
-    
-    for pattern in json_patterns:
-        matches = re.findall(pattern, response_text, re.DOTALL)
-        for match in matches:
-            try:
-                return json.loads(match)
-            except json.JSONDecodeError:
-                continue
-    
-    # Strategy 4: Try to extract key-value pairs manually
+    # Strategy 2: Try to extract key-value pairs manually
     try:
         lines = response_text.split('\n')
         extracted = {}
@@ -474,16 +446,17 @@ Ready to master homeowner conversations and help them create amazing entertainme
             # Add randomization to get different variations each time
             random_seed = random.randint(1, 10000)
             
-            completion = openai_service.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": f"You are an expert AI sales coach persona generator with deep business intelligence. Generate sophisticated, industry-aware coaching personas that demonstrate understanding of specific business dynamics, buyer psychology, and market contexts. IMPORTANT: Create fresh, varied content with different phrasing, approaches, and insights each time. Randomization seed: {random_seed}"},
-                    {"role": "user", "content": enhanced_prompt}
-                ],
-                temperature=0.9,  # Increased for more variation
-                max_tokens=500,
-                seed=random_seed  # Add seed for variation
-            )
+            with llm_admission(Priority.BACKGROUND):
+                completion = openai_service.client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {"role": "system", "content": f"You are an expert AI sales coach persona generator with deep business intelligence. Generate sophisticated, industry-aware coaching personas that demonstrate understanding of specific business dynamics, buyer psychology, and market contexts. IMPORTANT: Create fresh, varied content with different phrasing, approaches, and insights each time. Randomization seed: {random_seed}"},
+                        {"role": "user", "content": enhanced_prompt}
+                    ],
+                    temperature=0.9,  # Increased for more variation
+                    max_tokens=500,
+                    seed=random_seed  # Add seed for variation
+                )
             persona = completion.choices[0].message.content.strip()
             logger.info(f"Successfully generated advanced AI coach persona with business intelligence (seed: {random_seed}).")
             return persona
@@ -704,15 +677,16 @@ Make it professional, specific, and immediately usable.
 """
 
         try:
-            completion = openai_service.client.chat.completions.create(
-                model="gpt-4o",  # Premium model for highest quality
-                messages=[
-                    {"role": "system", "content": "You are a world-class sales strategist and business consultant. Generate premium, professional content that sales professionals can use immediately."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8,  # Slightly higher for more creative/varied suggestions
-                max_tokens=600,   # More tokens for detailed responses
-            )
+            with llm_admission():
+                completion = openai_service.client.chat.completions.create(
+                    model="gpt-4o",  # Premium model for highest quality
+                    messages=[
+                        {"role": "system", "content": "You are a world-class sales strategist and business consultant. Generate premium, professional content that sales professionals can use immediately."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.8,  # Slightly higher for more creative/varied suggestions
+                    max_tokens=600,   # More tokens for detailed responses
+                )
             
             response_text = completion.choices[0].message.content.strip()
             
@@ -976,12 +950,13 @@ def summarize_text(text: str, summary_type: str = "product") -> str:
     if openai_service and openai_service.client:
         try:
             prompt = f"Summarize the following description into a concise and compelling phrase for an AI sales coach persona. The description is about a {summary_type}. Focus on the core value and benefit. Be brief and impactful. DESCRIPTION: '{text}'"
-            response = openai_service.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=60
-            )
+            with llm_admission():
+                response = openai_service.client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.7,
+                    max_tokens=60
+                )
             summary = response.choices[0].message.content.strip().strip('"')
             logger.info(f"OpenAI summarization successful for {summary_type}.")
             return summary
@@ -1036,15 +1011,16 @@ Examples:
 """
 
     try:
-        completion = openai_service.client.chat.completions.create(
-            model="gpt-4o-mini",  # Faster model for analysis
-            messages=[
-                {"role": "system", "content": "You are a sales psychology expert. Return ONLY valid JSON with no additional text."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,  # Lower temperature for consistent analysis
-            max_tokens=300
-        )
+        with llm_admission():
+            completion = openai_service.client.chat.completions.create(
+                model="gpt-4o-mini",  # Faster model for analysis
+                messages=[
+                    {"role": "system", "content": "You are a sales psychology expert. Return ONLY valid JSON with no additional text."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,  # Lower temperature for consistent analysis
+                max_tokens=300
+            )
         
         response_text = completion.choices[0].message.content.strip()
         
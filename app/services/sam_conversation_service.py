@@ -7,6 +7,9 @@ handling message attribution, response reconstruction, and information extractio
 
 import logging
 import re
+import threading
+import time
+from collections import OrderedDict
 from typing import Dict, List, Tuple, Optional, Any
 
 logger = logging.getLogger(__name__)
@@ -57,6 +60,12 @@ class SamConversationService:
             "great! let me create your custom ai prospect",
             "i'll now generate your practice partner based on this information"
         ]
+        
+        # Per-conversation incremental analyzers (bounded, least recently used evicted)
+        self.max_tracked_conversations = 1000
+        self.analyzer_ttl = 3600  # Seconds
+        self._analyzers: 'OrderedDict[str, SamConversationAnalyzer]' = OrderedDict()
+        self._analyzers_lock = threading.Lock()
     
     def analyze_conversation(self, conversation: List[str]) -> Dict[str, Any]:
         """
@@ -142,6 +151,75 @@ class SamConversationService:
                 "reasoning": f"Analysis error: {str(e)}"
             }
     
+    def analyze_incremental(self, conversation_id: str, conversation: Optional[List[str]] = None,
+                            new_messages: Optional[List[str]] = None, cursor: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Analyze a conversation, resuming from where the last call for it stopped.
+        
+        Args:
+            conversation_id: Key for the conversation's analyzer
+            conversation: Full conversation; only messages past the cursor are analyzed,
+                and the analysis restarts if the already-analyzed prefix changed
+            new_messages: Messages appended since `cursor` (alternative to conversation)
+            cursor: Number of messages the caller has already sent; required with new_messages
+            
+        Returns:
+            analyze_conversation's result plus "cursor" (messages analyzed)
+            
+        Raises:
+            AnalysisCursorMismatch: new_messages were sent without a cursor or for a
+                different one; the caller must resend the full conversation
+        """
+        analyzer = self._get_analyzer(conversation_id)
+        with analyzer.lock:
+            if conversation is not None:
+                if analyzer.cursor > len(conversation) or conversation[:analyzer.cursor] != analyzer.messages:
+                    logger.debug(f"Conversation {conversation_id} changed before the cursor, re-analyzing")
+                    analyzer.reset()
+                new_messages = conversation[analyzer.cursor:]
+            elif cursor is None or cursor != analyzer.cursor:
+                # Skipped or replayed batches would be analyzed as the wrong conversation
+                raise AnalysisCursorMismatch(analyzer.cursor)
+            
+            try:
+                result = analyzer.feed(new_messages or []).result()
+            except Exception as e:
+                logger.error(f"Error analyzing conversation: {e}")
+                self.forget_conversation(conversation_id)
+                return {
+                    "is_complete": False,
+                    "product_service": None,
+                    "target_market": None,
+                    "ready_for_completion": False,
+                    "confidence": 0.0,
+                    "reasoning": f"Analysis error: {str(e)}",
+                    "cursor": 0
+                }
+            result["cursor"] = analyzer.cursor
+            return result
+    
+    def forget_conversation(self, conversation_id: str):
+        """Drop the incremental state for a conversation."""
+        with self._analyzers_lock:
+            self._analyzers.pop(conversation_id, None)
+    
+    def _get_analyzer(self, conversation_id: str) -> 'SamConversationAnalyzer':
+        with self._analyzers_lock:
+            analyzer = self._analyzers.get(conversation_id)
+            if analyzer is not None and time.time() - analyzer.last_used < self.analyzer_ttl:
+                self._analyzers.move_to_end(conversation_id)
+                return analyzer
+        return self._new_analyzer(conversation_id)
+    
+    def _new_analyzer(self, conversation_id: str) -> 'SamConversationAnalyzer':
+        analyzer = SamConversationAnalyzer(self)
+        with self._analyzers_lock:
+            self._analyzers[conversation_id] = analyzer
+            self._analyzers.move_to_end(conversation_id)
+            while len(self._analyzers) > self.max_tracked_conversations:
+                self._analyzers.popitem(last=False)
+        return analyzer
+    
     def _identify_message_roles(self, conversation: List[str]) -> List[str]:
         """
         Identify whether each message is from Sam or the user.
@@ -156,58 +234,64 @@ class SamConversationService:
         last_role = None
         
         for i, msg in enumerate(conversation):
-            msg_lower = msg.lower().strip()
-            
-            # Skip empty messages
-            if not msg_lower:
-                message_roles.append('unknown')
-                continue
-            
-            # High confidence Sam identification
-            if any(sam_phrase in msg_lower for sam_phrase in self.sam_identifiers):
-                message_roles.append('sam')
-                last_role = 'sam'
-                continue
-            
-            # High confidence user identification
-            if any(user_phrase in msg_lower for user_phrase in self.user_identifiers):
-                message_roles.append('user')
-                last_role = 'user'
-                continue
-            
-            # Use conversation flow logic for ambiguous messages
-            if i == 0:
-                # First message is likely Sam's greeting
-                message_roles.append('sam')
-                last_role = 'sam'
-            elif last_role == 'sam' and len(msg_lower.split()) <= 3 and any(word in msg_lower for word in ['great', 'excellent', 'perfect', 'wonderful', 'fantastic', 'amazing']):
-                # Short acknowledgment after Sam's message is likely Sam continuing
-                message_roles.append('sam')
-                last_role = 'sam'
-            elif last_role == 'sam' and '?' in conversation[i-1]:
-                # Response after Sam asks a question is likely user's answer
-                message_roles.append('user')
-                last_role = 'user'
-            elif last_role == 'user' and len(msg_lower.split()) <= 15 and '?' not in msg_lower:
-                # Short message after user message without question is likely user continuing
-                message_roles.append('user')
-                last_role = 'user'
-            else:
-                # Additional heuristics for ambiguous cases
-                if any(sam_phrase in msg_lower for sam_phrase in [
-                    "what is your", "who is your", "tell me about", "can you describe", 
-                    "what do you sell", "product or service", "target market", "ideal customer",
-                    "perfect!", "excellent!", "great!", "wonderful!", "amazing!", "fantastic!",
-                    "i'll now", "let me create", "i'll create"
-                ]):
-                    message_roles.append('sam')
-                    last_role = 'sam'
-                else:
-                    message_roles.append('user')
-                    last_role = 'user'
+            role = self._classify_message(msg, i, last_role, conversation[i-1] if i > 0 else '')
+            message_roles.append(role)
+            if role != 'unknown':
+                last_role = role
         
         return message_roles
     
+    def _classify_message(self, msg: str, index: int, last_role: Optional[str], prev_msg: str) -> str:
+        """
+        Classify one message given the role of the last non-empty message.
+        
+        Args:
+            msg: Message to classify
+            index: Position of the message in the conversation
+            last_role: Role of the most recent non-empty message
+            prev_msg: The message immediately before this one
+            
+        Returns:
+            'sam', 'user' or 'unknown' (empty message)
+        """
+        msg_lower = msg.lower().strip()
+        
+        # Skip empty messages
+        if not msg_lower:
+            return 'unknown'
+        
+        # High confidence Sam identification
+        if any(sam_phrase in msg_lower for sam_phrase in self.sam_identifiers):
+            return 'sam'
+        
+        # High confidence user identification
+        if any(user_phrase in msg_lower for user_phrase in self.user_identifiers):
+            return 'user'
+        
+        # Use conversation flow logic for ambiguous messages
+        if index == 0:
+            # First message is likely Sam's greeting
+            return 'sam'
+        if last_role == 'sam' and len(msg_lower.split()) <= 3 and any(word in msg_lower for word in ['great', 'excellent', 'perfect', 'wonderful', 'fantastic', 'amazing']):
+            # Short acknowledgment after Sam's message is likely Sam continuing
+            return 'sam'
+        if last_role == 'sam' and '?' in prev_msg:
+            # Response after Sam asks a question is likely user's answer
+            return 'user'
+        if last_role == 'user' and len(msg_lower.split()) <= 15 and '?' not in msg_lower:
+            # Short message after user message without question is likely user continuing
+            return 'user'
+        
+        # Additional heuristics for ambiguous cases
+        if any(sam_phrase in msg_lower for sam_phrase in [
+            "what is your", "who is your", "tell me about", "can you describe", 
+            "what do you sell", "product or service", "target market", "ideal customer",
+            "perfect!", "excellent!", "great!", "wonderful!", "amazing!", "fantastic!",
+            "i'll now", "let me create", "i'll create"
+        ]):
+            return 'sam'
+        return 'user'
+    
     def _reconstruct_user_responses(self, conversation: List[str], message_roles: List[str]) -> List[str]:
         """
         Reconstruct complete user responses by merging adjacent user messages.
@@ -223,36 +307,10 @@ class SamConversationService:
         current_response = []
         
         for i, (msg, role) in enumerate(zip(conversation, message_roles)):
-            if not msg.strip() or role == 'unknown':
-                continue
-                
-            if role == 'user':
-                # Check if this is a continuation of previous message
-                if i > 0 and message_roles[i-1] == 'user':
-                    # If previous message doesn't end with punctuation, likely continuation
-                    prev_msg = conversation[i-1].strip()
-                    if prev_msg and not prev_msg[-1] in '.!?':
-                        current_response.append(msg.strip())
-                    else:
-                        # Previous message had ending punctuation, might be new thought
-                        # Check if this message starts with lowercase (likely continuation)
-                        if msg.strip() and msg.strip()[0].islower():
-                            current_response.append(msg.strip())
-                        else:
-                            # Likely new thought
-                            if current_response:
-                                complete_user_responses.append(' '.join(current_response))
-                            current_response = [msg.strip()]
-                else:
-                    # First user message or after Sam's message
-                    if current_response:
-                        complete_user_responses.append(' '.join(current_response))
-                    current_response = [msg.strip()]
-            else:
-                # Sam's message - finalize any pending user response
-                if current_response:
-                    complete_user_responses.append(' '.join(current_response))
-                    current_response = []
+            current_response = self._merge_user_message(
+                complete_user_responses, current_response, msg, role,
+                message_roles[i-1] if i > 0 else None, conversation[i-1] if i > 0 else ''
+            )
         
         # Add final response if exists
         if current_response:
@@ -260,6 +318,48 @@ class SamConversationService:
             
         return complete_user_responses
     
+    def _merge_user_message(self, complete_user_responses: List[str], current_response: List[str],
+                            msg: str, role: str, prev_role: Optional[str], prev_msg: str) -> List[str]:
+        """
+        Fold one message into the responses being reconstructed.
+        
+        Args:
+            complete_user_responses: Finished responses (appended to in place)
+            current_response: Parts of the response still being built
+            msg: The message
+            role: Its role
+            prev_role: Role of the message immediately before it (None for the first)
+            prev_msg: The message immediately before it
+            
+        Returns:
+            The response parts still being built after this message
+        """
+        if not msg.strip() or role == 'unknown':
+            return current_response
+            
+        if role == 'user':
+            # Check if this is a continuation of previous message
+            if prev_role == 'user':
+                # If previous message doesn't end with punctuation, likely continuation
+                prev_msg = prev_msg.strip()
+                if prev_msg and not prev_msg[-1] in '.!?':
+                    current_response.append(msg.strip())
+                    return current_response
+                # Previous message had ending punctuation, might be new thought
+                # Check if this message starts with lowercase (likely continuation)
+                if msg.strip() and msg.strip()[0].islower():
+                    current_response.append(msg.strip())
+                    return current_response
+            # First user message, after Sam's message, or likely new thought
+            if current_response:
+                complete_user_responses.append(' '.join(current_response))
+            return [msg.strip()]
+        
+        # Sam's message - finalize any pending user response
+        if current_response:
+            complete_user_responses.append(' '.join(current_response))
+        return []
+    
     def _check_if_sam_asked_about(self, conversation: List[str], message_roles: List[str], patterns: List[str]) -> bool:
         """
         Check if Sam asked about a specific topic.
@@ -299,22 +399,36 @@ class SamConversationService:
                 if any(pattern in msg_lower for pattern in self.product_question_patterns):
                     product_question_indices.append(i)
         
-        # If we found where Sam asked about products
+        # Find the first user response after the last product question
+        answer = None
         if product_question_indices:
             last_product_question = product_question_indices[-1]
-            
-            # Find the next user response after the product question
-            for i, (msg, role) in enumerate(zip(conversation[last_product_question+1:], 
-                                              message_roles[last_product_question+1:])):
+            for msg, role in zip(conversation[last_product_question+1:], message_roles[last_product_question+1:]):
                 if role == 'user' and msg.strip():
-                    # Found first user response after product question
-                    # Find the corresponding complete response
-                    for complete_resp in complete_user_responses:
-                        if msg.strip() in complete_resp:
-                            return complete_resp.strip()
-                    
-                    # If we couldn't find a matching complete response, use this message
-                    return msg.strip()
+                    answer = msg
+                    break
+        
+        return self._resolve_product_service(answer, complete_user_responses)
+    
+    def _resolve_product_service(self, answer: Optional[str], complete_user_responses: List[str]) -> Optional[str]:
+        """
+        Pick the product/service given the user's answer to Sam's product question.
+        
+        Args:
+            answer: First user message after the last product question, if any
+            complete_user_responses: List of complete user responses
+            
+        Returns:
+            Extracted product/service or None if not found
+        """
+        if answer is not None:
+            # Find the corresponding complete response
+            for complete_resp in complete_user_responses:
+                if answer.strip() in complete_resp:
+                    return complete_resp.strip()
+            
+            # If we couldn't find a matching complete response, use this message
+            return answer.strip()
         
         # Fallback: Use the first substantial user response with product keywords
         for resp in complete_user_responses:
@@ -351,25 +465,41 @@ class SamConversationService:
                 if any(pattern in msg_lower for pattern in self.target_question_patterns):
                     target_question_indices.append(i)
         
-        # If we found where Sam asked about target market
+        # Collect user responses that came after the last target market question
+        answers = []
         if target_question_indices:
             last_target_question = target_question_indices[-1]
+            answers = [
+                msg for msg, role in zip(conversation[last_target_question+1:], message_roles[last_target_question+1:])
+                if role == 'user' and msg.strip()
+            ]
+        
+        return self._resolve_target_market(answers, complete_user_responses, product_service)
+    
+    def _resolve_target_market(self, answers: List[str], complete_user_responses: List[str],
+                               product_service: Optional[str]) -> Optional[str]:
+        """
+        Pick the target market given the user's answers to Sam's target market question.
+        
+        Args:
+            answers: User messages after the last target market question
+            complete_user_responses: List of complete user responses
+            product_service: Previously extracted product/service
             
-            # Find user responses that came after the target market question
-            for i, (msg, role) in enumerate(zip(conversation[last_target_question+1:], 
-                                              message_roles[last_target_question+1:])):
-                if role == 'user' and msg.strip():
-                    # Found user response after target market question
-                    # Make sure this isn't the product service response
-                    if not product_service or not self._is_same_response(msg, product_service):
-                        # Find the corresponding complete response
-                        for complete_resp in complete_user_responses:
-                            if msg.strip() in complete_resp and (not product_service or 
-                               not self._is_same_response(complete_resp, product_service)):
-                                return complete_resp.strip()
-                        
-                        # If we couldn't find a matching complete response, use this message
-                        return msg.strip()
+        Returns:
+            Extracted target market or None if not found
+        """
+        for msg in answers:
+            # Make sure this isn't the product service response
+            if not product_service or not self._is_same_response(msg, product_service):
+                # Find the corresponding complete response
+                for complete_resp in complete_user_responses:
+                    if msg.strip() in complete_resp and (not product_service or 
+                       not self._is_same_response(complete_resp, product_service)):
+                        return complete_resp.strip()
+                
+                # If we couldn't find a matching complete response, use this message
+                return msg.strip()
         
         # Fallback: Look for a user response with target market keywords that's different from product
         for resp in complete_user_responses:
@@ -475,6 +605,125 @@ class SamConversationService:
         return reasoning, confidence
 
 
+class AnalysisCursorMismatch(Exception):
+    """New messages were sent for a cursor the analyzer is not at."""
+
+    def __init__(self, cursor: int):
+        super().__init__(f"Analyzer is at message {cursor}")
+        self.cursor = cursor
+
+
+class SamConversationAnalyzer:
+    """
+    Resumable analysis of one Sam conversation.
+    
+    Keeps a cursor and the partial results of every step of
+    SamConversationService.analyze_conversation, so feeding new messages
+    costs O(new messages) and result() matches a full re-analysis of the
+    same messages.
+    """
+    
+    def __init__(self, service: SamConversationService):
+        self.service = service
+        self._phrase_window = max(len(phrase) for phrase in service.completion_phrases) - 1
+        self.lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Forget all analyzed messages."""
+        self.messages: List[str] = []
+        self.message_roles: List[str] = []
+        self.complete_user_responses: List[str] = []
+        self._current_response: List[str] = []
+        self._last_role: Optional[str] = None
+        self.sam_asked_product = False
+        self.sam_asked_target = False
+        self._product_answer: Optional[str] = None  # First user message after the last product question
+        self._target_answers: List[str] = []  # User messages after the last target question
+        self.is_complete = False
+        self._tail = ''  # End of the joined, lowercased conversation text
+        self.last_used = time.time()
+    
+    @property
+    def cursor(self) -> int:
+        return len(self.messages)
+    
+    def feed(self, new_messages: List[str]) -> 'SamConversationAnalyzer':
+        """Advance the analysis over messages appended since the cursor."""
+        service = self.service
+        for msg in new_messages:
+            i = len(self.messages)
+            prev_msg = self.messages[-1] if self.messages else ''
+            prev_role = self.message_roles[-1] if self.message_roles else None
+            
+            role = service._classify_message(msg, i, self._last_role, prev_msg)
+            if role != 'unknown':
+                self._last_role = role
+            self._current_response = service._merge_user_message(
+                self.complete_user_responses, self._current_response, msg, role, prev_role, prev_msg
+            )
+            
+            if role == 'sam':
+                msg_lower = msg.lower()
+                if any(pattern in msg_lower for pattern in service.product_question_patterns):
+                    self.sam_asked_product = True
+                    self._product_answer = None
+                if any(pattern in msg_lower for pattern in service.target_question_patterns):
+                    self.sam_asked_target = True
+                    self._target_answers = []
+            elif role == 'user' and msg.strip():
+                if self.sam_asked_product and self._product_answer is None:
+                    self._product_answer = msg
+                if self.sam_asked_target:
+                    self._target_answers.append(msg)
+            
+            # Completion phrases may straddle message boundaries in the joined text
+            text = f"{self._tail} {msg.lower()}" if self.messages else msg.lower()
+            if not self.is_complete:
+                self.is_complete = any(phrase in text for phrase in service.completion_phrases)
+            self._tail = text[-self._phrase_window:] if self._phrase_window else ''
+            
+            self.messages.append(msg)
+            self.message_roles.append(role)
+        self.last_used = time.time()
+        return self
+    
+    def result(self) -> Dict[str, Any]:
+        """Same dictionary analyze_conversation returns for the messages fed so far."""
+        if not self.messages:
+            return self.service.analyze_conversation([])
+        
+        service = self.service
+        complete_user_responses = list(self.complete_user_responses)
+        if self._current_response:
+            complete_user_responses.append(' '.join(self._current_response))
+        
+        product_service = service._resolve_product_service(self._product_answer, complete_user_responses)
+        target_market = service._resolve_target_market(self._target_answers, complete_user_responses, product_service)
+        ready_for_completion = (
+            product_service and 
+            target_market and 
+            self.sam_asked_product and 
+            self.sam_asked_target
+        )
+        reasoning, confidence = service._generate_reasoning(
+            self.is_complete, ready_for_completion, self.sam_asked_product,
+            self.sam_asked_target, product_service, target_market
+        )
+        return {
+            "is_complete": self.is_complete,
+            "product_service": product_service,
+            "target_market": target_market,
+            "ready_for_completion": ready_for_completion,
+            "sam_asked_product": self.sam_asked_product,
+            "sam_asked_target": self.sam_asked_target,
+            "confidence": confidence,
+            "reasoning": reasoning,
+            "message_roles": list(self.message_roles),
+            "complete_user_responses": complete_user_responses
+        }
+
+
 # Singleton instance
 sam_conversation_service = SamConversationService()
 
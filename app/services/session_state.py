@@ -7,6 +7,7 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +72,7 @@ class SessionState:
     def __init__(self, session_id: str, persona: Optional[Dict] = None):
         self.session_id = session_id
         self.current_turn = 0
+        self.lock = threading.RLock()  # Serializes turn patches and async plan application
         
         # === COMPILED PERSONA (static, built once) ===
         self.compiled_persona_prompt: str = ""
@@ -446,6 +448,10 @@ You're a {role} with limited time and many competing priorities. You've been thr
     
     def apply_patch(self, patch: Dict) -> None:
         """Apply Coach's state patch with validation"""
+        with self.lock:
+            self._apply_patch(patch)
+    
+    def _apply_patch(self, patch: Dict) -> None:
         self.current_turn += 1
         
         try:
@@ -682,7 +688,6 @@ You're a {role} with limited time and many competing priorities. You've been thr
 
 
 # Thread-safe global store
-import threading
 
 _session_states: Dict[str, SessionState] = {}
 _session_lock = threading.RLock()  # Reentrant lock for nested access
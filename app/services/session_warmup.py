@@ -0,0 +1,201 @@
+"""
+Session Warm-up - Opening line and prompt prefix ready before the first turn
+
+Opening a roleplay used to call the model for the greeting while the user
+waited, and the first turn then sent the large static system-prompt prefix
+cold. As soon as a persona is assigned, a warm-up now runs in the background:
+- Renders the roleplay system prompt (GPT4oService.static_prompt_prefix plus
+  the persona section) into the service's persona prompt cache
+- Generates the opening line with that same system prompt, so the first
+  turn's prompt prefix is already in the provider's prompt cache
+- Records completion; the greeting is handed out once and the first turn
+  is timed into 'first_turn_warm' or 'first_turn_cold'
+
+Only /warmup starts a warm-up. A session start takes its greeting if it is
+ready within GREETING_WAIT, and otherwise generates one itself and records
+a cold start (record_start), so the first turn is timed cold as well. A
+failed warm-up leaves no greeting behind.
+
+Warm-ups are kept in process, bounded to MAX_WARMUPS and dropped WARMUP_TTL
+seconds after they start.
+"""
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+import logging
+import threading
+import time
+
+from app.services.coach_metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+WARMUP_WORKERS = 4
+WARMUP_TTL = 30 * 60  # Seconds a warm-up is kept for its session
+MAX_WARMUPS = 1000
+GREETING_WAIT = 1.0  # Seconds a session start waits for an in-flight greeting before generating its own
+
+
+@dataclass
+class Warmup:
+    started_at: float
+    future: Future = field(default_factory=Future)
+    greeting: Optional[str] = None
+    completed_at: Optional[float] = None
+    greeting_taken: bool = False
+    cold_start: bool = False
+    first_turn_done: bool = False
+
+    @property
+    def ready(self) -> bool:
+        return self.completed_at is not None
+
+
+class SessionWarmup:
+    """
+    Background warm-ups keyed by session (or warm-up) id.
+    service needs generate_roleplay_greeting(persona, user_info) -> str;
+    it defaults to the GPT-4o service and is injectable for tests.
+    """
+
+    def __init__(self, service=None, max_workers: int = WARMUP_WORKERS, executor: Optional[ThreadPoolExecutor] = None,
+                 ttl: float = WARMUP_TTL, max_warmups: int = MAX_WARMUPS):
+        self._service = service
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='session-warmup')
+        self.ttl = ttl
+        self.max_warmups = max_warmups
+        self._warmups: 'OrderedDict[str, Warmup]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'started': 0, 'completed': 0, 'failed': 0, 'greetings_reused': 0,
+                      'warm_starts': 0, 'cold_starts': 0}
+
+    @property
+    def service(self):
+        if self._service is None:
+            from app.services.gpt4o_service import get_gpt4o_service
+            self._service = get_gpt4o_service()
+        return self._service
+
+    def start(self, key: str, persona: Dict[str, Any], user_info: Optional[Dict[str, Any]] = None) -> Warmup:
+        """Begin warming key's session; a warm-up already running or done for key is kept"""
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            warmup = self._warmups.get(key)
+            if warmup is not None:
+                return warmup
+            warmup = self._warmups[key] = Warmup(started_at=now)
+            while len(self._warmups) > self.max_warmups:
+                self._warmups.popitem(last=False)
+        self.stats['started'] += 1
+        self._executor.submit(self._run, key, warmup, persona, user_info)
+        return warmup
+
+    def _run(self, key: str, warmup: Warmup, persona: Dict[str, Any], user_info: Optional[Dict[str, Any]]):
+        try:
+            greeting = self.service.generate_roleplay_greeting(persona, user_info)
+        except Exception as e:
+            logger.error(f"[SessionWarmup] Warm-up failed for {key}: {e}")
+            self.stats['failed'] += 1
+            warmup.future.set_result(None)
+            return
+        warmup.greeting = greeting
+        warmup.completed_at = time.monotonic()
+        self.stats['completed'] += 1
+        logger.info(f"[SessionWarmup] {key} warm in {(warmup.completed_at - warmup.started_at) * 1000:.0f}ms")
+        warmup.future.set_result(greeting)
+
+    def get(self, key: Optional[str]) -> Optional[Warmup]:
+        if not key:
+            return None
+        with self._lock:
+            warmup = self._warmups.get(key)
+        if warmup is not None and time.monotonic() - warmup.started_at > self.ttl:
+            return None
+        return warmup
+
+    def take_greeting(self, key: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        The warmed opening line, waiting up to timeout (default GREETING_WAIT)
+        for one in flight. Handed out once; None if there is no warm-up, it
+        failed or it is not ready in time.
+        """
+        warmup = self.get(key)
+        if warmup is None or warmup.greeting_taken:
+            return None
+        if timeout is None:
+            timeout = GREETING_WAIT
+        try:
+            greeting = warmup.future.result(timeout=timeout)
+        except FutureTimeout:
+            logger.warning(f"[SessionWarmup] Greeting for {key} not ready after {timeout}s")
+            return None
+        if greeting is None:
+            return None
+        with self._lock:
+            if warmup.greeting_taken:
+                return None
+            warmup.greeting_taken = True
+        self.stats['greetings_reused'] += 1
+        return greeting
+
+    def record_start(self, key: Optional[str], warm: bool):
+        """
+        Count a session start as warm (greeting from its warm-up) or cold.
+        A cold start's first turn is timed cold even if the warm-up finishes later.
+        """
+        warmup = self.get(key)
+        if not warm and warmup is not None:
+            warmup.cold_start = True
+        self.stats['warm_starts' if warm else 'cold_starts'] += 1
+        get_metrics().increment('session_start_warm' if warm else 'session_start_cold')
+
+    @contextmanager
+    def first_turn(self, key: Optional[str]):
+        """
+        Time the session's first turn into 'first_turn_warm' (warm start and
+        warm-up finished before the turn started) or 'first_turn_cold'.
+        Yields whether it was warm.
+        """
+        warmup = self.get(key)
+        warm = warmup is not None and warmup.ready and not warmup.cold_start
+        start = time.perf_counter()
+        try:
+            yield warm
+        finally:
+            if warmup is None or not warmup.first_turn_done:
+                if warmup is not None:
+                    warmup.first_turn_done = True
+                get_metrics().record_latency('first_turn_warm' if warm else 'first_turn_cold',
+                                             (time.perf_counter() - start) * 1000)
+
+    def discard(self, key: str):
+        with self._lock:
+            self._warmups.pop(key, None)
+
+    def _purge(self, now: float):
+        while self._warmups:
+            key, warmup = next(iter(self._warmups.items()))
+            if now - warmup.started_at <= self.ttl:
+                break
+            del self._warmups[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            warmups = list(self._warmups.values())
+        return {**self.stats, 'tracked': len(warmups), 'ready': sum(1 for warmup in warmups if warmup.ready)}
+
+
+# Shared instance
+_warmup = None
+_warmup_lock = threading.Lock()
+
+def get_session_warmup() -> SessionWarmup:
+    global _warmup
+    if _warmup is None:
+        with _warmup_lock:
+            if _warmup is None:
+                _warmup = SessionWarmup()
+    return _warmup
@@ -0,0 +1,229 @@
+"""
+Streaming JSON - Incremental parsing of a JSON object in model output
+
+Coach, planner and persona callers used to wait for the whole completion
+and then hunt for the object with regexes and brace counting, which broke
+on braces inside strings and could not act on any field before the last
+token. IncrementalJSONParser is fed text as it streams in:
+- Prose and code fences before the object are skipped; anything after
+  the object's closing brace is ignored
+- Each top-level field is emitted as soon as its value is complete (a
+  string at its closing quote, an object or array at its closing bracket,
+  a number or literal at the next delimiter)
+- Braces and brackets inside strings, and escaped quotes, do not confuse it
+- A malformed object is abandoned and scanning resumes at the next '{',
+  so a stray brace in the prose does not hide the real object
+
+Fields are checked one by one as they complete; callers validate the
+final object against their schema (coach_schemas).
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import json
+import re
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+_WHITESPACE = ' \t\r\n'
+_DECODER = json.JSONDecoder(strict=False)  # Models put raw newlines in strings
+
+FieldCallback = Callable[[str, Any], None]
+
+
+class IncompleteJSONError(ValueError):
+    """The text held no complete JSON object"""
+
+
+class IncrementalJSONParser:
+    """
+    Parser for the first JSON object in a stream of text chunks.
+    feed() returns the (key, value) top-level fields completed by that chunk
+    and passes each to on_field; result() returns the object.
+    """
+
+    def __init__(self, on_field: Optional[FieldCallback] = None):
+        self.on_field = on_field
+        self.restarts = 0  # Objects abandoned as malformed
+        self._buffer = ''
+        self._pos = 0
+        self.done = False
+        self._start_object(found=False)
+
+    def _start_object(self, found: bool):
+        self.fields: Dict[str, Any] = {}
+        self._found = found
+        self._stack: List[str] = ['{'] if found else []
+        self._in_string = False
+        self._state = 'key'  # key -> key_string -> colon -> value -> comma -> key ...
+        self._key: Optional[str] = None
+        self._mark: Optional[int] = None  # Start of the key or value being read
+        self._scalar = False  # Reading a number or literal, which ends at a delimiter
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        if self.done or not text:
+            return []
+        self._buffer += text
+        completed: List[Tuple[str, Any]] = []
+        while not self.done:
+            if not self._found and not self._find_object():
+                break
+            if not self._scan(completed):
+                break
+        return completed
+
+    def _find_object(self) -> bool:
+        start = self._buffer.find('{', self._pos)
+        if start == -1:
+            self._buffer, self._pos = '', 0  # Prose only; nothing to keep
+            return False
+        self._buffer = self._buffer[start:]
+        self._pos = 1
+        self._start_object(found=True)
+        return True
+
+    def _abandon(self):
+        # Malformed object: resume scanning just after its opening brace
+        self.restarts += 1
+        self._buffer = self._buffer[1:]
+        self._pos = 0
+        self._start_object(found=False)
+
+    def _scan(self, completed: List[Tuple[str, Any]]) -> bool:
+        """
+        Advance through the buffered text. Returns False when it is used up,
+        True when scanning should continue from a new object start.
+        """
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            if self._in_string:
+                match = _STRING_SPECIAL.search(buffer, i)
+                if match is None:
+                    i = len(buffer)
+                    break
+                i = match.start()
+                if buffer[i] == '\\':
+                    if i + 1 >= len(buffer):
+                        break  # Escape split across chunks; wait for the rest
+                    i += 2
+                    continue
+                self._in_string = False
+                if len(self._stack) == 1:
+                    if self._state == 'key_string':
+                        try:
+                            self._key = _DECODER.decode(buffer[self._mark:i + 1])
+                        except ValueError:
+                            self._abandon()
+                            return True
+                        self._state = 'colon'
+                    elif not self._emit(buffer[self._mark:i + 1], completed):
+                        return True
+                i += 1
+                continue
+
+            char = buffer[i]
+            depth = len(self._stack)
+            if char in _WHITESPACE:
+                pass
+            elif depth > 1:
+                # Inside a nested value; it is checked whole when it closes
+                if char == '"':
+                    self._in_string = True
+                elif char in '{[':
+                    self._stack.append(char)
+                elif char in '}]':
+                    if self._stack.pop() != ('{' if char == '}' else '['):
+                        self._abandon()
+                        return True
+                    if len(self._stack) == 1 and not self._emit(buffer[self._mark:i + 1], completed):
+                        return True
+            elif not self._top_level(char, i, completed):
+                return True
+            if self.done:
+                self._buffer, self._pos = '', 0
+                return False
+            i += 1
+        self._pos = i
+        return False
+
+    def _top_level(self, char: str, i: int, completed: List[Tuple[str, Any]]) -> bool:
+        """Handle one character between the root object's fields; False if the object was abandoned"""
+        state = self._state
+        if self._scalar and char in ',}':
+            self._scalar = False
+            if not self._emit(self._buffer[self._mark:i], completed):
+                return False
+            state = self._state
+        if char == '"' and state in ('key', 'value') and not self._scalar:
+            self._in_string = True
+            self._mark = i
+            self._state = 'key_string' if state == 'key' else 'value'
+        elif char in '{[' and state == 'value' and not self._scalar:
+            self._stack.append(char)
+            self._mark = i
+        elif char == ':' and state == 'colon':
+            self._state = 'value'
+        elif char == ',' and state == 'comma':
+            self._state = 'key'
+        elif char == '}' and state in ('key', 'comma'):
+            self._stack.pop()
+            self.done = True
+        elif state == 'value' and not self._scalar and (char == '-' or char.isdigit() or char in 'tfn'):
+            self._scalar = True
+            self._mark = i
+        elif not (self._scalar and char not in '"{[:'):
+            self._abandon()
+            return False
+        return True
+
+    def _emit(self, text: str, completed: List[Tuple[str, Any]]) -> bool:
+        try:
+            value = _DECODER.decode(text)
+        except ValueError:
+            self._abandon()
+            return False
+        self.fields[self._key] = value
+        self._state = 'comma'
+        completed.append((self._key, value))
+        if self.on_field is not None:
+            self.on_field(self._key, value)
+        return True
+
+    def result(self, partial: bool = False) -> Dict[str, Any]:
+        """
+        The parsed object. With partial=True, the fields completed so far of
+        an object the text stopped in the middle of.
+        """
+        if self.done or (partial and self._found):
+            return dict(self.fields)
+        if self._found:
+            raise IncompleteJSONError(f"JSON object truncated after {len(self.fields)} fields")
+        raise IncompleteJSONError("No JSON object found")
+
+
+def extract_json(text: str) -> Dict[str, Any]:
+    """The first complete JSON object in text, skipping prose and code fences around it"""
+    parser = IncrementalJSONParser()
+    parser.feed(text or '')
+    return parser.result()
+
+
+def parse_stream(chunks: Iterable[str], on_field: Optional[FieldCallback] = None,
+                 until: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Tuple[Dict[str, Any], bool]:
+    """
+    Parse streamed chunks, passing each completed field to on_field. Stops
+    reading - and closes the stream - once the object is complete or
+    until(fields) is true. Returns (fields, complete); fields are partial
+    when complete is False. Raises IncompleteJSONError if no object started.
+    """
+    parser = IncrementalJSONParser(on_field)
+    iterator = iter(chunks)
+    try:
+        for chunk in iterator:
+            if parser.feed(chunk) and until is not None and until(parser.fields):
+                return dict(parser.fields), parser.done
+            if parser.done:
+                break
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            close()
+    return parser.result(partial=True), parser.done
@@ -0,0 +1,348 @@
+"""
+Telemetry Ingest - Batched persistence for client call metrics and logs
+
+The /call-metrics, /log-websocket-message and /log-conversation-text
+endpoints validate their payload into compact rows and enqueue them; a
+background thread writes the queue to client_telemetry_events in
+batches, so requests never wait on the database. Aggregates (latency
+percentiles, reconnects) are computed per session from the table.
+
+The endpoints are rate limited per user (or client IP when anonymous)
+and the same thread deletes rows older than TELEMETRY_RETENTION_DAYS,
+so the table stays bounded.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from collections import deque
+from datetime import datetime, timedelta
+import atexit
+import json
+import logging
+import math
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import delete, insert, select
+
+from app.extensions import db
+from app.models import ClientTelemetryEvent
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH = 500  # Rows per insert
+FLUSH_INTERVAL = 1.0  # Seconds a row may wait in the queue
+MAX_QUEUE = 50000  # Rows held in memory before new ones are dropped
+MAX_PAYLOAD_BYTES = 16 * 1024  # Compact JSON per row
+MAX_EVENTS_PER_REQUEST = 200
+RETENTION_DAYS = 14  # Default for TELEMETRY_RETENTION_DAYS
+PURGE_INTERVAL = 600.0  # Seconds between retention sweeps
+PURGE_BATCH = 5000  # Rows per delete, so a sweep never holds long locks
+
+# Requests per client across all telemetry endpoints
+RATE_LIMIT = 120
+RATE_LIMIT_WINDOW = 60  # seconds
+
+# Client field names, in order of preference
+SESSION_FIELDS = ('sessionId', 'session_id')
+LATENCY_FIELDS = ('latencyMs', 'latency_ms', 'latency', 'responseLatencyMs', 'responseTime')
+RECONNECT_FIELDS = ('reconnectAttempts', 'reconnect_attempts', 'reconnects')
+
+# Column limits (see ClientTelemetryEvent)
+STRING_LIMITS = {'session_id': 100, 'event': 50, 'persona': 100, 'client_timestamp': 40}
+
+
+class TelemetryValidationError(ValueError):
+    """Payload does not fit the telemetry schema"""
+
+
+def _string(value: Any, column: str) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        value = value.get('name')  # e.g. persona: {name, role, company}
+        if value is None:
+            return None
+    if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+        raise TelemetryValidationError(f"{column} must be a string")
+    return str(value)[:STRING_LIMITS[column]]
+
+
+def _number(value: Any, field: str) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise TelemetryValidationError(f"{field} must be a finite number")
+    return float(value)
+
+
+def _first(data: Dict, fields) -> Any:
+    for field in fields:
+        if data.get(field) is not None:
+            return data[field]
+    return None
+
+
+def _payload(data: Dict) -> Optional[str]:
+    if not data:
+        return None
+    encoded = json.dumps(data, separators=(',', ':'), default=str)
+    if len(encoded) > MAX_PAYLOAD_BYTES:
+        raise TelemetryValidationError(f"payload exceeds {MAX_PAYLOAD_BYTES} bytes")
+    return encoded
+
+
+def _row(kind: str, data: Dict, user_id: Optional[int], event=None, persona=None,
+         session_id=None, extra: Optional[Dict] = None) -> Dict[str, Any]:
+    latency = _first(data, LATENCY_FIELDS)
+    reconnects = _first(data, RECONNECT_FIELDS)
+    return {
+        'received_at': datetime.utcnow(),
+        'kind': kind,
+        'session_id': _string(session_id if session_id is not None else _first(data, SESSION_FIELDS), 'session_id'),
+        'event': _string(event, 'event'),
+        'user_id': user_id,
+        'persona': _string(persona, 'persona'),
+        'client_timestamp': _string(data.get('timestamp'), 'client_timestamp'),
+        'latency_ms': _number(latency, 'latency'),
+        'reconnect_attempts': int(_number(reconnects, 'reconnectAttempts')) if reconnects is not None else None,
+        'payload': _payload(extra if extra is not None else data)
+    }
+
+
+def _require_object(data: Any) -> Dict:
+    if not isinstance(data, dict) or not data:
+        raise TelemetryValidationError("No data provided")
+    return data
+
+
+def call_metrics_rows(data: Any, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Rows for a /call-metrics payload. Accepts both client shapes:
+    {event, sessionId, personaName, timestamp, metrics?, persona?} and
+    {metrics: {sessionId, personaName, duration, ...}, events: [...]}.
+    """
+    data = _require_object(data)
+    metrics = {} if data.get('metrics') is None else data['metrics']
+    events = [] if data.get('events') is None else data['events']
+    if not isinstance(metrics, dict) or not isinstance(events, list):
+        raise TelemetryValidationError("metrics must be an object and events a list")
+    if len(events) > MAX_EVENTS_PER_REQUEST:
+        raise TelemetryValidationError(f"at most {MAX_EVENTS_PER_REQUEST} events per request")
+
+    session_id = _first(data, SESSION_FIELDS) or _first(metrics, SESSION_FIELDS)
+    persona = data.get('personaName') or metrics.get('personaName') or data.get('persona')
+    summary = {**metrics, **{k: v for k, v in data.items() if k not in ('metrics', 'events')}}
+    rows = [_row('call_metrics', summary, user_id, event=data.get('event'), persona=persona, session_id=session_id)]
+
+    for event in events:
+        if not isinstance(event, dict):
+            raise TelemetryValidationError("events must be objects")
+        rows.append(_row('call_event', event, user_id, event=event.get('type') or event.get('event'),
+                         persona=persona, session_id=_first(event, SESSION_FIELDS) or session_id))
+    return rows
+
+
+def websocket_message_row(data: Any, user_id: Optional[int] = None) -> Dict[str, Any]:
+    data = _require_object(data)
+    message = data.get('message', {})
+    return _row('websocket', message if isinstance(message, dict) else {}, user_id,
+                event=data.get('direction', 'UNKNOWN'), persona=data.get('persona'),
+                session_id=_first(data, SESSION_FIELDS), extra={'message': message, 'timestamp': data.get('timestamp')})
+
+
+def conversation_text_row(data: Any, user_id: Optional[int] = None) -> Dict[str, Any]:
+    data = _require_object(data)
+    text = data.get('text', '')
+    if not isinstance(text, str):
+        raise TelemetryValidationError("text must be a string")
+    return _row('transcript', {}, user_id, event=data.get('role', 'unknown'), persona=data.get('persona'),
+                session_id=_first(data, SESSION_FIELDS), extra={'text': text, 'timestamp': data.get('timestamp')})
+
+
+class DatabaseSink:
+    """Writes row batches to client_telemetry_events"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, rows: List[Dict[str, Any]]):
+        with self.app.app_context():
+            try:
+                db.session.execute(insert(ClientTelemetryEvent), rows)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                db.session.remove()
+
+    def purge(self, before: datetime) -> int:
+        """Delete rows received before a cutoff; returns rows deleted"""
+        deleted = 0
+        with self.app.app_context():
+            try:
+                while True:
+                    ids = select(ClientTelemetryEvent.id).where(
+                        ClientTelemetryEvent.received_at < before).limit(PURGE_BATCH)
+                    result = db.session.execute(delete(ClientTelemetryEvent).where(
+                        ClientTelemetryEvent.id.in_(ids.scalar_subquery())))
+                    db.session.commit()
+                    deleted += result.rowcount
+                    if result.rowcount < PURGE_BATCH:
+                        return deleted
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                db.session.remove()
+
+
+class TelemetryIngestor:
+    """
+    In-memory queue flushed to a sink in batches by a background thread.
+    With a retention period and a sink that has purge(), the same thread
+    deletes expired rows every purge_interval seconds.
+    """
+
+    def __init__(self, sink: Callable[[List[Dict[str, Any]]], None], batch_size: int = FLUSH_BATCH,
+                 flush_interval: float = FLUSH_INTERVAL, max_queue: int = MAX_QUEUE,
+                 retention: Optional[timedelta] = None, purge_interval: float = PURGE_INTERVAL):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.retention = retention
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+        self._queue = deque()
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()  # One writer at a time
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self.stats = {'enqueued': 0, 'dropped': 0, 'written': 0, 'batches': 0, 'failed': 0, 'purged': 0}
+
+    def enqueue(self, rows: List[Dict[str, Any]]) -> int:
+        """Queue rows for the next flush; returns how many were accepted"""
+        self._ensure_thread()
+        accepted = min(len(rows), max(0, self.max_queue - len(self._queue)))
+        self._queue.extend(rows[:accepted])
+        self.stats['enqueued'] += accepted
+        if accepted < len(rows):
+            self.stats['dropped'] += len(rows) - accepted
+            logger.warning(f"[Telemetry] Queue full, dropped {len(rows) - accepted} rows")
+        if len(self._queue) >= self.batch_size:
+            self._wake.set()
+        return accepted
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns rows written"""
+        written = 0
+        with self._flush_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.batch_size:
+                    batch.append(self._queue.popleft())
+                try:
+                    self.sink(batch)
+                except Exception as e:
+                    self.stats['failed'] += len(batch)
+                    logger.error(f"[Telemetry] Failed to write {len(batch)} rows: {e}")
+                    continue
+                written += len(batch)
+                self.stats['written'] += len(batch)
+                self.stats['batches'] += 1
+        return written
+
+    def purge(self, now: Optional[datetime] = None) -> int:
+        """Delete rows older than the retention period; returns rows deleted"""
+        purge = getattr(self.sink, 'purge', None)
+        if not self.retention or purge is None:
+            return 0
+        try:
+            deleted = purge((now or datetime.utcnow()) - self.retention)
+        except Exception as e:
+            logger.error(f"[Telemetry] Retention sweep failed: {e}")
+            return 0
+        self.stats['purged'] += deleted
+        if deleted:
+            logger.info(f"[Telemetry] Deleted {deleted} rows older than {self.retention.days} days")
+        return deleted
+
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name='telemetry-flush')
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            if self.retention and time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + self.purge_interval
+                self.purge()
+
+
+def _percentile(ordered: List[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def session_summary(session_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Event counts, latency percentiles and reconnects for one session,
+    from the rows the user recorded. None if the user has no rows for it.
+    """
+    rows = db.session.query(
+        ClientTelemetryEvent.kind, ClientTelemetryEvent.event,
+        ClientTelemetryEvent.latency_ms, ClientTelemetryEvent.reconnect_attempts
+    ).filter(ClientTelemetryEvent.session_id == session_id,
+             ClientTelemetryEvent.user_id == user_id).all()
+    if not rows:
+        return None
+
+    latencies = sorted(row.latency_ms for row in rows if row.latency_ms is not None)
+    events_by_kind: Dict[str, int] = {}
+    for row in rows:
+        events_by_kind[row.kind] = events_by_kind.get(row.kind, 0) + 1
+    reported = [row.reconnect_attempts for row in rows if row.reconnect_attempts is not None]
+    reconnect_events = sum(1 for row in rows if row.event and 'RECONNECT' in row.event.upper())
+
+    return {
+        'session_id': session_id,
+        'events': len(rows),
+        'events_by_kind': events_by_kind,
+        'latency_ms': {
+            'count': len(latencies),
+            'p50': _percentile(latencies, 50),
+            'p95': _percentile(latencies, 95),
+            'p99': _percentile(latencies, 99),
+            'max': latencies[-1] if latencies else None
+        },
+        # Clients report a running reconnect counter and/or discrete reconnect events
+        'reconnects': max(max(reported, default=0), reconnect_events)
+    }
+
+
+# Singleton instance
+_ingestor = None
+_ingestor_lock = threading.Lock()
+
+def get_telemetry_ingestor() -> TelemetryIngestor:
+    """Get singleton ingestor (call inside an app context the first time)"""
+    global _ingestor
+    if _ingestor is None:
+        with _ingestor_lock:
+            if _ingestor is None:
+                app = current_app._get_current_object()
+                days = app.config.get('TELEMETRY_RETENTION_DAYS', RETENTION_DAYS)
+                _ingestor = TelemetryIngestor(DatabaseSink(app), retention=timedelta(days=days) if days else None)
+                atexit.register(_ingestor.flush)
+    return _ingestor
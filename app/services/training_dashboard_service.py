@@ -0,0 +1,256 @@
+"""
+Training Dashboard Service - SQL-aggregated context for training.show_dashboard
+
+Builds the dashboard from a fixed number of aggregate queries instead of
+hydrating every TrainingSession:
+- Counts and averages in one GROUP-free aggregate over the user's sessions
+- First/latest scores via window functions (one row returned)
+- Recent sessions and chart points share one LIMITed query; streak days stop early
+
+Results are memoized per user profile and keyed by the user's metrics
+rollup version, so completing a session (in any worker) invalidates them.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+import logging
+import threading
+import time
+
+from sqlalchemy import case, func
+
+from app.extensions import db
+from app.models import TrainingSession
+from app.services.user_metrics_rollup import SKILL_FIELDS, get_user_rollup
+
+logger = logging.getLogger(__name__)
+
+LEVEL_THRESHOLDS = [0, 60, 75, 85, 95]  # Level 1 starts at 0, L2 at 60, etc.
+USER_TITLES = ["Rookie", "Apprentice", "Practitioner", "Expert", "Master"]
+RECENT_SESSIONS = 6  # Template lists 5 and shows "View All" when there are more
+CHART_POINTS = 50  # Most recent completed-session scores plotted
+CACHE_TTL = 60  # Seconds; covers changes that do not touch the rollup (new active sessions)
+CACHE_MAX_USERS = 1000
+
+SKILL_DISPLAY = {
+    'rapport': ('Rapport Building', 'fa-handshake'),
+    'discovery': ('Needs Discovery', 'fa-search'),
+    'presentation': ('Solution Presentation', 'fa-presentation'),
+    'objection_handling': ('Objection Handling', 'fa-shield-alt'),
+    'closing': ('Closing', 'fa-flag-checkered'),
+}
+
+
+@dataclass
+class SessionSummary:
+    """Columns the session history list renders"""
+    id: int
+    status: str
+    end_time: Optional[datetime]
+    overall_score: Optional[float] = None
+
+
+@dataclass
+class DashboardContext:
+    """Everything dashboard_super_minimal.html needs except the user"""
+    completed_sessions: int = 0
+    total_sessions: int = 0
+    current_score: float = 0
+    current_level: int = 1
+    current_title: str = "Rookie"
+    progress_to_next: float = 0
+    next_level_score: float = 60
+    growth_percentage: float = 0
+    avg_trust_score: float = 0
+    avg_persuasion_rating: float = 0
+    avg_confidence_score: float = 0
+    total_training_time: int = 0  # Seconds
+    session_streak: int = 0
+    chronological_scores: List[float] = field(default_factory=list)
+    sessions: List[SessionSummary] = field(default_factory=list)
+    skill_progression: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    most_improved_skill: Dict[str, Any] = field(default_factory=lambda: {'name': None, 'change': 0})
+    advanced_metrics: Dict[str, Any] = field(default_factory=dict)
+    journey_metrics: Dict[str, Any] = field(default_factory=dict)
+    trophy_data: Dict[str, int] = field(default_factory=lambda: {'count': 0, 'max_count': 8})
+
+    @property
+    def show_growth_path(self) -> bool:
+        return False
+
+    def to_template_context(self, user) -> Dict[str, Any]:
+        context = {f: getattr(self, f) for f in self.__dataclass_fields__}
+        context.update(user=user, show_growth_path=self.show_growth_path)
+        return context
+
+
+def level_for_score(score: float) -> Tuple[int, str, float, float]:
+    """(level, title, progress_to_next %, next_level_score)"""
+    level, title = 1, USER_TITLES[0]
+    progress, next_score = 0, LEVEL_THRESHOLDS[1]
+    for i, threshold in enumerate(LEVEL_THRESHOLDS):
+        if score < threshold:
+            break
+        level, title = i + 1, USER_TITLES[i]
+        if i + 1 < len(LEVEL_THRESHOLDS):
+            upper = LEVEL_THRESHOLDS[i + 1]
+            next_score = upper
+            progress = ((score - threshold) / (upper - threshold)) * 100 if upper > threshold else 0
+        else:
+            progress, next_score = 100, score  # Max level reached
+    return level, title, progress, next_score
+
+
+def build_dashboard_context(profile_id: int, today: Optional[date] = None) -> DashboardContext:
+    """Aggregate a user's sessions into a DashboardContext with a fixed number of queries"""
+    completed = TrainingSession.status == 'completed'
+    owned = TrainingSession.query.filter(TrainingSession.user_profile_id == profile_id)
+
+    # 1. Counts, averages and totals in one pass
+    totals = db.session.query(
+        func.count(TrainingSession.id),
+        func.sum(case((completed, 1), else_=0)),
+        func.avg(case((completed, TrainingSession.trust_score))),
+        func.avg(case((completed, TrainingSession.persuasion_rating))),
+        func.sum(case((completed, TrainingSession.session_length), else_=0)),
+    ).filter(TrainingSession.user_profile_id == profile_id).one()
+    total_sessions, completed_count, avg_trust, avg_persuasion, training_time = totals
+
+    context = DashboardContext(total_sessions=total_sessions or 0, completed_sessions=completed_count or 0)
+    if not context.completed_sessions:
+        return context
+
+    # 2. First and latest completed scores (window functions, a single row back)
+    oldest_first = TrainingSession.start_time.asc(), TrainingSession.id.asc()
+    newest_first = TrainingSession.start_time.desc(), TrainingSession.id.desc()
+    first_score, latest_score, latest_confidence = db.session.query(
+        func.first_value(TrainingSession.overall_score).over(order_by=oldest_first),
+        func.first_value(TrainingSession.overall_score).over(order_by=newest_first),
+        func.first_value(TrainingSession.confidence_score).over(order_by=newest_first),
+    ).filter(TrainingSession.user_profile_id == profile_id, completed).limit(1).one()
+
+    # 3. Newest completed sessions: chart points (oldest to newest) and the history list
+    recent = owned.filter(completed).order_by(*newest_first).with_entities(
+        TrainingSession.id, TrainingSession.status, TrainingSession.end_time, TrainingSession.overall_score
+    ).limit(max(CHART_POINTS, RECENT_SESSIONS)).all()
+
+    current_score = latest_score or 0
+    level, title, progress, next_score = level_for_score(current_score)
+    growth = 0
+    if context.completed_sessions > 1 and first_score:
+        growth = ((current_score - first_score) / first_score) * 100
+
+    context.current_score = current_score
+    context.current_level = level
+    context.current_title = title
+    context.progress_to_next = progress
+    context.next_level_score = next_score
+    context.growth_percentage = growth
+    context.avg_trust_score = avg_trust or 0
+    context.avg_persuasion_rating = avg_persuasion or 0
+    context.avg_confidence_score = latest_confidence or 0
+    context.total_training_time = int(training_time or 0)
+    context.chronological_scores = [r.overall_score or 0 for r in reversed(recent[:CHART_POINTS])]
+    context.sessions = [
+        SessionSummary(id=r.id, status=r.status, end_time=r.end_time, overall_score=r.overall_score)
+        for r in recent[:RECENT_SESSIONS]
+    ]
+    context.session_streak = _session_streak(profile_id, today or datetime.utcnow().date())
+    return context
+
+
+def _session_streak(profile_id: int, today: date) -> int:
+    """
+    Consecutive days with a completed session, ending today or yesterday.
+    Days stream newest first and iteration stops at the first gap, so
+    only streak-length rows are read.
+    """
+    day = func.date(TrainingSession.end_time)
+    days = db.session.query(day).filter(
+        TrainingSession.user_profile_id == profile_id,
+        TrainingSession.status == 'completed',
+        TrainingSession.end_time.isnot(None)
+    ).distinct().order_by(day.desc()).yield_per(64)
+
+    streak = 0
+    expected = today
+    for (value,) in days:
+        value = value if isinstance(value, date) else date.fromisoformat(str(value))
+        if value > today:
+            continue
+        if streak == 0 and value == today - timedelta(days=1):
+            expected = value  # Streak still alive if the last session was yesterday
+        if value != expected:
+            break
+        streak += 1
+        expected = value - timedelta(days=1)
+    return streak
+
+
+def _skill_progression(rollup) -> Dict[str, Dict[str, Any]]:
+    """Skill cards from the rolling averages in the user's metrics rollup"""
+    if rollup is None or not rollup.scored_sessions:
+        return {}
+    progression = {}
+    for skill, (column, _) in SKILL_FIELDS.items():
+        score = getattr(rollup, column)
+        if score is not None:
+            name, icon = SKILL_DISPLAY[skill]
+            progression[skill] = {'name': name, 'icon': icon, 'score': round(score, 1)}
+    return progression
+
+
+class DashboardCache:
+    """Per-user memo of DashboardContext, validated against the rollup version"""
+
+    def __init__(self, ttl: float = CACHE_TTL, max_users: int = CACHE_MAX_USERS):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._entries: 'OrderedDict[int, Tuple[Any, float, DashboardContext]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, profile_id: int) -> DashboardContext:
+        rollup = get_user_rollup(profile_id)
+        version = (rollup.sessions_count, rollup.scored_sessions, rollup.updated_at) if rollup else None
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(profile_id)
+            if entry and entry[0] == version and entry[1] > now:
+                self._entries.move_to_end(profile_id)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+
+        context = build_dashboard_context(profile_id)
+        context.skill_progression = _skill_progression(rollup)
+        with self._lock:
+            self._entries[profile_id] = (version, now + self.ttl, context)
+            self._entries.move_to_end(profile_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+        return context
+
+    def invalidate(self, profile_id: int):
+        with self._lock:
+            self._entries.pop(profile_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_dashboard_cache = DashboardCache()
+
+
+def get_dashboard_context(profile_id: int) -> DashboardContext:
+    """Memoized dashboard context for a user profile"""
+    return _dashboard_cache.get(profile_id)
+
+
+def invalidate_dashboard(profile_id: int):
+    """Drop this worker's memo for a user (other workers see the rollup change)"""
+    _dashboard_cache.invalidate(profile_id)
@@ -0,0 +1,324 @@
+"""
+TTS Cache - Content-addressed audio for phrases the prospect says again and again
+
+Fillers and brief acknowledgements (conversation_patterns) come from small
+fixed phrase sets and openers repeat, yet every one went through TTS
+synthesis again - fillers exist to hide latency and were adding their own.
+Synthesized audio is now cached by a hash of (voice, model, audio format,
+normalized text):
+- A memory tier (LRU, bounded by bytes) in front of a disk tier (LRU,
+  bounded by bytes; file mtimes carry the order across restarts)
+- A hit streams the stored audio in chunks straight away; a miss relays
+  the provider's chunks as they arrive and stores the audio once the
+  stream completes
+- Only short texts are stored, so one-off model responses do not push
+  the recurring phrases out
+- prewarm() synthesizes the known filler phrases for every configured
+  voice in the background; claim() lets one worker sharing the cache
+  directory do that for all of them
+- Hits and misses are counted in get_stats() and as the 'tts_cache_hit'
+  and 'tts_cache_miss' coach metrics
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+
+from app.services.coach_metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+CACHE_DIR = os.environ.get('TTS_CACHE_DIR', os.path.join(PROJECT_ROOT, 'instance', 'tts_cache'))
+DISK_BYTES = int(os.environ.get('TTS_CACHE_DISK_BYTES', str(256 * 1024 * 1024)))
+MEMORY_BYTES = int(os.environ.get('TTS_CACHE_MEMORY_BYTES', str(16 * 1024 * 1024)))
+MAX_TEXT_CHARS = int(os.environ.get('TTS_CACHE_MAX_CHARS', '200'))  # Longer texts are not stored
+PREWARM_WORKERS = 2
+STREAM_CHUNK_SIZE = 16 * 1024
+
+Synthesize = Callable[[], Tuple[str, Iterable[bytes]]]
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalized, whitespace-collapsed text; case and punctuation are kept, they change the audio"""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', text)).strip()
+
+
+def cache_key(voice: str, model: str, audio_format: str, text: str) -> str:
+    """Content address of one synthesized phrase"""
+    material = '\x1f'.join((voice, model, audio_format, normalize_text(text)))
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class TTSCache:
+    """Two-tier (memory, disk) LRU audio cache; thread-safe"""
+
+    def __init__(self, directory: str = CACHE_DIR, disk_bytes: int = DISK_BYTES, memory_bytes: int = MEMORY_BYTES,
+                 max_text_chars: int = MAX_TEXT_CHARS, executor: Optional[ThreadPoolExecutor] = None):
+        self.directory = directory
+        self.disk_bytes = disk_bytes
+        self.memory_bytes = memory_bytes
+        self.max_text_chars = max_text_chars
+        self._executor = executor
+        self._memory: 'OrderedDict[str, Tuple[str, bytes]]' = OrderedDict()
+        self._memory_size = 0
+        self._disk: 'OrderedDict[str, int]' = OrderedDict()  # key -> file size, least recent first
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0, 'prewarmed': 0}
+        self._load_index()
+
+    def cacheable(self, text: str) -> bool:
+        return 0 < len(normalize_text(text)) <= self.max_text_chars
+
+    # === LOOKUP ===
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        """(content type, audio) if cached, promoting disk hits to memory; does not count stats"""
+        return self._lookup(key)[0]
+
+    def _lookup(self, key: str) -> Tuple[Optional[Tuple[str, bytes]], Optional[str]]:
+        """The entry and the tier ('memory' or 'disk') it came from"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                return entry, 'memory'
+            on_disk = key in self._disk
+        if not on_disk:
+            return None, None
+        entry = self._read(key)
+        if entry is None:
+            return None, None
+        with self._lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            self._remember(key, entry)
+        return entry, 'disk'
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    def stream(self, key: str, text: str, synthesize: Synthesize) -> Tuple[str, Iterator[bytes]]:
+        """
+        Content type and audio chunks for text: from the cache when present,
+        else from synthesize() - relayed as it arrives and stored once complete
+        """
+        entry, tier = self._lookup(key)
+        if entry is not None:
+            self._count(f'{tier}_hits', 'tts_cache_hit')
+            content_type, audio = entry
+            return content_type, self._chunks(audio)
+        self._count('misses', 'tts_cache_miss')
+        content_type, chunks = synthesize()
+        if not self.cacheable(text):
+            return content_type, iter(chunks)
+        return content_type, self._tee(key, content_type, chunks)
+
+    @staticmethod
+    def _chunks(audio: bytes) -> Iterator[bytes]:
+        for start in range(0, len(audio), STREAM_CHUNK_SIZE):
+            yield audio[start:start + STREAM_CHUNK_SIZE]
+
+    def _tee(self, key: str, content_type: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        # Only reached when the stream completed; a client that disconnected early stores nothing
+        audio = b''.join(parts)
+        if audio:
+            self.put(key, content_type, audio)
+
+    # === STORAGE ===
+
+    def put(self, key: str, content_type: str, audio: bytes):
+        with self._lock:
+            self._remember(key, (content_type, audio))
+        self._write(key, content_type, audio)
+
+    def _remember(self, key: str, entry: Tuple[str, bytes]):
+        # Caller holds the lock
+        size = len(entry[1])
+        if size > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_size -= len(previous[1])
+        self._memory[key] = entry
+        self._memory_size += size
+        while self._memory_size > self.memory_bytes:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _write(self, key: str, content_type: str, audio: bytes):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content_type.encode('ascii') + b'\n')
+                f.write(audio)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            logger.warning(f"[TTSCache] Could not store {key[:12]}: {e}")
+            return
+        with self._lock:
+            self._disk_size += size - self._disk.pop(key, 0)
+            self._disk[key] = size
+            self.stats['stored'] += 1
+            evict = []
+            while self._disk_size > self.disk_bytes and len(self._disk) > 1:
+                old_key, old_size = self._disk.popitem(last=False)
+                self._disk_size -= old_size
+                evict.append(old_key)
+            self.stats['evicted'] += len(evict)
+        for old_key in evict:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def _read(self, key: str) -> Optional[Tuple[str, bytes]]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                content_type = f.readline().rstrip(b'\n').decode('ascii')
+                audio = f.read()
+            os.utime(path)  # Recency survives a restart
+        except OSError:
+            with self._lock:
+                self._disk_size -= self._disk.pop(key, 0)
+            return None
+        return content_type, audio
+
+    def _load_index(self):
+        """Index the disk tier, least recently used first"""
+        if not os.path.isdir(self.directory):
+            return
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith('.tmp-'):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_size += size
+        logger.info(f"[TTSCache] Indexed {len(self._disk)} cached phrases ({self._disk_size} bytes)")
+
+    # === PREWARMING ===
+
+    def claim(self, name: str) -> bool:
+        """
+        Atomically create marker `name` in the cache directory. True for the
+        one caller (across processes sharing the directory) that created it.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            os.close(os.open(os.path.join(self.directory, name), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return False
+        except OSError as e:
+            logger.warning(f"[TTSCache] Cannot claim {name}: {e}")
+            return False
+        return True
+
+    def release(self, name: str):
+        """Remove marker `name`, so the next claim() succeeds again"""
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"[TTSCache] Cannot release {name}: {e}")
+
+    def prewarm(self, items: Iterable[Tuple[str, str, Synthesize]], marker: Optional[str] = None):
+        """
+        Synthesize each (key, text, synthesize) not yet cached, on a background
+        worker. Returns the futures. If marker is given and every synthesis
+        fails, the marker is released so a later prewarm tries again.
+        """
+        pending = [(key, text, synthesize) for key, text, synthesize in items if key not in self]
+        if not pending:
+            return []
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=PREWARM_WORKERS, thread_name_prefix='tts-prewarm')
+        progress = {'left': len(pending), 'stored': 0}
+
+        def run(key: str, text: str, synthesize: Synthesize):
+            stored = False
+            try:
+                stored = self._prewarm_one(key, text, synthesize)
+            finally:
+                with self._lock:
+                    progress['left'] -= 1
+                    progress['stored'] += stored
+                    failed = progress['left'] == 0 and not progress['stored']
+                if failed and marker is not None:
+                    logger.warning(f"[TTSCache] Prewarm stored nothing; releasing {marker}")
+                    self.release(marker)
+
+        return [self._executor.submit(run, key, text, synthesize) for key, text, synthesize in pending]
+
+    def _prewarm_one(self, key: str, text: str, synthesize: Synthesize) -> bool:
+        """True once key is cached"""
+        if key in self:
+            return True
+        try:
+            content_type, chunks = synthesize()
+            audio = b''.join(chunks)
+        except Exception as e:
+            logger.warning(f"[TTSCache] Prewarm failed for '{text}': {e}")
+            return False
+        if not audio:
+            return False
+        self.put(key, content_type, audio)
+        with self._lock:
+            self.stats['prewarmed'] += 1
+        return True
+
+    # === STATS ===
+
+    def _count(self, stat: str, event: str):
+        with self._lock:
+            self.stats[stat] += 1
+        get_metrics().increment(event)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update(memory_entries=len(self._memory), memory_bytes=self._memory_size,
+                         disk_entries=len(self._disk), disk_bytes=self._disk_size)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+# Shared instance
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_tts_cache() -> TTSCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TTSCache()
+    return _cache
@@ -0,0 +1,189 @@
+"""
+User Metrics Rollup - One-row dashboard aggregates per user
+
+Keeps UserMetricsRollup current as sessions end and metrics are stored,
+so the dashboard reads a single row instead of every TrainingSession.
+- record_session_end(): session count, duration, message counts
+- record_session_metrics(): rolling (EMA) skill averages
+- rebuild_user_metrics(): recompute from scratch (backfill / repair)
+
+Incremental updates are SQL increments on the row and are only added to
+the caller's db.session; the caller's commit makes them part of the same
+transaction as the session change.
+"""
+from typing import Dict, Optional, Tuple
+from datetime import datetime
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import PerformanceMetrics, TrainingSession, UserMetricsRollup
+
+logger = logging.getLogger(__name__)
+
+# Dashboard skill -> (rollup column, PerformanceMetrics field)
+SKILL_FIELDS = {
+    'rapport': ('rapport_avg', 'rapport_building'),
+    'discovery': ('discovery_avg', 'needs_discovery'),
+    'presentation': ('presentation_avg', 'product_knowledge'),
+    'objection_handling': ('objection_handling_avg', 'objection_handling'),
+    'closing': ('closing_avg', 'closing_techniques'),
+}
+SKILL_EMA_ALPHA = 0.2  # Weight of the newest scored session in rolling averages
+
+
+def rollup_user_id(session: TrainingSession) -> Optional[int]:
+    """Owner key used by the dashboard queries (user_profile_id is an alias)"""
+    return session.user_id or session.user_profile_id
+
+
+def session_duration(session: TrainingSession) -> float:
+    if session.end_time and session.start_time:
+        return max(0.0, (session.end_time - session.start_time).total_seconds())
+    return float(session.session_length or 0)
+
+
+def message_counts(session: TrainingSession) -> Tuple[int, int]:
+    """(user, assistant) message counts from the session's conversation log"""
+    user_count = ai_count = 0
+    for message in session.conversation:
+        role = message.get('role') if isinstance(message, dict) else None
+        if role == 'user':
+            user_count += 1
+        elif role == 'assistant':
+            ai_count += 1
+    return user_count, ai_count
+
+
+def skill_scores(metrics: PerformanceMetrics) -> Dict[str, float]:
+    """Dashboard skills on a 0-100 scale (stored ratings may be 1-10 or 0-100)"""
+    scores = {}
+    for skill, (_, field) in SKILL_FIELDS.items():
+        value = getattr(metrics, field, None)
+        if value is not None:
+            scores[skill] = float(value) * 10 if value <= 10 else float(value)
+    return scores
+
+
+def _get_or_create(user_id: int) -> UserMetricsRollup:
+    """Persistent rollup row (flushed, so SQL increments can target it)"""
+    rollup = db.session.get(UserMetricsRollup, user_id)
+    if rollup is not None:
+        return rollup
+    try:
+        with db.session.begin_nested():
+            rollup = UserMetricsRollup(
+                user_id=user_id, sessions_count=0, total_duration_seconds=0.0,
+                user_message_count=0, ai_message_count=0, scored_sessions=0
+            )
+            db.session.add(rollup)
+    except IntegrityError:
+        # Another worker created it first
+        rollup = db.session.get(UserMetricsRollup, user_id)
+    return rollup
+
+
+def _ema(column, value: float):
+    """SQL expression: rolling average updated in place by the database"""
+    current = func.coalesce(column, value)
+    return current + SKILL_EMA_ALPHA * (value - current)
+
+
+def record_session_end(session: TrainingSession) -> None:
+    """Add a just-completed session to its owner's rollup (caller commits)"""
+    user_id = rollup_user_id(session)
+    if not user_id:
+        return
+    user_count, ai_count = message_counts(session)
+    rollup = _get_or_create(user_id)
+    rollup.sessions_count = UserMetricsRollup.sessions_count + 1
+    rollup.total_duration_seconds = UserMetricsRollup.total_duration_seconds + session_duration(session)
+    rollup.user_message_count = UserMetricsRollup.user_message_count + user_count
+    rollup.ai_message_count = UserMetricsRollup.ai_message_count + ai_count
+    rollup.last_session_at = session.end_time or datetime.utcnow()
+
+
+def record_session_metrics(metrics: PerformanceMetrics, session: TrainingSession) -> None:
+    """Fold a session's newly stored skill ratings into the rolling averages (caller commits)"""
+    user_id = rollup_user_id(session)
+    scores = skill_scores(metrics)
+    if not user_id or not scores:
+        return
+    rollup = _get_or_create(user_id)
+    for skill, score in scores.items():
+        column = SKILL_FIELDS[skill][0]
+        setattr(rollup, column, _ema(getattr(UserMetricsRollup, column), score))
+    rollup.overall_avg = _ema(UserMetricsRollup.overall_avg, sum(scores.values()) / len(scores))
+    rollup.scored_sessions = UserMetricsRollup.scored_sessions + 1
+
+
+def rebuild_user_metrics(user_id: Optional[int] = None, batch_size: int = 500) -> int:
+    """
+    Recompute rollups from TrainingSession and PerformanceMetrics rows.
+    Applies the same arithmetic as the incremental path, in session order.
+    Returns the number of rollup rows written.
+    """
+    owner = func.coalesce(TrainingSession.user_id, TrainingSession.user_profile_id)
+    rollups: Dict[int, UserMetricsRollup] = {}
+
+    def rollup_for(uid: int) -> UserMetricsRollup:
+        if uid not in rollups:
+            rollups[uid] = UserMetricsRollup(
+                user_id=uid, sessions_count=0, total_duration_seconds=0.0,
+                user_message_count=0, ai_message_count=0, scored_sessions=0
+            )
+        return rollups[uid]
+
+    sessions = TrainingSession.query.filter(TrainingSession.end_time.isnot(None), owner.isnot(None))
+    if user_id is not None:
+        sessions = sessions.filter(owner == user_id)
+    for session in sessions.order_by(TrainingSession.end_time, TrainingSession.id).yield_per(batch_size):
+        rollup = rollup_for(rollup_user_id(session))
+        user_count, ai_count = message_counts(session)
+        rollup.sessions_count += 1
+        rollup.total_duration_seconds += session_duration(session)
+        rollup.user_message_count += user_count
+        rollup.ai_message_count += ai_count
+        rollup.last_session_at = session.end_time
+
+    scored = db.session.query(PerformanceMetrics, TrainingSession).join(
+        TrainingSession, PerformanceMetrics.training_session_id == TrainingSession.id
+    ).filter(owner.isnot(None))
+    if user_id is not None:
+        scored = scored.filter(owner == user_id)
+    for metrics, session in scored.order_by(PerformanceMetrics.id).yield_per(batch_size):
+        scores = skill_scores(metrics)
+        if not scores:
+            continue
+        rollup = rollup_for(rollup_user_id(session))
+        for skill, score in scores.items():
+            column = SKILL_FIELDS[skill][0]
+            setattr(rollup, column, _ema_value(getattr(rollup, column), score))
+        rollup.overall_avg = _ema_value(rollup.overall_avg, sum(scores.values()) / len(scores))
+        rollup.scored_sessions += 1
+
+    existing = UserMetricsRollup.query
+    if user_id is not None:
+        rollup_for(user_id)  # Users without sessions still get a (zero) row
+        existing = existing.filter_by(user_id=user_id)
+    existing.delete()
+    db.session.add_all(rollups.values())
+    db.session.commit()
+    logger.info(f"[MetricsRollup] Rebuilt {len(rollups)} user rollups")
+    return len(rollups)
+
+
+def _ema_value(current: Optional[float], value: float) -> float:
+    current = value if current is None else current
+    return current + SKILL_EMA_ALPHA * (value - current)
+
+
+def get_user_rollup(user_id: int) -> UserMetricsRollup:
+    """The user's rollup row, built on first access if the backfill has not run"""
+    rollup = db.session.get(UserMetricsRollup, user_id)
+    if rollup is None:
+        rebuild_user_metrics(user_id)
+        rollup = db.session.get(UserMetricsRollup, user_id)
+    return rollup
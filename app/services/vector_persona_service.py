@@ -16,6 +16,8 @@ from openai import OpenAI
 from flask import current_app
 import requests
 
+from app.services.llm_admission import Priority, llm_admission
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -252,14 +254,15 @@ class VectorPersonaService:
             persona_prompt = self._format_persona_prompt(sales_info)
             
             # Generate the persona using GPT-4.1-mini
-            response = self.client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=[
-                    {"role": "system", "content": "You are an AI that creates detailed sales coach personas."},
-                    {"role": "user", "content": persona_prompt}
-                ],
-                temperature=0.7,
-            )
+            with llm_admission(Priority.BACKGROUND):
+                response = self.client.chat.completions.create(
+                    model="gpt-4.1-mini",
+                    messages=[
+                        {"role": "system", "content": "You are an AI that creates detailed sales coach personas."},
+                        {"role": "user", "content": persona_prompt}
+                    ],
+                    temperature=0.7,
+                )
             
             persona_text = response.choices[0].message.content
             
@@ -335,11 +338,12 @@ class VectorPersonaService:
             
             # Generate the response
             messages = [system_message] + formatted_history
-            response = self.client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=messages,
-                temperature=0.7,
-            )
+            with llm_admission():
+                response = self.client.chat.completions.create(
+                    model="gpt-4.1-mini",
+                    messages=messages,
+                    temperature=0.7,
+                )
             
             return response.choices[0].message.content
             
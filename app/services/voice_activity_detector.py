@@ -0,0 +1,360 @@
+"""
+Voice Activity Detector - Streaming silence trimming before STT
+
+Energy + spectral-flatness VAD over 16 kHz mono s16le PCM.
+- Processes audio in fixed frames as chunks arrive (streaming)
+- Drops leading/trailing silence, compresses long internal pauses
+- Emits speech_start / speech_end / endpoint events
+- Records trimmed duration and pause statistics per turn
+
+Endpoint events fire once the speaker has been silent for
+endpoint_silence_ms and can be used to complete a turn early.
+"""
+from typing import Callable, Dict, List, Optional
+from dataclasses import dataclass, field
+import logging
+import os
+import subprocess
+import tempfile
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_WIDTH = 2  # s16le
+
+
+@dataclass
+class VADConfig:
+    """Tuning knobs for the detector (defaults suit 16 kHz telephony speech)"""
+    sample_rate: int = 16000
+    frame_ms: int = 20
+    energy_threshold_db: float = -45.0  # Absolute floor: quieter frames are never speech
+    noise_margin_db: float = 10.0  # Speech must exceed the adaptive noise floor by this
+    flatness_max: float = 0.45  # Spectral flatness above this looks like broadband noise
+    min_speech_ms: int = 60  # Speech run needed before speech_start fires
+    hangover_ms: int = 200  # Silence tolerated before a segment is closed
+    endpoint_silence_ms: int = 700  # Silence after speech that signals end of turn
+    max_pause_ms: int = 300  # Internal pauses are compressed to at most this
+    pad_ms: int = 100  # Silence kept before the first and after the last speech frame
+    min_pause_ms: int = 250  # Shorter gaps are not counted as pauses
+
+    @property
+    def frame_samples(self) -> int:
+        return self.sample_rate * self.frame_ms // 1000
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.frame_samples * SAMPLE_WIDTH
+
+    def frames(self, ms: int) -> int:
+        """Convert a duration to a whole number of frames"""
+        return max(0, -(-ms // self.frame_ms))
+
+
+@dataclass
+class VADEvent:
+    """Endpointing event emitted while streaming"""
+    type: str  # 'speech_start', 'speech_end' or 'endpoint'
+    timestamp_ms: int
+
+
+@dataclass
+class VADResult:
+    """Trimmed audio plus per-turn statistics"""
+    audio: bytes
+    original_ms: int
+    trimmed_ms: int
+    speech_ms: int
+    segments: List[Dict[str, int]] = field(default_factory=list)
+    pauses_ms: List[int] = field(default_factory=list)
+    events: List[VADEvent] = field(default_factory=list)
+
+    @property
+    def has_speech(self) -> bool:
+        return bool(self.segments)
+
+    def pause_stats(self) -> Dict:
+        """Pause statistics in the shape VoiceAnalysisService reports"""
+        pauses = self.pauses_ms
+        return {
+            'pause_count': len(pauses),
+            'total_pause_ms': sum(pauses),
+            'mean_pause_ms': round(sum(pauses) / len(pauses), 1) if pauses else 0.0,
+            'max_pause_ms': max(pauses) if pauses else 0,
+            'speech_ms': self.speech_ms,
+            'speech_ratio': round(self.speech_ms / self.original_ms, 3) if self.original_ms else 0.0
+        }
+
+    def to_dict(self) -> Dict:
+        """Summary for logging and turn metrics (audio excluded)"""
+        return {
+            'original_ms': self.original_ms,
+            'trimmed_ms': self.trimmed_ms,
+            'removed_ms': self.original_ms - self.trimmed_ms,
+            'segments': self.segments,
+            'pauses': self.pause_stats()
+        }
+
+
+class VoiceActivityDetector:
+    """
+    Streaming VAD. Feed PCM with process(), then call finish() for the
+    trimmed turn. Instances are per-turn and not thread-safe.
+    """
+
+    def __init__(
+        self,
+        config: Optional[VADConfig] = None,
+        on_event: Optional[Callable[[VADEvent], None]] = None
+    ):
+        self.config = config or VADConfig()
+        self.on_event = on_event
+
+        cfg = self.config
+        self._min_speech_frames = max(1, cfg.frames(cfg.min_speech_ms))
+        self._hangover_frames = cfg.frames(cfg.hangover_ms)
+        self._endpoint_frames = cfg.frames(cfg.endpoint_silence_ms)
+        self._max_pause_frames = cfg.max_pause_ms // cfg.frame_ms  # Rounded down so a pause never exceeds it
+        self._pad_frames = cfg.frames(cfg.pad_ms)
+        self._window = np.hanning(cfg.frame_samples).astype(np.float32)
+
+        self._remainder = b''
+        self._frame_index = 0
+        self._noise_floor_db = cfg.energy_threshold_db - cfg.noise_margin_db
+
+        # Output: kept frames, and how many trailing kept frames are silence
+        self._kept: List[bytes] = []
+        self._trailing_silence_kept = 0
+
+        # Pre-roll of recent silent frames, emitted as padding on speech start
+        self._preroll: List[bytes] = []
+        self._candidate: List[bytes] = []  # Speech frames not yet confirmed
+
+        self._in_speech = False
+        self._segment_start: Optional[int] = None
+        self._last_speech_frame: Optional[int] = None
+        self._silence_run = 0
+        self._endpoint_sent = False
+
+        self.segments: List[Dict[str, int]] = []
+        self.pauses_ms: List[int] = []
+        self.events: List[VADEvent] = []
+
+    # ------------------------------------------------------------------
+    # Streaming API
+    # ------------------------------------------------------------------
+
+    def process(self, pcm: bytes) -> List[VADEvent]:
+        """Consume a PCM chunk; returns events raised by this chunk"""
+        data = self._remainder + pcm
+        frame_bytes = self.config.frame_bytes
+        usable = len(data) - (len(data) % frame_bytes)
+        self._remainder = data[usable:]
+        if not usable:
+            return []
+
+        raw = data[:usable]
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+        frames = samples.reshape(-1, self.config.frame_samples)
+        energies_db, flatness = self._frame_features(frames)
+
+        new_events: List[VADEvent] = []
+        for i in range(frames.shape[0]):
+            frame = raw[i * frame_bytes:(i + 1) * frame_bytes]
+            is_speech = self._classify(float(energies_db[i]), float(flatness[i]))
+            new_events.extend(self._advance(frame, is_speech))
+            self._frame_index += 1
+
+        return new_events
+
+    def finish(self) -> VADResult:
+        """Close the stream and return the trimmed turn"""
+        cfg = self.config
+        if self._remainder:
+            # Pad the partial tail so it is classified like any other frame
+            self.process(b'\x00' * (cfg.frame_bytes - len(self._remainder)))
+
+        if self._in_speech:
+            self._close_segment()
+            self._emit('speech_end', self._last_speech_frame + 1)
+
+        # Drop trailing silence beyond the pad
+        excess = self._trailing_silence_kept - self._pad_frames
+        if excess > 0:
+            del self._kept[-excess:]
+
+        audio = b''.join(self._kept) if self.segments else b''
+        speech_ms = sum(s['end_ms'] - s['start_ms'] for s in self.segments)
+
+        return VADResult(
+            audio=audio,
+            original_ms=self._frame_index * cfg.frame_ms,
+            trimmed_ms=len(audio) // cfg.frame_bytes * cfg.frame_ms,
+            speech_ms=speech_ms,
+            segments=list(self.segments),
+            pauses_ms=list(self.pauses_ms),
+            events=list(self.events)
+        )
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _frame_features(self, frames: np.ndarray):
+        """Vectorized per-frame energy (dBFS) and spectral flatness"""
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        energies_db = 20.0 * np.log10(rms + 1e-10)
+
+        power = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return energies_db, flatness
+
+    def _classify(self, energy_db: float, flatness: float) -> bool:
+        cfg = self.config
+        threshold = max(cfg.energy_threshold_db, self._noise_floor_db + cfg.noise_margin_db)
+        is_speech = energy_db > threshold and flatness < cfg.flatness_max
+
+        if not is_speech:
+            # Track the noise floor on non-speech frames only
+            self._noise_floor_db = 0.95 * self._noise_floor_db + 0.05 * energy_db
+        return is_speech
+
+    def _emit(self, event_type: str, frame_index: int) -> VADEvent:
+        event = VADEvent(type=event_type, timestamp_ms=frame_index * self.config.frame_ms)
+        self.events.append(event)
+        if self.on_event:
+            try:
+                self.on_event(event)
+            except Exception as e:
+                logger.warning(f"[VAD] Event callback failed: {e}")
+        return event
+
+    def _keep(self, frame: bytes, silent: bool):
+        self._kept.append(frame)
+        self._trailing_silence_kept = self._trailing_silence_kept + 1 if silent else 0
+
+    def _advance(self, frame: bytes, is_speech: bool) -> List[VADEvent]:
+        events = []
+        idx = self._frame_index
+
+        if is_speech:
+            if not self._in_speech:
+                self._candidate.append(frame)
+                if len(self._candidate) < self._min_speech_frames:
+                    return events
+
+                # Confirmed: start a new segment
+                start = idx - len(self._candidate) + 1
+                if self._last_speech_frame is not None:
+                    gap_ms = (start - self._last_speech_frame - 1) * self.config.frame_ms
+                    if gap_ms >= self.config.min_pause_ms:
+                        self.pauses_ms.append(gap_ms)
+
+                pad_frames = self._pad_frames
+                if self._last_speech_frame is not None:
+                    # The pad is part of the compressed pause, which already kept some silence
+                    pad_frames = min(pad_frames, max(0, self._max_pause_frames - self._trailing_silence_kept))
+                for pad in self._preroll[-pad_frames:] if pad_frames else []:
+                    self._keep(pad, silent=True)
+                for speech_frame in self._candidate:
+                    self._keep(speech_frame, silent=False)
+
+                self._preroll = []
+                self._candidate = []
+                self._in_speech = True
+                self._segment_start = start
+                self._endpoint_sent = False
+                events.append(self._emit('speech_start', start))
+            else:
+                self._keep(frame, silent=False)
+
+            self._last_speech_frame = idx
+            self._silence_run = 0
+            return events
+
+        # Silent frame; a speech run too short to confirm counts as silence too
+        pending, self._candidate = self._candidate, []
+        for silent_frame in pending + [frame]:
+            events.extend(self._advance_silence(silent_frame, idx))
+        return events
+
+    def _advance_silence(self, frame: bytes, idx: int) -> List[VADEvent]:
+        events = []
+        self._silence_run += 1
+
+        if self._in_speech:
+            if self._silence_run <= self._max_pause_frames:
+                self._keep(frame, silent=True)
+            if self._silence_run > self._hangover_frames:
+                self._close_segment()
+                events.append(self._emit('speech_end', self._last_speech_frame + 1))
+            return events
+
+        # Outside speech: keep a compressed pause, remember recent silence for padding
+        if self._last_speech_frame is not None and self._silence_run <= self._max_pause_frames:
+            self._keep(frame, silent=True)
+        else:
+            self._preroll.append(frame)
+            if len(self._preroll) > self._pad_frames:
+                self._preroll.pop(0)
+
+        if (
+            self._last_speech_frame is not None
+            and not self._endpoint_sent
+            and self._silence_run >= self._endpoint_frames
+        ):
+            self._endpoint_sent = True
+            events.append(self._emit('endpoint', idx + 1))
+        return events
+
+    def _close_segment(self):
+        self.segments.append({
+            'start_ms': self._segment_start * self.config.frame_ms,
+            'end_ms': (self._last_speech_frame + 1) * self.config.frame_ms
+        })
+        self._in_speech = False
+        self._segment_start = None
+
+
+def trim_silence(pcm: bytes, config: Optional[VADConfig] = None) -> VADResult:
+    """Run the detector over a complete PCM buffer"""
+    vad = VoiceActivityDetector(config)
+    vad.process(pcm)
+    return vad.finish()
+
+
+def decode_to_pcm16k(audio_bytes: bytes, suffix: str = '.webm') -> Optional[bytes]:
+    """Decode compressed audio to 16 kHz mono s16le via ffmpeg; None on failure"""
+    input_path = output_path = None
+    try:
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as input_file:
+            input_file.write(audio_bytes)
+            input_path = input_file.name
+        with tempfile.NamedTemporaryFile(suffix='.pcm', delete=False) as output_file:
+            output_path = output_file.name
+
+        cmd = [
+            'ffmpeg', '-i', input_path,
+            '-f', 's16le', '-ar', '16000', '-ac', '1',
+            '-y', output_path
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            logger.warning(f"[VAD] ffmpeg decode failed: {result.stderr[-200:]}")
+            return None
+
+        with open(output_path, 'rb') as f:
+            return f.read()
+
+    except Exception as e:
+        logger.warning(f"[VAD] Audio decode failed: {e}")
+        return None
+
+    finally:
+        for path in (input_path, output_path):
+            if path:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
@@ -395,6 +395,31 @@ class VoiceAnalysisService:
             # Fall back to basic analysis
             return self.analyze_audio_tone(audio_path, transcript)
 
+    def analyze_pauses(self, pcm_audio, vad_config=None):
+        """
+        Pause statistics from raw 16 kHz mono PCM using the streaming VAD.
+        
+        Args:
+            pcm_audio (bytes): s16le PCM audio
+            vad_config (VADConfig, optional): Detector tuning
+            
+        Returns:
+            dict: Pause count/durations, speech ratio and trimmed duration
+        """
+        try:
+            from app.services.voice_activity_detector import trim_silence
+            
+            vad = trim_silence(pcm_audio, vad_config)
+            stats = vad.pause_stats()
+            stats["original_ms"] = vad.original_ms
+            stats["trimmed_ms"] = vad.trimmed_ms
+            stats["segments"] = len(vad.segments)
+            return stats
+            
+        except Exception as e:
+            self.logger.error(f"Error analyzing pauses: {str(e)}")
+            return {"error": f"Failed to analyze pauses: {str(e)}"}
+    
     def detect_key_moments(self, audio_path, transcript):
         """
         Detect key moments in the audio based on the transcript.
@@ -0,0 +1,184 @@
+"""
+Voice Session Registry - Live dual-voice session state, local or shared
+
+Holds what DualVoiceAgentService needs between requests:
+- Session fields (state, config, ids) as JSON-safe values
+- Append-only lists per session (conversation log, interventions, snippets)
+
+SessionRegistry keeps everything in process. SharedSessionRegistry keeps
+it in a Redis-protocol store so any worker can serve any session; each
+session is a hash of JSON fields plus one list per appended collection,
+expiring after `ttl` seconds without writes.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+import json
+import logging
+import threading
+import time
+
+from app.utils.redis_client import RedisClient, get_shared_client
+
+logger = logging.getLogger(__name__)
+
+SESSION_TTL = 6 * 3600  # Seconds without activity before a session is dropped
+SESSION_LISTS = ('conversation_log', 'coaching_interventions', 'recording_snippets')
+
+
+class SessionRegistry:
+    """In-process registry; thread-safe"""
+
+    def __init__(self, ttl: int = SESSION_TTL):
+        self.ttl = ttl
+        self._fields: Dict[str, Dict[str, Any]] = {}
+        self._lists: Dict[str, Dict[str, List[Any]]] = {}
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def create(self, session_id: str, fields: Dict[str, Any]):
+        with self._lock:
+            self._purge()
+            self._fields[session_id] = dict(fields)
+            self._lists[session_id] = {}
+            self._touched[session_id] = time.time()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Copy of the session's fields, or None if unknown/expired"""
+        with self._lock:
+            if not self._live(session_id):
+                return None
+            return dict(self._fields[session_id])
+
+    def update(self, session_id: str, **fields) -> bool:
+        with self._lock:
+            if not self._live(session_id):
+                return False
+            self._fields[session_id].update(fields)
+            self._touched[session_id] = time.time()
+            return True
+
+    def append(self, session_id: str, name: str, item: Any) -> int:
+        """Append to one of the session's lists; returns the new length (0 if unknown)"""
+        with self._lock:
+            if not self._live(session_id):
+                return 0
+            items = self._lists[session_id].setdefault(name, [])
+            items.append(item)
+            self._touched[session_id] = time.time()
+            return len(items)
+
+    def items(self, session_id: str, name: str, start: int = 0) -> List[Any]:
+        """List contents from `start` (negative counts from the end)"""
+        with self._lock:
+            if not self._live(session_id):
+                return []
+            return list(self._lists[session_id].get(name, [])[start:])
+
+    def length(self, session_id: str, name: str) -> int:
+        with self._lock:
+            return len(self._lists.get(session_id, {}).get(name, []))
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._drop(session_id)
+
+    def count(self) -> int:
+        with self._lock:
+            self._purge()
+            return len(self._fields)
+
+    def _live(self, session_id: str) -> bool:
+        touched = self._touched.get(session_id)
+        if touched is None:
+            return False
+        if time.time() - touched > self.ttl:
+            self._drop(session_id)
+            return False
+        return True
+
+    def _drop(self, session_id: str):
+        self._fields.pop(session_id, None)
+        self._lists.pop(session_id, None)
+        self._touched.pop(session_id, None)
+
+    def _purge(self):
+        cutoff = time.time() - self.ttl
+        for session_id in [sid for sid, touched in self._touched.items() if touched < cutoff]:
+            self._drop(session_id)
+
+
+class SharedSessionRegistry:
+    """Registry in a Redis-protocol store, shared by all workers"""
+
+    def __init__(self, client: RedisClient, prefix: str = 'dual_voice', ttl: int = SESSION_TTL,
+                 lists: Sequence[str] = SESSION_LISTS):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.lists = tuple(lists)  # List names removed with the session
+
+    def _key(self, session_id: str, name: Optional[str] = None) -> str:
+        return f"{self.prefix}:{session_id}" + (f":{name}" if name else '')
+
+    @property
+    def _index(self) -> str:
+        return f"{self.prefix}:active"
+
+    def create(self, session_id: str, fields: Dict[str, Any]):
+        key = self._key(session_id)
+        self.client.execute('DEL', key)
+        self.client.execute('HSET', key, *self._encode(fields))
+        self.client.execute('EXPIRE', key, self.ttl)
+        self.client.execute('SADD', self._index, session_id)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        flat = self.client.execute('HGETALL', self._key(session_id))
+        if not flat:
+            return None
+        return {field: json.loads(value) for field, value in zip(flat[0::2], flat[1::2])}
+
+    def update(self, session_id: str, **fields) -> bool:
+        key = self._key(session_id)
+        if not self.client.execute('EXISTS', key):
+            return False
+        self.client.execute('HSET', key, *self._encode(fields))
+        self.client.execute('EXPIRE', key, self.ttl)
+        return True
+
+    def append(self, session_id: str, name: str, item: Any) -> int:
+        if not self.client.execute('EXISTS', self._key(session_id)):
+            return 0
+        key = self._key(session_id, name)
+        length = self.client.execute('RPUSH', key, json.dumps(item, default=str))
+        self.client.execute('EXPIRE', key, self.ttl)
+        self.client.execute('EXPIRE', self._key(session_id), self.ttl)
+        return length
+
+    def items(self, session_id: str, name: str, start: int = 0) -> List[Any]:
+        return [json.loads(item) for item in self.client.execute('LRANGE', self._key(session_id, name), start, -1) or []]
+
+    def length(self, session_id: str, name: str) -> int:
+        return self.client.execute('LLEN', self._key(session_id, name))
+
+    def delete(self, session_id: str):
+        self.client.execute('DEL', self._key(session_id), *(self._key(session_id, name) for name in self.lists))
+        self.client.execute('SREM', self._index, session_id)
+
+    def count(self) -> int:
+        """Sessions created and not deleted (includes sessions that expired unended)"""
+        return self.client.execute('SCARD', self._index)
+
+    @staticmethod
+    def _encode(fields: Dict[str, Any]) -> List[str]:
+        flat = []
+        for field, value in fields.items():
+            flat.extend((field, json.dumps(value, default=str)))
+        return flat
+
+
+def create_session_registry(prefix: str = 'dual_voice', ttl: int = SESSION_TTL):
+    """Shared registry when SHARED_STATE_URL is configured, else in-process"""
+    client = get_shared_client()
+    if client is None:
+        return SessionRegistry(ttl=ttl)
+    logger.info(f"[VoiceSessions] Using shared session registry '{prefix}'")
+    return SharedSessionRegistry(client, prefix=prefix, ttl=ttl)
@@ -24,6 +24,8 @@ import traceback
 from app.training import services as training_services
 from sqlalchemy.orm import joinedload
 from app.services.gpt4o_service import get_gpt4o_service
+from app.services.user_metrics_rollup import record_session_end
+from app.services.training_dashboard_service import DashboardContext, get_dashboard_context, invalidate_dashboard
 from app.extensions import csrf
 
 # Initialize logger
@@ -46,150 +48,24 @@ def show_dashboard():
     try:
         current_app.logger.info(f"User {current_user.id} accessing dashboard")
 
-        # 1. Initial checks (Profile, Session Query)
+        # 1. Initial checks (Profile)
         if not hasattr(current_user, 'profile') or not current_user.profile:
             flash("Please complete your profile to access the dashboard.", "info")
             return redirect(url_for('training.onboarding'))
-        try:
-            sessions_list = TrainingSession.query.filter_by(user_profile_id=current_user.profile.id).order_by(TrainingSession.start_time.desc()).all()
-        except Exception as e:
-            current_app.logger.error(f"Error querying sessions for dashboard: {str(e)}")
-            sessions_list = []
-
-        # 2. Calculate the *count* of completed sessions
-        completed_sessions_list = [s for s in sessions_list if s.status == 'completed']
-        session_count = len(completed_sessions_list)
-
-        # 3. Initialize the *entire* context dictionary with SAFE defaults
-        template_context = {
-            'user': current_user,
-            'sessions': completed_sessions_list, # Pass ONLY completed sessions maybe?
-            'completed_sessions': session_count,
-            'current_score': 0,
-            'current_level': 1, # Default level
-            'current_title': "Rookie", # Default title
-            'progress_to_next': 0, # Default progress
-            'next_level_score': 60, # Default score for next level (L2 threshold)
-            'growth_percentage': 0,
-            'skill_progression': {},
-            'session_streak': 0, # Needs calculation
-            'most_improved_skill': {'name': None, 'change': 0}, # Needs calculation
-            'advanced_metrics': {}, # Needs calculation/retrieval
-            'journey_metrics': {}, # Needs calculation/retrieval
-            'trophy_data': {'count': 0, 'max_count': 8}, # Needs calculation
-            'chronological_scores': [], # Needs calculation
-            'show_growth_path': False,
-            'avg_trust_score': 0,
-            'avg_persuasion_rating': 0,
-            'avg_confidence_score': 0,
-            'total_sessions': len(sessions_list), # Total includes non-completed
-            'total_training_time': 0 # Needs calculation
-            # Add any other keys the template requires with safe defaults
-        }
 
-        # 4. If there *are* completed sessions, attempt calculations SAFELY
-        if session_count > 0:
-            try:
-                # --- Start of SAFE calculation block ---
-                latest_session = completed_sessions_list[0] # Most recent completed session
-
-                # Safely get overall score from the latest session
-                # Assume overall_score is a direct attribute, fallback to 0
-                current_score = getattr(latest_session, 'overall_score', 0) or 0
-
-                # --- ADD Level Calculation Logic Here --- 
-                level_thresholds = [0, 60, 75, 85, 95] # Level 1 starts at 0, L2 at 60, etc.
-                user_titles = ["Rookie", "Apprentice", "Practitioner", "Expert", "Master"]
-                current_level = 1
-                current_title = user_titles[0]
-                progress_to_next = 0
-                next_level_score = level_thresholds[1] if len(level_thresholds) > 1 else 100 # Default next threshold
-
-                for i in range(len(level_thresholds)):
-                    if current_score >= level_thresholds[i]:
-                        current_level = i + 1
-                        current_title = user_titles[i]
-                        if i + 1 < len(level_thresholds):
-                            lower_bound = level_thresholds[i]
-                            upper_bound = level_thresholds[i+1]
-                            next_level_score = upper_bound
-                            if upper_bound > lower_bound:
-                                progress_to_next = ((current_score - lower_bound) / (upper_bound - lower_bound)) * 100
-                            else:
-                                progress_to_next = 0 # Avoid division by zero if thresholds are same
-                        else:
-                            # Max level reached
-                            progress_to_next = 100
-                            next_level_score = current_score # Or set to 100, depending on desired display
-                    else:
-                        # Found the level, stop checking higher thresholds
-                        break 
-                # --- END Level Calculation --- 
-
-                # Example: Safely calculate average trust score
-                trust_scores = [s.trust_score for s in completed_sessions_list if hasattr(s, 'trust_score') and s.trust_score is not None]
-                avg_trust = sum(trust_scores) / len(trust_scores) if trust_scores else 0
-
-                # Example: Safely get skill progression from the latest session
-                # Assume skill_progression is stored in feedback_analysis relationship
-                latest_feedback = FeedbackAnalysis.query.filter_by(session_id=latest_session.id).first()
-                skill_progression = {} # Default empty dict
-                if latest_feedback:
-                    # Example structure: feedback.skill_scores might be JSON text
-                    try:
-                        skill_data_text = getattr(latest_feedback, 'skill_scores', '{}')
-                        skill_progression = json.loads(skill_data_text or '{}')
-                        if not isinstance(skill_progression, dict):
-                             skill_progression = {} # Fallback if not a dict
-                        # You might need to transform this structure further for the template
-                        # E.g., adding 'name' and 'icon' if not present
-                    except (json.JSONDecodeError, AttributeError, TypeError) as skill_err:
-                        current_app.logger.warning(f"Could not load/parse skill_progression for session {latest_session.id}: {skill_err}")
-                        skill_progression = {}
-
-                # --- Placeholder for other complex calculations (streak, growth, etc.) ---
-                # These need to be implemented carefully, checking for None values and handling potential errors.
-                # For now, we'll use the defaults.
-                chronological_scores = [getattr(s, 'overall_score', 0) or 0 for s in reversed(completed_sessions_list)] # Example
-                # Calculate growth_percentage safely
-                growth_percentage = 0
-                if len(chronological_scores) > 1:
-                    first_score = chronological_scores[0]
-                    last_score = chronological_scores[-1]
-                    if first_score and first_score != 0: # Avoid division by zero
-                        growth_percentage = ((last_score - first_score) / first_score) * 100
-
-                # --- Update the context dictionary with calculated values ---
-                template_context.update({
-                    'current_score': current_score,
-                    'current_level': current_level,
-                    'current_title': current_title,
-                    'progress_to_next': progress_to_next,
-                    'next_level_score': next_level_score,
-                    'avg_trust_score': avg_trust,
-                    'skill_progression': skill_progression,
-                    'chronological_scores': chronological_scores,
-                    'growth_percentage': growth_percentage,
-                    # Safely get avg confidence from latest session metrics if they exist
-                    'avg_confidence_score': getattr(latest_session, 'confidence_score', 0) or 0,
-                    # Update ALL other relevant keys based on your safe calculations
-                    # 'session_streak': calculated_streak,
-                    # 'most_improved_skill': calculated_most_improved,
-                    # ... etc.
-                })
-                # --- End of SAFE calculation block ---
-
-            except Exception as calc_err:
-                # Log the specific error during calculations but still try to render dashboard
-                current_app.logger.error(f"Error during dashboard calculations: {str(calc_err)}\n{traceback.format_exc()}")
-                flash("Could not calculate all dashboard metrics due to an error.", "warning")
-                # The template_context will retain its default values for failed calculations
-
-        # 5. ALWAYS render the template at the end of the main 'try' block
-        current_app.logger.info(f"Rendering dashboard with context keys: {list(template_context.keys())}")
+        # 2. Aggregate metrics in SQL (memoized per user until a session completes)
+        try:
+            dashboard = get_dashboard_context(current_user.profile.id)
+        except Exception as calc_err:
+            # Log the specific error during calculations but still try to render dashboard
+            current_app.logger.error(f"Error during dashboard calculations: {str(calc_err)}\n{traceback.format_exc()}")
+            flash("Could not calculate all dashboard metrics due to an error.", "warning")
+            dashboard = DashboardContext()
+
+        # 3. ALWAYS render the template at the end of the main 'try' block
         return render_template(
             'training/dashboard_super_minimal.html',
-            **template_context # Unpack the dictionary
+            **dashboard.to_template_context(current_user)
         )
 
     except Exception as e:
@@ -514,6 +390,10 @@ def end_roleplay_session(session_id):
         # Trigger final feedback generation and storage
         # This assumes generate_feedback_analysis handles saving
         feedback = training_services.generate_feedback_analysis(session) 
+        
+        # Dashboard rollup; committed together with the status change below
+        record_session_end(session)
+        invalidate_dashboard(session.user_profile_id)
         if not feedback:
              # Even if feedback fails, we still mark session completed
              current_app.logger.error(f"Failed to generate final feedback for completed session {session_id}")
@@ -922,16 +802,11 @@ def generate_training_persona():
         logger.info(f"Generating training persona for product: '{product_service}', target: '{target_market}'")
         
         # Use our comprehensive bias prevention system
-        from app.services.comprehensive_bias_prevention import ComprehensiveBiasPrevention
+        from app.services.persona_pool import get_persona_pool
         
         try:
-            # Generate bias-free persona with contextual fears
-            framework = ComprehensiveBiasPrevention.generate_bias_free_persona_framework(
-                industry_context=None,
-                target_market=target_market,
-                complexity_level="intermediate",
-                product_service=product_service  # This triggers contextual fear generation
-            )
+            # Draw a pregenerated bias-free persona; contextual fears are added for this product
+            framework = get_persona_pool().draw(target_market, product_service, data.get('difficulty'))
             
             # Transform framework to match expected training persona format
             persona_data = {
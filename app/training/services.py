@@ -17,20 +17,27 @@ import logging
 import traceback
 import random
 import re
+import secrets
 from threading import Thread
 from flask import session as flask_session, current_app
+from flask_login import current_user
 from sqlalchemy.orm import joinedload # Added joinedload
 from sqlalchemy.exc import SQLAlchemyError
 from typing import List, Dict, Any, Optional # Added Optional
 from sqlalchemy import func
 from app.training.curated_personas_data import BEHAVIORAL_SHELLS, LEGENDARY_BEHAVIORAL_SHELLS # Import shells
 from app.services.conversation_state_manager import ConversationStateManager # <-- ADDED Import
+from app.services.user_metrics_rollup import record_session_metrics
+from app.services.persona_cache import get_persona_cache
 
 logger = logging.getLogger(__name__)
 
 # Global variable to store the backup persona
 _backup_persona = None
 
+# Session cookie key for the opaque persona cache token
+PERSONA_CACHE_TOKEN = 'persona_cache_token'
+
 # Constants for shell selection
 CHANCE_TO_USE_LEGENDARY_SHELL = 0.0 # Disabled for enterprise demos - enable via admin settings
 
@@ -284,20 +291,35 @@ def generate_buyer_persona(user_profile=None, use_previous_feedback=False, previ
         logger.error(f"Error generating buyer persona: {str(e)}", exc_info=True) # exc_info for full traceback
         return create_default_persona(user_profile)
 
+def _persona_cache_key(session_key, create=False):
+    """
+    Server-side cache key for session_key: user id plus an opaque per-browser
+    token, the only part that lives in the session cookie. None if the
+    browser has no token yet and create is False.
+    """
+    token = flask_session.get(PERSONA_CACHE_TOKEN)
+    if token is None:
+        if not create:
+            return None
+        token = flask_session[PERSONA_CACHE_TOKEN] = secrets.token_urlsafe(16)
+    user_id = current_user.get_id() if current_user and current_user.is_authenticated else 'anonymous'
+    return f"{user_id}:{token}:{session_key}"
+
 def get_cached_persona(session_key):
     """
-    Retrieve a cached persona from the Flask session if available.
+    Retrieve a cached persona from the server-side persona cache if available.
     
     Args:
-        session_key: The key used to store the persona in the session.
+        session_key: The key the persona was cached under.
         
     Returns:
         BuyerPersona object if found, None otherwise.
     """
     try:
-        if session_key in flask_session:
+        cache_key = _persona_cache_key(session_key)
+        persona_data = get_persona_cache().get(cache_key) if cache_key else None
+        if persona_data is not None:
             logger.info(f"Found cached persona with key {session_key}")
-            persona_data = flask_session[session_key]
             
             # Create a BuyerPersona object from the cached data
             persona = BuyerPersona(
@@ -319,14 +341,14 @@ def get_cached_persona(session_key):
 
 def cache_persona(session_key, persona):
     """
-    Cache a persona in the Flask session.
+    Cache a persona server-side; the session cookie only carries an opaque token.
     
     Args:
         session_key: The key to use for storing the persona.
         persona: The BuyerPersona object to cache.
     """
     try:
-        flask_session[session_key] = {
+        get_persona_cache().set(_persona_cache_key(session_key, create=True), {
             'name': persona.name,
             'description': persona.description,
             'personality_traits': persona.personality_traits,
@@ -336,7 +358,7 @@ def cache_persona(session_key, persona):
             'pain_points': persona.pain_points,
             'objections': persona.objections,
             'cognitive_biases': persona.cognitive_biases
-        }
+        })
         logger.info(f"Cached persona with key {session_key}")
     except Exception as e:
         logger.error(f"Error caching persona: {str(e)}")
@@ -1405,7 +1427,8 @@ def calculate_and_store_metrics(session: TrainingSession) -> Optional[Performanc
         
         # Create or update PerformanceMetrics
         metrics_record = PerformanceMetrics.query.filter_by(training_session_id=session.id).first()
-        if not metrics_record:
+        is_new_record = metrics_record is None
+        if is_new_record:
             metrics_record = PerformanceMetrics(training_session_id=session.id, user_profile_id=session.user_profile_id)
             db.session.add(metrics_record)
             
@@ -1430,6 +1453,10 @@ def calculate_and_store_metrics(session: TrainingSession) -> Optional[Performanc
         session_metrics_record.pain_point_details_dict = metrics_data.get('pain_point_details', {})
         session_metrics_record.updated_at = datetime.utcnow()
 
+        # Fold into the dashboard rollup once per session, in the same commit
+        if is_new_record:
+            record_session_metrics(metrics_record, session)
+
         db.session.commit()
         logger.info(f"Calculated and stored metrics for session {session.id}")
         return metrics_record
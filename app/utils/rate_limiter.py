@@ -0,0 +1,347 @@
+"""
+Unified rate limiter (GCRA) with pluggable storage.
+
+One limiter for every ad-hoc limit in the app (auth, login lockout,
+Cartesia token). Each key stores a single number, its theoretical
+arrival time (TAT), so a check is O(1) in time and memory.
+
+Storage backends, selected by RATE_LIMIT_STORAGE_URI:
+- memory://              in-process, LRU-bounded (single worker only)
+- sqlite:///path/to.db   shared across workers on one host
+- redis://host:port/db   shared across hosts (Redis protocol; rediss:// for TLS)
+"""
+from typing import Callable, Optional, Tuple
+from dataclasses import dataclass
+from collections import OrderedDict
+from functools import wraps
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from flask import current_app, g, jsonify, request
+
+from app.utils.redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of a limiter check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float  # Seconds until the next request would be allowed
+    overhead_ms: float  # Time spent inside the limiter for this check
+
+
+# ----------------------------------------------------------------------
+# Storage backends
+# ----------------------------------------------------------------------
+
+class MemoryStorage:
+    """In-process TAT store with LRU eviction of idle keys"""
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._tats: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update_tat(self, key: str, now: float, interval: float, window: float,
+                   cost: int) -> Tuple[bool, float]:
+        with self._lock:
+            tat = max(self._tats.get(key, now), now)
+            new_tat = tat + interval * cost
+            if new_tat - window > now:
+                return False, new_tat
+
+            self._tats[key] = new_tat
+            self._tats.move_to_end(key)
+            while len(self._tats) > self.max_keys:
+                self._tats.popitem(last=False)
+            return True, new_tat
+
+    def get_tat(self, key: str) -> Optional[float]:
+        with self._lock:
+            return self._tats.get(key)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._tats.pop(key, None)
+
+    def __len__(self):
+        return len(self._tats)
+
+
+class SQLiteStorage:
+    """TAT store in a SQLite file, shared by every worker on the host"""
+
+    PURGE_EVERY = 1000  # Updates between sweeps of expired keys
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._updates = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "key TEXT PRIMARY KEY, tat REAL NOT NULL, expires REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limits_expires ON rate_limits (expires)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def update_tat(self, key: str, now: float, interval: float, window: float,
+                   cost: int) -> Tuple[bool, float]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tat = max(row[0] if row else now, now)
+            new_tat = tat + interval * cost
+            if new_tat - window > now:
+                conn.execute("COMMIT")
+                return False, new_tat
+
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (key, tat, expires) VALUES (?, ?, ?)",
+                (key, new_tat, new_tat)
+            )
+            self._updates += 1
+            if self._updates % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM rate_limits WHERE expires < ?", (now,))
+            conn.execute("COMMIT")
+            return True, new_tat
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_tat(self, key: str) -> Optional[float]:
+        row = self._conn().execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+
+# Atomic GCRA step; TATs travel as strings so Lua does not truncate them
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local tat = tonumber(redis.call('GET', KEYS[1]) or ARGV[1])
+if tat < now then tat = now end
+local new_tat = tat + interval * cost
+if new_tat - window > now then
+  return {0, tostring(new_tat)}
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1)
+return {1, tostring(new_tat)}
+"""
+
+
+class RedisStorage:
+    """TAT store in Redis; keys expire on their own once idle"""
+
+    def __init__(self, client: RedisClient, prefix: str = 'ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+
+    def update_tat(self, key: str, now: float, interval: float, window: float,
+                   cost: int) -> Tuple[bool, float]:
+        allowed, tat = self.client.execute(
+            'EVAL', GCRA_SCRIPT, 1, self.prefix + key, now, interval, window, cost
+        )
+        return bool(int(allowed)), float(tat)
+
+    def get_tat(self, key: str) -> Optional[float]:
+        value = self.client.execute('GET', self.prefix + key)
+        return float(value) if value is not None else None
+
+    def delete(self, key: str):
+        self.client.execute('DEL', self.prefix + key)
+
+
+def storage_from_uri(uri: Optional[str]):
+    """Build a storage backend from a URI (defaults to memory://)"""
+    if not uri or uri.startswith('memory://'):
+        return MemoryStorage()
+    if uri.startswith('sqlite:///'):
+        return SQLiteStorage(uri[len('sqlite:///'):])
+    if uri.startswith(('redis://', 'rediss://')):
+        return RedisStorage(RedisClient.from_url(uri))
+    raise ValueError(f"Unsupported rate limit storage: {uri}")
+
+
+# ----------------------------------------------------------------------
+# Limiter
+# ----------------------------------------------------------------------
+
+class RateLimiter:
+    """GCRA limiter: `limit` requests per `window` seconds, bursts up to `limit`"""
+
+    def __init__(self, storage=None, clock: Callable[[], float] = time.time):
+        self.storage = storage if storage is not None else MemoryStorage()
+        self.clock = clock
+        self._stats_lock = threading.Lock()
+        self.checks = 0
+        self.rejections = 0
+        self.total_overhead_ms = 0.0
+        self.max_overhead_ms = 0.0
+
+    def hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitResult:
+        """Consume `cost` units for `key`"""
+        start = time.perf_counter()
+        now = self.clock()
+        interval = window / limit
+        allowed, tat = self.storage.update_tat(key, now, interval, window, cost)
+
+        if allowed:
+            remaining = int(math.floor((window - (tat - now)) / interval + 1e-9))
+            retry_after = 0.0
+        else:
+            remaining = 0
+            retry_after = tat - window - now
+        return self._result(allowed, limit, remaining, retry_after, start)
+
+    def peek(self, key: str, limit: int, window: float) -> RateLimitResult:
+        """Would one more unit be allowed? Consumes nothing"""
+        start = time.perf_counter()
+        now = self.clock()
+        interval = window / limit
+        tat = max(self.storage.get_tat(key) or now, now)
+
+        next_tat = tat + interval
+        allowed = next_tat - window <= now
+        remaining = int(math.floor((window - (tat - now)) / interval + 1e-9)) if allowed else 0
+        retry_after = 0.0 if allowed else next_tat - window - now
+        return self._result(allowed, limit, remaining, retry_after, start)
+
+    def reset(self, key: str):
+        self.storage.delete(key)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'checks': self.checks,
+                'rejections': self.rejections,
+                'avg_overhead_ms': round(self.total_overhead_ms / self.checks, 4) if self.checks else 0.0,
+                'max_overhead_ms': round(self.max_overhead_ms, 4),
+                'backend': type(self.storage).__name__
+            }
+
+    def _result(self, allowed, limit, remaining, retry_after, start) -> RateLimitResult:
+        overhead_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self.checks += 1
+            self.rejections += 0 if allowed else 1
+            self.total_overhead_ms += overhead_ms
+            self.max_overhead_ms = max(self.max_overhead_ms, overhead_ms)
+        return RateLimitResult(
+            allowed=allowed,
+            limit=limit,
+            remaining=max(0, remaining),
+            retry_after=max(0.0, retry_after),
+            overhead_ms=overhead_ms
+        )
+
+
+# Global limiter, built lazily from app config
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide limiter (storage from RATE_LIMIT_STORAGE_URI)"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                uri = None
+                try:
+                    uri = current_app.config.get('RATE_LIMIT_STORAGE_URI')
+                except RuntimeError:
+                    pass  # Outside app context: in-process storage
+                try:
+                    _limiter = RateLimiter(storage_from_uri(uri))
+                except Exception as e:
+                    logger.error(f"[RateLimit] Storage {uri} unavailable, using memory: {e}")
+                    _limiter = RateLimiter(MemoryStorage())
+    return _limiter
+
+
+def client_ip() -> str:
+    """Client address for rate-limit keys (ProxyFix resolves X-Forwarded-For)"""
+    return request.remote_addr or 'unknown'
+
+
+def user_or_ip() -> str:
+    """Rate-limit key: the logged-in user, else the client address"""
+    from flask_login import current_user
+    if current_user.is_authenticated:
+        return f"user:{current_user.id}"
+    return client_ip()
+
+
+def rate_limit(limit: int = None, window: int = None, key_func: Callable[[], str] = None,
+               scope: str = None):
+    """
+    Decorator to rate limit a route.
+
+    Args:
+        limit: Requests allowed per window (default: RATE_LIMIT config)
+        window: Window in seconds (default: RATE_LIMIT_WINDOW config)
+        key_func: Returns the client identity (default: client IP)
+        scope: Bucket name shared by routes (default: the request path)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            route_limit = limit or current_app.config.get('RATE_LIMIT', 20)
+            route_window = window or current_app.config.get('RATE_LIMIT_WINDOW', 60)
+            identity = key_func() if key_func else client_ip()
+            key = f"{scope or request.path}:{identity}"
+
+            try:
+                result = get_rate_limiter().hit(key, route_limit, route_window)
+            except Exception as e:
+                # Fail open: a storage outage must not take the route down
+                logger.error(f"[RateLimit] Check failed for {key}: {e}")
+                return f(*args, **kwargs)
+
+            g.rate_limit_result = result
+            if not result.allowed:
+                retry_after = int(math.ceil(result.retry_after))
+                logger.warning(f"[RateLimit] Exceeded for {key}, retry in {retry_after}s")
+                response = jsonify({'error': 'Rate limit exceeded', 'retry_after': retry_after})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(retry_after)
+                response.headers['X-RateLimit-Limit'] = str(route_limit)
+                response.headers['X-RateLimit-Remaining'] = '0'
+                return response
+
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+def add_rate_limit_headers(response):
+    """after_request hook: limit, remaining and limiter overhead for limited routes"""
+    result = g.get('rate_limit_result')
+    if result is not None:
+        response.headers.setdefault('X-RateLimit-Limit', str(result.limit))
+        response.headers.setdefault('X-RateLimit-Remaining', str(result.remaining))
+        response.headers['X-RateLimit-Overhead-Ms'] = f"{result.overhead_ms:.3f}"
+    return response
@@ -0,0 +1,201 @@
+"""
+Minimal Redis-protocol (RESP2) client.
+
+Just enough of the wire protocol for shared counters and state
+(GET/SET/EVAL/HINCRBY/...), without a redis-py dependency. Works
+against Redis, Valkey, KeyDB or a local stand-in server in tests.
+"""
+import os
+import socket
+import ssl
+import threading
+from typing import Any, List, Optional
+from urllib.parse import urlparse
+
+
+SCHEMES = ('redis', 'rediss')
+
+
+class RedisError(Exception):
+    """Error reply from the server or a broken connection."""
+
+
+class RedisClient:
+    """
+    Thread-safe RESP client over a single persistent connection.
+
+    Commands are serialized with a lock; the workloads this serves are
+    small (a few keys per request), so one connection per process is enough.
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, timeout: float = 2.0, use_tls: bool = False):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.use_tls = use_tls
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 2.0) -> 'RedisClient':
+        """Build a client from redis://[:password@]host[:port][/db] (rediss:// for TLS)"""
+        parsed = urlparse(url)
+        if parsed.scheme not in SCHEMES:
+            raise ValueError(f"Unsupported Redis URL scheme: {parsed.scheme!r}")
+        db = int(parsed.path.lstrip('/') or 0)
+        return cls(
+            host=parsed.hostname or 'localhost',
+            port=parsed.port or 6379,
+            db=db,
+            password=parsed.password,
+            timeout=timeout,
+            use_tls=parsed.scheme == 'rediss'
+        )
+
+    def execute(self, *args) -> Any:
+        """Send one command and return its decoded reply"""
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                self._send(args)
+                return self._read_reply()
+            except OSError as e:
+                # Error replies leave the connection usable; I/O errors do not
+                self._close()
+                raise RedisError(f'Connection error: {e}') from e
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    # ------------------------------------------------------------------
+    # Wire protocol
+    # ------------------------------------------------------------------
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self.use_tls:
+            try:
+                sock = ssl.create_default_context().wrap_socket(sock, server_hostname=self.host)
+            except OSError:
+                sock.close()
+                raise
+        self._sock = sock
+        self._file = self._sock.makefile('rb')
+        if self.password:
+            self._send(('AUTH', self.password))
+            self._read_reply()
+        if self.db:
+            self._send(('SELECT', self.db))
+            self._read_reply()
+
+    def _close(self):
+        for closable in (self._file, self._sock):
+            if closable is not None:
+                try:
+                    closable.close()
+                except OSError:
+                    pass
+        self._sock = None
+        self._file = None
+
+    def _send(self, args):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if isinstance(arg, bytes):
+                data = arg
+            elif isinstance(arg, float):
+                data = repr(arg).encode()
+            else:
+                data = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        self._sock.sendall(b''.join(parts))
+
+    def _read_line(self) -> bytes:
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError('Connection closed by server')
+        return line[:-2]
+
+    def _read_reply(self) -> Any:
+        line = self._read_line()
+        kind, payload = line[:1], line[1:]
+
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise RedisError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._file.read(length + 2)
+            return data[:-2].decode()
+        if kind == b'*':
+            count = int(payload)
+            if count == -1:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise RedisError(f'Unknown reply type: {line!r}')
+
+
+def encode_reply(value: Any) -> bytes:
+    """RESP-encode a reply value (used by stand-in servers)"""
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, bool):
+        return b':%d\r\n' % int(value)
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, Exception):
+        return b'-ERR %s\r\n' % str(value).encode()
+    if isinstance(value, (list, tuple)):
+        return b'*%d\r\n' % len(value) + b''.join(encode_reply(v) for v in value)
+    data = value if isinstance(value, bytes) else str(value).encode()
+    return b'$%d\r\n%s\r\n' % (len(data), data)
+
+
+def parse_command(stream) -> Optional[List[str]]:
+    """Read one RESP command array from a binary stream; None on EOF"""
+    header = stream.readline()
+    if not header:
+        return None
+    count = int(header[1:-2])
+    args = []
+    for _ in range(count):
+        length = int(stream.readline()[1:-2])
+        args.append(stream.read(length + 2)[:-2].decode())
+    return args
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_shared_client() -> Optional[RedisClient]:
+    """
+    Process-wide client for cross-worker state, or None when no
+    SHARED_STATE_URL is configured (callers then keep state in process).
+    """
+    global _shared_client
+    if _shared_client is None:
+        url = os.environ.get('SHARED_STATE_URL')
+        try:
+            from flask import current_app
+            url = current_app.config.get('SHARED_STATE_URL') or url
+        except RuntimeError:
+            pass  # Outside app context
+        if not url or not url.startswith(('redis://', 'rediss://')):
+            return None
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = RedisClient.from_url(url)
+    return _shared_client
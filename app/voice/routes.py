@@ -12,6 +12,7 @@ import random
 from app.models import db
 from app.services.openai_service import openai_service
 from app.services.gpt4o_service import get_gpt4o_service
+from app.services.llm_admission import Priority, llm_priority
 from app.services.conversation_state_manager import ConversationStateManager, ConversationPhase
 # from app.services.eleven_labs_service import get_eleven_labs_service  # REMOVED: Deprecated
 import re
@@ -433,11 +434,12 @@ Examples of good first messages:
                     "initial_greeting_instructions": initial_greeting_instructions
                 }
                 
-                initial_greeting = gpt4o_service.generate_initial_greeting(
-                    persona=persona_dict,
-                    sales_info=sales_info,
-                    conversation_id=conversation_id
-                )
+                with llm_priority(Priority.LIVE_TURN):
+                    initial_greeting = gpt4o_service.generate_initial_greeting(
+                        persona=persona_dict,
+                        sales_info=sales_info,
+                        conversation_id=conversation_id
+                    )
                 
                 # Add greeting to conversation history
                 if initial_greeting:
@@ -555,13 +557,14 @@ CONVERSATION GUIDANCE:
                     conversation_state = phase_info
                 
                 # Generate response using standard approach for later conversation stages
-                response = gpt4o_service.generate_roleplay_response(
-                    persona=enhanced_persona,
-                    messages=conv_history,
-                    conversation_state=conversation_state,
-                    user_info=user_info,
-                    conversation_id=conversation_id
-                )
+                with llm_priority(Priority.LIVE_TURN):
+                    response = gpt4o_service.generate_roleplay_response(
+                        persona=enhanced_persona,
+                        messages=conv_history,
+                        conversation_state=conversation_state,
+                        user_info=user_info,
+                        conversation_id=conversation_id
+                    )
                 
                 logger.info(f"Generated response for later conversation stage: {response[:50]}...")
                 
@@ -698,12 +701,13 @@ Avoid generic platitudes or overly theoretical advice - focus on practical, prov
         
         # Generate response using GPT-4.1-mini service for better quality
         try:
-            response = gpt4o_service.generate_response(
-                messages=conv_history,
-                system_prompt=None,  # System prompt already included in conversation history
-                temperature=0.6,
-                max_tokens=800
-            )
+            with llm_priority(Priority.LIVE_TURN):
+                response = gpt4o_service.generate_response(
+                    messages=conv_history,
+                    system_prompt=None,  # System prompt already included in conversation history
+                    temperature=0.6,
+                    max_tokens=800
+                )
         except Exception as e:
             logger.error(f"Error generating coach response: {str(e)}")
             response = "I'm sorry, I'm having trouble responding right now. Could you repeat your question?"
@@ -807,7 +811,7 @@ def voice_text_to_speech():
 @voice.route('/api/phase-update', methods=['POST'])
 @login_required
 def phase_update():
-    """Update conversation phase based on latest user utterance and return new prompt if phase changed."""
+    """Update conversation phase based on latest user utterance (and the optional prospect_reply it answers) and return new prompt if phase changed."""
     try:
         data = request.get_json() or {}
         conversation_id = data.get('conversation_id')
@@ -828,7 +832,7 @@ def phase_update():
             gpt_service.phase_managers[conversation_id] = ConversationStateManager()
         phase_manager = gpt_service.phase_managers[conversation_id]
 
-        phase_changed = phase_manager.update_phase(utterance)
+        phase_changed = phase_manager.update_phase(utterance, assistant_message=data.get('prospect_reply'))
         current_phase = phase_manager.current_state.get('likely_phase', ConversationPhase.RAPPORT)
         # --- Persona handling ---
         # Attach a simple persona cache on the service
@@ -72,6 +72,7 @@ class Config:
     OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-4.1-mini')
     OPENAI_FEEDBACK_MODEL = os.environ.get('OPENAI_FEEDBACK_MODEL', 'gpt-4.1-mini')
     DEEPGRAM_API_KEY = os.environ.get('DEEPGRAM_API_KEY')
+    TTS_PREWARM = os.environ.get('TTS_PREWARM', 'False').lower() in ('true', '1', 't')  # Synthesize filler audio once per deployment
     # --- End API Keys ---
 
     # --- Email/SMTP Configuration ---
@@ -88,6 +89,12 @@ class Config:
     # Flask-Limiter settings
     RATELIMIT_STORAGE_URI = os.environ.get('REDIS_URL') or "memory://"
     
+    # Cross-worker state (bias history, session registry, caches); redis:// or rediss:// (TLS)
+    SHARED_STATE_URL = os.environ.get('SHARED_STATE_URL') or os.environ.get('REDIS_URL')
+    
+    # Shared limiter storage (app.utils.rate_limiter): memory://, sqlite:///path or redis://
+    RATE_LIMIT_STORAGE_URI = os.environ.get('RATE_LIMIT_STORAGE_URI') or os.environ.get('REDIS_URL') or "memory://"
+    
     # General Rate Limits (used by @rate_limit decorator)
     RATE_LIMIT = 20  # Default limit per window
     RATE_LIMIT_WINDOW = 60  # Default window in seconds (1 minute)
@@ -119,6 +126,17 @@ class Config:
     AWS_ACCESS_KEY_ID = os.environ.get('AWS_ACCESS_KEY_ID')
     AWS_SECRET_ACCESS_KEY = os.environ.get('AWS_SECRET_ACCESS_KEY')
     AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+    
+    # Feedback analysis engine (app.services.feedback_analysis_engine)
+    FEEDBACK_CACHE_PATH = os.environ.get('FEEDBACK_CACHE_PATH') or os.path.join(instance_path, 'feedback_cache.db')
+    FEEDBACK_CACHE_TTL_DAYS = int(os.environ.get('FEEDBACK_CACHE_TTL_DAYS', 30))
+    FEEDBACK_MAX_CONCURRENCY = int(os.environ.get('FEEDBACK_MAX_CONCURRENCY', 3))  # Parallel LLM calls per process
+    FEEDBACK_MOMENT_MODEL = os.environ.get('FEEDBACK_MOMENT_MODEL', 'gpt-4o-mini')
+    FEEDBACK_LIGHT_MODEL = os.environ.get('FEEDBACK_LIGHT_MODEL', 'gpt-4.1-nano')  # Low-salience moments
+    FEEDBACK_SALIENCE_THRESHOLD = float(os.environ.get('FEEDBACK_SALIENCE_THRESHOLD', 0.35))
+    
+    # Client telemetry (app.services.telemetry_ingest)
+    TELEMETRY_RETENTION_DAYS = int(os.environ.get('TELEMETRY_RETENTION_DAYS', 14))  # 0 keeps rows forever
 
 class DevelopmentConfig(Config):
     """Development configuration."""
@@ -144,6 +162,11 @@ class ProductionConfig(Config):
     SESSION_COOKIE_SAMESITE = 'None' # Allow cross-domain authentication
     # Ensure Redis is used for rate limiting in production
     RATELIMIT_STORAGE_URI = os.environ.get('REDIS_URL') or "memory://"
+    # Without Redis, share limits across gunicorn workers through SQLite
+    RATE_LIMIT_STORAGE_URI = (
+        os.environ.get('RATE_LIMIT_STORAGE_URI') or os.environ.get('REDIS_URL')
+        or f"sqlite:///{os.path.join(Config.instance_path, 'rate_limits.db')}"
+    )
 
 # Configuration dictionary
 config_by_name = dict(
@@ -0,0 +1,42 @@
+"""add user_metrics_rollups table
+
+Revision ID: c4e8a1f2b913
+Revises: 97bcf1a30739
+Create Date: 2026-10-19 10:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a1f2b913'
+down_revision = '97bcf1a30739'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_metrics_rollups',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('sessions_count', sa.Integer(), nullable=False),
+    sa.Column('total_duration_seconds', sa.Float(), nullable=False),
+    sa.Column('user_message_count', sa.Integer(), nullable=False),
+    sa.Column('ai_message_count', sa.Integer(), nullable=False),
+    sa.Column('last_session_at', sa.DateTime(), nullable=True),
+    sa.Column('scored_sessions', sa.Integer(), nullable=False),
+    sa.Column('rapport_avg', sa.Float(), nullable=True),
+    sa.Column('discovery_avg', sa.Float(), nullable=True),
+    sa.Column('presentation_avg', sa.Float(), nullable=True),
+    sa.Column('objection_handling_avg', sa.Float(), nullable=True),
+    sa.Column('closing_avg', sa.Float(), nullable=True),
+    sa.Column('overall_avg', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user_profiles.id'], name=op.f('fk_user_metrics_rollups_user_id_user_profiles')),
+    sa.PrimaryKeyConstraint('user_id', name=op.f('pk_user_metrics_rollups'))
+    )
+    # Populate with: python scripts/database/backfill_user_metrics.py
+
+
+def downgrade():
+    op.drop_table('user_metrics_rollups')
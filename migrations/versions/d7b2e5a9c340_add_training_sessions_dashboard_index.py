@@ -0,0 +1,26 @@
+"""add training_sessions dashboard index
+
+Revision ID: d7b2e5a9c340
+Revises: c4e8a1f2b913
+Create Date: 2026-10-19 14:03:17.552901
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7b2e5a9c340'
+down_revision = 'c4e8a1f2b913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('training_sessions', schema=None) as batch_op:
+        batch_op.create_index('ix_training_sessions_profile_status_start', ['user_profile_id', 'status', 'start_time'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('training_sessions', schema=None) as batch_op:
+        batch_op.drop_index('ix_training_sessions_profile_status_start')
@@ -0,0 +1,44 @@
+"""add client_telemetry_events table
+
+Revision ID: e3f1a6c8b2d4
+Revises: d7b2e5a9c340
+Create Date: 2026-10-19 16:41:05.118230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3f1a6c8b2d4'
+down_revision = 'd7b2e5a9c340'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('client_telemetry_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('session_id', sa.String(length=100), nullable=True),
+    sa.Column('event', sa.String(length=50), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('persona', sa.String(length=100), nullable=True),
+    sa.Column('client_timestamp', sa.String(length=40), nullable=True),
+    sa.Column('latency_ms', sa.Float(), nullable=True),
+    sa.Column('reconnect_attempts', sa.Integer(), nullable=True),
+    sa.Column('payload', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('client_telemetry_events', schema=None) as batch_op:
+        batch_op.create_index('ix_client_telemetry_session_kind', ['session_id', 'kind'], unique=False)
+        batch_op.create_index(batch_op.f('ix_client_telemetry_events_received_at'), ['received_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('client_telemetry_events', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_client_telemetry_events_received_at'))
+        batch_op.drop_index('ix_client_telemetry_session_kind')
+
+    op.drop_table('client_telemetry_events')
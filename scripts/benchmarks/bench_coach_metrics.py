@@ -0,0 +1,85 @@
+"""
+Benchmark for CoachMetrics latency recording and percentile reads.
+
+Records N samples from 8 threads into the log-linear histograms, then reads
+p50/p95/p99 for every stage, against the previous approach of appending to
+a list trimmed by slicing at 1,000 entries and sorting for percentiles.
+
+Usage: python scripts/benchmarks/bench_coach_metrics.py [samples]
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from app.services.coach_metrics import STAGES, CoachMetrics
+
+THREADS = 8
+MAX_LOG_SIZE = 1000
+
+
+class ListMetrics:
+    """Previous approach: bounded lists, sorted on read"""
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+        self.lock = threading.Lock()
+
+    def record_latency(self, stage, latency_ms):
+        with self.lock:
+            samples = self.samples[stage]
+            samples.append(latency_ms)
+            if len(samples) > MAX_LOG_SIZE:
+                self.samples[stage] = samples[-MAX_LOG_SIZE:]
+
+    def percentiles(self):
+        result = {}
+        for stage, samples in self.samples.items():
+            ordered = sorted(samples)
+            result[stage] = [ordered[int(q / 100 * len(ordered)) - 1] for q in (50, 95, 99)] if ordered else None
+        return result
+
+
+def _record(metrics, samples):
+    def worker(seed):
+        rng = random.Random(seed)
+        for i in range(samples // THREADS):
+            metrics.record_latency(STAGES[i % len(STAGES)], rng.lognormvariate(4, 1))
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main(samples):
+    before = ListMetrics()
+    record_before = _record(before, samples)
+    start = time.perf_counter()
+    before.percentiles()
+    read_before = time.perf_counter() - start
+
+    after = CoachMetrics()
+    record_after = _record(after, samples)
+    start = time.perf_counter()
+    snapshot = after.snapshot().to_json()
+    read_after = time.perf_counter() - start
+
+    print(f"{samples} samples from {THREADS} threads across {len(STAGES)} stages")
+    print(f"  before (lists, last {MAX_LOG_SIZE}): record {record_before / samples * 1e6:.2f}us/sample, "
+          f"percentiles {read_before * 1000:.2f}ms")
+    print(f"  after  (histograms, all samples): record {record_after / samples * 1e6:.2f}us/sample, "
+          f"percentiles {read_after * 1000:.2f}ms")
+    for stage, summary in snapshot['stages'].items():
+        print(f"  {stage:20s} n={summary['count']} p50={summary['p50_ms']:.1f}ms "
+              f"p95={summary['p95_ms']:.1f}ms p99={summary['p99_ms']:.1f}ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 400000)
@@ -0,0 +1,64 @@
+"""
+Benchmark coach decision latency with and without streamed parsing.
+
+Simulates the model emitting the coach classification JSON at a fixed
+per-token delay and reports the time until a persist decision can be acted
+on when waiting for the whole completion (before) and when the stream is
+parsed incrementally and closed once the decision is settled (after), plus
+the parser's CPU cost per completion.
+
+Usage: python scripts/benchmarks/bench_coach_streaming.py [token_ms]
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from app.services.coach_llm_service import persist_settled
+from app.services.streaming_json import extract_json, parse_stream
+
+COMPLETION = '```json\n' + json.dumps({
+    'decision': 'persist',
+    'confidence': 0.86,
+    'reasoning': ('The user opened with rapport and is asking a natural discovery question about current '
+                  'tooling; the prospect should answer briefly and let the conversation flow.'),
+    'question_direction': 'user_asking',
+    'state_patch': {'max_sentences': {'value': 2, 'ttl_turns': 4}},
+    'one_shot_line': None
+}, indent=2) + '\n```'
+
+
+def tokens(text, size=4):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def stream(chunks, token_ms):
+    for chunk in chunks:
+        time.sleep(token_ms / 1000)
+        yield chunk
+
+
+def main(token_ms: float = 15.0):
+    chunks = tokens(COMPLETION)
+    print(f"Completion: {len(chunks)} tokens at {token_ms}ms/token")
+
+    start = time.perf_counter()
+    data = extract_json(''.join(stream(chunks, token_ms)))
+    print(f"  before: wait for completion  {(time.perf_counter() - start) * 1000:8.1f} ms  -> {data['decision']}")
+
+    start = time.perf_counter()
+    fields, complete = parse_stream(stream(chunks, token_ms), until=persist_settled)
+    print(f"  after: streamed, early close {(time.perf_counter() - start) * 1000:8.1f} ms  -> {fields['decision']}"
+          f" (complete={complete})")
+
+    iterations = 2000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parse_stream(iter(chunks))
+    print(f"  parser cost per completion   {(time.perf_counter() - start) / iterations * 1e6:8.1f} us")
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 15.0)
@@ -0,0 +1,84 @@
+"""
+Benchmark company profile lookups against a large business_profiles directory.
+
+Writes N profile files to a temporary directory and compares the old
+per-request path (list the directory, print every filename, open and
+parse the file; stdout goes to /dev/null) with CompanyProfileStore:
+startup index, first load, cached hits and a 404.
+
+Usage: python scripts/benchmarks/bench_company_profiles.py [files] [requests]
+"""
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from app.services.company_profile_store import CompanyProfileStore
+
+
+def write_profiles(directory, count):
+    for i in range(count):
+        profile = {
+            'company_id': f'company_{i:05d}',
+            'name': f'Company {i}',
+            'industry': random.choice(['saas', 'healthcare', 'retail', 'manufacturing']),
+            'employees': random.randint(10, 5000),
+            'pain_points': [f'pain point {j}' for j in range(5)],
+            'stakeholders': [{'name': f'Person {j}', 'role': 'Director'} for j in range(4)],
+        }
+        with open(os.path.join(directory, f'company_{i:05d}.json'), 'w') as f:
+            json.dump(profile, f)
+
+
+def scan_and_parse(directory, company_id):
+    files = [f for f in os.listdir(directory) if f.endswith('.json')]
+    print(f"Found {len(files)} JSON files in {directory}:")
+    for f in files:
+        print(f"  - {f}")
+    path = os.path.join(directory, f'{company_id}.json')
+    if not os.path.exists(path):
+        return {'files_in_directory': os.listdir(directory)}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def timed(label, fn, ids):
+    start = time.perf_counter()
+    for company_id in ids:
+        fn(company_id)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<24} {elapsed / len(ids) * 1e6:10.1f} us/request")
+
+
+def main(files: int = 10000, requests: int = 2000):
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as directory:
+        write_profiles(directory, files)
+        # Popular companies get most of the traffic
+        hot = [f'company_{random.randrange(files):05d}' for _ in range(50)]
+        ids = [random.choice(hot) for _ in range(requests)]
+        print(f"{files} profiles, {requests} requests over {len(hot)} companies")
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            for company_id in ids[:max(1, requests // 20)]:
+                scan_and_parse(directory, company_id)
+            legacy = (time.perf_counter() - start) / max(1, requests // 20)
+        print(f"  {'listdir + print + parse':<24} {legacy * 1e6:10.1f} us/request")
+
+        start = time.perf_counter()
+        store = CompanyProfileStore(directory)
+        print(f"  {'startup index':<24} {(time.perf_counter() - start) * 1000:10.1f} ms total ({len(store)} files)")
+        timed('first load', store.get, list(dict.fromkeys(ids)))
+        timed('cached', store.get, ids)
+        timed('not found', store.get, [f'missing_{i}' for i in range(requests)])
+        print(f"  stats: {store.get_stats()}")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,77 @@
+"""
+Microbenchmark for DemographicNameService lookups and selection.
+
+Compares name-to-gender detection as a scan of every culture's name lists
+(before) with the precomputed index (after), and name selection that
+rebuilds filtered lists on every call (before) with the indexed pools and
+LRU recency (after).
+
+Usage: python scripts/benchmarks/bench_demographic_names.py [iterations]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from app.services.demographic_names import DemographicNameService
+
+POOLS = DemographicNameService.NAME_POOLS
+
+
+def scan_gender(first_name):
+    for culture in POOLS:
+        if first_name in POOLS[culture]['female']['first']:
+            return 'female'
+        if first_name in POOLS[culture]['male']['first']:
+            return 'male'
+    return None
+
+
+def filtered_selection(recent, culture, gender, max_recent=100):
+    pool = POOLS[culture][gender]
+    available_first = [name for name in pool['first'] if name not in recent]
+    available_last = [name for name in pool['last'] if name not in recent]
+    if not available_first or not available_last:
+        recent.clear()
+        available_first, available_last = pool['first'], pool['last']
+    first, last = random.choice(available_first), random.choice(available_last)
+    recent.add(first)
+    recent.add(last)
+    if len(recent) > max_recent:
+        for name in list(recent)[:len(recent) - max_recent]:  # Arbitrary entries, not the oldest
+            recent.discard(name)
+    return first, last
+
+
+def timed(label, fn, iterations):
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<10} {elapsed / iterations * 1e6:8.2f} us/call")
+
+
+def main(iterations: int = 200000):
+    rng = random.Random(0)
+    known = [name for culture in POOLS.values() for gender in culture.values() for name in gender['first']]
+    # Mix of known names (hits late in the lists) and unknown names (full scans)
+    queries = [rng.choice(known) if rng.random() < 0.7 else f"Unknown{i}" for i in range(1000)]
+
+    print(f"Gender detection ({len(known)} known first names)")
+    timed('scan', lambda i: scan_gender(queries[i % 1000]), iterations)
+    timed('index', lambda i: DemographicNameService.detect_gender(queries[i % 1000]), iterations)
+
+    print("Name selection (avoid_recent=True)")
+    random.seed(0)
+    recent = set()
+    timed('filtered', lambda i: filtered_selection(recent, 'american_professional', ('female', 'male')[i % 2]),
+          iterations // 4)
+    DemographicNameService.reset_recent()
+    timed('indexed', lambda i: DemographicNameService.get_name_by_demographics(
+        'american_professional', ('female', 'male')[i % 2]), iterations // 4)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
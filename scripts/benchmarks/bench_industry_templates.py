@@ -0,0 +1,76 @@
+"""
+Benchmark industry template matching.
+
+Compares the substring keyword scan that get_industry_template used to run
+(mapping rebuilt per call, first template with any substring hit wins)
+with the compiled word-boundary matcher, cold and memoized, and reports
+how many sample contexts the two disagree on.
+
+Usage: python scripts/benchmarks/bench_industry_templates.py [iterations]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from app.services.industry_persona_templates import INDUSTRY_KEYWORDS, INDUSTRY_ACRONYMS, IndustryMatcher
+
+CONTEXTS = [
+    "Healthcare", "regional hospital network", "B2B SaaS", "IT services", "Managed IT for small business",
+    "fintech startup", "commercial banking", "automotive parts supplier", "K-12 schools", "e-commerce",
+    "consumer electronics retail", "Logistics", "Real estate", "Construction", "Architecture firm",
+    "Waiting list management", "it depends", "Restaurant group", "Nonprofit", "Government",
+    "medical device manufacturing", "higher education technology", "insurance brokerage", "Hospitality",
+]
+
+
+def substring_scan(industry_context):
+    industry_lower = industry_context.lower()
+    industry_mapping = {
+        "healthcare": ["healthcare", "medical", "hospital", "clinic", "pharmaceutical", "pharma"],
+        "technology": ["technology", "tech", "software", "saas", "it", "engineering", "startup"],
+        "manufacturing": ["manufacturing", "industrial", "factory", "production", "automotive"],
+        "education": ["education", "school", "university", "academic", "learning", "training"],
+        "retail": ["retail", "ecommerce", "e-commerce", "store", "shopping", "consumer"],
+        "financial_services": ["financial", "finance", "banking", "insurance", "fintech"]
+    }
+    for template_key, keywords in industry_mapping.items():
+        if any(keyword in industry_lower for keyword in keywords):
+            return template_key
+    return None
+
+
+def timed(label, fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<18} {elapsed / len(queries) * 1e6:8.2f} us/call")
+
+
+def main(iterations: int = 100000):
+    rng = random.Random(0)
+    queries = [rng.choice(CONTEXTS) for _ in range(iterations)]
+    # Distinct strings bypass the memo, so this measures the word scan itself
+    unique = [f"{query} {i}" for i, query in enumerate(queries)]
+
+    warm = IndustryMatcher(INDUSTRY_KEYWORDS, INDUSTRY_ACRONYMS)
+    print(f"Industry matching ({len(CONTEXTS)} sample contexts)")
+    timed('substring scan', substring_scan, queries)
+    timed('compiled (miss)', lambda query: warm._match(' '.join(query.split())), unique)
+    timed('compiled (memo)', warm, queries)
+    print(f"  memo: {warm.match.cache_info()}")
+
+    print("Disagreements (substring scan -> compiled):")
+    for context in CONTEXTS:
+        before, after = substring_scan(context), warm(context)
+        after_industry = after.industry if after else None
+        if before != after_industry:
+            confidence = f" ({after.confidence:.2f})" if after else ""
+            print(f"  {context!r}: {before} -> {after_industry}{confidence}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,99 @@
+"""
+Benchmark the session cookie with and without a cached persona in it.
+
+Builds the signed Flask session cookie a logged-in training user carries
+when the persona lives in the session (before) and when only the persona
+cache token does (after), and reports the Cookie request header size and
+the per-request cost of verifying and decoding it. The after case adds the
+server-side PersonaCache lookup, which only the requests that need the
+persona pay.
+
+Usage: python scripts/benchmarks/bench_persona_cookie.py [iterations]
+"""
+import os
+import random
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from flask import Flask
+
+from app.services.persona_cache import PersonaCache
+
+LOGIN_FIELDS = {'_user_id': '42', '_fresh': True, '_id': secrets.token_hex(64), 'csrf_token': secrets.token_hex(20)}
+
+
+SENTENCES = [
+    'Operations director at a regional logistics company.',
+    'Has sat through too many vendor demos and wants proof before committing budget.',
+    'Reports to a CFO who questions every new subscription.',
+    'Grew up in the business and knows most drivers by name.',
+    'Piloted a routing tool two years ago that the dispatch team quietly abandoned.',
+    'Measures success in on-time deliveries and overtime hours saved.',
+    'Prefers short calls with a clear agenda and a written follow-up.',
+    'Worried that automation will be read by the team as a headcount cut.',
+    'Will ask for a reference customer of similar size within the first ten minutes.',
+    'Has budget authority up to a limit but needs board sign-off above it.',
+    'Skeptical of AI claims after a chatbot project embarrassed the company.',
+    'Open to change when it is framed around customer complaints, not technology.',
+]
+
+
+def sample_persona(i):
+    rng = random.Random(i)
+    return {
+        'name': f'Amara Okafor {i}',
+        'description': ' '.join(rng.sample(SENTENCES, len(SENTENCES))),
+        'personality_traits': {'analytical': 0.8, 'skeptical': 0.7, 'patient': 0.4, 'direct': 0.9},
+        'emotional_state': 'Guarded but curious',
+        'buyer_type': 'Economic Buyer',
+        'decision_authority': 'Final Decision Maker',
+        'pain_points': ['Manual route planning eats two days a week', 'Drivers churn after onboarding',
+                        'No visibility into late deliveries until customers call'],
+        'objections': ['We tried a tool like this in 2022', 'Implementation would disrupt peak season',
+                       'My team will not adopt another dashboard'],
+        'cognitive_biases': {'status_quo': 'Prefers the current spreadsheet process',
+                             'anchoring': 'Compares every price to last year\'s failed rollout'}
+    }
+
+
+def measure(label, serializer, session, iterations):
+    cookie = serializer.dumps(session)
+    header = f"Cookie: session={cookie}"
+    start = time.perf_counter()
+    for _ in range(iterations):
+        serializer.loads(cookie)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {len(header):6d} header bytes  {elapsed / iterations * 1e6:8.1f} us verify+decode")
+
+
+def main(iterations: int = 5000):
+    app = Flask(__name__)
+    app.secret_key = secrets.token_hex(32)
+    serializer = app.session_interface.get_signing_serializer(app)
+
+    persona = sample_persona(1)
+    token = secrets.token_urlsafe(16)
+    print(f"Persona JSON: {len(str(persona))} chars; browsers cap a cookie at ~4096 bytes")
+    measure('login only', serializer, dict(LOGIN_FIELDS), iterations)
+    measure('before: persona in cookie', serializer, {**LOGIN_FIELDS, 'persona_session_1': persona}, iterations)
+    measure('before: two personas', serializer,
+            {**LOGIN_FIELDS, 'persona_session_1': persona, 'persona_session_2': sample_persona(2)}, iterations)
+    measure('after: cache token', serializer, {**LOGIN_FIELDS, 'persona_cache_token': token}, iterations)
+
+    cache = PersonaCache()
+    for i in range(1000):
+        cache.set(f'{i}:{secrets.token_urlsafe(16)}:persona_session_1', sample_persona(i))
+    key = f'42:{token}:persona_session_1'
+    cache.set(key, persona)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        cache.get(key)
+    elapsed = time.perf_counter() - start
+    print(f"  {'after: server-side lookup':<28} {'':>19}{elapsed / iterations * 1e6:8.1f} us (persona requests only)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,90 @@
+"""
+Replay benchmark for conversation phase tracking.
+
+Replays scripted salesperson turns through ConversationStateManager and
+counts phase-classifier (LLM) calls per 100 turns: classifying every turn
+with the LLM (before) vs the heuristic evidence with escalation only on
+close calls (after). The classifier is a counting stand-in, so no API key
+is needed.
+
+Usage: python scripts/benchmarks/bench_phase_tracking.py [conversations]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from app.services.conversation_state_manager import ConversationPhase, ConversationStateManager
+
+# Salesperson turns by phase, in call order
+TURNS = [
+    (ConversationPhase.RAPPORT, [
+        "Hi, how are you today?", "Nice to meet you, thanks for making the time.",
+        "How was your weekend?", "Tell me a bit about your background.",
+    ]),
+    (ConversationPhase.DISCOVERY, [
+        "What problems are you trying to solve right now?", "What are you looking for in a new tool?",
+        "What would you need to improve first?", "Is there an issue with how your team handles this today?",
+        "What challenge takes the most time each week?", "Okay, got it.",
+    ]),
+    (ConversationPhase.PRESENTATION, [
+        "This feature gives you real-time visibility, which sounds like what you described.",
+        "The main benefit is the value your reps get in week one.",
+        "Here's how it would work for your team.", "Customers like that it integrates with their CRM.",
+    ]),
+    (ConversationPhase.OBJECTION_HANDLING, [
+        "I hear you that it seems expensive; let's look at the cost of not fixing this.",
+        "If you're worried about the risk, we offer a pilot.",
+        "Compared to the competitor, the difference is support.", "That's fair, is there anything else?",
+    ]),
+    (ConversationPhase.CLOSING, [
+        "What would the next steps look like on your side?", "Can we agree on a timeline to start?",
+        "If this works, are you ready to sign the agreement?", "Who else is involved in the decision?",
+    ]),
+]
+
+
+class CountingClassifier:
+    def __init__(self):
+        self.calls = 0
+        self.phase = ConversationPhase.UNKNOWN
+
+    def __call__(self, recent_messages):
+        self.calls += 1
+        return self.phase
+
+
+def conversations(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        turns = []
+        for phase, options in TURNS:
+            turns.extend((phase, rng.choice(options)) for _ in range(rng.randint(2, 5)))
+        yield turns
+
+
+def main(count: int = 200):
+    turns = calls = agree = 0
+    start = time.perf_counter()
+    for conversation in conversations(count):
+        classifier = CountingClassifier()
+        manager = ConversationStateManager(phase_classifier=classifier)
+        for expected, utterance in conversation:
+            classifier.phase = expected  # A perfect LLM, so accuracy reflects the heuristics
+            manager.update_phase(utterance)
+            manager.settle()  # The background classification lands before the next turn
+            agree += manager.current_state["likely_phase"] == expected
+        turns += len(conversation)
+        calls += classifier.calls
+    elapsed = time.perf_counter() - start
+
+    print(f"Replayed {count} conversations, {turns} turns")
+    print(f"LLM calls per 100 turns: before {100.0:.1f}, after {calls / turns * 100:.1f}")
+    print(f"Phase matches script: {agree / turns:.1%}")
+    print(f"Heuristic cost: {elapsed / turns * 1e6:.1f} us per turn")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
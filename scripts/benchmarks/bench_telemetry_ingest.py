@@ -0,0 +1,69 @@
+"""
+Benchmark for client telemetry ingestion.
+
+Measures the request-path cost of a /call-metrics payload before (format it
+with json.dumps(indent=2) for the log) and after (validate into compact rows
+and enqueue), then how long until the background flusher has written every row to
+client_telemetry_events in a temporary SQLite database.
+
+Usage: python scripts/benchmarks/bench_telemetry_ingest.py [events]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from flask import Flask
+
+from app.extensions import db
+from app.services.telemetry_ingest import DatabaseSink, TelemetryIngestor, call_metrics_rows
+
+
+def _payload(i):
+    return {
+        'event': 'RESPONSE', 'sessionId': f'call-{i % 50}', 'personaName': 'Dana',
+        'timestamp': '2026-03-01T10:00:00Z',
+        'metrics': {'duration': i * 10, 'reconnectAttempts': i % 3, 'latencyMs': 200 + i % 700,
+                    'turns': i % 40, 'audio': {'sampleRate': 24000, 'codec': 'linear16'}}
+    }
+
+
+def main(events):
+    payloads = [_payload(i) for i in range(events)]
+
+    start = time.perf_counter()
+    for payload in payloads:
+        json.dumps(payload['metrics'], indent=2)
+    before = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+
+        ingestor = TelemetryIngestor(DatabaseSink(app))
+        start = time.perf_counter()
+        for payload in payloads:
+            ingestor.enqueue(call_metrics_rows(payload))
+        after = time.perf_counter() - start
+
+        # The background thread has been flushing full batches meanwhile
+        while ingestor.stats['written'] < events:
+            time.sleep(0.005)
+        flush = time.perf_counter() - start
+        written = ingestor.stats['written']
+
+    print(f"{events} call-metrics payloads")
+    print(f"  before (pretty-printed to log): {before / events * 1e6:.1f}us per request, nothing stored")
+    print(f"  after  (validate + enqueue):    {after / events * 1e6:.1f}us per request")
+    print(f"  all rows stored after {flush * 1000:.0f}ms ({written / flush:,.0f} rows/s, "
+          f"{ingestor.stats['batches']} batches)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
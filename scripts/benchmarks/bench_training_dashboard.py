@@ -0,0 +1,78 @@
+"""
+Benchmark training dashboard aggregation.
+
+Seeds a temporary SQLite database with N sessions for one user and compares
+loading every TrainingSession (the previous show_dashboard approach) with
+the SQL-aggregated build_dashboard_context and its memoized lookup.
+
+Usage: python scripts/benchmarks/bench_training_dashboard.py [sessions]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from flask import Flask
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import TrainingSession
+from app.services.training_dashboard_service import DashboardCache, build_dashboard_context
+
+
+def seed(profile_id: int, count: int):
+    rng = random.Random(0)
+    end = datetime.utcnow()
+    for i in range(count):
+        finished = end - timedelta(hours=12 * (count - i))
+        session = TrainingSession(
+            user_profile_id=profile_id, status='completed' if i % 5 else 'canceled',
+            start_time=finished - timedelta(minutes=15), end_time=finished,
+            session_length=900, overall_score=rng.uniform(40, 95)
+        )
+        session.conversation = [{'role': 'user', 'content': 'hello ' * 40}] * 20  # Realistic row width
+        db.session.add(session)
+    db.session.commit()
+
+
+def timed(label: str, fn, iterations: int):
+    statements = []
+    listener = lambda *args: statements.append(1)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+        db.session.expire_all()
+    elapsed = (time.perf_counter() - start) / iterations
+    event.remove(db.engine, 'before_cursor_execute', listener)
+    print(f"{label:<28} {elapsed * 1000:8.2f} ms  {len(statements) / iterations:5.1f} queries")
+
+
+def main(count: int = 1000):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            seed(1, count)
+            print(f"{count} sessions for one user")
+
+            def full_scan():
+                sessions = TrainingSession.query.filter_by(user_profile_id=1).order_by(TrainingSession.start_time.desc()).all()
+                return [s.overall_score for s in sessions if s.status == 'completed']
+
+            cache = DashboardCache()
+            timed("load all sessions (old)", full_scan, 20)
+            timed("build_dashboard_context", lambda: build_dashboard_context(1), 20)
+            cache.get(1)
+            timed("memoized (cache hit)", lambda: cache.get(1), 200)
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,90 @@
+"""
+Benchmark filler TTS with and without the audio cache.
+
+Serves a stand-in /speak endpoint locally that takes synth_ms before its
+first byte (Deepgram Aura is typically 150-300ms for a short phrase) and
+reports time to first byte and to the last byte for a filler spoken
+through DeepgramHTTPClient.speak (before), and through speak_cached on a
+miss, a memory hit and a disk hit (after a restart).
+
+Usage: python scripts/benchmarks/bench_tts_cache.py [iterations] [synth_ms]
+"""
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from app.services.deepgram_http import DeepgramHTTPClient, tts_cache_key
+from app.services.tts_cache import TTSCache
+
+AUDIO = os.urandom(12 * 1024)  # About a second of 96 kbps mp3
+
+
+def make_handler(synth_ms):
+    class FakeSpeak(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(synth_ms / 1000)
+            self.send_response(200)
+            self.send_header('Content-Type', 'audio/mpeg')
+            self.send_header('Content-Length', str(len(AUDIO)))
+            self.end_headers()
+            self.wfile.write(AUDIO)
+    return FakeSpeak
+
+
+def timed(speak):
+    start = time.perf_counter()
+    _, audio = speak()
+    first = None
+    for _ in audio:
+        if first is None:
+            first = time.perf_counter() - start
+    return first * 1000, (time.perf_counter() - start) * 1000
+
+
+def report(label, samples):
+    first = statistics.median(s[0] for s in samples)
+    total = statistics.median(s[1] for s in samples)
+    print(f"  {label:<22} first byte {first:8.2f} ms   last byte {total:8.2f} ms")
+
+
+def main(iterations: int = 20, synth_ms: float = 200):
+    logging.disable(logging.INFO)  # One index line per simulated restart
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(synth_ms))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    client = DeepgramHTTPClient(api_key='bench', base_url=f'http://{host}:{port}')
+    phrase = 'Let me think...'
+
+    with tempfile.TemporaryDirectory() as directory:
+        report('before: speak', [timed(lambda: client.speak(phrase)) for _ in range(iterations)])
+
+        cache = TTSCache(directory=directory)
+        report('after: miss', [timed(lambda: client.speak_cached(phrase, cache=cache))])
+        report('after: memory hit', [timed(lambda: client.speak_cached(phrase, cache=cache))
+                                     for _ in range(iterations)])
+
+        samples = []
+        for _ in range(iterations):
+            restarted = TTSCache(directory=directory)  # Empty memory tier
+            samples.append(timed(lambda: client.speak_cached(phrase, cache=restarted)))
+        report('after: disk hit', samples)
+        assert tts_cache_key(phrase) in restarted
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20, float(sys.argv[2]) if len(sys.argv) > 2 else 200)
@@ -0,0 +1,31 @@
+"""
+Rebuild the per-user dashboard rollups (user_metrics_rollups) from scratch.
+
+Run after the migration that creates the table, or to repair drift:
+    python scripts/database/backfill_user_metrics.py            # all users
+    python scripts/database/backfill_user_metrics.py --user 42  # one user
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from app import create_app
+from app.services.user_metrics_rollup import rebuild_user_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--user', type=int, default=None, help='Rebuild a single user id')
+    parser.add_argument('--batch-size', type=int, default=500, help='Sessions fetched per round trip')
+    args = parser.parse_args()
+
+    app = create_app(os.environ.get('FLASK_ENV', 'development'))
+    with app.app_context():
+        rebuilt = rebuild_user_metrics(args.user, batch_size=args.batch_size)
+        print(f"Rebuilt {rebuilt} user metrics rollup(s)")
+
+
+if __name__ == '__main__':
+    main()
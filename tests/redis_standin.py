@@ -0,0 +1,144 @@
+"""
+Local Redis-protocol stand-in for tests.
+
+Speaks RESP over TCP on an ephemeral port and implements the handful of
+commands the app uses. EVAL is served by Python callables registered per
+script, so tests exercise the real client and wire encoding without a
+Redis server.
+"""
+import socketserver
+import threading
+import time
+
+from app.utils.redis_client import encode_reply, parse_command
+
+
+class RedisStandIn:
+    """Threaded RESP server backed by a dict; use as a context manager."""
+
+    def __init__(self, scripts=None):
+        self.data = {}
+        self.expiry = {}
+        self.scripts = dict(scripts or {})
+        self.commands = []
+        self.lock = threading.Lock()
+        standin = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    args = parse_command(self.rfile)
+                    if args is None:
+                        return
+                    self.wfile.write(encode_reply(standin.dispatch(args)))
+
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"redis://127.0.0.1:{self.server.server_address[1]}/0"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _expire(self, key):
+        deadline = self.expiry.get(key)
+        if deadline is not None and deadline <= time.time():
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+
+    def dispatch(self, args):
+        name, rest = args[0].upper(), args[1:]
+        with self.lock:
+            self.commands.append(name)
+            for key in rest[:1]:
+                self._expire(key)
+            try:
+                return getattr(self, f'cmd_{name.lower()}')(*rest)
+            except Exception as e:
+                return e
+
+    def cmd_ping(self):
+        return 'PONG'
+
+    def cmd_select(self, db):
+        return 'OK'
+
+    def cmd_get(self, key):
+        return self.data.get(key)
+
+    def cmd_set(self, key, value, *options):
+        self.data[key] = value
+        self.expiry.pop(key, None)
+        if len(options) >= 2 and options[0].upper() == 'PX':
+            self.expiry[key] = time.time() + int(options[1]) / 1000
+        return 'OK'
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            removed += self.data.pop(key, None) is not None
+            self.expiry.pop(key, None)
+        return removed
+
+    def cmd_exists(self, *keys):
+        for key in keys:
+            self._expire(key)
+        return sum(key in self.data for key in keys)
+
+    def cmd_expire(self, key, seconds):
+        if key not in self.data:
+            return 0
+        self.expiry[key] = time.time() + int(seconds)
+        return 1
+
+    def cmd_hset(self, key, *pairs):
+        fields = self.data.setdefault(key, {})
+        added = sum(field not in fields for field in pairs[0::2])
+        fields.update(zip(pairs[0::2], pairs[1::2]))
+        return added
+
+    def cmd_hgetall(self, key):
+        return [x for item in self.data.get(key, {}).items() for x in item]
+
+    def cmd_rpush(self, key, *values):
+        items = self.data.setdefault(key, [])
+        items.extend(values)
+        return len(items)
+
+    def cmd_lrange(self, key, start, stop):
+        items = self.data.get(key, [])
+        start, stop = int(start), int(stop)
+        stop = len(items) if stop == -1 else stop + 1
+        return items[start:stop]
+
+    def cmd_llen(self, key):
+        return len(self.data.get(key, []))
+
+    def cmd_sadd(self, key, *members):
+        members_set = self.data.setdefault(key, set())
+        added = len(set(members) - members_set)
+        members_set.update(members)
+        return added
+
+    def cmd_srem(self, key, *members):
+        members_set = self.data.get(key, set())
+        removed = len(members_set & set(members))
+        members_set.difference_update(members)
+        return removed
+
+    def cmd_smembers(self, key):
+        return sorted(self.data.get(key, set()))
+
+    def cmd_scard(self, key):
+        return len(self.data.get(key, set()))
+
+    def cmd_eval(self, script, numkeys, *rest):
+        numkeys = int(numkeys)
+        keys, argv = list(rest[:numkeys]), list(rest[numkeys:])
+        for key in keys:
+            self._expire(key)
+        return self.scripts[script](self, keys, argv)
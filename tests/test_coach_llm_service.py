@@ -0,0 +1,138 @@
+import json
+
+import pytest
+from flask import Flask
+
+from app.services.coach_async_planner import CoachAsyncPlanner
+from app.services.coach_llm_service import EARLY_PERSIST_REASONING, CoachLLMService, persist_settled
+from app.services.coach_metrics import get_metrics
+from app.services.gpt4o_service import GPT4oServiceError
+from app.services.llm_admission import AdmissionRejected, Priority
+from app.services.llm_router import NoProviderAvailable
+
+PERSIST = {'decision': 'persist', 'confidence': 0.9, 'reasoning': 'Flowing naturally. ' * 40,
+           'question_direction': 'neutral', 'state_patch': {}}
+INTERVENE = {'decision': 'intervene', 'confidence': 0.8, 'reasoning': 'User is coasting',
+             'state_patch': {'max_sentences': {'value': 2, 'ttl_turns': 4}, 'pressure_level': {'value': 7}},
+             'one_shot_line': 'What are you replacing?'}
+
+
+class FakeGPT:
+    """Streams a canned completion a few characters at a time"""
+
+    def __init__(self, output, stream_error=None):
+        self.output = output
+        self.stream_error = stream_error
+        self.streamed = 0
+        self.closed = False
+        self.unstreamed_calls = 0
+
+    def stream_response(self, messages, temperature, max_tokens, system_prompt=''):
+        if self.stream_error:
+            raise self.stream_error
+        return self._chunks()
+
+    def _chunks(self):
+        try:
+            for i in range(0, len(self.output), 4):
+                self.streamed = i + 4
+                yield self.output[i:i + 4]
+        finally:
+            self.closed = True
+
+    def generate_response(self, messages, temperature, max_tokens, system_prompt=''):
+        self.unstreamed_calls += 1
+        return self.output
+
+
+@pytest.fixture
+def app_context():
+    with Flask(__name__).app_context():
+        yield
+
+
+def _coach(gpt):
+    coach = CoachLLMService.__new__(CoachLLMService)
+    coach.gpt = gpt
+    return coach
+
+
+def _classify(coach):
+    return coach.classify('Hi, how are you?', [], {'name': 'Dana'}, {}, session_id='s1', turn=1)
+
+
+def test_persist_stops_generation_after_confidence(app_context):
+    gpt = FakeGPT('```json\n' + json.dumps(PERSIST) + '\n```')
+    early_before = get_metrics().snapshot().counters.get('coach_early_decision', 0)
+
+    decision = _classify(_coach(gpt))
+
+    assert not decision.should_intervene and decision.confidence == 0.9
+    assert gpt.closed and gpt.streamed < len(gpt.output) // 4  # Stopped long before the reasoning ended
+    # Reasoning comes after confidence in the prompt, so an early persist has none
+    assert decision.reasoning == EARLY_PERSIST_REASONING
+    assert get_metrics().snapshot().counters['coach_early_decision'] == early_before + 1
+
+
+def test_intervene_reads_whole_object_and_validates_it(app_context):
+    gpt = FakeGPT('Here you go: ' + json.dumps(INTERVENE))
+    decision = _classify(_coach(gpt))
+
+    assert decision.should_intervene and decision.confidence == 0.8
+    assert decision.state_patch == {'max_sentences': {'value': 2, 'ttl_turns': 4}}  # Invalid pressure dropped
+    assert decision.one_shot_line == 'What are you replacing?'
+
+
+@pytest.mark.parametrize('output', [
+    '{"decision": "intervene", "confidence": 0.9, "reasoning": "user dodged price", '
+    '"state_patch": {"pressure_level": {"value": 0.8, "tt',
+    json.dumps(INTERVENE)[:json.dumps(INTERVENE).index('"one_shot_line"') + 5],
+])
+def test_truncated_intervene_falls_back_to_persist(app_context, output):
+    before = get_metrics().snapshot().counters.get('coach_early_decision', 0)
+    decision = _classify(_coach(FakeGPT(output)))  # max_tokens ran out
+    assert not decision.should_intervene and decision.confidence == 0.0
+    assert decision.reasoning.startswith('Parse error')
+    assert get_metrics().snapshot().counters.get('coach_early_decision', 0) == before
+
+
+def test_unparseable_output_falls_back_to_persist(app_context):
+    decision = _classify(_coach(FakeGPT('I cannot classify this.')))
+    assert not decision.should_intervene and decision.confidence == 0.0
+    assert decision.reasoning.startswith('Parse error')
+
+
+def test_stream_failure_retries_unstreamed(app_context):
+    gpt = FakeGPT(json.dumps(INTERVENE), stream_error=GPT4oServiceError('stream refused'))
+    decision = _classify(_coach(gpt))
+    assert decision.should_intervene and gpt.unstreamed_calls == 1
+
+
+@pytest.mark.parametrize('error', [AdmissionRejected(Priority.COACH_CLASSIFY, 'queue_full'),
+                                   NoProviderAvailable('All providers have open circuits')])
+def test_shed_or_unavailable_goes_to_safe_fallback(app_context, error):
+    gpt = FakeGPT(json.dumps(INTERVENE), stream_error=error)
+    decision = _classify(_coach(gpt))
+    assert not decision.should_intervene and decision.confidence == 0.0
+    assert gpt.unstreamed_calls == 0  # No second request behind a shedding gate
+
+
+def test_persist_settled_needs_valid_decision_and_confidence():
+    assert persist_settled({'decision': 'PERSIST', 'confidence': 0.4})
+    assert not persist_settled({'decision': 'persist'})
+    assert not persist_settled({'decision': 'intervene', 'confidence': 0.9})
+    assert not persist_settled({'decision': 'persist', 'confidence': 'high'})
+
+
+def test_planner_parses_plan_with_braces_in_strings():
+    planner = CoachAsyncPlanner.__new__(CoachAsyncPlanner)
+    plan = planner._parse_plan('Plan below.\n```json\n' + json.dumps({
+        'suggested_phase': 'discovery', 'phase_confidence': 1.7, 'pending_trap': None,
+        'pressure_adjustment': 0.1, 'objection_to_introduce': 'budget',
+        'reasoning': 'User said "we spend {a lot}" on tooling }', 'facts_detected': {'budget_range': '100k+'}
+    }) + '\n```')
+    assert plan.suggested_phase == 'discovery' and plan.phase_confidence == 1.0
+    assert plan.reasoning == 'User said "we spend {a lot}" on tooling }'
+    assert plan.facts_detected == {'budget_range': '100k+'}
+
+    assert planner._parse_plan('{"phase_confidence": "high"}').reasoning.startswith('Parse error')
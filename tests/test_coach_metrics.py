@@ -0,0 +1,147 @@
+import random
+import threading
+
+import pytest
+
+from app.services.coach_metrics import (
+    BUCKET_COUNT,
+    CoachMetrics,
+    HistogramSnapshot,
+    LatencyHistogram,
+    MetricsSnapshot,
+    bucket_bounds,
+    bucket_index
+)
+from app.utils.redis_client import RedisClient
+from tests.redis_standin import RedisStandIn
+
+
+def test_bucket_index_and_bounds_agree():
+    for value in list(range(200)) + [random.Random(1).randrange(3_600_000_000) for _ in range(5000)]:
+        lower, upper = bucket_bounds(bucket_index(value))
+        assert lower <= value < upper
+        # Relative bucket width stays under ~3.2% past the linear range
+        assert upper - lower <= max(1, lower / 31)
+    assert bucket_index(3_600_000_000) == BUCKET_COUNT - 1
+
+
+def test_percentiles_within_relative_error():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(4, 1) for _ in range(20000)]  # Milliseconds
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    snapshot = histogram.snapshot()
+    ordered = sorted(values)
+    assert snapshot.count == len(values)
+    for q in (50, 95, 99):
+        exact = ordered[int(q / 100 * len(ordered)) - 1]
+        assert snapshot.percentile(q) == pytest.approx(exact, rel=0.04)
+    assert snapshot.percentile(100) == pytest.approx(max(values), rel=0.001)
+    assert snapshot.mean() == pytest.approx(sum(values) / len(values), rel=0.001)
+
+
+def test_per_thread_recording_merges_to_exact_counts():
+    histogram = LatencyHistogram()
+
+    def record(seed):
+        rng = random.Random(seed)
+        for _ in range(5000):
+            histogram.record(rng.uniform(1, 500))
+
+    threads = [threading.Thread(target=record, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    snapshot = histogram.snapshot()
+    assert snapshot.count == 40000
+    assert sum(snapshot.counts) == 40000
+
+
+def test_finished_threads_fold_into_retired_totals():
+    """A thread-per-request server must not grow shards without bound."""
+    metrics = CoachMetrics()
+
+    def request(i):
+        metrics.record_latency('tts', i + 1)
+        metrics.increment('tts_cache_hit')
+
+    for i in range(200):
+        thread = threading.Thread(target=request, args=(i,))
+        thread.start()
+        thread.join()
+
+    histogram = metrics._histograms['tts']
+    assert histogram.shard_count == 0
+    assert len(metrics._counter_shards) == 0
+    snapshot = metrics.snapshot()
+    assert snapshot.stages['tts'].count == 200
+    assert snapshot.stages['tts'].min_us == 1000 and snapshot.stages['tts'].max_us == 200_000
+    assert snapshot.counters['tts_cache_hit'] == 200
+
+
+def test_snapshots_merge_and_roundtrip():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    for value in range(1, 101):
+        a.record(value)
+        b.record(value * 10)
+
+    merged = HistogramSnapshot().merge(a.snapshot()).merge(b.snapshot())
+    restored = HistogramSnapshot.from_dict(merged.to_dict())
+    assert restored == merged
+    assert restored.count == 200
+    assert restored.min_us == 1000 and restored.max_us == 1_000_000
+    exact = sorted(list(range(1, 101)) + [value * 10 for value in range(1, 101)])[99]
+    assert restored.percentile(50) == pytest.approx(exact, rel=0.04)
+
+
+def test_metrics_export_formats():
+    metrics = CoachMetrics()
+    for value in (10, 20, 30):
+        metrics.record_latency('sync_classify', value)
+    metrics.increment('tts_cache_hit', 2)
+    metrics.increment('llm_escalation')
+
+    summary = metrics.snapshot().to_json()
+    assert summary['stages']['sync_classify']['count'] == 3
+    assert summary['stages']['tts']['count'] == 0
+    assert summary['counters'] == {'llm_escalation': 1, 'tts_cache_hit': 2}
+
+    text = metrics.snapshot().to_prometheus()
+    assert 'coach_stage_latency_seconds{stage="sync_classify",quantile="0.5"} 0.020' in text
+    assert 'coach_stage_latency_seconds_count{stage="sync_classify"} 3' in text
+    assert 'coach_events_total{event="tts_cache_hit"} 2' in text
+
+
+def test_workers_aggregate_through_shared_store():
+    with RedisStandIn() as standin:
+        client = RedisClient.from_url(standin.url)
+        worker_a, worker_b = CoachMetrics(), CoachMetrics()
+        worker_a.record_latency('tts', 100)
+        worker_b.record_latency('tts', 300)
+        worker_b.increment('tts_cache_hit')
+
+        worker_a.publish(client, worker_id='a')
+        worker_b.publish(client, worker_id='b')
+        merged = CoachMetrics.collect(client)
+
+        assert merged.workers == 2
+        assert merged.stages['tts'].count == 2
+        assert merged.counters == {'tts_cache_hit': 1}
+
+        # An expired worker is dropped from the index
+        standin.data.pop('coach_metrics:worker:a')
+        assert CoachMetrics.collect(client).workers == 1
+        assert standin.data['coach_metrics:workers'] == {'b'}
+
+
+def test_decision_log_is_bounded():
+    metrics = CoachMetrics()
+    for turn in range(CoachMetrics.MAX_LOG_SIZE + 50):
+        metrics.log_decision('s1', {'should_intervene': False, 'confidence': 0.5}, 'hello', turn)
+    assert len(metrics.decisions_log) == CoachMetrics.MAX_LOG_SIZE
+    assert metrics.decisions_log[0]['turn'] == 50
+    assert isinstance(MetricsSnapshot().merge(metrics.snapshot()), MetricsSnapshot)
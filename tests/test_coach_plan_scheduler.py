@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from app.services.coach_async_planner import StrategicPlan
+from app.services.coach_plan_scheduler import CoachPlanScheduler
+from app.services.session_state import SessionState
+
+
+class FakePlanner:
+    """Planner whose calls block until released (or sleep for `latency`)."""
+
+    def __init__(self, latency=0.0, gated=False):
+        self.latency = latency
+        self.gate = threading.Event()
+        if not gated:
+            self.gate.set()
+        self.started = threading.Semaphore(0)
+        self.calls = []
+
+    def plan(self, current_turn, transcript_history, **kwargs):
+        self.calls.append((current_turn, len(transcript_history)))
+        self.started.release()
+        self.gate.wait(5)
+        time.sleep(self.latency)
+        return StrategicPlan(
+            suggested_phase=None, phase_confidence=0.0, pending_trap=None,
+            pressure_adjustment=0.0, objection_to_introduce=None,
+            reasoning=f"turn {current_turn}", facts_detected={'turns_seen': str(len(transcript_history))}
+        )
+
+
+@pytest.fixture
+def states():
+    return {}
+
+
+def _scheduler(planner, states):
+    return CoachPlanScheduler(
+        planner=planner,
+        get_state=lambda session_id: states.setdefault(session_id, SessionState(session_id))
+    )
+
+
+def test_single_plan_is_applied(states):
+    scheduler = _scheduler(FakePlanner(), states)
+    outcome = scheduler.plan('s1', 0, transcript_history=[{'content': 'hi'}])
+
+    assert outcome.applied and outcome.base_turn == 0
+    assert states['s1'].get_facts() == {'turns_seen': '1'}
+    assert scheduler.get_stats() == {
+        'submitted': 1, 'started': 1, 'coalesced': 0, 'superseded': 0,
+        'applied': 1, 'stale': 0, 'failed': 0, 'sessions_in_flight': 0
+    }
+
+
+def test_burst_runs_one_plan_in_flight_and_latest_queued(states):
+    planner = FakePlanner(gated=True)
+    scheduler = _scheduler(planner, states)
+
+    first = scheduler.submit('s1', 0, transcript_history=[1])
+    assert planner.started.acquire(timeout=5)
+    queued = [scheduler.submit('s1', 0, transcript_history=[1] * n) for n in (2, 3, 4)]
+
+    planner.gate.set()
+    assert first.result(5).plan.facts_detected == {'turns_seen': '1'}
+    outcomes = [future.result(5) for future in queued]
+
+    # Superseded callers get the newest turn's plan; only two LLM calls were made
+    assert all(outcome.plan.facts_detected == {'turns_seen': '4'} for outcome in outcomes)
+    assert [calls for _, calls in planner.calls] == [1, 4]
+    stats = scheduler.get_stats()
+    assert stats['coalesced'] == 3 and stats['superseded'] == 2
+    assert stats['started'] == 2 and stats['applied'] == 2
+    assert stats['sessions_in_flight'] == 0
+
+
+def test_plan_finishing_after_turn_advances_is_discarded(states):
+    planner = FakePlanner(gated=True)
+    scheduler = _scheduler(planner, states)
+    state = states.setdefault('s1', SessionState('s1'))
+
+    future = scheduler.submit('s1', state.current_turn, transcript_history=[])
+    assert planner.started.acquire(timeout=5)
+    state.apply_patch({})  # Prospect responded while the plan was running
+    planner.gate.set()
+
+    outcome = future.result(5)
+    assert not outcome.applied
+    assert state.get_facts() == {}
+    assert scheduler.get_stats()['stale'] == 1
+
+
+def test_sessions_plan_concurrently(states):
+    planner = FakePlanner(latency=0.2)
+    scheduler = _scheduler(planner, states)
+
+    start = time.perf_counter()
+    futures = [scheduler.submit(f's{i}', 0, transcript_history=[]) for i in range(4)]
+    assert all(future.result(5).applied for future in futures)
+    assert time.perf_counter() - start < 0.6
+    assert scheduler.get_stats()['coalesced'] == 0
+
+
+def test_planner_error_reaches_waiters_and_frees_session(states):
+    class FailingPlanner(FakePlanner):
+        def plan(self, **kwargs):
+            raise RuntimeError('boom')
+
+    scheduler = _scheduler(FailingPlanner(), states)
+    with pytest.raises(RuntimeError):
+        scheduler.plan('s1', 0, transcript_history=[])
+    assert scheduler.get_stats()['failed'] == 1
+
+    scheduler._planner = FakePlanner()
+    assert scheduler.plan('s1', 0, transcript_history=[]).applied
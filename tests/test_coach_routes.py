@@ -0,0 +1,54 @@
+import pytest
+from flask import Flask
+from flask_login import LoginManager, UserMixin
+
+from app.routes.api.coach_routes import coach_bp, coach_debug_bp
+
+ADMIN_EMAIL = 'admin@example.com'
+
+
+class User(UserMixin):
+    id = 7
+
+    def __init__(self, email):
+        self.email = email
+
+
+def _client(debug=False):
+    app = Flask(__name__)
+    app.config.update(ADMIN_EMAIL=ADMIN_EMAIL)
+    app.register_blueprint(coach_bp)
+    if debug:
+        app.register_blueprint(coach_debug_bp)  # As create_app does in debug mode
+    login_manager = LoginManager(app)
+    login_manager.request_loader(
+        lambda request: User(request.headers['X-User']) if 'X-User' in request.headers else None)
+    login_manager.unauthorized_handler(lambda: ({'error': 'Authentication is required'}, 401))
+    return app.test_client()
+
+
+@pytest.fixture
+def client():
+    return _client()
+
+
+@pytest.mark.parametrize('method, path', [('post', '/api/coach/sync-classify'), ('post', '/api/coach/async-plan'),
+                                          ('get', '/api/coach/metrics'), ('get', '/api/coach/llm-providers')])
+def test_coach_routes_need_a_login(client, method, path):
+    assert getattr(client, method)(path, json={}).status_code == 401
+
+
+@pytest.mark.parametrize('path', ['/api/coach/metrics', '/api/coach/plan-stats', '/api/coach/llm-admission',
+                                  '/api/coach/llm-retries', '/api/coach/llm-providers'])
+def test_pipeline_stats_are_admin_only(client, path):
+    assert client.get(path, headers={'X-User': 'rep@example.com'}).status_code == 403
+    assert client.get(path, headers={'X-User': ADMIN_EMAIL}).status_code == 200
+
+
+def test_state_is_on_the_debug_blueprint_only(client):
+    assert client.get('/api/coach/state', headers={'X-User': ADMIN_EMAIL}).status_code == 404
+
+    client = _client(debug=True)
+    assert client.get('/api/coach/state?session_id=s1').status_code == 401
+    response = client.get('/api/coach/state?session_id=s1', headers={'X-User': 'rep@example.com'})
+    assert response.status_code == 200 and response.get_json()['session_id'] == 's1'
@@ -0,0 +1,122 @@
+import json
+import os
+
+import pytest
+from flask import Flask
+
+from app.routes.api import company_routes
+from app.services import company_profile_store as store_module
+from app.services.company_profile_store import CompanyProfileStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _write(directory, company_id, data, mtime_ns=None):
+    path = directory / f'{company_id}.json'
+    path.write_text(json.dumps(data))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def profiles(tmp_path):
+    _write(tmp_path, 'acme', {'name': 'Acme', 'size': 120})
+    _write(tmp_path, 'globex', {'name': 'Globex'})
+    (tmp_path / 'notes.txt').write_text('not a profile')
+    return tmp_path
+
+
+def test_index_built_once_and_served_from_cache(profiles, clock, monkeypatch):
+    store = CompanyProfileStore(profiles, clock=clock)
+    assert sorted(store.ids()) == ['acme', 'globex']
+
+    def scan(*args, **kwargs):
+        raise AssertionError('directory scanned during a lookup')
+    monkeypatch.setattr(os, 'scandir', scan)
+    monkeypatch.setattr(os, 'listdir', scan)
+
+    first = store.get('acme')
+    assert first.data == {'name': 'Acme', 'size': 120}
+    assert json.loads(first.body) == first.data
+    assert store.get('acme.json') is first
+    assert store.get_stats()['loads'] == 1 and store.get_stats()['hits'] == 1
+
+
+def test_mtime_change_reloads_after_check_interval(profiles, clock):
+    store = CompanyProfileStore(profiles, check_interval=1.0, clock=clock)
+    original = store.get('acme')
+
+    _write(profiles, 'acme', {'name': 'Acme Corp', 'size': 120}, mtime_ns=original.mtime_ns + 10**9)
+    assert store.get('acme') is original  # Within the check interval: no stat
+    clock.now += 1.0
+    updated = store.get('acme')
+    assert updated.data['name'] == 'Acme Corp' and updated.etag != original.etag
+    assert store.get_stats()['reloads'] == 1
+
+    # Unchanged file: a stat, no reparse
+    clock.now += 1.0
+    assert store.get('acme') is updated
+
+
+def test_added_and_deleted_files(profiles, clock):
+    store = CompanyProfileStore(profiles, check_interval=0, clock=clock)
+    assert store.get('initech') is None
+    _write(profiles, 'initech', {'name': 'Initech'})
+    assert store.get('initech').data == {'name': 'Initech'}  # Found without a rescan
+    assert 'initech' in store.ids()
+
+    (profiles / 'globex.json').unlink()
+    assert store.get('globex') is None
+    assert 'globex' not in store.ids()
+
+
+@pytest.mark.parametrize('company_id', ['../secrets', '..', '.hidden', 'a/b', '', 'notes.txt'])
+def test_rejects_unsafe_or_unknown_ids(profiles, clock, company_id):
+    (profiles.parent / 'secrets.json').write_text('{}')
+    store = CompanyProfileStore(profiles, clock=clock)
+    assert store.get(company_id) is None
+
+
+def test_invalid_json_is_reported_not_cached(profiles, clock):
+    (profiles / 'broken.json').write_text('{"name": ')
+    store = CompanyProfileStore(profiles, clock=clock)
+    with pytest.raises(json.JSONDecodeError):
+        store.get('broken')
+    _write(profiles, 'broken', {'name': 'Fixed'})
+    assert store.get('broken').data == {'name': 'Fixed'}
+
+
+@pytest.fixture
+def client(profiles, monkeypatch):
+    monkeypatch.setattr(store_module, '_store', None)
+    monkeypatch.setattr(company_routes, 'PROFILE_DIR', profiles)
+    app = Flask(__name__)
+    app.register_blueprint(company_routes.company_bp, url_prefix='/api')
+    yield app.test_client()
+    store_module._store = None
+
+
+def test_route_etag_and_not_found(client):
+    response = client.get('/api/company/acme')
+    assert response.status_code == 200 and response.get_json() == {'name': 'Acme', 'size': 120}
+    etag = response.headers['ETag']
+
+    cached = client.get('/api/company/acme', headers={'If-None-Match': etag})
+    assert cached.status_code == 304 and cached.data == b''
+    assert client.get('/api/company/acme.json', headers={'If-None-Match': '"stale"'}).status_code == 200
+
+    missing = client.get('/api/company/nobody')
+    assert missing.status_code == 404
+    assert missing.get_json() == {'error': 'Company not found: nobody'}  # No directory listing
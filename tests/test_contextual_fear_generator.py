@@ -0,0 +1,105 @@
+import random
+from collections import Counter
+
+import pytest
+
+from app.services.contextual_fear_generator import ContextualFearGenerator
+
+PERSONA = {'role': 'Sales Manager', 'industry': 'technology'}
+
+
+@pytest.fixture(autouse=True)
+def fresh_generator():
+    ContextualFearGenerator.reset_fear_history()
+    ContextualFearGenerator.seed(0)
+    yield
+    ContextualFearGenerator.reset_fear_history()
+    ContextualFearGenerator.seed()
+
+
+def test_manifestations_are_varied_and_uniform():
+    manifestations = ContextualFearGenerator.FEAR_ARCHETYPES['job_security']['manifestations']
+    picks = [ContextualFearGenerator._anti_bias_fear_selection('job_security', manifestations)
+             for _ in range(5000)]
+
+    counts = Counter(picks)
+    assert set(counts) == set(manifestations)
+    expected = len(picks) / len(manifestations)
+    assert all(abs(count - expected) < 0.1 * expected for count in counts.values())
+    # Nothing repeats until every option has been used
+    assert len(set(picks[:len(manifestations)])) == len(manifestations)
+    # More than one ordering is possible: selection is not a fixed cycle
+    assert len({tuple(picks[i:i + 4]) for i in range(0, 400, 4)}) > 10
+
+
+def test_recent_window_spans_all_fear_types():
+    assert ContextualFearGenerator.RECENT_SELECTIONS == 20
+    select = ContextualFearGenerator._anti_bias_fear_selection
+    first = select('a', ['x', 'y'])
+
+    # Picks of other fear types count towards the 20-selection window
+    for _ in range(19):
+        select('b', ['p', 'q', 'r'])
+    assert select('a', ['x', 'y']) != first
+    for _ in range(19):
+        select('b', ['p', 'q', 'r'])
+    # Both options are recent now: either may repeat
+    assert select('a', ['x', 'y']) in ('x', 'y')
+
+    # Once 20 other selections have passed, the first pick is eligible again
+    repeated = set()
+    for _ in range(20):
+        ContextualFearGenerator.reset_fear_history()
+        first = select('a', ['x', 'y'])
+        for _ in range(20):
+            select('b', ['p', 'q', 'r'])
+        repeated.add(select('a', ['x', 'y']) == first)
+    assert repeated == {True, False}
+
+
+def test_fear_types_have_independent_recency():
+    first = ContextualFearGenerator._anti_bias_fear_selection('a', ['x', 'y', 'z'])
+    # The same text under another fear type is still available
+    assert ContextualFearGenerator._anti_bias_fear_selection('b', [first], recent_count=5) == first
+    # A single-option pool repeats rather than failing
+    assert ContextualFearGenerator._anti_bias_fear_selection('b', [first]) == first
+
+
+def test_seeded_generation_is_reproducible():
+    def run():
+        ContextualFearGenerator.reset_fear_history()
+        ContextualFearGenerator.seed(7)
+        return [ContextualFearGenerator.generate_contextual_fears('AI roleplay training platform', PERSONA)
+                for _ in range(20)]
+
+    assert run() == run()
+
+
+def test_generation_leaves_global_random_alone():
+    random.seed(1234)
+    expected = [random.random() for _ in range(3)]
+
+    random.seed(1234)
+    for _ in range(10):
+        ContextualFearGenerator.generate_contextual_fears('AI sales training', PERSONA)
+    assert [random.random() for _ in range(3)] == expected
+
+
+@pytest.mark.parametrize('product, fear_type, score', [
+    ('AI coaching for sales reps', 'ai_fear', 0.4),
+    ('AI roleplay with machine learning', 'ai_fear', 1.0),  # AI, roleplay, machine learning + related term bonus
+    ('Automated call scoring', 'ai_fear', 0.3),  # Related term only
+    ('A platform our teams can setup in a day', 'complexity_overwhelm', 0.8),
+    ('Budget-friendly pricing with strong ROI', 'financial_risk', 0.8),  # budget, ROI
+])
+def test_trigger_scores(product, fear_type, score):
+    assert ContextualFearGenerator._identify_fear_triggers(product)[fear_type] == pytest.approx(score)
+
+
+@pytest.mark.parametrize('product', [
+    'Said the representative',  # "AI" and "reps" inside words
+    'newsletter for chains',  # "new" and "AI" inside words
+    'Teammate roi',  # Acronyms only match in capitals
+])
+def test_triggers_match_whole_words(product):
+    assert not any(ContextualFearGenerator._identify_fear_triggers(product).values())
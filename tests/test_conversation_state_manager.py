@@ -0,0 +1,142 @@
+import threading
+import time
+from unittest.mock import patch
+
+from app.services import conversation_state_manager as csm
+from app.services.conversation_state_manager import (
+    ConversationPhase,
+    ConversationStateManager,
+    analyze_message_content,
+    get_phase_tracking_stats
+)
+
+
+class CountingClassifier:
+    def __init__(self, phase=ConversationPhase.PRESENTATION):
+        self.phase = phase
+        self.calls = []
+
+    def __call__(self, recent_messages):
+        self.calls.append(list(recent_messages))
+        return self.phase
+
+
+def test_analyze_message_content_scores():
+    scores = analyze_message_content("We need to improve onboarding, but it sounds too expensive for our company.")
+    assert scores["needs"] == 0.4  # need, improve
+    assert scores["objection"] == 0.25  # expensive
+    assert scores["business"] == 0.15
+    assert scores["closing"] == 0.0
+    assert max(analyze_message_content("need want looking for requirement problem issue").values()) == 1.0
+
+
+def test_unambiguous_turns_do_not_escalate():
+    """Clear keyword evidence decides the phase without calling the classifier."""
+    classifier = CountingClassifier()
+    manager = ConversationStateManager(phase_classifier=classifier)
+
+    assert manager.update_phase("What problems are you looking for help with? What do you need to improve?")
+    assert manager.current_state["likely_phase"] == ConversationPhase.DISCOVERY
+    assert not manager.update_phase("Got it, thanks.")  # No signal keeps the phase
+    assert manager.update_phase("Great, what are the next steps to move forward and sign the agreement?")
+    assert manager.current_state["likely_phase"] == ConversationPhase.CLOSING
+
+    assert classifier.calls == []
+    assert manager.phase_stats["turns"] == 3
+    assert manager.phase_stats["escalations"] == 0
+    assert [h["to_phase"] for h in manager.current_state["phase_history"]] == ["discovery", "closing"]
+
+
+def test_close_evidence_escalates_to_classifier_in_background():
+    classifier = CountingClassifier(ConversationPhase.OBJECTION_HANDLING)
+    manager = ConversationStateManager(phase_classifier=classifier)
+
+    # Interest and objection evidence are tied; the turn keeps its phase
+    assert not manager.update_phase("The feature sounds good but I'm worried about the risk.",
+                                    assistant_message="It would replace our current vendor.")
+    assert manager.settle()
+    assert manager.current_state["likely_phase"] == ConversationPhase.OBJECTION_HANDLING
+    assert len(classifier.calls) == 1
+    assert [m["role"] for m in classifier.calls[0]] == ["assistant", "user"]  # Both speakers
+    assert classifier.calls[0][-1]["content"].startswith("The feature sounds good")
+    assert manager.get_state()["phase_tracking"] == {"turns": 1, "escalations": 1}
+
+
+def test_slow_classifier_stays_off_the_turn():
+    """The turn returns without waiting; a late answer is dropped and the phase kept."""
+    release = threading.Event()
+
+    def slow(messages):
+        release.wait(5)
+        return ConversationPhase.CLOSING
+
+    manager = ConversationStateManager(phase_classifier=slow)
+    start = time.monotonic()
+    manager.update_phase("The feature sounds good but I'm worried about the risk.")
+    assert time.monotonic() - start < 0.5
+
+    with patch.object(csm, "PHASE_CLASSIFIER_TIMEOUT", 0.05):
+        assert not manager.settle(timeout=0.1)
+    release.set()
+    assert not manager.settle()
+    assert manager.current_state["likely_phase"] == ConversationPhase.RAPPORT
+    assert manager.phase_stats["classifier_failures"] == 1
+
+
+def test_stale_classification_is_discarded():
+    """A heuristic transition made while the classifier ran wins over its answer."""
+    release = threading.Event()
+
+    def slow(messages):
+        release.wait(5)
+        return ConversationPhase.OBJECTION_HANDLING
+
+    manager = ConversationStateManager(phase_classifier=slow)
+    manager.update_phase("The feature sounds good but I'm worried about the risk.")
+    assert manager.update_phase("Great, what are the next steps to move forward and sign the agreement?")
+    release.set()
+    manager.settle()
+    assert manager.current_state["likely_phase"] == ConversationPhase.CLOSING
+    assert manager.phase_stats["stale_classifications"] == 1
+
+
+def test_classifier_failure_keeps_phase():
+    def failing(messages):
+        raise RuntimeError("provider down")
+
+    for classifier in (lambda messages: None, failing):
+        manager = ConversationStateManager(phase_classifier=classifier)
+        state_before = dict(manager.current_state)
+        assert not manager.update_phase("The feature sounds good but I'm worried about the risk.")
+        assert not manager.settle()
+        assert manager.current_state == state_before
+        assert manager.phase_stats["classifier_failures"] == 1
+
+
+def test_process_stats_accumulate():
+    before = get_phase_tracking_stats()
+    manager = ConversationStateManager(phase_classifier=CountingClassifier())
+    manager.update_phase("What do you need to improve?")
+    manager.update_phase("The feature sounds good but I'm worried about the risk.")
+    after = get_phase_tracking_stats()
+    assert after["turns"] - before.get("turns", 0) == 2
+    assert after["escalations"] - before.get("escalations", 0) == 1
+    assert 0 < after["escalation_rate"] <= 1
+
+
+def test_update_state_counts_only_new_messages():
+    """Incremental question/topic counts match counting the whole history."""
+    history = [
+        {"role": "user", "content": "Hi there"},
+        {"role": "assistant", "content": "Hello! What does your company do?"},
+        {"role": "user", "content": "We sell a product for teams."},
+        {"role": "assistant", "content": "What budget do you have? Any timeline?"},
+    ]
+    manager = ConversationStateManager()
+    for end in range(1, len(history) + 1):
+        state = manager.update_state(history[:end])
+    assert state["question_count"] == 2
+    assert state["topics"] == {"business", "product", "pricing"}
+
+    # A replaced (shorter) history is recounted
+    assert manager.update_state(history[:2])["question_count"] == 1
@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from app.services.demographic_names import DemographicNameService
+
+SMALL_POOLS = {
+    "north": {
+        "female": {"first": ["Ada", "Bea", "Cleo", "Dora"], "last": ["Ash", "Birch", "Cedar"]},
+        "male": {"first": ["Abe", "Bo", "Cy"], "last": ["Dale", "Elm", "Fir", "Gale"]},
+    },
+    "south": {
+        "female": {"first": ["Eve", "Flo", "Gia"], "last": ["Hill", "Isle", "Jay"]},
+        "male": {"first": ["Ed", "Finn", "Gus", "Hal", "Ike"], "last": ["Kay", "Lane"]},
+    },
+}
+
+
+@pytest.fixture
+def service():
+    pools, size = DemographicNameService.NAME_POOLS, DemographicNameService._max_recent_size
+    DemographicNameService.reset_recent()
+    yield DemographicNameService
+    DemographicNameService.NAME_POOLS = pools
+    DemographicNameService._max_recent_size = size
+    DemographicNameService._build_indexes()
+
+
+def _use(service, pools, max_size):
+    service.NAME_POOLS = pools
+    service._max_recent_size = max_size
+    service._build_indexes()
+
+
+def test_selection_is_true_lru_against_reference_model(service):
+    # Property: after any sequence of picks, the recency structure holds the
+    # max_size most recently picked distinct names, oldest first, and a
+    # pick never repeats a name that is still recent
+    for seed in range(50):
+        rng = random.Random(seed)
+        random.seed(seed)
+        max_size = rng.randint(1, 12)
+        _use(service, SMALL_POOLS, max_size)
+        model = []
+        for _ in range(200):
+            culture, gender = rng.choice(["north", "south"]), rng.choice(["female", "male"])
+            pool = SMALL_POOLS[culture][gender]
+            if set(pool["first"]) <= set(model) or set(pool["last"]) <= set(model):
+                model.clear()  # Pool exhausted: the recent list resets
+
+            first, last = service.get_name_by_demographics(culture, gender)
+            assert first in pool["first"] and last in pool["last"]
+            assert first not in model and last not in model
+            for name in (first, last):
+                if name in model:
+                    model.remove(name)
+                model.append(name)
+                del model[:-max_size]
+            assert list(service._recently_used) == model
+
+            # Pool arrays agree with the recency structure
+            for (c, g, part), name_pool in service._pools.items():
+                available = set(name_pool.names[:name_pool.available])
+                assert available == set(SMALL_POOLS[c][g][part]) - set(model)
+
+
+def test_oldest_names_are_evicted_first(service):
+    _use(service, {"only": {"female": {"first": [f"F{i}" for i in range(20)],
+                                       "last": [f"L{i}" for i in range(20)]}}}, 4)
+    picks = [service.get_name_by_demographics("only", "female") for _ in range(5)]
+    # Only the last two picks (four names) are still recent
+    assert list(service._recently_used) == [picks[3][0], picks[3][1], picks[4][0], picks[4][1]]
+
+
+def test_avoid_recent_false_leaves_recency_alone(service):
+    _use(service, SMALL_POOLS, 10)
+    for _ in range(20):
+        first, last = service.get_name_by_demographics("north", "male", avoid_recent=False)
+        assert first in SMALL_POOLS["north"]["male"]["first"]
+    assert not service._recently_used
+
+
+def test_unknown_background_and_gender_fall_back(service):
+    first, last = service.get_name_by_demographics("atlantis", "unknown")
+    pool = service.NAME_POOLS["american_professional"]["female"]
+    assert first in pool["first"] and last in pool["last"]
+
+
+def test_detect_gender_uses_first_known_culture(service):
+    _use(service, {**SMALL_POOLS, "west": {"female": {"first": ["Abe"], "last": ["Moss"]},
+                                           "male": {"first": ["Ada"], "last": ["Oak"]}}}, 10)
+    assert service.detect_gender("Ada Lovelace") == "female"
+    assert service.detect_gender("  abe  ") == "male"  # Case-insensitive
+    assert service.detect_gender("Zed") is None
+    assert service.detect_gender("") is None
+    assert service.lookup_first_name("Hal") == ("south", "male")
+
+
+def test_detect_gender_matches_name_pools(service):
+    for gender in ("female", "male"):
+        for name in service.NAME_POOLS["american_professional"][gender]["first"]:
+            assert service.detect_gender(f"{name} Smith") == gender
@@ -0,0 +1,178 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import BuyerPersona, TrainingSession
+from app.services import dual_voice_agent_service as dual_voice
+from app.services.voice_session_registry import SessionRegistry, SharedSessionRegistry
+from app.utils.redis_client import RedisClient
+from tests.redis_standin import RedisStandIn
+
+
+class FakeGPT:
+    def __init__(self, reply='{"overall_performance": {"score": 80, "summary": "Solid"}}'):
+        self.reply = reply
+        self.release = threading.Event()
+        self.release.set()
+        self.calls = 0
+
+    def generate_response(self, messages, **kwargs):
+        self.release.wait(5)
+        self.calls += 1
+        return self.reply
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'voice.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def service(app, monkeypatch):
+    gpt = FakeGPT()
+    monkeypatch.setattr(dual_voice, 'get_gpt4o_service', lambda: gpt)
+    executor = ThreadPoolExecutor(max_workers=1)
+    service = dual_voice.DualVoiceAgentService(
+        sessions=SessionRegistry(), feedback_jobs=SessionRegistry(), feedback_executor=executor
+    )
+    yield service
+    executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def conversation_writes(app):
+    writes = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE training_sessions') and 'conversation_json' in statement:
+            writes.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield writes
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+
+def _start(service, session_id='dv-1'):
+    persona = BuyerPersona(
+        name='Dana', role='CFO', description='Budget owner', personality_traits='{}',
+        emotional_state='guarded', buyer_type='analytical', decision_authority='final',
+        pain_points='[]', objections='[]', cognitive_biases='{}'
+    )
+    db.session.add(persona)
+    db.session.flush()
+    training_session = TrainingSession(buyer_persona_id=persona.id, status='active')
+    db.session.add(training_session)
+    db.session.commit()
+    service.sessions.create(session_id, {
+        'session_id': session_id,
+        'training_session_id': training_session.id,
+        'buyer_persona_id': persona.id,
+        'buyer_persona_name': persona.name,
+        'scenario_type': 'discovery',
+        'session_state': 'active',
+        'persisted_turns': 0,
+        'last_flush': 1e12  # Keep the time threshold out of the way
+    })
+    return training_session.id
+
+
+@pytest.mark.parametrize('shared', [False, True])
+def test_registry_roundtrip(shared):
+    with RedisStandIn() as standin:
+        registry = SharedSessionRegistry(RedisClient.from_url(standin.url)) if shared else SessionRegistry()
+        registry.create('s1', {'session_state': 'active', 'training_session_id': 7})
+        assert registry.update('s1', session_state='paused')
+        assert not registry.update('missing', session_state='paused')
+        assert registry.append('s1', 'conversation_log', {'content': 'a'}) == 1
+        assert registry.append('s1', 'conversation_log', {'content': 'b'}) == 2
+        assert registry.append('missing', 'conversation_log', {'content': 'x'}) == 0
+
+        assert registry.get('s1') == {'session_state': 'paused', 'training_session_id': 7}
+        assert registry.items('s1', 'conversation_log', -1) == [{'content': 'b'}]
+        assert registry.length('s1', 'conversation_log') == 2
+        assert registry.count() == 1
+
+        registry.delete('s1')
+        assert registry.get('s1') is None
+        assert registry.items('s1', 'conversation_log') == []
+        assert registry.count() == 0
+
+
+def test_local_registry_expires_idle_sessions(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('app.services.voice_session_registry.time.time', lambda: now[0])
+    registry = SessionRegistry(ttl=60)
+    registry.create('s1', {'a': 1})
+    now[0] += 59
+    assert registry.update('s1', a=2)
+    now[0] += 61
+    assert registry.get('s1') is None
+    assert registry.count() == 0
+
+
+def test_turns_are_written_in_batches(app, service, conversation_writes):
+    training_session_id = _start(service)
+
+    for i in range(dual_voice.TURN_FLUSH_BATCH - 1):
+        service.log_conversation_turn('dv-1', 'user' if i % 2 else 'persona', f'turn {i}')
+    assert conversation_writes == []
+
+    service.log_conversation_turn('dv-1', 'user', 'batch full')
+    assert len(conversation_writes) == 1
+    stored = db.session.get(TrainingSession, training_session_id).conversation
+    assert len(stored) == dual_voice.TURN_FLUSH_BATCH
+    assert stored[0]['role'] == 'assistant' and stored[1]['role'] == 'user'
+
+    service.log_conversation_turn('dv-1', 'persona', 'after flush')
+    assert len(conversation_writes) == 1
+
+
+def test_turns_flush_after_interval(app, service, conversation_writes, monkeypatch):
+    _start(service)
+    service.sessions.update('dv-1', last_flush=1000.0)
+    monkeypatch.setattr(dual_voice.time, 'time', lambda: 1000.0 + dual_voice.TURN_FLUSH_INTERVAL)
+
+    service.log_conversation_turn('dv-1', 'user', 'hello')
+    assert len(conversation_writes) == 1
+
+
+def test_end_session_flushes_and_feedback_runs_in_background(app, service):
+    training_session_id = _start(service)
+    for i in range(3):
+        service.log_conversation_turn('dv-1', 'user', f'turn {i}')
+
+    service.gpt4o_service.release.clear()
+    result = service.end_session('dv-1')
+
+    assert result['success'] and result['feedback_status'] == 'pending'
+    assert len(result['conversation_log']) == 3
+    training_session = db.session.get(TrainingSession, training_session_id)
+    assert training_session.status == 'completed'
+    assert len(training_session.conversation) == 3
+    assert service.sessions.get('dv-1') is None
+    assert service.get_session_feedback('dv-1')['feedback_status'] == 'pending'
+
+    service.gpt4o_service.release.set()
+    service._feedback_executor.shutdown(wait=True)
+
+    feedback = service.get_session_feedback('dv-1')
+    assert feedback['feedback_status'] == 'complete'
+    assert feedback['feedback_summary']['overall_performance']['score'] == 80
+    db.session.expire_all()
+    assert json.loads(db.session.get(TrainingSession, training_session_id).feedback_json)['overall_performance']['score'] == 80
+
+
+def test_unknown_session_has_no_feedback(service):
+    assert service.end_session('nope')['success'] is False
+    assert service.get_session_feedback('nope')['success'] is False
@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from app.services.feedback_analysis_engine import (
+    FeedbackAnalysisEngine,
+    FeedbackResultStore,
+    select_moments
+)
+
+TRANSCRIPT = """Rep: Hi Marcus, thanks for downloading our guide. How is onboarding going?
+Marcus: Honestly we struggle with ramp time, new reps take months and we have lost deals because of it.
+Rep: Got it. Let me show you our platform, it has role plays, analytics, dashboards and a lot more.
+Marcus: Ok.
+Rep: Would a demo next week work?
+Marcus: Maybe, but it sounds expensive and we already have a training budget locked in a contract.
+"""
+
+
+class FakeLLM:
+    """Stands in for the OpenAI client; records calls and sleeps like a network call."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        with self.lock:
+            self.calls.append(model)
+        time.sleep(self.delay)
+        content = json.dumps({'model': model, 'prompt': messages[0]['content'][-80:]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _engine(tmp_path, **kwargs):
+    return FeedbackAnalysisEngine(FeedbackResultStore(str(tmp_path / 'feedback.db')), **kwargs)
+
+
+def test_select_moments_ranks_by_salience():
+    """Objection and pain exchanges outrank the filler exchange; prefixes are stable."""
+    candidates = select_moments(TRANSCRIPT, 3)
+    assert [c.turn for c in candidates] == [3, 1, 2]
+    assert 'objection' in candidates[0].signals
+    assert candidates[0].salience > candidates[2].salience
+    assert [c.turn for c in select_moments(TRANSCRIPT, 2)] == [3, 1]
+
+
+def test_results_are_cached_by_content_hash(tmp_path):
+    """Whitespace changes hit the cache; a prompt change does not."""
+    engine = _engine(tmp_path)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'score': 70}
+
+    assert engine.cached('summary', TRANSCRIPT, 'prompt v1', compute) == ({'score': 70}, False)
+    assert engine.cached('summary', '  ' + TRANSCRIPT.replace(' ', '  '), 'prompt v1', compute)[1]
+    engine.cached('summary', TRANSCRIPT, 'prompt v2', compute)
+    assert len(calls) == 2
+
+
+def test_stream_fans_out_in_parallel(tmp_path):
+    """Three 0.3s moments finish in roughly one call's time."""
+    engine = _engine(tmp_path, max_workers=3)
+    client = FakeLLM(delay=0.3)
+
+    start = time.perf_counter()
+    events = list(engine.stream_moments(client, TRANSCRIPT, 3))
+    elapsed = time.perf_counter() - start
+
+    assert sorted(e['momentIndex'] for e in events) == [0, 1, 2]
+    assert not any(e['cached'] for e in events)
+    assert elapsed < 0.8
+
+
+def test_reload_resumes_from_persisted_moments(tmp_path):
+    """Moments already analyzed are served from the store, only the rest are computed."""
+    client = FakeLLM()
+    _engine(tmp_path).analyze_moment(client, TRANSCRIPT, 0)
+    assert len(client.calls) == 1
+
+    events = list(_engine(tmp_path).stream_moments(client, TRANSCRIPT, 2))  # Fresh process
+    assert events[0]['momentIndex'] == 0 and events[0]['cached']
+    assert not events[1]['cached']
+    assert len(client.calls) == 2
+
+
+def test_low_salience_moments_use_light_model(tmp_path):
+    engine = _engine(tmp_path, moment_model='big', light_model='small', salience_threshold=0.35)
+    client = FakeLLM()
+    events = {e['momentIndex']: e for e in engine.stream_moments(client, TRANSCRIPT, 3)}
+
+    assert events[0]['model'] == 'big'
+    assert events[2]['model'] == 'small'  # "Ok." after a pitch
+    assert engine.stats()['light_model_calls'] == 1
+
+
+def test_concurrent_requests_share_one_call(tmp_path):
+    """Two page loads at once trigger a single LLM call per moment."""
+    engine = _engine(tmp_path)
+    client = FakeLLM(delay=0.2)
+    threads = [
+        threading.Thread(target=engine.analyze_moment, args=(client, TRANSCRIPT, 0))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(client.calls) == 1
+
+
+def test_unlabeled_transcript_falls_back_to_model_choice(tmp_path):
+    engine = _engine(tmp_path)
+    result = engine.analyze_moment(FakeLLM(), 'no speaker labels here ' * 20, 1, [0])
+    assert result['salience'] is None
+    assert 'DIFFERENT critical decision point' in result['moment']['prompt']
+
+
+def test_stream_route_rejects_non_numeric_count():
+    """A count that is not an integer is a client error, not a 500."""
+    from flask import Flask
+    from app.routes.api.feedback_routes import feedback_bp
+
+    app = Flask(__name__)
+    app.register_blueprint(feedback_bp)
+    response = app.test_client().post('/api/feedback/analyze-moments/stream',
+                                      json={'transcript': TRANSCRIPT, 'count': 'two'})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'count must be an integer'}
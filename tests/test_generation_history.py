@@ -0,0 +1,104 @@
+import random
+from collections import Counter
+
+from app.services.comprehensive_bias_prevention import ComprehensiveBiasPrevention
+from app.services.generation_history import (
+    RECORD_SCRIPT,
+    TOKEN_SEP,
+    GenerationHistory,
+    SharedGenerationHistory
+)
+from app.utils.redis_client import RedisClient
+from tests.redis_standin import RedisStandIn
+
+FIELDS = {'gender': ['f', 'm', 'x'], 'role': ['a', 'b', 'c', 'd'], 'industry': ['tech', 'retail']}
+
+
+def _random_records(count, seed=7):
+    rng = random.Random(seed)
+    return [{field: rng.choice(values) for field, values in FIELDS.items()} for _ in range(count)]
+
+
+def _brute_force(records, field, window):
+    return dict(Counter(r[field] for r in records[-window:]))
+
+
+def _record_script(server, keys, argv):
+    """Python twin of RECORD_SCRIPT for the stand-in server."""
+    records = server.data.setdefault(keys[0], [])
+    windows = [int(w) for w in argv[1:]]
+    for i, window in enumerate(windows):
+        counts = server.data.setdefault(keys[i + 2], {})
+        if len(records) >= window:
+            for token in filter(None, records[-window].split(TOKEN_SEP)):
+                counts[token] -= 1
+                if counts[token] <= 0:
+                    del counts[token]
+    records.append(argv[0])
+    del records[:-windows[-1]]
+    for i in range(len(windows)):
+        counts = server.data[keys[i + 2]]
+        for token in filter(None, argv[0].split(TOKEN_SEP)):
+            counts[token] = counts.get(token, 0) + 1
+    total = int(server.data.get(keys[1], 0)) + 1
+    server.data[keys[1]] = str(total)
+    return [total] + [server.cmd_hgetall(key) for key in keys[2:]]
+
+
+def test_counters_match_brute_force():
+    """Maintained counters equal a scan of the last N records."""
+    history = GenerationHistory((3, 10, 50))
+    records = _random_records(300)
+    for i, record in enumerate(records, 1):
+        history.record(record)
+        for window in history.windows:
+            for field in FIELDS:
+                assert history.counts(field, window) == _brute_force(records[:i], field, window)
+    assert history.total == 300
+    assert history.size(10) == 10
+
+
+def test_empty_values_are_not_counted():
+    history = GenerationHistory((10,))
+    history.record({'gender': None, 'role': 'a'})
+    assert history.counts('gender') == {}
+    assert history.counts('role') == {'a': 1}
+
+
+def test_shared_history_is_shared_between_workers():
+    """Two workers on one store see each other's generations."""
+    with RedisStandIn(scripts={RECORD_SCRIPT: _record_script}) as server:
+        worker_a = SharedGenerationHistory(RedisClient.from_url(server.url), windows=(10, 50))
+        worker_b = SharedGenerationHistory(RedisClient.from_url(server.url), windows=(10, 50),
+                                           refresh_interval=0)
+        records = _random_records(80)
+        for i, record in enumerate(records):
+            (worker_a if i % 2 else worker_b).record(record)
+
+        for field in FIELDS:
+            assert worker_b.counts(field, 10) == _brute_force(records, field, 10)
+            assert worker_b.counts(field, 50) == _brute_force(records, field, 50)
+        assert worker_b.total == 80
+        assert worker_a.total == 80  # Snapshot returned by its last record()
+
+
+def test_shared_history_falls_back_when_store_is_down():
+    """An unreachable store degrades to the worker's own counters."""
+    history = SharedGenerationHistory(RedisClient('127.0.0.1', 1, timeout=0.2))
+    history.record({'gender': 'f'})
+    assert history.counts('gender') == {'f': 1}
+    assert history.total == 1
+
+
+def test_bias_prevention_avoids_recent_choices():
+    """Selection skips values used in the recent window."""
+    ComprehensiveBiasPrevention.reset_history()
+    ComprehensiveBiasPrevention.get_history().record({'buyer_type': 'a'})
+    picks = {ComprehensiveBiasPrevention._anti_bias_selection('buyer_type', ['a', 'b']) for _ in range(20)}
+    assert picks == {'b'}
+
+    for _ in range(20):
+        ComprehensiveBiasPrevention.generate_bias_free_persona_framework(industry_context='technology')
+    report = ComprehensiveBiasPrevention.get_bias_report()
+    assert report['total_generations'] == 21
+    ComprehensiveBiasPrevention.reset_history()
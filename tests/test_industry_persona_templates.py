@@ -0,0 +1,97 @@
+import copy
+
+import pytest
+
+from app.services.industry_persona_templates import (
+    INDUSTRY_KEYWORDS,
+    INDUSTRY_TEMPLATES,
+    IndustryMatcher,
+    apply_industry_modifications,
+    get_industry_template,
+    match_industry
+)
+
+
+@pytest.mark.parametrize('context, industry', [
+    ('Healthcare', 'healthcare'),
+    ('regional hospitals and clinics', 'healthcare'),
+    ('Health Care', 'healthcare'),
+    ('pharma', 'healthcare'),
+    ('B2B SaaS', 'technology'),
+    ('IT services', 'technology'),
+    ('Managed IT', 'technology'),
+    ('software engineering', 'technology'),
+    ('fintech', 'financial_services'),
+    ('Banking and insurance', 'financial_services'),
+    ('automotive parts', 'manufacturing'),
+    ('factories', 'manufacturing'),
+    ('K-12 schools', 'education'),
+    ('University', 'education'),
+    ('E-commerce', 'retail'),
+    ('online stores', 'retail'),
+    # Strong keywords beat weak ones from another industry
+    ('consumer software', 'technology'),
+    ('medical training', 'healthcare'),
+    ('fintech startup', 'financial_services'),
+    # Ties go to the earlier template
+    ('healthcare software', 'healthcare'),
+])
+def test_industry_table(context, industry):
+    match = match_industry(context)
+    assert match is not None and match.industry == industry
+    assert get_industry_template(context) is INDUSTRY_TEMPLATES[industry]
+
+
+@pytest.mark.parametrize('context', [
+    'it is complicated',  # "it" is not IT
+    'Waiting list',  # "it" inside a word
+    'Architecture',  # "tech" inside a word
+    'Restored furniture',  # "store" inside a word
+    'Logistics',
+    'Real estate',
+    '',
+    '   ',
+    None,
+])
+def test_no_false_positives(context):
+    assert match_industry(context) is None
+    assert get_industry_template(context) is None
+
+
+def test_confidence_reflects_competing_industries():
+    assert match_industry('hospital').confidence == 1.0
+    mixed = match_industry('healthcare software')
+    assert mixed.confidence == 0.5 and mixed.keywords == ('healthcare',)
+    # Repeated keywords count once
+    assert match_industry('retail retail software').confidence == 0.5
+    strong = match_industry('fintech banking startup')
+    assert strong.confidence == 0.8 and strong.keywords == ('fintech', 'banking')
+
+
+def test_matching_is_deterministic_and_memoized():
+    matcher = IndustryMatcher(INDUSTRY_KEYWORDS, {'IT'})
+    first = matcher('  Hospital   software ')
+    assert matcher('Hospital software') == first
+    assert matcher.match.cache_info().hits == 1  # Whitespace is normalized before the cache
+
+
+def test_apply_industry_modifications_leaves_input_unchanged():
+    persona = {
+        'trait_metrics': {'Skeptical': 0.85, 'Thoughtful': 0.5},
+        'pain_points': ['cost', 'time'],
+        'objections': ['too expensive'],
+        'speech_patterns': {'pace': ''},
+        'conversation_dynamics': {},
+        'business_description': 'A clinic.'
+    }
+    original = copy.deepcopy(persona)
+    modified = apply_industry_modifications(persona, 'hospital')
+
+    assert persona == original
+    template = INDUSTRY_TEMPLATES['healthcare']
+    assert modified['trait_metrics'] == {'Skeptical': 0.9, 'Thoughtful': 0.6}
+    assert set(modified['pain_points']) & set(template['common_pain_points'])
+    assert modified['objections'][0] in template['typical_objections']
+    assert modified['speech_patterns']['pace'] == template['speech_patterns']['pace']
+    assert modified['business_description'].endswith(template['description'])
+    assert apply_industry_modifications(persona, 'logistics') is persona
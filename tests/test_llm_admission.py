@@ -0,0 +1,219 @@
+import threading
+import time
+
+import pytest
+
+from app.services.llm_admission import (
+    AdmissionRejected,
+    LLMAdmissionController,
+    Priority,
+    current_priority,
+    llm_priority
+)
+
+
+class FakeProvider:
+    """Completion endpoint with fixed latency and a requests-per-second limit."""
+
+    def __init__(self, latency=0.0, rate_limit=None):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.lock = threading.Lock()
+        self.calls = []  # (start time, tag)
+        self.in_flight = 0
+        self.peak = 0
+
+    def complete(self, tag):
+        now = time.monotonic()
+        with self.lock:
+            recent = sum(1 for start, _ in self.calls if now - start < 1.0)
+            if self.rate_limit is not None and recent >= self.rate_limit:
+                raise RuntimeError('rate_limit exceeded')
+            self.calls.append((now, tag))
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+        return f'response {tag}'
+
+
+def _call(controller, provider, priority, tag, results, deadline=None):
+    try:
+        with controller.admit(priority, deadline):
+            results.append(provider.complete(tag))
+    except AdmissionRejected as e:
+        results.append(e)
+
+
+def _hold_all_slots(controller, priority=Priority.LIVE_TURN):
+    release = threading.Event()
+    holders = []
+    for _ in range(controller.max_concurrent):
+        acquired = threading.Event()
+
+        def hold(acquired=acquired):
+            with controller.admit(priority):
+                acquired.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        assert acquired.wait(5)
+        holders.append(thread)
+    return release, holders
+
+
+def test_concurrency_bounded_at_provider():
+    controller = LLMAdmissionController(max_concurrent=3)
+    provider = FakeProvider(latency=0.05)
+    results = []
+    threads = [threading.Thread(target=_call, args=(controller, provider, Priority.LIVE_TURN, i, results))
+               for i in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert provider.peak == 3
+    assert len(results) == 12 and not any(isinstance(r, AdmissionRejected) for r in results)
+    stats = controller.get_stats()
+    assert stats['active'] == 0
+    assert stats['classes']['live_turn']['admitted'] == 12
+    assert stats['classes']['live_turn']['queued'] > 0
+    assert stats['classes']['live_turn']['queue_ms']['max_ms'] > 0
+
+
+def test_queued_callers_served_by_priority():
+    controller = LLMAdmissionController(max_concurrent=1)
+    provider = FakeProvider()
+    release, holders = _hold_all_slots(controller)
+
+    results = []
+    order = [Priority.BACKGROUND, Priority.FEEDBACK, Priority.ASYNC_PLAN, Priority.COACH_CLASSIFY, Priority.LIVE_TURN]
+    threads = []
+    for priority in order:
+        thread = threading.Thread(target=_call, args=(controller, provider, priority, priority.name, results))
+        thread.start()
+        threads.append(thread)
+        while controller.get_stats()['classes'][priority.name.lower()]['waiting'] == 0:
+            time.sleep(0.001)
+
+    release.set()
+    for thread in holders + threads:
+        thread.join()
+
+    assert [tag for _, tag in provider.calls] == [p.name for p in sorted(order)]
+
+
+def test_full_queue_sheds_immediately():
+    controller = LLMAdmissionController(max_concurrent=1, queue_limits={Priority.BACKGROUND: 1})
+    provider = FakeProvider()
+    release, holders = _hold_all_slots(controller)
+
+    results = []
+    waiting = threading.Thread(target=_call, args=(controller, provider, Priority.BACKGROUND, 'queued', results))
+    waiting.start()
+    while controller.get_stats()['classes']['background']['waiting'] == 0:
+        time.sleep(0.001)
+
+    start = time.monotonic()
+    with pytest.raises(AdmissionRejected) as excinfo:
+        with controller.admit(Priority.BACKGROUND):
+            pass
+    assert time.monotonic() - start < 0.1
+    assert excinfo.value.reason == 'queue_full' and excinfo.value.priority == Priority.BACKGROUND
+
+    release.set()
+    for thread in holders + [waiting]:
+        thread.join()
+    assert results == ['response queued']
+    assert controller.get_stats()['classes']['background']['rejected_queue_full'] == 1
+
+
+def test_deadline_rejects_waiting_caller():
+    controller = LLMAdmissionController(max_concurrent=1, queue_deadlines={Priority.LIVE_TURN: 0.05})
+    release, holders = _hold_all_slots(controller, Priority.FEEDBACK)
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        with controller.admit(Priority.LIVE_TURN):
+            pass
+    assert excinfo.value.reason == 'deadline'
+    assert excinfo.value.waited == pytest.approx(0.05, abs=0.04)
+
+    # An explicit request deadline tighter than the class limit wins
+    with pytest.raises(AdmissionRejected):
+        with controller.admit(Priority.BACKGROUND, deadline=time.monotonic() + 0.01):
+            pass
+
+    release.set()
+    for thread in holders:
+        thread.join()
+    # Timed-out waiters leave no trace in the queue
+    with controller.admit(Priority.LIVE_TURN):
+        assert controller.get_stats()['active'] == 1
+    stats = controller.get_stats()['classes']
+    assert stats['live_turn']['waiting'] == 0 and stats['live_turn']['rejected_deadline'] == 1
+
+
+def test_low_priority_classes_leave_headroom_for_live_turns():
+    controller = LLMAdmissionController(max_concurrent=4)  # Background may hold 1, feedback 2
+    provider = FakeProvider(latency=0.1)
+    results = []
+    background = [threading.Thread(target=_call, args=(controller, provider, Priority.BACKGROUND, f'bg{i}', results))
+                  for i in range(3)]
+    for thread in background:
+        thread.start()
+    time.sleep(0.02)
+
+    start = time.monotonic()
+    with controller.admit(Priority.LIVE_TURN):
+        waited = time.monotonic() - start
+    assert waited < 0.05
+    assert controller.get_stats()['classes']['background']['active'] <= 1
+    for thread in background:
+        thread.join()
+    assert len(results) == 3
+
+
+def test_shedding_protects_rate_limited_provider():
+    # 5 req/s provider behind a 2-slot gate: bursty background work is shed
+    # with AdmissionRejected instead of surfacing provider rate-limit errors
+    controller = LLMAdmissionController(
+        max_concurrent=2,
+        queue_limits={Priority.BACKGROUND: 2},
+        queue_deadlines={Priority.BACKGROUND: 0.5}
+    )
+    provider = FakeProvider(latency=0.4, rate_limit=5)
+    results = []
+    threads = [threading.Thread(target=_call, args=(controller, provider, Priority.BACKGROUND, i, results))
+               for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    rejected = [r for r in results if isinstance(r, AdmissionRejected)]
+    assert len(rejected) >= 7
+    assert all(isinstance(r, (str, AdmissionRejected)) for r in results)  # No provider errors leaked
+    assert provider.peak == 1  # Background is capped at a quarter of the slots (minimum one)
+
+
+def test_priority_context_is_scoped():
+    controller = LLMAdmissionController(max_concurrent=1)
+    assert current_priority() == Priority.ASYNC_PLAN
+    with llm_priority(Priority.LIVE_TURN):
+        assert current_priority() == Priority.LIVE_TURN
+    with llm_priority(Priority.FEEDBACK):
+        assert current_priority() == Priority.FEEDBACK
+        with controller.admit():
+            assert controller.get_stats()['classes']['feedback']['active'] == 1
+    assert current_priority() == Priority.ASYNC_PLAN
+
+
+def test_declared_live_turn_is_admitted_as_live_turn():
+    # LIVE_TURN is 0: the declared class must not fall back to the default
+    controller = LLMAdmissionController(max_concurrent=2)
+    with llm_priority(Priority.LIVE_TURN), controller.admit():
+        stats = controller.get_stats()['classes']
+        assert stats['live_turn']['active'] == 1 and stats['async_plan']['active'] == 0
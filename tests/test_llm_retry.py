@@ -0,0 +1,202 @@
+import random
+
+import pytest
+
+from app.services.llm_admission import AdmissionRejected, Priority, llm_priority
+from app.services.llm_retry import (
+    RetryBudget,
+    RetryFailed,
+    RetryPolicy,
+    TransientResponseError,
+    current_deadline,
+    is_retryable,
+    request_deadline,
+    retry_after
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f'HTTP {status_code}')
+        self.status_code = status_code
+        self.response = FakeResponse(status_code, headers)
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+class FlakyProvider:
+    """Fails with the queued errors, then succeeds; each attempt takes `latency` seconds."""
+
+    def __init__(self, clock, errors, latency=0.5):
+        self.clock = clock
+        self.errors = list(errors)
+        self.latency = latency
+        self.timeouts = []
+
+    def __call__(self, timeout):
+        self.timeouts.append(timeout)
+        self.clock.now += self.latency
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _policy(clock, **kwargs):
+    kwargs.setdefault('budget', RetryBudget(clock=clock))
+    return RetryPolicy('test', rng=random.Random(3), sleep=clock.sleep, clock=clock, **kwargs)
+
+
+def test_retries_transient_errors_and_reports_attempts(clock):
+    provider = FlakyProvider(clock, [ProviderError(503), APIConnectionError('reset')])
+    policy = _policy(clock)
+
+    result = policy.call(provider)
+    assert result.value == 'ok' and result.attempts == 3
+    # Each attempt gets the time left until the default deadline
+    assert provider.timeouts[0] == 30.0 and provider.timeouts[1] < provider.timeouts[0]
+    assert all(0.25 <= wait <= 0.75 * 3 for wait in clock.sleeps)
+    stats = policy.get_stats()
+    assert stats['attempts_per_call'] == {3: 1} and stats['retries'] == 2 and stats['succeeded'] == 1
+
+
+def test_non_retryable_errors_propagate_unchanged(clock):
+    policy = _policy(clock)
+    with pytest.raises(ProviderError):
+        policy.call(FlakyProvider(clock, [ProviderError(400)]))
+    with pytest.raises(AdmissionRejected):
+        policy.call(FlakyProvider(clock, [AdmissionRejected(Priority.LIVE_TURN, 'queue_full')]))
+    assert clock.sleeps == []
+    assert policy.get_stats()['attempts_per_call'] == {1: 2}
+
+
+def test_gives_up_after_max_attempts(clock):
+    policy = _policy(clock, max_attempts=2)
+    with pytest.raises(RetryFailed) as excinfo:
+        policy.call(FlakyProvider(clock, [ProviderError(429)] * 5))
+    assert excinfo.value.reason == 'attempts' and excinfo.value.attempts == 2
+    assert isinstance(excinfo.value.__cause__, ProviderError)
+
+
+def test_never_starts_an_attempt_that_cannot_finish(clock):
+    policy = _policy(clock, min_attempt_time=1.0)
+    provider = FlakyProvider(clock, [ProviderError(500)] * 5, latency=2.0)
+
+    with pytest.raises(RetryFailed) as excinfo:
+        policy.call(provider, deadline=clock.now + 3.0)
+    assert excinfo.value.reason == 'deadline'
+    # 2s attempt, then the wait plus a >1s attempt would overrun 3s
+    assert excinfo.value.attempts == 1 and clock.now == 1002.0 and clock.sleeps == []
+
+    # Less than the estimate left: the first attempt still runs, a retry does not
+    with pytest.raises(RetryFailed) as excinfo:
+        policy.call(provider, deadline=clock.now + 0.5)
+    assert excinfo.value.attempts == 1 and provider.timeouts[-1] == 0.5
+
+    # Deadline already passed: no attempt at all
+    with pytest.raises(RetryFailed) as excinfo:
+        policy.call(provider, deadline=clock.now)
+    assert excinfo.value.attempts == 0
+
+
+def test_attempt_estimate_is_kept_per_priority_class(clock):
+    # Slow feedback calls on a shared service must not starve tight live turns
+    policy = _policy(clock, min_attempt_time=0.5)
+    with llm_priority(Priority.FEEDBACK):
+        for _ in range(5):
+            policy.call(FlakyProvider(clock, [], latency=10.0))
+    assert policy.get_stats()['attempt_estimate_s']['feedback'] > 5.0
+
+    with llm_priority(Priority.LIVE_TURN):
+        result = policy.call(FlakyProvider(clock, [ProviderError(503)], latency=0.5), deadline=clock.now + 4.0)
+    assert result.attempts == 2
+    assert policy.get_stats()['attempt_estimate_s']['live_turn'] == 0.5
+
+
+def test_retry_after_sets_minimum_wait(clock):
+    provider = FlakyProvider(clock, [ProviderError(429, {'retry-after': '2'})])
+    policy = _policy(clock)
+    assert policy.call(provider).attempts == 2
+    assert clock.sleeps == [2.0]
+
+    # A hint past the deadline ends the call instead of sleeping through it
+    provider = FlakyProvider(clock, [ProviderError(429, {'retry-after-ms': '9000'})])
+    with pytest.raises(RetryFailed) as excinfo:
+        policy.call(provider, deadline=clock.now + 5)
+    assert excinfo.value.reason == 'deadline' and clock.sleeps == [2.0]
+
+
+def test_decorrelated_jitter_spreads_waits(clock):
+    waits = []
+    for seed in range(20):
+        clock.sleeps = []
+        policy = RetryPolicy('test', rng=random.Random(seed), sleep=clock.sleep, clock=clock,
+                             budget=RetryBudget(clock=clock), max_attempts=4)
+        policy.call(FlakyProvider(clock, [ProviderError(503)] * 3, latency=0.01))
+        waits.append(tuple(round(w, 3) for w in clock.sleeps))
+        assert all(0.25 <= w <= policy.max_delay for w in clock.sleeps)
+    assert len(set(waits)) == 20  # Callers that failed together do not retry in lockstep
+
+
+def test_shared_budget_caps_retries_under_brownout(clock):
+    budget = RetryBudget(ratio=0.1, min_per_second=0.0, window=10.0, clock=clock)
+    policy = _policy(clock, budget=budget, max_attempts=3)
+
+    failures = []
+    for _ in range(100):
+        try:
+            policy.call(FlakyProvider(clock, [ProviderError(503)] * 3, latency=0.0))
+        except RetryFailed as e:
+            failures.append(e.reason)
+        clock.now += 0.01
+
+    stats = policy.get_stats()
+    # Retries stay near 10% of calls instead of doubling the load
+    assert stats['retries'] <= 11
+    assert failures.count('budget') >= 85
+    assert sum(n * count for n, count in stats['attempts_per_call'].items()) <= 111
+
+
+def test_request_deadline_scopes_nest_to_the_tighter_bound():
+    assert current_deadline() is None
+    with request_deadline(10):
+        outer = current_deadline()
+        with request_deadline(60):
+            assert current_deadline() == outer
+        with request_deadline(1):
+            assert current_deadline() < outer
+    assert current_deadline() is None
+
+
+def test_error_classification():
+    assert is_retryable(ProviderError(429)) and is_retryable(ProviderError(529))
+    assert not is_retryable(ProviderError(401))
+    assert is_retryable(APIConnectionError()) and is_retryable(TransientResponseError())
+    assert not is_retryable(ValueError('bad json'))
+    assert retry_after(ProviderError(429, {'retry-after': 'soon'})) is None
+    assert retry_after(ProviderError(429, {'retry-after-ms': '250'})) == 0.25
@@ -0,0 +1,317 @@
+import threading
+import time
+
+import pytest
+
+from app.services.llm_admission import AdmissionRejected, Priority, get_admission_controller, llm_priority
+from app.services.llm_router import (
+    CircuitBreaker,
+    NoProviderAvailable,
+    ProviderResponse,
+    ProviderRouter,
+    RouterTimeout,
+    load_equivalents
+)
+
+GROUPS = {
+    'fast': {'alpha': 'alpha-mini', 'beta': 'beta-flash', 'gamma': 'gamma-small'},
+}
+ORDER = ('alpha', 'beta', 'gamma')
+
+
+class ProviderDown(Exception):
+    status_code = 503
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+class FakeProvider:
+    """Local provider with injectable latency and failures."""
+
+    def __init__(self, name, latency=0.0, fail=False, error=ProviderDown):
+        self.name = name
+        self.latency = latency
+        self.fail = fail
+        self.error = error
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def complete(self, model, messages, temperature, max_tokens, timeout):
+        with self.lock:
+            self.calls.append(model)
+        latency = self.latency() if callable(self.latency) else self.latency
+        time.sleep(min(latency, timeout))
+        if self.fail:
+            raise self.error(f'{self.name} failed')
+        return ProviderResponse(f'{self.name}:{model}')
+
+
+class FakeStreamingProvider(FakeProvider):
+    """FakeProvider that also streams its answer, optionally failing after fail_after deltas."""
+
+    def __init__(self, name, fail_after=None, **kwargs):
+        super().__init__(name, **kwargs)
+        self.fail_after = fail_after
+        self.closed = False
+
+    def stream(self, model, messages, temperature, max_tokens, timeout):
+        with self.lock:
+            self.calls.append(model)
+        try:
+            for i, word in enumerate([self.name, ':', model]):
+                if self.fail or i == self.fail_after:
+                    raise self.error(f'{self.name} failed')
+                yield word
+        finally:
+            self.closed = True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _router(*providers, **kwargs):
+    kwargs.setdefault('hedge_min_samples', 1)
+    return ProviderRouter({p.name: p for p in providers}, equivalents=GROUPS, provider_order=ORDER, **kwargs)
+
+
+def test_candidates_follow_equivalence_groups():
+    router = _router(FakeProvider('alpha'), FakeProvider('beta'), FakeProvider('gamma'))
+    assert router.candidates('fast') == [('alpha', 'alpha-mini'), ('beta', 'beta-flash'), ('gamma', 'gamma-small')]
+    # A provider-specific id puts its own provider first
+    assert router.candidates('beta-flash')[0] == ('beta', 'beta-flash')
+    assert router.candidates('fast', provider='gamma')[0] == ('gamma', 'gamma-small')
+    # Unknown models only run where asked
+    assert router.candidates('custom-model', provider='beta') == [('beta', 'custom-model')]
+
+    only_beta = _router(FakeProvider('beta'))
+    assert only_beta.candidates('alpha-mini') == [('beta', 'beta-flash')]
+
+
+def test_default_equivalents_stay_with_the_model_vendor(monkeypatch):
+    monkeypatch.delenv('LLM_MODEL_EQUIVALENTS', raising=False)
+    groups = load_equivalents()
+    assert groups['gpt-4o-mini'] == {'openai': 'gpt-4o-mini', 'openrouter': 'openai/gpt-4o-mini'}
+    assert all(set(models) <= {'openai', 'openrouter', 'anthropic'} for models in groups.values())
+
+    # Other vendors only when configured
+    monkeypatch.setenv('LLM_MODEL_EQUIVALENTS', '{"gpt-4o-mini": {"google": "gemini-2.5-flash"}}')
+    assert load_equivalents()['gpt-4o-mini']['google'] == 'gemini-2.5-flash'
+
+
+def test_fails_over_on_provider_error():
+    alpha, beta = FakeProvider('alpha', fail=True), FakeProvider('beta')
+    router = _router(alpha, beta)
+    response = router.complete('fast', [{'role': 'user', 'content': 'hi'}], hedge=False)
+    assert (response.provider, response.text, response.hedged) == ('beta', 'beta:beta-flash', False)
+    assert router.get_stats()['failovers'] == 1
+
+
+def test_last_error_raised_when_every_provider_fails():
+    router = _router(FakeProvider('alpha', fail=True), FakeProvider('beta', fail=True))
+    with pytest.raises(ProviderDown):
+        router.complete('fast', [], hedge=False)
+
+
+def test_client_errors_do_not_trip_the_breaker():
+    alpha = FakeProvider('alpha', fail=True, error=BadRequest)
+    router = _router(alpha, FakeProvider('beta'), breaker_factory=lambda name: CircuitBreaker(name, min_calls=2))
+    for _ in range(5):
+        router.complete('fast', [], hedge=False)
+    assert router.breakers['alpha'].state == CircuitBreaker.CLOSED
+
+
+def test_open_circuit_skips_provider_until_probe_succeeds():
+    clock = FakeClock()
+    breakers = {}
+
+    def factory(name):
+        breakers[name] = CircuitBreaker(name, min_calls=4, failure_rate=0.5, open_seconds=10, clock=clock)
+        return breakers[name]
+
+    alpha, beta = FakeProvider('alpha', fail=True), FakeProvider('beta')
+    router = _router(alpha, beta, breaker_factory=factory)
+    for _ in range(4):
+        router.complete('fast', [], hedge=False)
+    assert breakers['alpha'].state == CircuitBreaker.OPEN
+
+    # While open, calls go straight to beta without touching alpha
+    calls_before = len(alpha.calls)
+    for _ in range(3):
+        assert router.complete('fast', [], hedge=False).provider == 'beta'
+    assert len(alpha.calls) == calls_before
+
+    # After the cool-off one probe is let through; success closes the circuit
+    clock.now += 10
+    alpha.fail = False
+    assert breakers['alpha'].state == CircuitBreaker.HALF_OPEN
+    assert router.complete('fast', [], hedge=False).provider == 'alpha'
+    assert breakers['alpha'].state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_reopens_and_probes_are_limited():
+    clock = FakeClock()
+    breaker = CircuitBreaker('alpha', min_calls=2, open_seconds=5, half_open_probes=1, clock=clock)
+    breaker.record(False, 10)
+    breaker.record(False, 10)
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    clock.now = 5
+    assert breaker.allow() and not breaker.allow()  # One probe at a time
+    breaker.record(False, 10)
+    assert breaker.state == CircuitBreaker.OPEN and breaker.stats['opened'] == 2
+
+    clock.now = 10
+    assert breaker.allow()
+    breaker.cancel()  # Probe never reached the provider
+    assert breaker.allow()
+
+
+def test_slow_calls_open_the_circuit():
+    breaker = CircuitBreaker('alpha', min_calls=5, slow_call_ms=1000, slow_rate=0.6, clock=FakeClock())
+    for latency in (1500, 1200, 50, 2000):
+        breaker.record(True, latency)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record(True, 1100)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_window_forgets_old_failures():
+    clock = FakeClock()
+    breaker = CircuitBreaker('alpha', window=30, min_calls=4, failure_rate=0.5, clock=clock)
+    breaker.record(False, 10)
+    breaker.record(False, 10)
+    clock.now = 40
+    for _ in range(3):
+        breaker.record(True, 10)
+    breaker.record(False, 10)
+    assert breaker.state == CircuitBreaker.CLOSED  # 1 of 4 in window
+
+
+def test_hedge_fires_after_p95_and_takes_first_answer():
+    alpha = FakeProvider('alpha', latency=0.02)
+    beta = FakeProvider('beta', latency=0.02)
+    router = _router(alpha, beta, hedge_min_delay=0.01, hedge_min_samples=5)
+    for _ in range(10):
+        router.complete('fast', [], hedge=False)  # Latency samples; a scheduling stall must not hedge here
+    assert 0.01 <= router.hedge_delay('alpha') < 0.1
+
+    alpha.latency = 1.0  # Provider hiccup
+    start = time.monotonic()
+    response = router.complete('fast', [], hedge=True)
+    elapsed = time.monotonic() - start
+    assert response.provider == 'beta' and response.hedged
+    assert elapsed < 0.3
+    stats = router.get_stats()
+    assert stats['hedges'] == 1 and stats['hedge_wins'] == 1
+
+
+def test_hedging_defaults_to_live_priorities():
+    alpha, beta = FakeProvider('alpha', latency=0.3), FakeProvider('beta')
+    router = _router(alpha, beta, hedge_default_delay=0.05, hedge_min_samples=100)
+
+    with llm_priority(Priority.BACKGROUND):
+        assert router.complete('fast', []).provider == 'alpha'
+    with llm_priority(Priority.LIVE_TURN):
+        assert router.complete('fast', []).hedged
+
+
+def test_tail_latency_with_hedging():
+    # alpha stalls on 1 call in 10; hedging caps the tail near p95 + beta's latency
+    counter = iter(range(10000))
+
+    def alpha_latency():
+        return 0.4 if next(counter) % 10 == 9 else 0.01
+
+    alpha, beta = FakeProvider('alpha', latency=alpha_latency), FakeProvider('beta', latency=0.01)
+    router = _router(alpha, beta, hedge_min_delay=0.02, hedge_min_samples=5)
+
+    latencies = []
+    for _ in range(40):
+        start = time.monotonic()
+        router.complete('fast', [], hedge=True)
+        latencies.append(time.monotonic() - start)
+    assert max(latencies) < 0.2
+
+
+def _shed(message):
+    return AdmissionRejected(Priority.LIVE_TURN, 'queue_full')
+
+
+def test_shed_hedge_keeps_waiting_for_the_primary():
+    alpha = FakeProvider('alpha', latency=0.15)
+    beta = FakeProvider('beta', fail=True, error=_shed)
+    router = _router(alpha, beta, hedge_default_delay=0.02, hedge_min_samples=100)
+
+    response = router.complete('fast', [], hedge=True)
+    assert response.provider == 'alpha' and response.hedged
+    assert router.get_stats()['shed'] == 1
+
+
+def test_admission_rejected_only_when_every_attempt_is_shed():
+    alpha = FakeProvider('alpha', latency=0.05, fail=True, error=_shed)
+    beta = FakeProvider('beta', fail=True, error=_shed)
+    router = _router(alpha, beta, hedge_default_delay=0.01, hedge_min_samples=100)
+    with pytest.raises(AdmissionRejected):
+        router.complete('fast', [], hedge=True)
+    assert router.get_stats()['shed'] == 2
+
+    # A provider error alongside a shed hedge is what the caller sees
+    alpha.error = ProviderDown
+    with pytest.raises(ProviderDown):
+        router.complete('fast', [], hedge=True)
+
+    # A shed request is not failed over: the next provider sits behind the same gate
+    alpha.latency = 0
+    alpha.error = _shed
+    with pytest.raises(AdmissionRejected):
+        router.complete('fast', [], hedge=False)
+    assert len(beta.calls) == 2
+
+
+def test_no_provider_and_timeout_errors():
+    router = _router()
+    with pytest.raises(NoProviderAvailable):
+        router.complete('fast', [])
+
+    slow = _router(FakeProvider('alpha', latency=0.5))
+    with pytest.raises(RouterTimeout):
+        slow.complete('fast', [], timeout=0.05, hedge=False)
+    assert slow.get_stats()['timeouts'] == 1
+
+
+def test_stream_fails_over_until_first_delta():
+    alpha, beta = FakeStreamingProvider('alpha', fail=True), FakeStreamingProvider('beta')
+    router = _router(alpha, beta, FakeProvider('gamma'))
+    assert ''.join(router.stream('fast', [])) == 'beta:beta-flash'
+    assert router.get_stats()['failovers'] == 1
+    assert router.breakers['alpha'].get_stats()['window_failures'] == 1
+    assert router.breakers['beta'].get_stats()['window_failures'] == 0
+
+    # Past the first delta an error reaches the caller instead of restarting the text
+    flaky = _router(FakeStreamingProvider('alpha', fail_after=1), FakeStreamingProvider('beta'))
+    deltas = flaky.stream('fast', [])
+    assert next(deltas) == 'alpha'
+    with pytest.raises(ProviderDown):
+        list(deltas)
+
+    # Providers without stream() are skipped
+    with pytest.raises(NoProviderAvailable):
+        list(_router(FakeProvider('alpha')).stream('fast', []))
+
+
+def test_closing_stream_releases_provider_and_admission():
+    alpha = FakeStreamingProvider('alpha')
+    deltas = _router(alpha).stream('fast', [])
+    with llm_priority(Priority.COACH_CLASSIFY):
+        assert next(deltas) == 'alpha'
+    active = get_admission_controller().get_stats()['active']
+    deltas.close()
+    assert alpha.closed
+    assert get_admission_controller().get_stats()['active'] == active - 1
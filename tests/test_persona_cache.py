@@ -0,0 +1,102 @@
+import pytest
+from flask import Flask, session
+from flask_login import LoginManager, UserMixin, login_user
+
+from app.models import BuyerPersona
+from app.services import persona_cache as cache_module
+from app.services.persona_cache import PersonaCache, SharedPersonaCache
+from app.training import services
+from app.utils.redis_client import RedisClient
+from tests.redis_standin import RedisStandIn
+
+PERSONA = {
+    'name': 'Amara Okafor',
+    'description': 'Operations director at a regional logistics company',
+    'personality_traits': {'analytical': 0.8},
+    'emotional_state': 'Guarded',
+    'buyer_type': 'Economic Buyer',
+    'decision_authority': 'Final Decision Maker',
+    'pain_points': ['Manual route planning'],
+    'objections': ['We tried this before'],
+    'cognitive_biases': {'status_quo': 'Prefers spreadsheets'}
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize('shared', [False, True])
+def test_cache_roundtrip(shared):
+    with RedisStandIn() as standin:
+        cache = SharedPersonaCache(RedisClient.from_url(standin.url)) if shared else PersonaCache()
+        assert cache.get('7:token:p') is None
+        cache.set('7:token:p', PERSONA)
+        cached = cache.get('7:token:p')
+        assert cached == PERSONA
+        cached['name'] = 'changed'
+        assert cache.get('7:token:p')['name'] == 'Amara Okafor'  # Callers get copies
+        cache.delete('7:token:p')
+        assert cache.get('7:token:p') is None
+
+
+def test_local_cache_is_bounded_lru_with_ttl():
+    clock = FakeClock()
+    cache = PersonaCache(max_entries=2, ttl=60, clock=clock)
+    cache.set('a', {'n': 1})
+    cache.set('b', {'n': 2})
+    assert cache.get('a') == {'n': 1}  # 'a' is now most recently used
+    cache.set('c', {'n': 3})
+    assert cache.get('b') is None and len(cache) == 2
+
+    clock.now += 59
+    assert cache.get('c') == {'n': 3}
+    clock.now += 1
+    assert cache.get('c') is None
+    assert cache.stats['evicted'] == 1 and cache.stats['expired'] == 1
+
+
+def test_shared_cache_sets_store_ttl():
+    with RedisStandIn() as standin:
+        cache = SharedPersonaCache(RedisClient.from_url(standin.url), ttl=30)
+        cache.set('k', PERSONA)
+        assert 'persona_cache:k' in standin.expiry
+
+
+class User(UserMixin):
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(cache_module, '_cache', PersonaCache())
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    login_manager = LoginManager(app)
+    login_manager.user_loader(lambda user_id: User(user_id))
+    return app
+
+
+def test_session_cookie_holds_only_a_token(app):
+    with app.test_request_context():
+        login_user(User(7))
+        assert services.get_cached_persona('persona_1') is None
+        services.cache_persona('persona_1', BuyerPersona(**PERSONA))
+
+        assert set(session) - {'_user_id', '_fresh', '_id'} == {services.PERSONA_CACHE_TOKEN}
+        persona = services.get_cached_persona('persona_1')
+        assert isinstance(persona, BuyerPersona)
+        assert persona.name == 'Amara Okafor' and persona.objections == ['We tried this before']
+        assert services.get_cached_persona('persona_2') is None
+
+        token = session[services.PERSONA_CACHE_TOKEN]
+
+    with app.test_request_context():
+        login_user(User(8))
+        session[services.PERSONA_CACHE_TOKEN] = token  # Same browser token, different user
+        assert services.get_cached_persona('persona_1') is None
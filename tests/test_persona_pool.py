@@ -0,0 +1,198 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask import Flask
+from flask_login import LoginManager, UserMixin
+
+from app.routes.api import dual_voice_routes
+from app.services import persona_pool as pool_module
+from app.services.comprehensive_bias_prevention import ComprehensiveBiasPrevention
+from app.services.persona_pool import PersonaPool, PoolKey, market_bucket
+
+
+class HeldExecutor:
+    """Collects refill jobs; run() executes them when the test says so"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, *args):
+        self.jobs.append((fn, args))
+
+    def run(self):
+        jobs, self.jobs = self.jobs, []
+        for fn, args in jobs:
+            fn(*args)
+
+
+class SlowGenerator:
+    """Stands in for an LLM-backed generator: unique personas, fixed latency"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.ids = itertools.count()
+
+    def __call__(self, key):
+        time.sleep(self.delay)
+        n = next(self.ids)
+        return {'name': f'Persona {n}', 'role': 'Director', 'gender': 'Female', 'cultural_key': f'culture_{n}',
+                'industry_category': key.industry, 'industry': 'Software', 'age_range': '35-44'}
+
+
+@pytest.fixture(autouse=True)
+def clean_history():
+    ComprehensiveBiasPrevention.reset_history()
+    yield
+    ComprehensiveBiasPrevention.reset_history()
+
+
+@pytest.fixture
+def held():
+    return HeldExecutor()
+
+
+def _key(pool, target='small business owners'):
+    return pool.key_for(target)
+
+
+@pytest.mark.parametrize('target, bucket', [
+    ('B2C shoppers', 'b2c'),
+    ('Startup founders', 'small_business'),
+    ('Fortune 500 procurement teams', 'enterprise'),
+    ('software engineering leads', 'technical'),
+    ('regional dental practices', 'general'),
+    ('', 'general'),
+])
+def test_market_bucket(target, bucket):
+    assert market_bucket(target) == bucket
+
+
+def test_key_normalizes_difficulty(held):
+    pool = PersonaPool(generator=SlowGenerator(), executor=held)
+    key = pool.key_for('enterprise corporations', 'ERP software', 'ADVANCED')
+    assert key.difficulty == 'advanced' and key.market == 'enterprise'
+    assert key.industry in ComprehensiveBiasPrevention.INDUSTRY_DIVERSIFICATION
+    assert pool.key_for('enterprise corporations', difficulty='expert').difficulty == 'intermediate'
+
+
+def test_warm_bucket_serves_without_waiting_for_generation():
+    generator = SlowGenerator(delay=0.2)
+    executor = ThreadPoolExecutor(max_workers=3)
+    pool = PersonaPool(generator=generator, depth=3, executor=executor)
+    key = PoolKey('technology', 'intermediate', 'general')
+    pool.warm([key])
+    deadline = time.monotonic() + 5
+    while pool.ready(key) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool.ready(key) == 3
+
+    pool.key_for = lambda *args: key
+    start = time.monotonic()
+    framework = pool.draw('businesses')
+    assert time.monotonic() - start < generator.delay
+    assert framework['name'].startswith('Persona ')
+
+    stats = pool.get_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 0 and stats['hit_rate'] == 1.0
+    assert stats['refill_lag_ms']['max'] >= generator.delay * 1000
+    executor.shutdown(wait=True)
+
+
+def test_empty_bucket_is_a_miss_and_schedules_refill(held):
+    pool = PersonaPool(generator=SlowGenerator(), depth=2, executor=held)
+    key = _key(pool)
+    pool.key_for = lambda *args: key
+
+    assert pool.draw('small business owners')['name'] == 'Persona 0'
+    assert pool.get_stats()['misses'] == 1 and pool.get_stats()['in_flight'] == 2
+    held.run()
+    assert pool.ready(key) == 2 and pool.get_stats()['in_flight'] == 0
+
+    pool.draw('small business owners')
+    assert pool.get_stats()['hit_rate'] == 0.5
+    assert len(held.jobs) == 1  # Only the slot just freed
+
+
+def test_concurrent_draws_never_share_a_persona(held):
+    pool = PersonaPool(generator=SlowGenerator(), depth=40, executor=held)
+    key = _key(pool)
+    pool.key_for = lambda *args: key
+    pool.warm([key])
+    held.run()
+
+    served = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        for _ in range(6):
+            served.append(pool.draw('small business owners')['name'])
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(served) == 48 and len(set(served)) == 48
+    stats = pool.get_stats()
+    assert stats['hits'] == 40 and stats['misses'] == 8
+
+
+def test_draw_prefers_persona_least_like_recent_ones(held):
+    pool = PersonaPool(generator=SlowGenerator(), depth=2, executor=held)
+    key = PoolKey('healthcare', 'intermediate', 'general')
+    pool.key_for = lambda *args: key
+    repeat = {'name': 'A', 'cultural_key': 'east_asian', 'gender': 'Female', 'role': 'CFO', 'industry': 'Biotech'}
+    fresh = {'name': 'B', 'cultural_key': 'nordic', 'gender': 'Male', 'role': 'Nurse Manager', 'industry': 'Hospitals'}
+    pool._buckets[key] = pool_module._Bucket(entries=[dict(repeat), dict(fresh)])
+
+    ComprehensiveBiasPrevention.record_generation(dict(repeat, name='Earlier'))
+    assert pool.draw('businesses')['name'] == 'B'  # Oldest entry skipped: it repeats the last persona
+    history = ComprehensiveBiasPrevention.get_history()
+    assert history.counts('cultural_key').get('nordic') == 1  # Recorded when served
+
+
+def test_default_generator_records_only_served_personas(held):
+    pool = PersonaPool(depth=3, executor=held)
+    key = pool.key_for('B2C shoppers', 'meal kit subscription')
+    pool.key_for = lambda *args: key
+    pool.warm([key])
+    held.run()
+    assert pool.ready(key) == 3
+    assert ComprehensiveBiasPrevention.get_history().total == 0
+
+    framework = pool.draw('B2C shoppers', 'meal kit subscription')
+    assert framework['industry_category'] == key.industry
+    assert framework['business_context'] == 'B2C'
+    assert framework['contextual_fears'] and framework['conversation_flow_guidance']
+    assert ComprehensiveBiasPrevention.get_history().total == 1
+
+
+@pytest.fixture
+def client(held, monkeypatch):
+    pool = PersonaPool(executor=held)
+    monkeypatch.setattr(pool_module, '_pool', pool)
+    app = Flask(__name__)
+    app.register_blueprint(dual_voice_routes.dual_voice_bp, url_prefix='/api/dual-voice')
+    login_manager = LoginManager(app)
+
+    class User(UserMixin):
+        id = 7
+
+    login_manager.request_loader(lambda request: User())
+    return app.test_client()
+
+
+def test_generate_persona_route_uses_pool(client, held):
+    response = client.post('/api/dual-voice/generate-persona', json={
+        'product_service': 'Inventory forecasting software', 'target_market': 'independent retailers'})
+    data = response.get_json()
+    assert response.status_code == 200 and data['success']
+    assert data['context']['product_service'] == 'Inventory forecasting software'
+    assert data['note'].startswith('Generated using comprehensive bias prevention')  # Not the GPT-4o fallback
+    assert data['persona']['contextual_fears']
+    assert pool_module._pool.get_stats()['misses'] == 1 and held.jobs
@@ -0,0 +1,142 @@
+import math
+
+import pytest
+
+from app.utils.rate_limiter import (
+    GCRA_SCRIPT,
+    MemoryStorage,
+    RateLimiter,
+    RedisStorage,
+    SQLiteStorage
+)
+from app.utils.redis_client import RedisClient, RedisError
+from tests.redis_standin import RedisStandIn
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _gcra_script(server, keys, argv):
+    """Python twin of GCRA_SCRIPT for the stand-in server."""
+    now, interval, window, cost = (float(a) for a in argv)
+    stored = server.data.get(keys[0])
+    tat = max(float(stored) if stored is not None else now, now)
+    new_tat = tat + interval * cost
+    if new_tat - window > now:
+        return [0, repr(new_tat)]
+    server.cmd_set(keys[0], repr(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1)
+    return [1, repr(new_tat)]
+
+
+def _exercise_limiter(limiter, clock):
+    """Burst of `limit`, then one request per interval."""
+    results = [limiter.hit('ip', limit=5, window=60) for _ in range(6)]
+    assert [r.allowed for r in results] == [True] * 5 + [False]
+    assert [r.remaining for r in results[:5]] == [4, 3, 2, 1, 0]
+    assert math.isclose(results[5].retry_after, 12.0)
+
+    clock.now += 12
+    assert limiter.hit('ip', limit=5, window=60).allowed
+    assert not limiter.hit('ip', limit=5, window=60).allowed
+
+    limiter.reset('ip')
+    assert limiter.peek('ip', limit=5, window=60).remaining == 5
+
+
+def test_memory_storage_gcra():
+    """Burst up to the limit, then refill at limit/window."""
+    clock = FakeClock()
+    _exercise_limiter(RateLimiter(MemoryStorage(), clock=clock), clock)
+
+
+def test_memory_storage_evicts_least_recently_used():
+    """Idle keys are evicted once max_keys is reached."""
+    storage = MemoryStorage(max_keys=3)
+    limiter = RateLimiter(storage, clock=FakeClock())
+    for key in ['a', 'b', 'c']:
+        limiter.hit(key, limit=10, window=60)
+    limiter.hit('a', limit=10, window=60)  # 'a' is now most recent
+    limiter.hit('d', limit=10, window=60)
+
+    assert len(storage) == 3
+    assert storage.get_tat('b') is None
+    assert storage.get_tat('a') is not None
+
+
+def test_sqlite_storage_is_shared_between_instances(tmp_path):
+    """Two storages on one file behave like one limiter (separate workers)."""
+    path = str(tmp_path / 'limits.db')
+    clock = FakeClock()
+    worker_a = RateLimiter(SQLiteStorage(path), clock=clock)
+    worker_b = RateLimiter(SQLiteStorage(path), clock=clock)
+
+    allowed = [w.hit('ip', limit=4, window=60).allowed for w in (worker_a, worker_b) * 3]
+    assert allowed == [True] * 4 + [False] * 2
+
+
+def test_redis_storage_against_standin():
+    """Redis backend speaks RESP and runs the GCRA script via EVAL."""
+    with RedisStandIn(scripts={GCRA_SCRIPT: _gcra_script}) as server:
+        clock = FakeClock()
+        client = RedisClient.from_url(server.url)
+        _exercise_limiter(RateLimiter(RedisStorage(client), clock=clock), clock)
+        client.close()
+
+    assert 'EVAL' in server.commands
+
+
+def test_peek_does_not_consume():
+    """peek reports capacity without spending it."""
+    limiter = RateLimiter(MemoryStorage(), clock=FakeClock())
+    for _ in range(3):
+        assert limiter.peek('ip', limit=1, window=60).allowed
+    assert limiter.hit('ip', limit=1, window=60).allowed
+    assert not limiter.peek('ip', limit=1, window=60).allowed
+
+
+def test_stats_report_overhead():
+    """Every check records its overhead."""
+    limiter = RateLimiter(MemoryStorage())
+    for _ in range(10):
+        limiter.hit('ip', limit=100, window=60)
+    stats = limiter.stats()
+    assert stats['checks'] == 10
+    assert stats['avg_overhead_ms'] >= 0
+
+
+def test_login_lockout_lasts_full_lockout_time(monkeypatch):
+    """MAX_LOGIN_ATTEMPTS failures lock the address for all of LOCKOUT_TIME."""
+    from flask import Flask
+    from app.auth import security
+
+    clock = FakeClock()
+    limiter = RateLimiter(MemoryStorage(), clock=clock)
+    monkeypatch.setattr(security, 'get_rate_limiter', lambda: limiter)
+    app = Flask(__name__)
+    app.config.update(MAX_LOGIN_ATTEMPTS=5, LOCKOUT_TIME=300)
+
+    with app.app_context():
+        assert [security.record_failed_login('1.2.3.4')[0] for _ in range(5)] == [False] * 4 + [True]
+        clock.now += 299
+        assert security.check_login_attempts('1.2.3.4') == (False, 1)
+        clock.now += 1
+        assert security.check_login_attempts('1.2.3.4') == (True, 0)
+        assert not security.record_failed_login('1.2.3.4')[0]  # Attempts start over
+
+
+def test_rediss_url_uses_tls():
+    """rediss:// negotiates TLS, so a plaintext server is refused."""
+    assert RedisClient.from_url('rediss://:pw@cache:6380/2').use_tls
+    assert not RedisClient.from_url('redis://cache').use_tls
+    with pytest.raises(ValueError):
+        RedisClient.from_url('http://cache')
+
+    with RedisStandIn() as server:
+        client = RedisClient.from_url(server.url.replace('redis://', 'rediss://'), timeout=1.0)
+        with pytest.raises(RedisError):
+            client.execute('PING')
@@ -0,0 +1,151 @@
+import random
+
+import pytest
+
+from app.services.sam_conversation_service import (
+    AnalysisCursorMismatch,
+    SamConversationAnalyzer,
+    SamConversationService
+)
+
+# Transcripts as the onboarding client sends them (speech-to-text fragments, no speaker labels)
+RECORDED_CONVERSATIONS = [
+    [
+        "Hi, I'm Sam, your AI sales coach. What product or service do you sell?",
+        "We sell AI sales training",
+        "for B2B software teams.",
+        "Great! And who is your target market or ideal customer?",
+        "Mid-size SaaS companies with 10 to 50 reps",
+        "mostly in North America.",
+        "Excellent! I'll now generate your practice partner based on this information.",
+    ],
+    [
+        "Hey there! I'm Sam. Tell me what you sell?",
+        "",
+        "Commercial cleaning services.",
+        "we also do window washing",
+        "Perfect!",
+        "Who do you sell to?",
+        "Property managers and office building owners.",
+        "Fantastic! Let me create your custom AI prospect.",
+    ],
+    [
+        "Welcome! I'm Sam, a sales coach.",
+        "hello",
+        "What product or service do you sell?",
+        "Our product is a CRM for real estate agents",
+        "It helps them track leads",
+        "Who is your target market?",
+        "Our product is a CRM for real estate agents",
+        "Independent brokers and small agencies.",
+        "Great! I'll create your personas now.",
+        "Wonderful! Let me generate",
+        "them.",
+    ],
+    [
+        "What do you sell?",
+        "Consulting",
+        "Who are your customers?",
+        "Manufacturing companies",
+        "What is your product exactly? Can you describe it?",
+        "Lean process audits for factories.",
+    ],
+]
+
+FRAGMENTS = sorted({msg for conversation in RECORDED_CONVERSATIONS for msg in conversation} | {
+    "ok", "Sure.", "that's it", "Amazing! I'll", "create it now.", "I'll now", "generate your practice partner",
+    "We sell to enterprise teams", "Tell me about your product?", "   ",
+})
+
+
+@pytest.fixture
+def service():
+    return SamConversationService()
+
+
+def _assert_same(service, analyzer, messages):
+    assert analyzer.result() == service.analyze_conversation(messages)
+
+
+@pytest.mark.parametrize("conversation", RECORDED_CONVERSATIONS)
+def test_incremental_matches_full_analysis_per_message(service, conversation):
+    """Feeding one message at a time matches re-analyzing every prefix."""
+    analyzer = SamConversationAnalyzer(service)
+    for i, msg in enumerate(conversation):
+        analyzer.feed([msg])
+        _assert_same(service, analyzer, conversation[:i + 1])
+
+
+def test_incremental_matches_full_analysis_random(service):
+    """Random transcripts fed in random chunks agree with the full analysis."""
+    rng = random.Random(7)
+    for _ in range(300):
+        conversation = [rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 14))]
+        analyzer = SamConversationAnalyzer(service)
+        position = 0
+        while position < len(conversation):
+            step = rng.randint(1, 4)
+            analyzer.feed(conversation[position:position + step])
+            position += step
+            _assert_same(service, analyzer, conversation[:position])
+
+
+def test_completion_phrase_split_across_messages(service):
+    conversation = ["What do you sell?", "Software.", "Amazing! I'll", "create it now."]
+    analyzer = SamConversationAnalyzer(service).feed(conversation)
+    assert analyzer.result()["is_complete"] is True
+    assert service.analyze_conversation(conversation)["is_complete"] is True
+
+
+def test_analyze_incremental_resumes_and_restarts(service):
+    conversation = RECORDED_CONVERSATIONS[0]
+    first = service.analyze_incremental("c1", conversation=conversation[:3])
+    assert first["cursor"] == 3
+
+    result = service.analyze_incremental("c1", new_messages=conversation[3:], cursor=3)
+    assert result["cursor"] == len(conversation)
+    assert result["target_market"] == service.analyze_conversation(conversation)["target_market"]
+
+    with pytest.raises(AnalysisCursorMismatch) as excinfo:
+        service.analyze_incremental("c1", new_messages=["late"], cursor=2)
+    assert excinfo.value.cursor == len(conversation)
+    with pytest.raises(AnalysisCursorMismatch):
+        service.analyze_incremental("c1", new_messages=["late"])  # No cursor: cannot tell what was skipped
+
+    # An edited transcript (e.g. a corrected STT fragment) is re-analyzed from the start
+    edited = ["Hi, I'm Sam. What do you sell?", "Payroll software."]
+    result = service.analyze_incremental("c1", conversation=edited)
+    assert result["cursor"] == 2
+    assert result["product_service"] == "Payroll software."
+
+
+def test_tracked_conversations_are_bounded(service):
+    service.max_tracked_conversations = 3
+    for i in range(5):
+        service.analyze_incremental(f"c{i}", conversation=["What do you sell?", "Software."])
+    assert list(service._analyzers) == ["c2", "c3", "c4"]
+
+
+def test_route_asks_for_full_conversation_on_cursor_mismatch(service, monkeypatch):
+    """Skipped or replayed batches get 409 and the server cursor, never a partial analysis."""
+    from flask import Flask
+    from app.routes.api.sam_conversation_routes import sam_conversation_bp
+    from app.services import sam_conversation_service
+
+    monkeypatch.setattr(sam_conversation_service, 'get_sam_conversation_service', lambda: service)
+    app = Flask(__name__)
+    app.register_blueprint(sam_conversation_bp)
+    client = app.test_client()
+    conversation = RECORDED_CONVERSATIONS[0]
+
+    response = client.post('/analyze-sam-conversation', json={'conversation_id': 'c1', 'conversation': conversation[:3]})
+    assert response.get_json()['cursor'] == 3
+
+    skipped = client.post('/analyze-sam-conversation',
+                          json={'conversation_id': 'c1', 'new_messages': conversation[5:], 'cursor': 5})
+    assert skipped.status_code == 409 and skipped.get_json()['cursor'] == 3
+    missing = client.post('/analyze-sam-conversation', json={'conversation_id': 'c1', 'new_messages': conversation[3:]})
+    assert missing.status_code == 400
+
+    resent = client.post('/analyze-sam-conversation', json={'conversation_id': 'c1', 'conversation': conversation})
+    assert resent.status_code == 200 and resent.get_json()['cursor'] == len(conversation)
@@ -0,0 +1,211 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask import Flask
+from flask_login import LoginManager, UserMixin
+
+from app.routes.api import roleplay
+from app.services.coach_metrics import get_metrics
+from app.services import session_warmup
+from app.services.gpt4o_service import GPT4oServiceError, get_gpt4o_service
+from app.services.session_warmup import SessionWarmup
+
+PERSONA = {'name': 'Priya Raman', 'role': 'Operations Director', 'primary_concern': 'Missed deliveries',
+           'pain_points': ['Manual scheduling'], 'business_context': 'B2B'}
+
+
+class FakeService:
+    """Mock-mode stand-in for GPT4oService"""
+
+    def __init__(self, greeting='Hello there.'):
+        self.greeting = greeting
+        self.release = threading.Event()
+        self.release.set()
+        self.calls = []
+        self.phase_managers = {}
+
+    def generate_roleplay_greeting(self, persona, user_info=None):
+        self.release.wait(5)
+        self.calls.append(('greeting', persona['name'], user_info))
+        if isinstance(self.greeting, Exception):
+            raise self.greeting
+        return self.greeting
+
+    def generate_initial_greeting(self, persona, conversation_id=None):
+        self.calls.append(('cold_greeting', persona['name'], None))
+        return 'Hi, cold start.'
+
+    def generate_roleplay_response(self, persona, messages, user_info=None, conversation_id=None):
+        self.calls.append(('turn', persona['name'], user_info))
+        return 'Sure, go ahead.'
+
+
+def _stage_count(stage):
+    snapshot = get_metrics().snapshot().stages.get(stage)
+    return snapshot.count if snapshot else 0
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=2)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_greeting_is_prepared_once_and_handed_out_once(executor):
+    service = FakeService()
+    service.release.clear()
+    warmup = SessionWarmup(service=service, executor=executor)
+    state = warmup.start('s1', PERSONA, {'name': 'Sam'})
+    assert warmup.start('s1', PERSONA) is state  # Already warming
+    assert not state.ready
+
+    service.release.set()
+    assert warmup.take_greeting('s1') == 'Hello there.'  # Waits for the in-flight greeting
+    assert warmup.take_greeting('s1') is None
+    assert service.calls == [('greeting', 'Priya Raman', {'name': 'Sam'})]
+    assert warmup.get_stats()['greetings_reused'] == 1 and warmup.get_stats()['ready'] == 1
+
+
+def test_failed_or_unknown_warmup_gives_no_greeting(executor):
+    warmup = SessionWarmup(service=FakeService(greeting=RuntimeError('provider down')), executor=executor)
+    warmup.start('s1', PERSONA)
+    assert warmup.take_greeting('s1') is None
+    assert warmup.take_greeting('never-started') is None
+    assert warmup.get_stats()['failed'] == 1
+
+
+def test_first_turn_recorded_warm_or_cold(executor):
+    warmup = SessionWarmup(service=FakeService(), executor=executor)
+    warmup.start('warm', PERSONA).future.result(5)
+    warm_before, cold_before = _stage_count('first_turn_warm'), _stage_count('first_turn_cold')
+
+    with warmup.first_turn('warm') as warm:
+        assert warm
+    with warmup.first_turn('warm'):
+        pass  # Only the first turn counts
+    with warmup.first_turn('cold') as warm:
+        assert not warm
+
+    assert _stage_count('first_turn_warm') == warm_before + 1
+    assert _stage_count('first_turn_cold') == cold_before + 1
+
+
+def test_warmup_bounded_and_expires(executor):
+    warmup = SessionWarmup(service=FakeService(), executor=executor, max_warmups=2)
+    for key in ('a', 'b', 'c'):
+        warmup.start(key, PERSONA)
+    assert warmup.get('a') is None and warmup.get('c') is not None
+
+    warmup.ttl = 0
+    assert warmup.get('c') is None
+
+
+def test_greeting_uses_first_turn_system_prompt(monkeypatch):
+    service = get_gpt4o_service()
+    sent = []
+    monkeypatch.setattr(service, 'generate_response',
+                        lambda messages, system_prompt='', **kwargs: sent.append(system_prompt) or ' Hello there. ')
+    user_info = {'name': 'Sam'}
+
+    assert service.generate_roleplay_greeting(PERSONA, user_info) == 'Hello there.'
+    service.generate_roleplay_response(PERSONA, [{'role': 'user', 'content': 'Hi Priya'}], user_info=user_info)
+
+    assert len(sent) == 2 and sent[0] == sent[1]  # Byte-identical system prompt
+    assert sent[0].startswith(service.static_prompt_prefix())
+    assert service.static_prompt_prefix() is service.static_prompt_prefix()
+
+
+@pytest.fixture
+def client(executor, monkeypatch):
+    service = FakeService()
+    monkeypatch.setattr(roleplay, 'get_gpt4o_service', lambda: service)
+    warmup = SessionWarmup(service=service, executor=executor)
+    monkeypatch.setattr(roleplay, 'get_session_warmup', lambda: warmup)
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.register_blueprint(roleplay.roleplay_bp, url_prefix='/api/roleplay')
+    login_manager = LoginManager(app)
+
+    class User(UserMixin):
+        id = 7
+
+    login_manager.request_loader(lambda request: User())
+    client = app.test_client()
+    client.service, client.warmup = service, warmup
+    return client
+
+
+def test_roleplay_start_uses_warmed_greeting(client):
+    response = client.post('/api/roleplay/warmup', json={'persona': PERSONA})
+    assert response.status_code == 202
+    conversation_id = response.get_json()['conversation_id']
+    client.warmup.get(f'7:{conversation_id}').future.result(5)
+
+    response = client.post('/api/roleplay/start', json={'persona': PERSONA, 'conversation_id': conversation_id})
+    assert response.get_json() == {'conversation_id': conversation_id, 'initial_greeting': 'Hello there.'}
+    assert conversation_id in client.service.phase_managers
+
+    warm_before = _stage_count('first_turn_warm')
+    response = client.post('/api/roleplay/message', json={'conversation_id': conversation_id, 'message': 'Hi!'})
+    assert response.status_code == 200 and response.get_json()['response'] == 'Sure, go ahead.'
+    assert _stage_count('first_turn_warm') == warm_before + 1
+    assert [call[0] for call in client.service.calls] == ['greeting', 'turn']
+    # The turn is built with the user info the warm-up used
+    assert client.service.calls[0][2] == client.service.calls[1][2]
+
+
+def _counter(name):
+    return get_metrics().snapshot().counters.get(name, 0)
+
+
+def test_roleplay_start_without_warmup_is_cold(client):
+    cold_before = _counter('session_start_cold')
+    response = client.post('/api/roleplay/start', json={'persona': PERSONA})
+    assert response.status_code == 200
+    assert response.get_json()['initial_greeting'] == 'Hi, cold start.'
+    assert [call[0] for call in client.service.calls] == ['cold_greeting']  # /start starts no warm-up
+    assert _counter('session_start_cold') == cold_before + 1
+    assert client.warmup.get_stats()['started'] == 0
+
+
+def test_roleplay_start_does_not_wait_long_for_a_slow_warmup(client, monkeypatch):
+    monkeypatch.setattr(session_warmup, 'GREETING_WAIT', 0.05)
+    client.service.release.clear()
+    conversation_id = client.post('/api/roleplay/warmup', json={'persona': PERSONA}).get_json()['conversation_id']
+
+    response = client.post('/api/roleplay/start', json={'persona': PERSONA, 'conversation_id': conversation_id})
+    assert response.get_json()['initial_greeting'] == 'Hi, cold start.'
+
+    # The warm-up finishing before the first turn does not make a cold start warm
+    client.service.release.set()
+    client.warmup.get(f'7:{conversation_id}').future.result(5)
+    cold_before = _stage_count('first_turn_cold')
+    client.post('/api/roleplay/message', json={'conversation_id': conversation_id, 'message': 'Hi!'})
+    assert _stage_count('first_turn_cold') == cold_before + 1
+    assert client.warmup.get_stats()['cold_starts'] == 1
+
+
+def test_roleplay_start_falls_back_when_warmup_fails(client):
+    client.service.greeting = RuntimeError('provider down')
+    conversation_id = client.post('/api/roleplay/warmup', json={'persona': PERSONA}).get_json()['conversation_id']
+    client.warmup.get(f'7:{conversation_id}').future.result(5)
+
+    response = client.post('/api/roleplay/start', json={'persona': PERSONA, 'conversation_id': conversation_id})
+    assert response.get_json()['initial_greeting'] == 'Hi, cold start.'
+    assert client.warmup.get_stats()['failed'] == 1
+
+
+def test_greeting_errors_propagate(monkeypatch):
+    service = get_gpt4o_service()
+
+    def fail(messages, system_prompt='', **kwargs):
+        raise GPT4oServiceError('provider down')
+
+    monkeypatch.setattr(service, 'generate_response', fail)
+    with pytest.raises(GPT4oServiceError):
+        service.generate_roleplay_greeting(PERSONA)
+    monkeypatch.setattr(service, 'generate_response', lambda messages, system_prompt='', **kwargs: '  ')
+    with pytest.raises(GPT4oServiceError):
+        service.generate_roleplay_greeting(PERSONA)
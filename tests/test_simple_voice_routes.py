@@ -0,0 +1,249 @@
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from flask import Flask
+from flask_login import LoginManager, UserMixin
+
+from app.routes.api import simple_voice_routes
+from app.services import deepgram_http
+from app.services.conversation_patterns import get_filler_phrases
+from app.services.deepgram_http import DeepgramHTTPClient, DeepgramHTTPError
+from app.services.tts_cache import TTSCache
+
+AUDIO_CHUNKS = [b'ID3-frame-0;', b'frame-1;', b'frame-2;']
+
+
+class FakeDeepgram(BaseHTTPRequestHandler):
+    """Local stand-in for the Deepgram /listen and /speak REST endpoints"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive
+    chunk_delay = 0.15
+
+    def log_message(self, *args):
+        pass
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = b''
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return body
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def _send(self, status, body, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self._read_body()
+        self.server.requests.append({
+            'path': self.path.split('?')[0],
+            'port': self.client_address[1],
+            'chunked': self.headers.get('Transfer-Encoding', '').lower() == 'chunked',
+            'content_type': self.headers.get('Content-Type'),
+            'authorization': self.headers.get('Authorization'),
+            'body': body
+        })
+        if self.path.startswith('/listen'):
+            transcript = f"{len(body)} bytes of {self.headers.get('Content-Type')}"
+            result = {'results': {'channels': [{'alternatives': [{'transcript': transcript}]}]}}
+            self._send(200, json.dumps(result).encode())
+        elif json.loads(body)['text'] == 'fail':
+            self._send(400, b'{"err_msg": "bad voice"}')
+        else:
+            self.send_response(200)
+            self.send_header('Content-Type', 'audio/mpeg')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for i, chunk in enumerate(AUDIO_CHUNKS):
+                if i:
+                    time.sleep(self.chunk_delay)  # Synthesis still running
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                self.wfile.flush()
+            self.wfile.write(b'0\r\n\r\n')
+
+
+@pytest.fixture
+def fake_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeDeepgram)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def deepgram(fake_server):
+    host, port = fake_server.server_address
+    client = DeepgramHTTPClient(api_key='test-key', base_url=f'http://{host}:{port}', tts_timeout=5)
+    yield client
+    client.session.close()
+
+
+@pytest.fixture
+def tts_cache(tmp_path, monkeypatch):
+    cache = TTSCache(directory=str(tmp_path / 'tts'))
+    monkeypatch.setattr(deepgram_http, 'get_tts_cache', lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def client(deepgram, tts_cache, monkeypatch):
+    monkeypatch.setattr(simple_voice_routes, 'get_deepgram_http_client', lambda: deepgram)
+    app = Flask(__name__)
+    app.register_blueprint(simple_voice_routes.simple_voice_bp, url_prefix='/api/voice')
+    login_manager = LoginManager(app)
+
+    class User(UserMixin):
+        id = 7
+
+    login_manager.request_loader(lambda request: User())
+    return app.test_client()
+
+
+def test_transcribe_streams_upload_over_one_connection(deepgram, fake_server):
+    audio = b'RIFF' + bytes(200_000)
+    for _ in range(3):
+        result = deepgram.transcribe(io.BytesIO(audio))
+        assert result['results']['channels'][0]['alternatives'][0]['transcript'] == '200004 bytes of audio/wav'
+
+    requests = fake_server.requests
+    assert all(r['chunked'] and r['body'] == audio for r in requests)  # Streamed, not one buffered body
+    assert requests[0]['authorization'] == 'Token test-key'
+    assert len({r['port'] for r in requests}) == 1  # Keep-alive: the connection was reused
+
+
+def test_speak_yields_audio_before_synthesis_finishes(deepgram):
+    start = time.monotonic()
+    content_type, audio = deepgram.speak('Hello there')
+    first = next(audio)
+    first_at = time.monotonic() - start
+    rest = b''.join(audio)
+    total = time.monotonic() - start
+
+    assert content_type == 'audio/mpeg'
+    assert first + rest == b''.join(AUDIO_CHUNKS)
+    assert first_at < FakeDeepgram.chunk_delay < total
+
+
+def test_speak_error_releases_connection(deepgram, fake_server):
+    with pytest.raises(DeepgramHTTPError) as excinfo:
+        deepgram.speak('fail')
+    assert excinfo.value.status_code == 400 and 'bad voice' in excinfo.value.body
+
+    _, audio = deepgram.speak('ok')
+    assert b''.join(audio) == b''.join(AUDIO_CHUNKS)
+    assert len({r['port'] for r in fake_server.requests}) == 1
+
+
+def test_transcribe_route_accepts_multipart_and_raw_bodies(client, fake_server):
+    response = client.post('/api/voice/transcribe', data={'audio': (io.BytesIO(b'x' * 5000), 'clip.webm', 'audio/webm')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert response.get_json() == {'success': True, 'transcript': '5000 bytes of audio/webm'}
+
+    # Raw audio bodies are piped straight through
+    response = client.post('/api/voice/transcribe', data=b'y' * 7000, content_type='audio/ogg')
+    assert response.get_json()['transcript'] == '7000 bytes of audio/ogg'
+    assert fake_server.requests[-1]['chunked']
+
+    assert client.post('/api/voice/transcribe', data={}, content_type='multipart/form-data').status_code == 400
+
+
+def test_speak_route_relays_stream(client):
+    response = client.post('/api/voice/speak', json={'text': 'Hello there'}, buffered=False)
+    assert response.status_code == 200 and response.mimetype == 'audio/mpeg'
+    assert b''.join(response.response) == b''.join(AUDIO_CHUNKS)
+
+    response = client.post('/api/voice/speak', json={'text': 'fail'})
+    assert response.status_code == 500 and 'bad voice' in response.get_json()['details']
+
+
+def test_speak_route_replays_cached_phrase(client, fake_server, tts_cache):
+    for _ in range(3):
+        response = client.post('/api/voice/speak', json={'text': 'Got it.'})
+        assert response.status_code == 200 and response.data == b''.join(AUDIO_CHUNKS)
+    client.post('/api/voice/speak', json={'text': '  Got   it. '})  # Same phrase once normalized
+
+    assert len(fake_server.requests) == 1
+    assert tts_cache.get_stats()['misses'] == 1 and tts_cache.get_stats()['memory_hits'] == 3
+
+
+def test_prewarm_fillers_synthesizes_each_phrase_per_voice(deepgram, fake_server, tts_cache, monkeypatch):
+    monkeypatch.setattr(FakeDeepgram, 'chunk_delay', 0)
+    for future in deepgram.prewarm_fillers(voices=['aura-asteria-en', 'aura-orion-en']):
+        future.result(10)
+    phrases = get_filler_phrases()
+    assert len(fake_server.requests) == 2 * len(phrases)
+    assert {json.loads(r['body'])['model'] for r in fake_server.requests} == {'aura-asteria-en', 'aura-orion-en'}
+
+    assert deepgram.prewarm_fillers(voices=['aura-asteria-en']) == []  # Already cached
+    _, audio = deepgram.speak_cached(phrases[0])
+    assert b''.join(audio) == b''.join(AUDIO_CHUNKS)
+    assert len(fake_server.requests) == 2 * len(phrases)
+
+
+def test_prewarm_runs_once_for_workers_sharing_the_cache(deepgram, fake_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(FakeDeepgram, 'chunk_delay', 0)
+    first_worker, second_worker = TTSCache(directory=str(tmp_path / 'tts')), TTSCache(directory=str(tmp_path / 'tts'))
+
+    futures = deepgram.prewarm_fillers(cache=first_worker, voices=['aura-asteria-en'])
+    assert deepgram.prewarm_fillers(cache=second_worker, voices=['aura-asteria-en']) == []
+    for future in futures:
+        future.result(10)
+    assert len(fake_server.requests) == len(get_filler_phrases())
+
+    # A different voice set is a new phrase set
+    futures = deepgram.prewarm_fillers(cache=second_worker, voices=['aura-orion-en'])
+    for future in futures:
+        future.result(10)
+    assert len(fake_server.requests) == 2 * len(get_filler_phrases())
+
+
+def test_failed_prewarm_releases_its_claim(deepgram, fake_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(deepgram_http, 'get_filler_phrases', lambda: ['fail', 'fail'])
+    cache = TTSCache(directory=str(tmp_path / 'tts'))
+
+    for attempt in (1, 2):
+        futures = deepgram.prewarm_fillers(cache=cache, voices=['aura-asteria-en'])
+        assert len(futures) == 2  # Nothing stored last time, so this worker tries again
+        for future in futures:
+            future.result(10)
+        assert len(fake_server.requests) == 2 * attempt
+    assert cache.get_stats()['prewarmed'] == 0
+
+
+@pytest.mark.parametrize('testing, enabled, expected', [(False, True, 1), (True, True, 0), (False, False, 0)])
+def test_prewarm_is_opt_in_and_skipped_for_test_apps(testing, enabled, expected, monkeypatch):
+    calls = []
+
+    class Client:
+        api_key = 'test-key'
+
+        def prewarm_fillers(self):
+            calls.append(1)
+
+    monkeypatch.setattr(simple_voice_routes, 'get_deepgram_http_client', lambda: Client())
+    monkeypatch.setattr(simple_voice_routes, '_prewarm_checked', False)
+    app = Flask(__name__)
+    app.config.update(TESTING=testing, TTS_PREWARM=enabled)
+    app.register_blueprint(simple_voice_routes.simple_voice_bp, url_prefix='/api/voice')
+    assert calls == []  # Nothing at registration (create_app, CLI commands)
+
+    client = app.test_client()
+    client.get('/missing')
+    client.get('/missing')
+    assert len(calls) == expected  # On the first request only
@@ -0,0 +1,172 @@
+import json
+import random
+
+import pytest
+
+from app.services.streaming_json import IncompleteJSONError, IncrementalJSONParser, extract_json, parse_stream
+
+COACH_OUTPUT = {
+    'decision': 'intervene',
+    'confidence': 0.82,
+    'reasoning': 'User asked {twice} about "pricing" and got no answer }',
+    'state_patch': {'max_sentences': {'value': 2, 'ttl_turns': 4},
+                    'hard_constraints': [{'action': 'add', 'value': 'wait_for_complete_thought'}]},
+    'one_shot_line': None
+}
+
+WRAPPERS = [
+    '{}',
+    '```json\n{}\n```',
+    'Here is my analysis:\n\n```\n{}\n```\nLet me know if {{that}} helps.',
+    'Sure - the JSON {{as requested}}: {}',
+]
+
+
+def chunked(text, rng, max_size=12):
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, max_size)
+        yield text[i:i + size]
+        i += size
+
+
+def random_value(rng, depth=0):
+    kind = rng.choice(['str', 'num', 'lit', 'obj', 'list'] if depth < 3 else ['str', 'num', 'lit'])
+    if kind == 'str':
+        alphabet = 'abc {}[]":,\\\n\t/é€😀'
+        return ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+    if kind == 'num':
+        return rng.choice([0, -1, 42, 3.5, -0.25, 1e-7, 12345678901234])
+    if kind == 'lit':
+        return rng.choice([True, False, None])
+    if kind == 'obj':
+        return {f'k{i}': random_value(rng, depth + 1) for i in range(rng.randint(0, 3))}
+    return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+
+
+def random_object(rng):
+    return {f'field_{i}': random_value(rng) for i in range(rng.randint(1, 6))}
+
+
+def feed_all(parser, chunks):
+    completed = []
+    for chunk in chunks:
+        completed.extend(parser.feed(chunk))
+    return completed
+
+
+@pytest.mark.parametrize('wrapper', WRAPPERS)
+def test_object_found_in_prose_and_code_fences(wrapper):
+    text = wrapper.format(json.dumps(COACH_OUTPUT, indent=2))
+    assert extract_json(text) == COACH_OUTPUT
+
+
+def test_fields_emitted_as_soon_as_complete():
+    text = json.dumps(COACH_OUTPUT)
+    seen = []
+    parser = IncrementalJSONParser(on_field=lambda key, value: seen.append(key))
+    cut = text.index('"reasoning"')
+    assert parser.feed(text[:cut]) == [('decision', 'intervene'), ('confidence', 0.82)]
+    assert not parser.done
+    parser.feed(text[cut:])
+    assert seen == list(COACH_OUTPUT) and parser.done
+    assert parser.result() == COACH_OUTPUT
+
+
+def test_scalars_wait_for_a_delimiter():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"confidence": 0.8') == []  # Could still be 0.85
+    assert parser.feed('5, "n": tr') == [('confidence', 0.85)]
+    assert parser.feed('ue}') == [('n', True)]
+
+
+def test_escape_split_across_chunks():
+    parser = IncrementalJSONParser()
+    for chunk in ['{"a": "say \\', '"hi\\', '"", "b": 1}']:
+        parser.feed(chunk)
+    assert parser.result() == {'a': 'say "hi"', 'b': 1}
+
+
+def test_stray_brace_in_prose_is_skipped():
+    parser = IncrementalJSONParser()
+    parser.feed('I would {probably} say: {"decision": "persist"}')
+    assert parser.result() == {'decision': 'persist'}
+    assert parser.restarts == 1
+
+
+def test_raw_newlines_in_strings_are_tolerated():
+    assert extract_json('{"reasoning": "line one\nline two"}') == {'reasoning': 'line one\nline two'}
+
+
+@pytest.mark.parametrize('text', ['', 'no json here', '```json\n```', '{"a": 1', '{"a": tru}', '{"a" 1}',
+                                  '{a: 1}', '{"a": 1 "b": 2}', '{"a": [1, 2}', '{"a": "unterminated}'])
+def test_malformed_or_missing_object_raises(text):
+    with pytest.raises(IncompleteJSONError):
+        extract_json(text)
+
+
+def test_fuzz_roundtrip_any_chunking():
+    rng = random.Random(1234)
+    for _ in range(300):
+        obj = random_object(rng)
+        text = rng.choice(WRAPPERS).format(json.dumps(obj, indent=rng.choice([None, 2]),
+                                                      ensure_ascii=rng.random() < 0.5))
+        parser = IncrementalJSONParser()
+        completed = feed_all(parser, chunked(text, rng))
+        assert parser.result() == obj
+        assert completed == list(obj.items())
+
+
+def test_fuzz_truncated_streams_give_only_correct_fields():
+    rng = random.Random(99)
+    for _ in range(60):
+        obj = random_object(rng)
+        text = json.dumps(obj)
+        for cut in range(len(text)):
+            parser = IncrementalJSONParser()
+            completed = feed_all(parser, chunked(text[:cut], rng))
+            with pytest.raises(IncompleteJSONError):
+                parser.result()
+            partial = parser.result(partial=True) if cut else {}
+            assert completed == list(partial.items())
+            assert all(obj[key] == value for key, value in partial.items())
+
+
+def test_fuzz_malformed_input_only_raises_value_errors():
+    rng = random.Random(7)
+    for _ in range(1500):
+        text = list(json.dumps(random_object(rng)))
+        for _ in range(rng.randint(1, 4)):
+            position = rng.randrange(len(text) + 1)
+            if rng.random() < 0.5 and position < len(text):
+                del text[position]
+            else:
+                text.insert(position, rng.choice('{}[]":,\\ x1'))
+        text = ''.join(text)
+        try:
+            result = extract_json(text)
+        except IncompleteJSONError:
+            continue
+        assert isinstance(result, dict)
+        # Whatever it accepts is valid JSON for the object it found
+        json.dumps(result)
+
+
+def test_parse_stream_stops_reading_once_satisfied():
+    consumed = []
+    closed = []
+
+    def stream():
+        try:
+            for chunk in ['{"decision": "persist", ', '"confidence": 0.9, ', '"reasoning": "', 'long text...', '"}']:
+                consumed.append(chunk)
+                yield chunk
+        finally:
+            closed.append(True)
+
+    fields, complete = parse_stream(stream(), until=lambda fields: 'confidence' in fields)
+    assert fields == {'decision': 'persist', 'confidence': 0.9}
+    assert not complete and len(consumed) == 2 and closed == [True]
+
+    fields, complete = parse_stream(iter(['x {"a": 1}', ' trailing']))
+    assert fields == {'a': 1} and complete
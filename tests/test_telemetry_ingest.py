@@ -0,0 +1,195 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from app.extensions import db
+from app.models import ClientTelemetryEvent
+from app.services.telemetry_ingest import (
+    DatabaseSink,
+    TelemetryIngestor,
+    TelemetryValidationError,
+    call_metrics_rows,
+    conversation_text_row,
+    session_summary,
+    websocket_message_row
+)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'telemetry.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+class ListSink:
+    def __init__(self):
+        self.batches = []
+        self.written = threading.Event()
+
+    def __call__(self, rows):
+        self.batches.append(list(rows))
+        self.written.set()
+
+
+def test_call_metrics_accepts_both_client_shapes():
+    [start] = call_metrics_rows({
+        'event': 'CALL_STARTING', 'sessionId': 'call-1', 'personaName': 'Dana',
+        'timestamp': '2026-03-01T10:00:00Z', 'metrics': {'duration': 0, 'reconnectAttempts': 0},
+        'persona': {'name': 'Dana', 'role': 'CFO'}
+    }, user_id=3)
+    assert start['kind'] == 'call_metrics' and start['event'] == 'CALL_STARTING'
+    assert start['session_id'] == 'call-1' and start['persona'] == 'Dana' and start['user_id'] == 3
+    assert start['reconnect_attempts'] == 0
+    assert ' ' not in start['payload']  # Compact JSON
+
+    rows = call_metrics_rows({
+        'metrics': {'sessionId': 'call-2', 'personaName': 'Lee', 'duration': 61000, 'reconnectAttempts': 2},
+        'events': [{'type': 'RESPONSE', 'latencyMs': 420}, {'type': 'RECONNECT'}]
+    })
+    assert [row['kind'] for row in rows] == ['call_metrics', 'call_event', 'call_event']
+    assert all(row['session_id'] == 'call-2' for row in rows)
+    assert rows[1]['latency_ms'] == 420.0 and rows[2]['event'] == 'RECONNECT'
+
+
+@pytest.mark.parametrize('payload', [
+    None,
+    {},
+    {'metrics': [], 'sessionId': 'x'},
+    {'sessionId': 'x', 'events': ['not an object']},
+    {'sessionId': 'x', 'events': [{'latencyMs': 'slow'}]},
+    {'sessionId': 'x', 'latencyMs': float('nan')},
+    {'sessionId': ['x']},
+    {'sessionId': 'x', 'blob': 'a' * 20000},
+    {'sessionId': 'x', 'events': [{}] * 201},
+])
+def test_invalid_call_metrics_are_rejected(payload):
+    with pytest.raises(TelemetryValidationError):
+        call_metrics_rows(payload)
+
+
+def test_websocket_and_transcript_rows():
+    row = websocket_message_row({'direction': 'SENT', 'persona': 'Dana', 'message': {'type': 'Settings'}})
+    assert row['kind'] == 'websocket' and row['event'] == 'SENT'
+    assert row['payload'] == '{"message":{"type":"Settings"},"timestamp":null}'
+
+    row = conversation_text_row({'persona': 'Dana', 'role': 'user', 'text': 'Hello'}, user_id=1)
+    assert row['kind'] == 'transcript' and row['event'] == 'user'
+    with pytest.raises(TelemetryValidationError):
+        conversation_text_row({'role': 'user', 'text': 42})
+
+
+def test_ingestor_flushes_in_batches():
+    sink = ListSink()
+    ingestor = TelemetryIngestor(sink, batch_size=100, flush_interval=60)
+    ingestor.enqueue([{'n': i} for i in range(250)])
+
+    # Batch size reached: the background thread wakes without waiting for the interval
+    assert sink.written.wait(5)
+    ingestor.flush()
+    assert [len(batch) for batch in sink.batches] == [100, 100, 50]
+    assert ingestor.stats['written'] == 250 and ingestor.queued() == 0
+
+
+def test_ingestor_drops_when_full_and_survives_sink_errors():
+    calls = []
+
+    def flaky_sink(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise RuntimeError('database down')
+
+    ingestor = TelemetryIngestor(flaky_sink, batch_size=10, flush_interval=60, max_queue=15)
+    assert ingestor.enqueue([{}] * 20) == 15
+    ingestor.flush()
+    assert ingestor.stats == {'enqueued': 15, 'dropped': 5, 'written': 5, 'batches': 1, 'failed': 10, 'purged': 0}
+
+
+def test_rows_persist_and_summarize(app):
+    ingestor = TelemetryIngestor(DatabaseSink(app), batch_size=50, flush_interval=60)
+    rows = call_metrics_rows({'event': 'CALL_STARTING', 'sessionId': 'call-1', 'metrics': {'reconnectAttempts': 0}}, 7)
+    rows += call_metrics_rows({
+        'metrics': {'sessionId': 'call-1', 'reconnectAttempts': 1},
+        'events': [{'type': 'RESPONSE', 'latencyMs': ms} for ms in range(10, 1010, 10)] + [{'type': 'RECONNECT'}] * 2
+    }, 7)
+    rows.append(websocket_message_row({'direction': 'RECEIVED', 'sessionId': 'call-1', 'message': {}}, 7))
+    rows += call_metrics_rows({'sessionId': 'other', 'latencyMs': 5000}, 7)
+    ingestor.enqueue(rows)
+    ingestor.flush()
+
+    assert db.session.query(ClientTelemetryEvent).count() == len(rows)
+    summary = session_summary('call-1', 7)
+    assert summary['events'] == len(rows) - 1
+    assert summary['events_by_kind'] == {'call_metrics': 2, 'call_event': 102, 'websocket': 1}
+    assert summary['latency_ms'] == {'count': 100, 'p50': 500.0, 'p95': 950.0, 'p99': 990.0, 'max': 1000.0}
+    assert summary['reconnects'] == 2
+
+
+def test_summary_only_covers_the_users_own_rows(app):
+    sink = DatabaseSink(app)
+    sink(call_metrics_rows({'sessionId': 'call-1', 'latencyMs': 100}, 7)
+         + call_metrics_rows({'sessionId': 'call-1', 'latencyMs': 9000}, 8)
+         + call_metrics_rows({'sessionId': 'call-1', 'latencyMs': 9000}))
+
+    assert session_summary('call-1', 7)['latency_ms']['max'] == 100.0
+    assert session_summary('call-1', 9) is None
+    assert session_summary('missing', 7) is None
+
+
+def test_retention_deletes_only_expired_rows(app, monkeypatch):
+    monkeypatch.setattr('app.services.telemetry_ingest.PURGE_BATCH', 3)
+    now = datetime(2026, 3, 15)
+    rows = [dict(call_metrics_rows({'sessionId': f'old-{i}'})[0], received_at=now - timedelta(days=20))
+            for i in range(7)]
+    rows.append(dict(call_metrics_rows({'sessionId': 'recent'})[0], received_at=now - timedelta(days=2)))
+    DatabaseSink(app)(rows)
+
+    ingestor = TelemetryIngestor(DatabaseSink(app), retention=timedelta(days=14))
+    assert ingestor.purge(now) == 7
+    assert [row.session_id for row in db.session.query(ClientTelemetryEvent).all()] == ['recent']
+    assert ingestor.stats['purged'] == 7
+
+    # No retention configured, or a sink without purge(): nothing is deleted
+    assert TelemetryIngestor(DatabaseSink(app)).purge(now + timedelta(days=30)) == 0
+    assert TelemetryIngestor(ListSink(), retention=timedelta(days=1)).purge(now) == 0
+
+
+def test_anonymous_telemetry_endpoints_are_rate_limited(app, monkeypatch):
+    from flask_login import LoginManager
+
+    from app.routes.api import call_metrics as call_metrics_routes
+    from app.routes.api import websocket_logging
+    from app.utils import rate_limiter
+
+    limiter = rate_limiter.RateLimiter(rate_limiter.MemoryStorage())
+    monkeypatch.setattr(rate_limiter, 'get_rate_limiter', lambda: limiter)
+    sink = ListSink()
+    ingestor = TelemetryIngestor(sink, flush_interval=60)
+    monkeypatch.setattr(call_metrics_routes, 'get_telemetry_ingestor', lambda: ingestor)
+    monkeypatch.setattr(websocket_logging, 'get_telemetry_ingestor', lambda: ingestor)
+
+    app.secret_key = 'test'
+    LoginManager(app).user_loader(lambda user_id: None)
+    app.register_blueprint(call_metrics_routes.call_metrics_bp)
+    app.register_blueprint(websocket_logging.websocket_logging_bp)
+    client = app.test_client()
+
+    limit = call_metrics_routes.TELEMETRY_RATE_LIMIT
+    half = limit // 2
+    statuses = [client.post('/call-metrics', json={'sessionId': 'x', 'latencyMs': 10}).status_code
+                for _ in range(half)]
+    # The budget is shared across the telemetry endpoints
+    statuses += [client.post('/log-websocket-message', json={'direction': 'SENT', 'message': {}}).status_code
+                 for _ in range(limit - half)]
+    assert statuses == [202] * limit
+    assert len(sink.batches) == 0 and ingestor.queued() == limit
+
+    response = client.post('/log-websocket-message', json={'direction': 'SENT', 'message': {}})
+    assert response.status_code == 429 and 'Retry-After' in response.headers
+    assert client.post('/call-metrics', json={'sessionId': 'x'}).status_code == 429
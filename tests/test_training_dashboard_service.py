@@ -0,0 +1,153 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import TrainingSession
+from app.services.training_dashboard_service import (
+    CHART_POINTS,
+    DashboardCache,
+    build_dashboard_context,
+    level_for_score
+)
+from app.services.user_metrics_rollup import record_session_end
+
+TODAY = date(2026, 3, 1)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'dashboard.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def query_count(app):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', count)
+
+
+def _seed(profile_id, count, seed=0):
+    """Sessions ending one per day up to TODAY, with mixed statuses and scores."""
+    rng = random.Random(seed)
+    for i in range(count):
+        end = datetime.combine(TODAY, datetime.min.time()) - timedelta(days=count - 1 - i) + timedelta(hours=9)
+        db.session.add(TrainingSession(
+            user_profile_id=profile_id,
+            status=rng.choice(['completed', 'completed', 'completed', 'active', 'canceled']),
+            start_time=end - timedelta(minutes=20), end_time=end,
+            session_length=rng.randint(60, 1800),
+            overall_score=rng.uniform(30, 99), trust_score=rng.choice([None, rng.uniform(40, 90)]),
+            persuasion_rating=rng.uniform(40, 90), confidence_score=rng.uniform(40, 90)
+        ))
+    db.session.commit()
+
+
+def _reference(profile_id):
+    """The dashboard numbers computed by loading every session (previous route behaviour)."""
+    sessions = TrainingSession.query.filter_by(user_profile_id=profile_id).order_by(TrainingSession.start_time.desc()).all()
+    completed = [s for s in sessions if s.status == 'completed']
+    scores = [s.overall_score or 0 for s in reversed(completed)]
+    trust = [s.trust_score for s in completed if s.trust_score is not None]
+    growth = (scores[-1] - scores[0]) / scores[0] * 100 if len(scores) > 1 and scores[0] else 0
+    return {
+        'total_sessions': len(sessions), 'completed_sessions': len(completed),
+        'current_score': scores[-1], 'growth_percentage': growth,
+        'avg_trust_score': sum(trust) / len(trust) if trust else 0,
+        'avg_persuasion_rating': sum(s.persuasion_rating for s in completed) / len(completed),
+        'avg_confidence_score': completed[0].confidence_score,
+        'total_training_time': sum(s.session_length for s in completed),
+        'chronological_scores': scores[-CHART_POINTS:],
+        'recent_ids': [s.id for s in completed[:5]],
+    }
+
+
+def test_context_matches_full_scan(app):
+    """SQL aggregates agree with computing the dashboard from every row."""
+    _seed(1, 120)
+    _seed(2, 30, seed=1)  # Other users' sessions are excluded
+
+    context = build_dashboard_context(1, today=TODAY)
+    expected = _reference(1)
+    for name in ('total_sessions', 'completed_sessions', 'total_training_time'):
+        assert getattr(context, name) == expected[name], name
+    for name in ('current_score', 'growth_percentage', 'avg_trust_score', 'avg_persuasion_rating', 'avg_confidence_score'):
+        assert getattr(context, name) == pytest.approx(expected[name]), name
+    assert context.chronological_scores == pytest.approx(expected['chronological_scores'])
+    assert [s.id for s in context.sessions[:5]] == expected['recent_ids']
+    assert (context.current_level, context.current_title) == level_for_score(context.current_score)[:2]
+
+
+def test_query_count_is_independent_of_history_size(app, query_count):
+    """The dashboard costs the same number of queries for 10 or 500 sessions."""
+    _seed(1, 10)
+    _seed(2, 500, seed=1)
+
+    counts = []
+    for profile_id in (1, 2):
+        query_count.clear()
+        build_dashboard_context(profile_id, today=TODAY)
+        counts.append(len(query_count))
+    assert counts[0] == counts[1] <= 4
+
+
+def test_session_streak(app):
+    """Consecutive days with a completed session, allowing today to be empty so far."""
+    day = datetime(2026, 2, 26, 10)
+    for offset, status in [(0, 'completed'), (1, 'completed'), (1, 'completed'), (2, 'canceled'), (4, 'completed')]:
+        db.session.add(TrainingSession(user_profile_id=1, status=status, start_time=day, end_time=day + timedelta(days=offset)))
+    db.session.commit()
+
+    assert build_dashboard_context(1, today=date(2026, 2, 27)).session_streak == 2
+    assert build_dashboard_context(1, today=date(2026, 2, 28)).session_streak == 2
+    assert build_dashboard_context(1, today=date(2026, 3, 1)).session_streak == 0  # Canceled day breaks it
+    assert build_dashboard_context(1, today=date(2026, 3, 3)).session_streak == 1
+    assert build_dashboard_context(1, today=date(2026, 3, 4)).session_streak == 0
+
+
+def test_no_completed_sessions(app):
+    db.session.add(TrainingSession(user_profile_id=1, status='active'))
+    db.session.commit()
+
+    context = build_dashboard_context(1)
+    assert (context.total_sessions, context.completed_sessions, context.current_score) == (1, 0, 0)
+    assert context.to_template_context(user=None)['sessions'] == []
+
+
+def test_cache_invalidated_when_session_completes(app, query_count):
+    """Memoized until the user's rollup changes; then rebuilt."""
+    _seed(1, 20)
+    cache = DashboardCache()
+    first = cache.get(1)
+
+    query_count.clear()
+    assert cache.get(1) is first
+    assert len(query_count) <= 1  # Rollup version check only
+
+    session = TrainingSession(user_profile_id=1, status='active', start_time=datetime.utcnow(), overall_score=91.0)
+    db.session.add(session)
+    db.session.commit()
+    session.status = 'completed'
+    session.end_time = datetime.utcnow()
+    record_session_end(session)
+    db.session.commit()
+
+    refreshed = cache.get(1)
+    assert refreshed is not first
+    assert refreshed.completed_sessions == first.completed_sessions + 1
+    assert refreshed.current_score == 91.0
+    assert cache.hits == 1 and cache.misses == 2
@@ -0,0 +1,95 @@
+import os
+
+from app.services.coach_metrics import get_metrics
+from app.services.tts_cache import TTSCache, cache_key
+
+
+def synthesizer(calls, audio=b'mp3-audio'):
+    def synthesize():
+        calls.append(1)
+        return 'audio/mpeg', [audio[:4], audio[4:]]
+    return synthesize
+
+
+def test_key_covers_voice_model_format_and_normalized_text():
+    key = cache_key('aura-asteria-en', 'deepgram-aura', 'mp3_24000', 'Got it.')
+    assert key == cache_key('aura-asteria-en', 'deepgram-aura', 'mp3_24000', '  Got\n it. ')
+    assert key != cache_key('aura-asteria-en', 'deepgram-aura', 'mp3_24000', 'got it.')
+    assert key != cache_key('aura-orion-en', 'deepgram-aura', 'mp3_24000', 'Got it.')
+    assert key != cache_key('aura-asteria-en', 'deepgram-aura', 'linear16_24000', 'Got it.')
+
+
+def test_miss_is_relayed_then_stored_and_replayed(tmp_path):
+    cache = TTSCache(directory=str(tmp_path))
+    calls = []
+    hits_before = get_metrics().snapshot().counters.get('tts_cache_hit', 0)
+
+    content_type, audio = cache.stream('k1', 'Got it.', synthesizer(calls))
+    assert content_type == 'audio/mpeg' and b''.join(audio) == b'mp3-audio'
+    content_type, audio = cache.stream('k1', 'Got it.', synthesizer(calls))
+    assert content_type == 'audio/mpeg' and b''.join(audio) == b'mp3-audio'
+
+    assert len(calls) == 1
+    assert cache.get_stats()['hit_rate'] == 0.5
+    assert get_metrics().snapshot().counters['tts_cache_hit'] == hits_before + 1
+
+
+def test_interrupted_and_long_streams_are_not_stored(tmp_path):
+    cache = TTSCache(directory=str(tmp_path), max_text_chars=20)
+    calls = []
+    _, audio = cache.stream('k1', 'Got it.', synthesizer(calls))
+    next(audio)
+    audio.close()  # Client went away mid-stream
+    assert 'k1' not in cache
+
+    _, audio = cache.stream('k2', 'A one-off model response, too long to cache', synthesizer(calls))
+    assert b''.join(audio) == b'mp3-audio'
+    assert 'k2' not in cache
+
+
+def test_disk_tier_survives_restart_in_lru_order(tmp_path):
+    cache = TTSCache(directory=str(tmp_path), disk_bytes=100)
+    cache.put('a' * 64, 'audio/mpeg', b'x' * 30)
+    cache.put('b' * 64, 'audio/mpeg', b'y' * 30)
+    os.utime(cache._path('a' * 64), (1, 1))
+    os.utime(cache._path('b' * 64), (2, 2))
+
+    restarted = TTSCache(directory=str(tmp_path), disk_bytes=100)
+    assert restarted.get('a' * 64) == ('audio/mpeg', b'x' * 30)  # From disk; now most recent
+    restarted.put('c' * 64, 'audio/mpeg', b'z' * 30)  # Over the byte bound: evicts 'b'
+
+    assert 'b' * 64 not in restarted and not os.path.exists(restarted._path('b' * 64))
+    assert 'a' * 64 in restarted and 'c' * 64 in restarted
+    assert restarted.get_stats()['evicted'] == 1
+
+
+def test_memory_tier_is_bounded_by_bytes(tmp_path):
+    cache = TTSCache(directory=str(tmp_path), memory_bytes=50)
+    cache.put('k1', 'audio/mpeg', b'x' * 30)
+    cache.put('k2', 'audio/mpeg', b'y' * 30)
+    stats = cache.get_stats()
+    assert stats['memory_entries'] == 1 and stats['memory_bytes'] == 30
+    assert stats['disk_entries'] == 2
+
+    calls = []
+    _, audio = cache.stream('k1', 'Got it.', synthesizer(calls))
+    assert b''.join(audio) == b'x' * 30 and not calls
+    assert cache.get_stats()['disk_hits'] == 1
+
+
+def test_prewarm_skips_cached_and_survives_failures(tmp_path):
+    cache = TTSCache(directory=str(tmp_path))
+    cache.put('k1', 'audio/mpeg', b'cached')
+    calls = []
+
+    def failing():
+        raise RuntimeError('provider down')
+
+    futures = cache.prewarm([('k1', 'Got it.', synthesizer(calls)), ('k2', 'Right.', synthesizer(calls)),
+                             ('k3', 'Okay.', failing)])
+    for future in futures:
+        future.result(5)
+
+    assert len(futures) == 2 and len(calls) == 1
+    assert cache.get('k2') == ('audio/mpeg', b'mp3-audio') and 'k3' not in cache
+    assert cache.get_stats()['prewarmed'] == 1
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+import importlib.util
+import os
+
+import pytest
+from flask import Flask
+from flask_login import LoginManager, login_user
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import PerformanceMetrics, TrainingSession, User, UserMetricsRollup, UserProfile
+from app.services.user_metrics_rollup import (
+    SKILL_FIELDS,
+    get_user_rollup,
+    rebuild_user_metrics,
+    record_session_end,
+    record_session_metrics
+)
+
+ROLLUP_COLUMNS = [c.name for c in UserMetricsRollup.__table__.columns if c.name != 'updated_at']
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'rollup.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def _end_session(user_id, index, rating=None):
+    """Create a session, end it and store metrics the way the app does."""
+    start = datetime(2026, 1, 1) + timedelta(hours=index)
+    session = TrainingSession(user_id=user_id, start_time=start, status='active')
+    session.conversation = [{'role': 'user', 'content': 'hi'}, {'role': 'assistant', 'content': 'hello'}] * (index % 3 + 1)
+    db.session.add(session)
+    db.session.commit()
+
+    session.status = 'completed'
+    session.end_time = start + timedelta(minutes=5 + index)
+    record_session_end(session)
+    db.session.commit()
+
+    if rating is not None:
+        metrics = PerformanceMetrics(
+            training_session_id=session.id, user_profile_id=user_id,
+            rapport_building=rating, needs_discovery=rating - 1, objection_handling=60.0,
+            closing_techniques=rating / 2, product_knowledge=8, bias_effectiveness='{}',
+            emotional_awareness=5, tone_consistency=5
+        )
+        db.session.add(metrics)
+        record_session_metrics(metrics, session)
+        db.session.commit()
+
+
+def _snapshot(user_id):
+    db.session.expire_all()
+    row = db.session.get(UserMetricsRollup, user_id)
+    return {name: getattr(row, name) for name in ROLLUP_COLUMNS}
+
+
+def test_incremental_rollup_matches_rebuild(app):
+    """Updating row-by-row and rebuilding from scratch agree."""
+    for i in range(12):
+        _end_session(user_id=1 + i % 2, index=i, rating=(4 + i % 6) if i % 3 else None)
+
+    incremental = {uid: _snapshot(uid) for uid in (1, 2)}
+    assert incremental[1]['sessions_count'] == 6
+    assert incremental[1]['scored_sessions'] == 4
+
+    assert rebuild_user_metrics() == 2
+    for uid in (1, 2):
+        rebuilt = _snapshot(uid)
+        for name, value in incremental[uid].items():
+            assert rebuilt[name] == pytest.approx(value), name
+
+
+def test_skill_averages_are_on_percent_scale(app):
+    _end_session(user_id=1, index=0, rating=7)
+    rollup = _snapshot(1)
+    assert rollup['rapport_avg'] == pytest.approx(70)
+    assert rollup['presentation_avg'] == pytest.approx(80)
+    assert rollup['objection_handling_avg'] == pytest.approx(60)
+    assert set(SKILL_FIELDS) == {'rapport', 'discovery', 'presentation', 'objection_handling', 'closing'}
+
+
+def test_dashboard_reads_one_row(app):
+    """Metrics cost one query regardless of session count."""
+    for i in range(40):
+        _end_session(user_id=1, index=i, rating=6)
+    db.session.expire_all()
+    db.session.remove()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        rollup = get_user_rollup(1)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert rollup.sessions_count == 40
+    assert len(statements) == 1
+
+
+def test_missing_rollup_is_built_on_first_read(app):
+    """Users from before the backfill get their row lazily."""
+    _end_session(user_id=3, index=0)
+    db.session.query(UserMetricsRollup).delete()
+    db.session.commit()
+
+    assert get_user_rollup(3).sessions_count == 1
+    assert get_user_rollup(99).sessions_count == 0
+
+
+def _dashboard_api():
+    """app/routes/api.py, which the app/routes/api package shadows on import"""
+    path = os.path.join(os.path.dirname(__file__), '..', 'app', 'routes', 'api.py')
+    spec = importlib.util.spec_from_file_location('dashboard_api', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_dashboard_metrics_use_the_profile_id(app):
+    """Rollups are keyed by UserProfile.id, which need not equal User.id."""
+    users = [User(id=i, name=f'user{i}', email=f'user{i}@example.com') for i in (1, 2, 3)]
+    db.session.add_all(users + [UserProfile(id=2, user_id=1), UserProfile(id=1, user_id=2)])
+    db.session.commit()
+    for i in range(3):
+        _end_session(user_id=2, index=i)
+    _end_session(user_id=1, index=3)
+
+    api = _dashboard_api()
+    app.config['SECRET_KEY'] = 'test'
+    LoginManager(app)
+    for user_id, sessions in ((1, 3), (2, 1), (3, 0)):
+        with app.test_request_context():
+            login_user(db.session.get(User, user_id))
+            assert api.user_metrics().get_json()['sessions_count'] == sessions
+
+    # A user without a profile gets empty metrics and no stray rollup row
+    assert db.session.get(UserMetricsRollup, 3) is None
@@ -0,0 +1,91 @@
+import numpy as np
+
+from app.services.voice_activity_detector import (
+    VADConfig,
+    VoiceActivityDetector,
+    trim_silence
+)
+
+SAMPLE_RATE = 16000
+
+
+def _speech(ms, freq=220.0, amplitude=0.3):
+    """Harmonic tone: loud and spectrally peaked like voiced speech."""
+    t = np.arange(SAMPLE_RATE * ms // 1000) / SAMPLE_RATE
+    return amplitude * (np.sin(2 * np.pi * freq * t) + 0.5 * np.sin(2 * np.pi * 3 * freq * t))
+
+
+def _silence(ms, amplitude=0.001, seed=0):
+    return np.random.default_rng(seed).normal(0, amplitude, SAMPLE_RATE * ms // 1000)
+
+
+def _pcm(*parts):
+    return (np.concatenate(parts) * 32767).clip(-32768, 32767).astype('<i2').tobytes()
+
+
+def test_trims_leading_and_trailing_silence():
+    """Leading/trailing silence is removed down to the configured padding."""
+    result = trim_silence(_pcm(_silence(1000), _speech(800), _silence(1500)))
+
+    assert result.original_ms == 3300
+    assert result.segments == [{'start_ms': 1000, 'end_ms': 1800}]
+    assert result.trimmed_ms == 800 + 2 * VADConfig.pad_ms
+    assert len(result.audio) == result.trimmed_ms * SAMPLE_RATE // 1000 * 2
+
+
+def test_internal_pauses_are_compressed_and_counted():
+    """Long pauses shrink in the output but are reported at full length."""
+    pcm = _pcm(_speech(500), _silence(2000), _speech(500))
+    result = trim_silence(pcm)
+
+    assert len(result.segments) == 2
+    assert result.pauses_ms == [2000]
+    assert result.trimmed_ms < 1000 + 2000
+    stats = result.pause_stats()
+    assert stats['pause_count'] == 1
+    assert stats['max_pause_ms'] == 2000
+
+
+def test_streaming_chunks_match_single_buffer():
+    """Arbitrary chunk boundaries produce the same result as one buffer."""
+    pcm = _pcm(_silence(300), _speech(400), _silence(900), _speech(300), _silence(200))
+
+    vad = VoiceActivityDetector()
+    for i in range(0, len(pcm), 777):
+        vad.process(pcm[i:i + 777])
+    streamed = vad.finish()
+    whole = trim_silence(pcm)
+
+    assert streamed.audio == whole.audio
+    assert streamed.segments == whole.segments
+    assert streamed.pauses_ms == whole.pauses_ms
+
+
+def test_endpoint_event_fires_after_trailing_silence():
+    """Endpoint fires once, endpoint_silence_ms after the last speech frame."""
+    events = []
+    vad = VoiceActivityDetector(on_event=events.append)
+    vad.process(_pcm(_speech(400), _silence(1000)))
+
+    endpoints = [e for e in events if e.type == 'endpoint']
+    assert [e.type for e in events] == ['speech_start', 'speech_end', 'endpoint']
+    assert endpoints[0].timestamp_ms == 400 + VADConfig.endpoint_silence_ms
+
+
+def test_noise_and_silence_produce_no_speech():
+    """Silence and loud broadband noise are both rejected."""
+    noise = np.random.default_rng(1).normal(0, 0.2, SAMPLE_RATE)
+
+    assert not trim_silence(_pcm(_silence(1000))).has_speech
+    assert trim_silence(_pcm(noise)).audio == b''
+
+
+def test_long_pause_is_clamped_to_max_pause():
+    """A pause far longer than max_pause_ms keeps at most max_pause_ms of silence."""
+    for config in (VADConfig(), VADConfig(frame_ms=40, max_pause_ms=300, pad_ms=200)):
+        pcm = _pcm(_silence(1000), _speech(500), _silence(5000), _speech(500), _silence(1000))
+        result = trim_silence(pcm, config)
+
+        assert result.pauses_ms and result.pauses_ms[0] >= 4900
+        kept_silence = result.trimmed_ms - result.speech_ms - 2 * config.pad_ms
+        assert kept_silence <= config.max_pause_ms